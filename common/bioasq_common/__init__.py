@@ -0,0 +1 @@
+"""Data structures shared by data_acquisition and data_processing."""
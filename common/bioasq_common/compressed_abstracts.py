@@ -0,0 +1,123 @@
+"""
+File format of zstd-compressed abstracts, and reading them back.
+
+data_acquisition's ZstdFileStore writes the files; data_processing reads them
+with load_compressed_abstract. Both use the names and record layout defined
+here.
+
+Each abstract is one {pmid}.json.zst file holding a single zstd frame of
+compact JSON. A frame compressed with a dictionary names the dictionary in its
+header; the dictionary is saved as abstracts.zdict next to the records.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Union
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+ZSTD_SUFFIX = ".json.zst"
+ZSTD_DICTIONARY_NAME = "abstracts.zdict"
+# Largest possible zstd frame header, which holds the dictionary ID
+ZSTD_FRAME_HEADER_MAX_SIZE = 18
+
+
+def is_compressed_abstract(file_path: Union[str, Path]) -> bool:
+    """
+    Check whether a file holds a zstd-compressed abstract.
+
+    Args:
+        file_path: Path of the abstract file
+
+    Returns:
+        True if the file name ends with .json.zst
+    """
+    return str(file_path).endswith(ZSTD_SUFFIX)
+
+
+def compressed_abstract_id(file_path: Union[str, Path]) -> str:
+    """
+    Return the PubMed ID of a compressed abstract file.
+
+    Args:
+        file_path: Path of the abstract file
+
+    Returns:
+        The file name without the .json.zst suffix
+    """
+    return Path(file_path).name[: -len(ZSTD_SUFFIX)]
+
+
+def encode_compressed_record(abstract: Dict[str, Any]) -> bytes:
+    """Encode an abstract as compact JSON, before it is compressed."""
+    return json.dumps(abstract, separators=(",", ":")).encode("utf-8")
+
+
+def read_compressed_record(
+    f: IO[bytes],
+    decompressor_for: Callable[[int], "zstandard.ZstdDecompressor"],
+) -> Dict[str, Any]:
+    """
+    Decompress and parse a record, streaming it from an open file.
+
+    Args:
+        f: File positioned at the start of the record
+        decompressor_for: Function returning the decompressor for records
+            compressed with a dictionary ID (0 for none)
+
+    Returns:
+        The abstract data
+    """
+    # The frame header names the dictionary the record needs
+    header = f.read(ZSTD_FRAME_HEADER_MAX_SIZE)
+    dict_id = zstandard.get_frame_parameters(header).dict_id
+    f.seek(0)
+    with decompressor_for(dict_id).stream_reader(f) as reader:
+        return json.load(reader)
+
+
+def load_compressed_abstract(file_path: Union[str, Path]) -> Dict[str, Any]:
+    """
+    Decompress and parse a single abstract, streaming it from disk.
+
+    Records compressed with a dictionary are decompressed with the
+    abstracts.zdict file in the same directory.
+
+    Args:
+        file_path: Path of the .json.zst file
+
+    Returns:
+        The abstract data
+
+    Raises:
+        ImportError: If the zstandard package is not installed
+        ValueError: If the record needs a dictionary that is not available
+    """
+    if zstandard is None:
+        raise ImportError(
+            "Reading compressed abstracts requires the zstandard package "
+            "(install the 'zstd' extra)"
+        )
+    path = Path(file_path)
+    directory = str(path.parent.resolve())
+    with open(path, "rb") as f:
+        return read_compressed_record(
+            f, lambda dict_id: _decompressor(directory, dict_id)
+        )
+
+
+@lru_cache(maxsize=16)
+def _decompressor(directory: str, dict_id: int) -> "zstandard.ZstdDecompressor":
+    """Return a decompressor for records of a directory using a dictionary."""
+    if dict_id == 0:
+        return zstandard.ZstdDecompressor()
+    dictionary_path = Path(directory) / ZSTD_DICTIONARY_NAME
+    if dictionary_path.exists():
+        dictionary = zstandard.ZstdCompressionDict(dictionary_path.read_bytes())
+        if dictionary.dict_id() == dict_id:
+            return zstandard.ZstdDecompressor(dict_data=dictionary)
+    raise ValueError(f"Dictionary {dict_id} not found in {directory}")
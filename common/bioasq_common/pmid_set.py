@@ -0,0 +1,351 @@
+"""
+Compact set of PubMed IDs backed by a sorted array of unsigned 32-bit integers.
+
+data_acquisition writes .pmids files with this module and data_processing
+reads them.
+"""
+
+import bisect
+import heapq
+import itertools
+import operator
+import struct
+import sys
+import zlib
+from array import array
+from collections.abc import MutableSet
+from pathlib import Path
+from typing import AbstractSet, Any, Iterable, Iterator, Optional, Set, Union
+
+# File header: magic, format version and number of IDs
+HEADER = struct.Struct("<8sII")
+MAGIC = b"PMIDSET\0"
+FORMAT_VERSION = 1
+FILE_SUFFIX = ".pmids"
+
+PUBMED_URL = "http://www.ncbi.nlm.nih.gov/pubmed/{}"
+
+# Pending additions and removals are merged into the array once they exceed
+# this many entries or an eighth of the array
+_MIN_PENDING = 1024
+
+PMIDLike = Union[int, str]
+
+
+def _common_ids(pmids: Iterable[int], sorted_ids: "array[int]") -> Iterator[int]:
+    """
+    Yield the ascending IDs that a sorted array also holds.
+
+    Each binary search starts where the previous one ended, so the array is
+    walked once from front to back.
+
+    Args:
+        pmids: IDs in ascending order
+        sorted_ids: Sorted array to look them up in
+
+    Yields:
+        IDs found in the array
+    """
+    start, end = 0, len(sorted_ids)
+    for pmid in pmids:
+        start = bisect.bisect_left(sorted_ids, pmid, start)
+        if start == end:
+            return
+        if sorted_ids[start] == pmid:
+            yield pmid
+
+
+def _missing_ids(pmids: Iterable[int], sorted_ids: "array[int]") -> Iterator[int]:
+    """
+    Yield the ascending IDs that a sorted array does not hold.
+
+    Args:
+        pmids: IDs in ascending order
+        sorted_ids: Sorted array to look them up in
+
+    Yields:
+        IDs not found in the array
+    """
+    start, end = 0, len(sorted_ids)
+    pmids = iter(pmids)
+    for pmid in pmids:
+        start = bisect.bisect_left(sorted_ids, pmid, start)
+        if start == end:
+            yield pmid
+            # Nothing after the end of the array can be in it
+            yield from pmids
+            return
+        if sorted_ids[start] != pmid:
+            yield pmid
+
+
+def parse_pmid(value: PMIDLike) -> Optional[int]:
+    """
+    Convert a PubMed ID or URL to an integer.
+
+    Args:
+        value: An integer ID, a string ID, or a URL whose ID follows "pubmed/"
+
+    Returns:
+        The PubMed ID, or None if the value holds no ID
+    """
+    if isinstance(value, int):
+        return value if 0 <= value < 2**32 else None
+    if value.isdigit():
+        pmid = int(value)
+    else:
+        _, separator, tail = value.rpartition("pubmed/")
+        digits = "".join(itertools.takewhile(str.isdigit, tail))
+        if not separator or not digits:
+            return None
+        pmid = int(digits)
+    return pmid if pmid < 2**32 else None
+
+
+class PMIDSet(MutableSet):
+    """
+    Set of PubMed IDs stored in 4 bytes per ID.
+
+    IDs are kept in a sorted array, so membership is a binary search and union,
+    intersection and difference with another PMIDSet are linear merges of the
+    two arrays, which never hold all IDs as Python objects at once. Additions
+    and removals are buffered and merged into the array in bulk. Membership
+    tests and comparisons accept integer IDs, string IDs and PubMed URLs alike;
+    iteration yields integers (see ids() and urls()).
+    """
+
+    def __init__(self, values: Iterable[PMIDLike] = ()):
+        """
+        Create a set from PubMed IDs or URLs.
+
+        Args:
+            values: Integer IDs, string IDs or PubMed URLs
+
+        Raises:
+            ValueError: If a value holds no PubMed ID
+        """
+        unique = set(values)
+        try:
+            # Integer IDs are sorted and packed at C speed
+            self._ids = array("I", sorted(unique))
+        except (TypeError, OverflowError):
+            self._ids = array("I", sorted({self._require(value) for value in unique}))
+        self._added: Set[int] = set()
+        self._removed: Set[int] = set()
+
+    @classmethod
+    def _from_sorted(cls, ids: Iterable[int]) -> "PMIDSet":
+        """Create a set from sorted, unique integer IDs without re-sorting."""
+        pmid_set = cls()
+        pmid_set._ids = array("I", ids)
+        return pmid_set
+
+    @classmethod
+    def _from_iterable(cls, values: Iterable[PMIDLike]) -> "PMIDSet":
+        # Used by the MutableSet mixin methods
+        return cls(values)
+
+    @staticmethod
+    def _require(value: PMIDLike) -> int:
+        pmid = parse_pmid(value)
+        if pmid is None:
+            raise ValueError(f"Not a PubMed ID: {value!r}")
+        return pmid
+
+    def _compact(self) -> None:
+        """Merge the pending additions and removals into the array."""
+        if not self._added and not self._removed:
+            return
+        kept = itertools.filterfalse(self._removed.__contains__, self._ids)
+        self._ids = array("I", heapq.merge(kept, sorted(self._added)))
+        self._added.clear()
+        self._removed.clear()
+
+    def _maybe_compact(self) -> None:
+        pending = len(self._added) + len(self._removed)
+        if pending > max(_MIN_PENDING, len(self._ids) // 8):
+            self._compact()
+
+    def _in_array(self, pmid: int) -> bool:
+        index = bisect.bisect_left(self._ids, pmid)
+        return index < len(self._ids) and self._ids[index] == pmid
+
+    def __contains__(self, value: Any) -> bool:
+        if not isinstance(value, (int, str)):
+            return False
+        pmid = parse_pmid(value)
+        if pmid is None:
+            return False
+        if pmid in self._added:
+            return True
+        return pmid not in self._removed and self._in_array(pmid)
+
+    def __iter__(self) -> Iterator[int]:
+        self._compact()
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids) + len(self._added) - len(self._removed)
+
+    def __repr__(self) -> str:
+        return f"PMIDSet({len(self)} IDs)"
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, PMIDSet):
+            self._compact()
+            other._compact()
+            return self._ids == other._ids
+        if isinstance(other, AbstractSet):
+            return len(self) == len(other) and all(value in self for value in other)
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def add(self, value: PMIDLike) -> None:
+        """Add a PubMed ID or URL."""
+        pmid = self._require(value)
+        if pmid in self._removed:
+            self._removed.discard(pmid)
+        elif not self._in_array(pmid):
+            self._added.add(pmid)
+            self._maybe_compact()
+
+    def discard(self, value: PMIDLike) -> None:
+        """Remove a PubMed ID or URL if it is in the set."""
+        pmid = parse_pmid(value)
+        if pmid is None:
+            return
+        if pmid in self._added:
+            self._added.discard(pmid)
+        elif pmid not in self._removed and self._in_array(pmid):
+            self._removed.add(pmid)
+            self._maybe_compact()
+
+    def update(self, values: Iterable[PMIDLike]) -> None:
+        """Add many PubMed IDs or URLs in one merge."""
+        if not isinstance(values, PMIDSet):
+            values = PMIDSet(values)
+        if values:
+            self._ids = (self | values)._ids
+            self._added.clear()
+            self._removed.clear()
+
+    def clear(self) -> None:
+        """Remove all IDs."""
+        self._ids = array("I")
+        self._added.clear()
+        self._removed.clear()
+
+    def _coerce(self, other: Iterable[PMIDLike]) -> "PMIDSet":
+        other = other if isinstance(other, PMIDSet) else PMIDSet(other)
+        self._compact()
+        other._compact()
+        return other
+
+    def __or__(self, other: Iterable[PMIDLike]) -> "PMIDSet":  # type: ignore[override]
+        other = self._coerce(other)
+        merged = heapq.merge(self._ids, other._ids)
+        return self._from_sorted(pmid for pmid, _ in itertools.groupby(merged))
+
+    def __and__(self, other: Iterable[PMIDLike]) -> "PMIDSet":  # type: ignore[override]
+        other = self._coerce(other)
+        small, large = sorted((self, other), key=len)
+        return self._from_sorted(_common_ids(small._ids, large._ids))
+
+    def __sub__(self, other: Iterable[PMIDLike]) -> "PMIDSet":  # type: ignore[override]
+        other = self._coerce(other)
+        return self._from_sorted(_missing_ids(self._ids, other._ids))
+
+    __ror__ = __or__
+    __rand__ = __and__
+
+    def union(self, *others: Iterable[PMIDLike]) -> "PMIDSet":
+        """Return the IDs in this set or any of the others."""
+        result = self
+        for other in others:
+            result = result | other
+        return result
+
+    def intersection(self, *others: Iterable[PMIDLike]) -> "PMIDSet":
+        """Return the IDs in this set and all of the others."""
+        result = self
+        for other in others:
+            result = result & other
+        return result
+
+    def difference(self, *others: Iterable[PMIDLike]) -> "PMIDSet":
+        """Return the IDs in this set but in none of the others."""
+        result = self
+        for other in others:
+            result = result - other
+        return result
+
+    def ids(self) -> Iterator[str]:
+        """Iterate over the IDs as strings, in ascending order."""
+        return map(str, self)
+
+    def urls(self) -> Iterator[str]:
+        """Iterate over the PubMed URLs of the IDs, in ascending order."""
+        return map(PUBMED_URL.format, self)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """
+        Write the set to a binary file.
+
+        The IDs are stored as zlib-compressed little-endian gaps between
+        consecutive IDs, which takes one to two bytes per ID for dense sets.
+
+        Args:
+            path: Path of the file (conventionally ending in .pmids)
+        """
+        self._compact()
+        gaps = array(
+            "I", map(operator.sub, self._ids, itertools.chain((0,), self._ids))
+        )
+        if sys.byteorder == "big":  # pragma: no cover - platform dependent
+            gaps.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(gaps)))
+            f.write(zlib.compress(gaps.tobytes(), 6))
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "PMIDSet":
+        """
+        Read a set written by save().
+
+        Args:
+            path: Path of the file
+
+        Returns:
+            The set
+
+        Raises:
+            ValueError: If the file is not a PMID set file
+        """
+        with open(path, "rb") as f:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} is not a PMID set file")
+            magic, version, count = HEADER.unpack(header)
+            if magic != MAGIC or version != FORMAT_VERSION:
+                raise ValueError(f"{path} is not a PMID set file")
+            gaps = array("I")
+            gaps.frombytes(zlib.decompress(f.read()))
+        if sys.byteorder == "big":  # pragma: no cover - platform dependent
+            gaps.byteswap()
+        if len(gaps) != count:
+            raise ValueError(f"{path} is truncated: expected {count} IDs")
+        return cls._from_sorted(itertools.accumulate(gaps))
+
+    @classmethod
+    def from_urls(cls, urls: Iterable[str]) -> "PMIDSet":
+        """
+        Create a set from PubMed URLs, skipping URLs without an ID.
+
+        Args:
+            urls: PubMed URLs
+
+        Returns:
+            The set of their IDs
+        """
+        return cls(pmid for pmid in map(parse_pmid, urls) if pmid is not None)
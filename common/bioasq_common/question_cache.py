@@ -0,0 +1,250 @@
+"""
+Content-addressed cache of parsed BioASQ question files.
+
+A question file is parsed once into the fields the pipeline uses and stored
+under the SHA-256 digest of its content, so data_acquisition and
+data_processing load the same file in milliseconds and rebuild only when the
+file changes.
+"""
+
+import gc
+import hashlib
+import json
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+# Entry header: magic, format version and number of questions, followed by one
+# line of compact JSON per question. Entries hold only data, so loading one
+# cannot run code even if the cache directory is writable by others.
+HEADER = struct.Struct("<8sII")
+MAGIC = b"BQCACHE\0"
+# Bump when QUESTION_FIELDS or the payload changes
+FORMAT_VERSION = 2
+ENTRY_SUFFIX = ".questions"
+
+# Directory inside the data directory holding the cache
+QUESTION_CACHE_DIR = "question_cache"
+
+# Question fields kept in the cache; all others (e.g. triples, exact_answer)
+# are dropped
+QUESTION_FIELDS = ("id", "body", "type", "documents", "ideal_answer", "snippets")
+
+
+def file_digest(file_path: Union[str, Path]) -> str:
+    """
+    Return the SHA-256 digest of a file's content.
+
+    Args:
+        file_path: Path of the file
+
+    Returns:
+        Hex digest of the content
+    """
+    with open(file_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def parse_question_file(file_path: Union[str, Path]) -> List[Dict[str, Any]]:
+    """
+    Parse a BioASQ file into its questions, keeping only QUESTION_FIELDS.
+
+    With ijson installed, questions are decoded one at a time, so the fields
+    that are dropped are never held for the whole file at once.
+
+    Args:
+        file_path: Path of the BioASQ file
+
+    Returns:
+        The questions in file order
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not valid JSON
+    """
+    if ijson is None:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return [_keep_fields(question) for question in data.get("questions", [])]
+
+    with open(file_path, "rb") as f:
+        try:
+            # use_float keeps numbers plain floats instead of Decimals
+            questions = ijson.items(f, "questions.item", use_float=True)
+            return [_keep_fields(question) for question in questions]
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON in {file_path}: {e}") from e
+
+
+def _keep_fields(question: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: question[key] for key in QUESTION_FIELDS if key in question}
+
+
+class QuestionCache:
+    """
+    Cache of parsed BioASQ question files in a directory.
+
+    Entries are named after the digest of the source file's content. To avoid
+    hashing large files on every load, the size, modification time and digest
+    of each source file are remembered in a small stat file; a source whose
+    size and modification time are unchanged is not hashed again.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path]):
+        """
+        Initialize the cache.
+
+        Args:
+            cache_dir: Directory of the cache, created when needed
+        """
+        self.cache_dir = Path(cache_dir)
+
+    def entry_path(self, digest: str) -> Path:
+        """Return the path of the entry for a content digest."""
+        return self.cache_dir / f"{digest}{ENTRY_SUFFIX}"
+
+    def _stat_path(self, file_path: Path) -> Path:
+        key = hashlib.sha256(str(file_path.resolve()).encode("utf-8")).hexdigest()
+        return self.cache_dir / "sources" / f"{key}.json"
+
+    def digest(self, file_path: Union[str, Path]) -> str:
+        """
+        Return the content digest of a source file, hashing it only if it changed.
+
+        Args:
+            file_path: Path of the source file
+
+        Returns:
+            Hex digest of the content
+        """
+        file_path = Path(file_path)
+        stat = file_path.stat()
+        stat_path = self._stat_path(file_path)
+        try:
+            with open(stat_path, "r", encoding="utf-8") as f:
+                known = json.load(f)
+            if known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                return known["digest"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        digest = file_digest(file_path)
+        stat_path.parent.mkdir(parents=True, exist_ok=True)
+        _write_atomic(
+            stat_path,
+            json.dumps(
+                {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "digest": digest,
+                }
+            ).encode("utf-8"),
+        )
+        return digest
+
+    def _read_entry(self, digest: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            with open(self.entry_path(digest), "rb") as f:
+                header = f.read(HEADER.size)
+                if len(header) < HEADER.size:
+                    return None
+                magic, version, count = HEADER.unpack(header)
+                if (magic, version) != (MAGIC, FORMAT_VERSION):
+                    return None
+                questions = _load_without_gc(f)
+            if len(questions) != count:
+                raise ValueError(f"expected {count} questions, found {len(questions)}")
+            return questions
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable question cache entry {digest}: {e}")
+            return None
+
+    def load(self, file_path: Union[str, Path]) -> List[Dict[str, Any]]:
+        """
+        Return the questions of a BioASQ file, parsing it only on a cache miss.
+
+        Args:
+            file_path: Path of the BioASQ file
+
+        Returns:
+            The questions in file order, with only QUESTION_FIELDS
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not valid JSON
+        """
+        digest = self.digest(file_path)
+        questions = self._read_entry(digest)
+        if questions is not None:
+            logger.debug(f"Loaded {file_path} from the question cache")
+            return questions
+
+        questions = parse_question_file(file_path)
+        payload = HEADER.pack(MAGIC, FORMAT_VERSION, len(questions)) + b"".join(
+            json.dumps(question, separators=(",", ":")).encode("utf-8") + b"\n"
+            for question in questions
+        )
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _write_atomic(self.entry_path(digest), payload)
+        logger.info(f"Cached {len(questions)} questions of {file_path}")
+        return questions
+
+
+def load_questions(
+    file_path: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Return the questions of a BioASQ file, through the cache if one is given.
+
+    Args:
+        file_path: Path of the BioASQ file
+        cache_dir: Directory of the question cache, or None to parse the file
+
+    Returns:
+        The questions in file order, with only QUESTION_FIELDS
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not valid JSON
+    """
+    if cache_dir is None:
+        return parse_question_file(file_path)
+    return QuestionCache(cache_dir).load(file_path)
+
+
+def _load_without_gc(f: BinaryIO) -> List[Dict[str, Any]]:
+    """
+    Decode the JSON lines of an entry with the garbage collector paused.
+
+    Decoding creates many containers and no cycles, and every collection the
+    new objects trigger would scan the whole heap again.
+
+    Raises:
+        ValueError: If a line is not valid JSON
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return [json.loads(line) for line in f]
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Write a file under a temporary name and rename it into place."""
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
@@ -0,0 +1,166 @@
+"""
+File format of the packed abstract segment store, and a reader for it.
+
+data_acquisition's SegmentStore writes the store; data_processing reads it with
+SegmentStoreReader. Both use the constants and index parsing defined here.
+
+A store holds, for each writer, numbered segment files of records and one
+binary index of fixed-size (PMID, segment, offset, length) entries. Each record
+is one line of compact JSON.
+"""
+
+import json
+import re
+import struct
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, Set, Tuple, Union
+
+# Index entries: PMID, segment number, offset and length of the record
+INDEX_ENTRY = struct.Struct("<QIQI")
+SEGMENT_NAME = "segment-{writer_id}-{number:06d}.seg"
+INDEX_NAME = "index-{writer_id}.idx"
+SEGMENT_PATTERN = re.compile(r"^segment-(?P<writer_id>.+)-(?P<number>\d{6})\.seg$")
+INDEX_PATTERN = re.compile(r"^index-(?P<writer_id>.+)\.idx$")
+
+# Writer ID, segment number, offset and length of a record
+RecordLocation = Tuple[str, int, int, int]
+
+
+def is_segment_store(directory: Union[str, Path]) -> bool:
+    """
+    Check whether a directory holds a segment store.
+
+    Args:
+        directory: Directory to check
+
+    Returns:
+        True if the directory contains at least one segment store index
+    """
+    return any(Path(directory).glob("index-*.idx"))
+
+
+def segment_path(directory: Union[str, Path], writer_id: str, number: int) -> Path:
+    """
+    Return the path of a segment file.
+
+    Args:
+        directory: Directory of the store
+        writer_id: Writer the segment belongs to
+        number: Segment number
+
+    Returns:
+        Path of the segment
+    """
+    return Path(directory) / SEGMENT_NAME.format(writer_id=writer_id, number=number)
+
+
+def read_segment_indexes(directory: Union[str, Path]) -> Dict[str, RecordLocation]:
+    """
+    Read the indexes of all writers of a store.
+
+    Indexes are read in name order and entries in file order, so a later entry
+    for a PMID replaces an earlier one.
+
+    Args:
+        directory: Directory of the store
+
+    Returns:
+        Location of every record, by PubMed ID
+    """
+    locations: Dict[str, RecordLocation] = {}
+    for path in sorted(Path(directory).glob("index-*.idx")):
+        match = INDEX_PATTERN.match(path.name)
+        if not match:
+            continue
+        writer_id = match.group("writer_id")
+        data = path.read_bytes()
+        # Ignore a trailing entry cut short by a crash
+        usable = len(data) - len(data) % INDEX_ENTRY.size
+        for pmid, number, offset, length in INDEX_ENTRY.iter_unpack(data[:usable]):
+            locations[str(pmid)] = (writer_id, number, offset, length)
+    return locations
+
+
+def encode_segment_record(abstract: Dict[str, Any]) -> bytes:
+    """Encode a record as appended to a segment (one line of compact JSON)."""
+    return json.dumps(abstract, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def decode_segment_record(data: bytes) -> Dict[str, Any]:
+    """Decode a record read back from a segment."""
+    return json.loads(data)
+
+
+class SegmentStoreReader:
+    """Reader for the abstracts of a segment store, by ID or sequentially."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Open a segment store for reading.
+
+        Args:
+            directory: Directory holding the segment and index files
+        """
+        self.directory = Path(directory)
+        self._locations = read_segment_indexes(self.directory)
+        self._handles: Dict[Tuple[str, int], IO[bytes]] = {}
+
+    def __enter__(self) -> "SegmentStoreReader":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def ids(self) -> Set[str]:
+        """Return the PubMed IDs of all abstracts in the store."""
+        return set(self._locations)
+
+    def get(self, pubmed_id: str) -> Dict[str, Any]:
+        """
+        Read a single abstract.
+
+        Args:
+            pubmed_id: The PubMed ID of the abstract
+
+        Returns:
+            The abstract data
+
+        Raises:
+            KeyError: If the store has no abstract for the ID
+        """
+        writer_id, number, offset, length = self._locations[pubmed_id]
+        f = self._handle(writer_id, number)
+        f.seek(offset)
+        return decode_segment_record(f.read(length))
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Iterate over all abstracts, reading each segment front to back.
+
+        Yields:
+            Tuples of (PubMed ID, abstract data)
+        """
+        ordered = sorted(self._locations.items(), key=lambda item: item[1])
+        for pubmed_id, (writer_id, number, offset, length) in ordered:
+            f = self._handle(writer_id, number)
+            if f.tell() != offset:
+                f.seek(offset)
+            yield pubmed_id, decode_segment_record(f.read(length))
+
+    def close(self) -> None:
+        """Close all open segment files."""
+        for f in self._handles.values():
+            f.close()
+        self._handles.clear()
+
+    def _handle(self, writer_id: str, number: int) -> IO[bytes]:
+        """Return a cached read handle for a segment."""
+        key = (writer_id, number)
+        if key not in self._handles:
+            self._handles[key] = open(
+                segment_path(self.directory, writer_id, number), "rb"
+            )
+        return self._handles[key]
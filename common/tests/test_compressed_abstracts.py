@@ -0,0 +1,57 @@
+"""Tests for the zstd-compressed abstract format."""
+
+import pytest
+
+from bioasq_common.compressed_abstracts import (
+    ZSTD_DICTIONARY_NAME,
+    compressed_abstract_id,
+    encode_compressed_record,
+    is_compressed_abstract,
+    load_compressed_abstract,
+)
+
+zstandard = pytest.importorskip("zstandard")
+
+
+def sample_records():
+    """Return enough distinct records to train a dictionary on."""
+    return [
+        encode_compressed_record(
+            {"id": str(i), "title": f"Abstract {i} on topic {i % 7}", "year": i % 25}
+        )
+        for i in range(300)
+    ]
+
+
+def test_file_names():
+    """Test that compressed abstract files are recognized by their suffix."""
+    assert is_compressed_abstract("abstracts_zstd/123.json.zst")
+    assert not is_compressed_abstract("abstracts/123.json")
+    assert compressed_abstract_id("abstracts_zstd/123.json.zst") == "123"
+
+
+def test_load_with_and_without_dictionary(tmp_path):
+    """Test that records with and without the store's dictionary are read."""
+    dictionary = zstandard.train_dictionary(16384, sample_records())
+    (tmp_path / ZSTD_DICTIONARY_NAME).write_bytes(dictionary.as_bytes())
+    abstract = {"id": "1", "title": "Abstract 1 on topic 1"}
+    record = encode_compressed_record(abstract)
+    (tmp_path / "1.json.zst").write_bytes(zstandard.ZstdCompressor().compress(record))
+    (tmp_path / "2.json.zst").write_bytes(
+        zstandard.ZstdCompressor(dict_data=dictionary).compress(record)
+    )
+
+    assert load_compressed_abstract(tmp_path / "1.json.zst") == abstract
+    assert load_compressed_abstract(tmp_path / "2.json.zst") == abstract
+
+
+def test_missing_dictionary_raises(tmp_path):
+    """Test that a record whose dictionary is missing cannot be read."""
+    dictionary = zstandard.train_dictionary(16384, sample_records())
+    record = encode_compressed_record({"id": "1"})
+    (tmp_path / "1.json.zst").write_bytes(
+        zstandard.ZstdCompressor(dict_data=dictionary).compress(record)
+    )
+
+    with pytest.raises(ValueError):
+        load_compressed_abstract(tmp_path / "1.json.zst")
@@ -0,0 +1,147 @@
+"""Tests for the compact PubMed ID set."""
+
+import pytest
+
+from bioasq_common.pmid_set import HEADER, MAGIC, PMIDSet, parse_pmid
+
+URL = "http://www.ncbi.nlm.nih.gov/pubmed/{}"
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (123, 123),
+        ("123", 123),
+        (URL.format(123), 123),
+        ("https://pubmed.ncbi.nlm.nih.gov/pubmed/456?report=abstract", 456),
+        ("http://example.com/no-id", None),
+        ("http://www.ncbi.nlm.nih.gov/pubmed/", None),
+        (-1, None),
+        (2**32, None),
+    ],
+)
+def test_parse_pmid(value, expected):
+    """Test that integer IDs, string IDs and URLs are parsed alike."""
+    assert parse_pmid(value) == expected
+
+
+def test_values_are_normalized():
+    """Test that IDs given as integers, strings and URLs are one set."""
+    pmids = PMIDSet([3, "1", URL.format(2), URL.format(3)])
+
+    assert len(pmids) == 3
+    assert list(pmids) == [1, 2, 3]
+    assert list(pmids.ids()) == ["1", "2", "3"]
+    assert list(pmids.urls()) == [URL.format(1), URL.format(2), URL.format(3)]
+    assert 2 in pmids and "2" in pmids and URL.format(2) in pmids
+    assert 4 not in pmids and "not an id" not in pmids and None not in pmids
+    assert pmids == {URL.format(1), URL.format(2), URL.format(3)}
+    assert pmids == {"1", "2", "3"}
+    assert pmids != {1, 2}
+
+    with pytest.raises(ValueError):
+        PMIDSet(["http://example.com/no-id"])
+
+
+def test_add_and_discard_are_buffered():
+    """Test that buffered changes are visible before they are merged."""
+    pmids = PMIDSet(range(0, 100, 2))
+
+    pmids.add(URL.format(1))
+    pmids.add(2)
+    pmids.discard("4")
+    pmids.discard(5)
+    pmids.discard("not an id")
+    pmids.add(4)
+
+    assert len(pmids) == 51
+    assert 1 in pmids and 4 in pmids
+    assert list(pmids)[:4] == [0, 1, 2, 4]
+
+    # Enough pending changes are merged into the array
+    big = PMIDSet()
+    for pmid in range(5000, 0, -1):
+        big.add(pmid)
+    for pmid in range(1, 5001, 2):
+        big.discard(pmid)
+    assert len(big) == 2500
+    assert list(big) == list(range(2, 5001, 2))
+
+
+def test_set_operations():
+    """Test union, intersection and difference against sets and PMIDSets."""
+    a = PMIDSet([1, 2, 3, 4])
+    b = PMIDSet([3, 4, 5])
+
+    assert list(a | b) == [1, 2, 3, 4, 5]
+    assert list(a & b) == [3, 4]
+    assert list(a - b) == [1, 2]
+    assert list(a - {URL.format(1)}) == [2, 3, 4]
+    assert list(a.union(b, ["9"])) == [1, 2, 3, 4, 5, 9]
+    assert list(a.intersection(b, {4})) == [4]
+    assert list(a.difference(b, {"1"})) == [2]
+
+    a.add(7)
+    b.discard(5)
+    assert list(a | b) == [1, 2, 3, 4, 7]
+
+    a.update([URL.format(8), 1])
+    assert list(a) == [1, 2, 3, 4, 7, 8]
+    a.clear()
+    assert not a
+
+
+def test_set_operations_on_large_sets():
+    """Test that merging large arrays matches the results of Python sets."""
+    evens = range(0, 400_000, 2)
+    thirds = range(0, 600_000, 3)
+    a = PMIDSet._from_sorted(evens)
+    b = PMIDSet._from_sorted(thirds)
+
+    union = a | b
+    intersection = a & b
+    difference = a - b
+
+    assert list(union) == sorted(set(evens) | set(thirds))
+    assert list(intersection) == list(range(0, 400_000, 6))
+    assert list(difference) == sorted(set(evens) - set(thirds))
+    assert list(b & PMIDSet([3, 6, 7, 599_997, 600_000])) == [3, 6, 599_997]
+    assert union._ids.typecode == "I"
+
+
+def test_save_and_load(tmp_path):
+    """Test that a saved set loads back unchanged and stays small."""
+    pmids = PMIDSet(range(10_000_000, 10_100_000, 3))
+    pmids.add(2**32 - 1)
+    path = tmp_path / "ids.pmids"
+
+    pmids.save(path)
+
+    assert PMIDSet.load(path) == pmids
+    assert path.stat().st_size < len(pmids) // 4
+
+    empty_path = tmp_path / "empty.pmids"
+    PMIDSet().save(empty_path)
+    assert len(PMIDSet.load(empty_path)) == 0
+
+
+def test_load_rejects_other_files(tmp_path):
+    """Test that files not written by save raise ValueError."""
+    not_a_set = tmp_path / "urls.txt"
+    not_a_set.write_text(URL.format(1))
+    with pytest.raises(ValueError, match="not a PMID set file"):
+        PMIDSet.load(not_a_set)
+
+    truncated = tmp_path / "truncated.pmids"
+    PMIDSet([1, 2, 3]).save(truncated)
+    data = truncated.read_bytes()
+    truncated.write_bytes(HEADER.pack(MAGIC, 1, 4) + data[HEADER.size :])
+    with pytest.raises(ValueError, match="truncated"):
+        PMIDSet.load(truncated)
+
+
+def test_from_urls_skips_urls_without_id():
+    """Test that from_urls ignores URLs that hold no PubMed ID."""
+    pmids = PMIDSet.from_urls([URL.format(5), "http://example.com/", URL.format(5)])
+
+    assert list(pmids) == [5]
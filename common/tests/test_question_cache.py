@@ -0,0 +1,139 @@
+"""Tests for the content-addressed question cache."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from bioasq_common import question_cache
+from bioasq_common.question_cache import (
+    ENTRY_SUFFIX,
+    QuestionCache,
+    file_digest,
+    load_questions,
+)
+
+
+@pytest.fixture
+def question_file(tmp_path):
+    """Write a BioASQ file with fields the cache keeps and drops."""
+    path = tmp_path / "training.json"
+    data = {
+        "questions": [
+            {
+                "id": "q1",
+                "body": "What is X?",
+                "type": "factoid",
+                "documents": ["http://www.ncbi.nlm.nih.gov/pubmed/1"],
+                "ideal_answer": ["X is Y."],
+                "exact_answer": [["Y"]],
+                "snippets": [{"text": "X is Y", "offsetInBeginSection": 0}],
+                "triples": [{"s": "X", "p": "is", "o": "Y"}],
+            },
+            {"id": "q2", "body": "No documents?", "type": "summary"},
+        ]
+    }
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_load_keeps_only_question_fields(question_file, tmp_path):
+    """Test that parsed questions hold the cached fields in file order."""
+    questions = load_questions(question_file, tmp_path / "cache")
+
+    assert [question["id"] for question in questions] == ["q1", "q2"]
+    assert set(questions[0]) == set(question_cache.QUESTION_FIELDS)
+    assert questions[0]["snippets"] == [{"text": "X is Y", "offsetInBeginSection": 0}]
+    assert questions[1] == {"id": "q2", "body": "No documents?", "type": "summary"}
+    assert load_questions(question_file) == questions
+
+
+def test_second_load_is_served_from_the_cache(question_file, tmp_path):
+    """Test that an unchanged file is parsed and hashed only once."""
+    cache = QuestionCache(tmp_path / "cache")
+    first = cache.load(question_file)
+    assert cache.entry_path(file_digest(question_file)).exists()
+
+    with (
+        patch.object(question_cache, "parse_question_file") as mock_parse,
+        patch.object(question_cache, "file_digest") as mock_digest,
+    ):
+        second = QuestionCache(tmp_path / "cache").load(question_file)
+
+    mock_parse.assert_not_called()
+    mock_digest.assert_not_called()
+    assert second == first
+
+
+def test_touched_file_is_rehashed_but_not_reparsed(question_file, tmp_path):
+    """Test that a new modification time with the same content keeps the entry."""
+    cache = QuestionCache(tmp_path / "cache")
+    cache.load(question_file)
+    stat = question_file.stat()
+    os.utime(question_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    with patch.object(question_cache, "parse_question_file") as mock_parse:
+        cache.load(question_file)
+
+    mock_parse.assert_not_called()
+
+
+def test_changed_file_is_parsed_again(question_file, tmp_path):
+    """Test that changing the content rebuilds the entry under a new digest."""
+    cache = QuestionCache(tmp_path / "cache")
+    cache.load(question_file)
+    question_file.write_text(json.dumps({"questions": [{"id": "q3"}]}))
+
+    assert cache.load(question_file) == [{"id": "q3"}]
+    assert len(list(cache.cache_dir.glob(f"*{ENTRY_SUFFIX}"))) == 2
+
+
+def test_corrupt_entry_is_rebuilt(question_file, tmp_path):
+    """Test that an unreadable or foreign entry is replaced by a parse."""
+    cache = QuestionCache(tmp_path / "cache")
+    expected = cache.load(question_file)
+    entry = cache.entry_path(file_digest(question_file))
+
+    data = entry.read_bytes()
+    # The last cut ends on a line boundary, so only the question count shows it
+    last_line = data.rindex(b"\n", 0, len(data) - 1) + 1
+    for content in (b"", b"not a cache entry", data[:20], data[:last_line]):
+        entry.write_bytes(content)
+        assert cache.load(question_file) == expected
+
+
+def test_entries_are_json_lines(question_file, tmp_path):
+    """Test that an entry is the header followed by one JSON line per question."""
+    cache = QuestionCache(tmp_path / "cache")
+    expected = cache.load(question_file)
+    data = cache.entry_path(file_digest(question_file)).read_bytes()
+
+    header = question_cache.HEADER.unpack(data[: question_cache.HEADER.size])
+    assert header == (question_cache.MAGIC, question_cache.FORMAT_VERSION, 2)
+    lines = data[question_cache.HEADER.size :].splitlines()
+    assert [json.loads(line) for line in lines] == expected
+
+
+def test_entry_of_another_version_is_rebuilt(question_file, tmp_path):
+    """Test that an entry written by an older format version is not decoded."""
+    cache = QuestionCache(tmp_path / "cache")
+    expected = cache.load(question_file)
+    entry = cache.entry_path(file_digest(question_file))
+    entry.write_bytes(
+        question_cache.HEADER.pack(question_cache.MAGIC, 1, 2) + b"\x80\x05junk"
+    )
+
+    assert cache.load(question_file) == expected
+    assert entry.read_bytes()[question_cache.HEADER.size :].startswith(b"{")
+
+
+def test_invalid_json_raises_value_error(tmp_path):
+    """Test that a broken file raises ValueError and leaves no entry."""
+    path = tmp_path / "broken.json"
+    path.write_text('{"questions": [')
+    cache = QuestionCache(tmp_path / "cache")
+
+    with pytest.raises(ValueError):
+        cache.load(path)
+    assert not list(cache.cache_dir.glob(f"*{ENTRY_SUFFIX}"))
@@ -0,0 +1,61 @@
+"""Tests for the segment store format and reader."""
+
+from bioasq_common.segment_store import (
+    INDEX_ENTRY,
+    INDEX_NAME,
+    SegmentStoreReader,
+    encode_segment_record,
+    is_segment_store,
+    read_segment_indexes,
+    segment_path,
+)
+
+
+def write_segment(directory, writer_id, number, records):
+    """Write one segment of records and append their index entries."""
+    segment = b""
+    index = b""
+    for pubmed_id, abstract in records:
+        record = encode_segment_record(abstract)
+        index += INDEX_ENTRY.pack(int(pubmed_id), number, len(segment), len(record))
+        segment += record
+    segment_path(directory, writer_id, number).write_bytes(segment)
+    with open(directory / INDEX_NAME.format(writer_id=writer_id), "ab") as f:
+        f.write(index)
+
+
+def test_reader_reads_by_id_and_in_storage_order(tmp_path):
+    """Test random access and sequential reads across writers and segments."""
+    write_segment(tmp_path, "a", 1, [("3", {"title": "Three"}), ("1", {"title": "One"})])
+    write_segment(tmp_path, "a", 2, [("2", {"title": "Two"})])
+    write_segment(tmp_path, "b", 1, [("4", {"title": "Four"})])
+
+    assert is_segment_store(tmp_path)
+    with SegmentStoreReader(tmp_path) as reader:
+        assert len(reader) == 4
+        assert reader.ids() == {"1", "2", "3", "4"}
+        assert reader.get("2") == {"title": "Two"}
+        assert [pubmed_id for pubmed_id, _ in reader.iter_records()] == [
+            "3",
+            "1",
+            "2",
+            "4",
+        ]
+
+
+def test_later_index_entries_replace_earlier_ones(tmp_path):
+    """Test that the last entry for a PMID wins and a torn entry is ignored."""
+    write_segment(tmp_path, "main", 1, [("1", {"title": "Old"})])
+    write_segment(tmp_path, "main", 2, [("1", {"title": "New"})])
+    with open(tmp_path / INDEX_NAME.format(writer_id="main"), "ab") as f:
+        f.write(b"\x01\x02")
+
+    assert read_segment_indexes(tmp_path)["1"][1] == 2
+    with SegmentStoreReader(tmp_path) as reader:
+        assert reader.get("1") == {"title": "New"}
+
+
+def test_empty_directory_is_not_a_store(tmp_path):
+    """Test that a directory without indexes is not a segment store."""
+    assert not is_segment_store(tmp_path)
+    assert read_segment_indexes(tmp_path) == {}
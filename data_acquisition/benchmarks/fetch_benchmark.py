@@ -0,0 +1,498 @@
+#!/usr/bin/env python
+"""
+Measure the throughput of DataFetcher.run and retry_failed_urls.
+
+Both stages run against an in-process fake PubMed client with a configurable
+latency distribution and error profile, so the numbers reflect the fetcher's
+own scheduling rather than the network. Run from the data_acquisition
+directory:
+
+    uv run python -m benchmarks.fetch_benchmark --urls 2000 --rate-limit 10 \\
+        --concurrent-requests 5 10 20 --latency lognormal:0.3:0.6 --error-rate 0.02
+
+Every combination of the swept parameters runs in a fresh process, so that the
+reported peak RSS belongs to that run alone. The results are written as JSON
+together with the git commit; pass an earlier file as --baseline to print the
+change against it.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import logging
+import multiprocessing
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+from unittest.mock import patch
+
+from src.clients.batching_pubmed_client import BatchingPubMedClient
+from src.clients.pubmed_client import (
+    PubMedClientError,
+    PubMedRateLimitError,
+    PubMedTimeoutError,
+)
+from src.data_fetcher import DataFetcher
+from src.eutils_simulator import LatencyDistribution, synthetic_corpus
+from src.retry_failed import retry_failed_urls
+
+# The fake client's latency must not be counted as fetcher sleep time
+_sleep = asyncio.sleep
+
+
+@dataclass
+class ClientProfile:
+    """
+    Latency and error profile of the fake client.
+
+    Attributes:
+        latency: Specification of the per-request latency distribution, as
+            accepted by LatencyDistribution.parse
+        throttle_rate: Probability of a rate limit error (HTTP 429)
+        retry_after: Retry-After seconds of rate limit errors (None to omit)
+        error_rate: Probability of a server error (HTTP 503)
+        timeout_rate: Probability of a timeout
+        timeout: Seconds a timed out request takes
+    """
+
+    latency: str = "lognormal:0.2:0.5"
+    throttle_rate: float = 0.0
+    retry_after: Optional[float] = 1.0
+    error_rate: float = 0.0
+    timeout_rate: float = 0.0
+    timeout: float = 5.0
+
+
+@dataclass
+class StageMetrics:
+    """Measurements of one benchmark stage."""
+
+    latencies: List[float] = field(default_factory=list)
+    outcomes: Counter = field(default_factory=Counter)
+    rate_limit_wait: float = 0.0
+    backoff_sleep: float = 0.0
+
+    def summary(self, wall_seconds: float, rate_limit: float) -> Dict[str, Any]:
+        """
+        Summarize the stage.
+
+        Args:
+            wall_seconds: Duration of the stage
+            rate_limit: Configured requests per second
+
+        Returns:
+            Request rate, latency percentiles and time split of the stage
+        """
+        requests = len(self.latencies)
+        in_flight = sum(self.latencies)
+        latencies = sorted(self.latencies)
+        achieved = requests / wall_seconds if wall_seconds else 0.0
+        return {
+            "wall_seconds": wall_seconds,
+            "requests": requests,
+            "requests_per_sec": achieved,
+            "rate_limit_utilization": achieved / rate_limit if rate_limit else None,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "latency_p99": percentile(latencies, 99),
+            "in_flight_seconds": in_flight,
+            "rate_limit_wait_seconds": self.rate_limit_wait,
+            "backoff_sleep_seconds": self.backoff_sleep,
+            "mean_concurrency": in_flight / wall_seconds if wall_seconds else 0.0,
+            "outcomes": dict(self.outcomes),
+        }
+
+
+def percentile(sorted_values: List[float], q: float) -> Optional[float]:
+    """Return the nearest-rank percentile of sorted values, or None if empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class FakePubMedClient(BatchingPubMedClient):
+    """
+    In-process PubMed client returning synthetic abstracts after a random delay.
+
+    Batches are bisected on errors like the real clients. Every request is
+    recorded in ``metrics``, which can be swapped between stages.
+    """
+
+    def __init__(
+        self,
+        corpus: Dict[str, Dict[str, Any]],
+        profile: ClientProfile,
+        efetch_batch_size: int = 200,
+        seed: int = 0,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.corpus = corpus
+        self.profile = profile
+        self.efetch_batch_size = efetch_batch_size
+        self.metrics = StageMetrics()
+        self._latency = LatencyDistribution.parse(profile.latency)
+        self._rng = random.Random(seed)
+
+    async def get_abstract_by_id(self, pubmed_id: str) -> Dict[str, Any]:
+        abstracts = await self._request([pubmed_id])
+        if not abstracts:
+            raise PubMedClientError(f"No record found for ID: {pubmed_id}")
+        return abstracts[0]
+
+    async def _fetch_batch(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        return await self._request(pubmed_ids)
+
+    async def _request(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """Simulate one EFetch request with the latency and faults of the profile."""
+        profile = self.profile
+        start = time.perf_counter()
+        roll = self._rng.random()
+        try:
+            if roll < profile.timeout_rate:
+                await _sleep(profile.timeout)
+                self.metrics.outcomes["timeout"] += 1
+                raise PubMedTimeoutError("Simulated timeout")
+            await _sleep(self._latency.sample(self._rng))
+            roll -= profile.timeout_rate
+            if roll < profile.throttle_rate:
+                self.metrics.outcomes["429"] += 1
+                raise PubMedRateLimitError(
+                    "Simulated rate limit",
+                    status_code=429,
+                    retry_after=profile.retry_after,
+                )
+            roll -= profile.throttle_rate
+            if roll < profile.error_rate:
+                self.metrics.outcomes["503"] += 1
+                raise PubMedClientError("Simulated server error", status_code=503)
+            self.metrics.outcomes["200"] += 1
+            return [
+                self.corpus[pubmed_id]
+                for pubmed_id in pubmed_ids
+                if pubmed_id in self.corpus
+            ]
+        finally:
+            self.metrics.latencies.append(time.perf_counter() - start)
+
+
+class StaticURLCollector:
+    """URL collector returning a fixed set of URLs."""
+
+    def __init__(self, urls: Set[str]):
+        self.urls = urls
+
+    def collect_urls(self) -> Set[str]:
+        return set(self.urls)
+
+
+@contextlib.contextmanager
+def instrument(client: FakePubMedClient) -> Iterator[None]:
+    """Time rate limit waits and backoff sleeps of the fetcher into client.metrics."""
+    wait_for_rate_limit = DataFetcher._wait_for_rate_limit
+
+    async def timed_wait(fetcher: DataFetcher) -> None:
+        start = time.perf_counter()
+        await wait_for_rate_limit(fetcher)
+        client.metrics.rate_limit_wait += time.perf_counter() - start
+
+    async def timed_sleep(delay: float, *args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        result = await _sleep(delay, *args, **kwargs)
+        client.metrics.backoff_sleep += time.perf_counter() - start
+        return result
+
+    # The rate limiter keeps its own reference to asyncio.sleep, so only
+    # the fetcher's retry backoff goes through timed_sleep
+    with (
+        patch.object(DataFetcher, "_wait_for_rate_limit", timed_wait),
+        patch("asyncio.sleep", timed_sleep),
+    ):
+        yield
+
+
+def peak_rss_bytes() -> int:
+    """Return the peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+async def benchmark_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run DataFetcher.run and then retry_failed_urls on the failures.
+
+    Args:
+        scenario: Benchmark parameters, see main
+
+    Returns:
+        The parameters, a summary per stage and the peak RSS
+    """
+    corpus = synthetic_corpus(scenario["urls"])
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{pubmed_id}" for pubmed_id in corpus}
+    client = FakePubMedClient(
+        corpus,
+        ClientProfile(**scenario["profile"]),
+        efetch_batch_size=max(1, scenario["ids_per_request"]),
+        seed=scenario["seed"],
+    )
+    results: Dict[str, Any] = {"scenario": scenario}
+
+    with tempfile.TemporaryDirectory(prefix="fetch-benchmark-") as data_dir:
+        with instrument(client), contextlib.redirect_stdout(io.StringIO()):
+            fetcher = DataFetcher(
+                client,
+                data_dir=data_dir,
+                batch_size=scenario["batch_size"],
+                rate_limit_per_sec=scenario["rate_limit"],
+                burst_size=scenario["burst_size"],
+                concurrent_requests=scenario["concurrent_requests"],
+                ids_per_request=scenario["ids_per_request"],
+                max_retries=scenario["max_retries"],
+                retry_delay=scenario["retry_delay"],
+                adaptive=scenario["adaptive"],
+                storage_format=scenario["storage_format"],
+            )
+            fetcher.url_collector = StaticURLCollector(urls)
+            start = time.perf_counter()
+            summary = await fetcher.run()
+            fetcher.close()
+            results["run"] = client.metrics.summary(
+                time.perf_counter() - start, scenario["rate_limit"]
+            )
+            results["run"]["fetched"] = summary["successful_fetches"] if summary else 0
+
+            client.metrics = StageMetrics()
+            start = time.perf_counter()
+            retried = await retry_failed_urls(
+                email="benchmark@example.com",
+                data_dir=data_dir,
+                rate_limit=scenario["rate_limit"],
+                max_retries=scenario["max_retries"],
+                retry_delay=scenario["retry_delay"],
+                pubmed_client=client,
+            )
+            results["retry"] = client.metrics.summary(
+                time.perf_counter() - start, scenario["rate_limit"]
+            )
+            results["retry"]["fetched"] = retried
+
+    results["peak_rss_mb"] = peak_rss_bytes() / 1e6
+    return results
+
+
+def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a scenario on a new event loop (the entry point of worker processes)."""
+    # Injected faults make the fetcher log an error per failed request
+    logging.disable(logging.CRITICAL)
+    return asyncio.run(benchmark_scenario(scenario))
+
+
+def git_commit() -> Optional[str]:
+    """Return the commit of the working tree, or None outside a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scenario_key(scenario: Dict[str, Any]) -> str:
+    """Return a label identifying the swept parameters of a scenario."""
+    return (
+        f"c={scenario['concurrent_requests']} b={scenario['batch_size']} "
+        f"ids={scenario['ids_per_request']}"
+    )
+
+
+def print_results(
+    results: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]]
+) -> None:
+    """Print a table of the results, with the change against a baseline."""
+    previous = {}
+    if baseline:
+        previous = {
+            (scenario_key(r["scenario"]), stage): r[stage]
+            for r in baseline["results"]
+            for stage in ("run", "retry")
+        }
+    print(
+        f"{'scenario':<22} {'stage':<6} {'req':>6} {'req/s':>7} {'util':>5} "
+        f"{'p50':>6} {'p95':>6} {'p99':>6} {'flight s':>9} {'limit s':>8} "
+        f"{'backoff s':>9} {'fetched':>7} {'RSS MB':>7}"
+    )
+    for r in results:
+        key = scenario_key(r["scenario"])
+        for stage in ("run", "retry"):
+            s = r[stage]
+            utilization = s["rate_limit_utilization"] or 0.0
+            line = (
+                f"{key:<22} {stage:<6} {s['requests']:>6} "
+                f"{s['requests_per_sec']:>7.2f} {utilization:>5.0%} "
+                f"{s['latency_p50'] or 0:>6.3f} {s['latency_p95'] or 0:>6.3f} "
+                f"{s['latency_p99'] or 0:>6.3f} {s['in_flight_seconds']:>9.1f} "
+                f"{s['rate_limit_wait_seconds']:>8.1f} "
+                f"{s['backoff_sleep_seconds']:>9.1f} {s['fetched']:>7} "
+                f"{r['peak_rss_mb']:>7.1f}"
+            )
+            old = previous.get((key, stage))
+            if old and old["requests_per_sec"]:
+                change = s["requests_per_sec"] / old["requests_per_sec"] - 1
+                line += f"  req/s {change:+.1%} vs baseline"
+            print(line)
+
+
+def main():
+    """Run the fetch benchmark for every combination of the swept parameters."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark DataFetcher throughput against a fake PubMed client"
+    )
+    parser.add_argument(
+        "--urls", type=int, default=1000, help="Number of PubMed URLs to fetch"
+    )
+    parser.add_argument(
+        "--rate-limit", type=int, default=10, help="Requests per second allowed"
+    )
+    parser.add_argument(
+        "--burst-size", type=int, default=1, help="Burst size of the rate limiter"
+    )
+    parser.add_argument(
+        "--concurrent-requests",
+        type=int,
+        nargs="+",
+        default=[10],
+        help="Concurrent request limits to sweep",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        nargs="+",
+        default=[100],
+        help="DataFetcher batch sizes to sweep",
+    )
+    parser.add_argument(
+        "--ids-per-request",
+        type=int,
+        nargs="+",
+        default=[1],
+        help="PubMed IDs per request to sweep",
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=3, help="Maximum attempts per request"
+    )
+    parser.add_argument(
+        "--retry-delay",
+        type=float,
+        default=1.0,
+        help="Base delay in seconds between retries",
+    )
+    parser.add_argument(
+        "--adaptive", action="store_true", help="Enable adaptive rate control"
+    )
+    parser.add_argument(
+        "--storage-format",
+        default="json",
+        choices=["json", "segments", "zstd"],
+        help="Storage format the abstracts are written in",
+    )
+    parser.add_argument(
+        "--latency",
+        default=ClientProfile.latency,
+        help="Request latency as distribution:mean[:spread]",
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="Probability of a 429"
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=1.0,
+        help="Retry-After seconds of 429s (negative to omit)",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Probability of a 503"
+    )
+    parser.add_argument(
+        "--timeout-rate", type=float, default=0.0, help="Probability of a timeout"
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=5.0, help="Seconds a timed out request takes"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the fake client")
+    parser.add_argument(
+        "--output",
+        default="fetch_benchmark.json",
+        help="File to write the results to as JSON",
+    )
+    parser.add_argument(
+        "--baseline", help="Results file of an earlier run to compare against"
+    )
+    args = parser.parse_args()
+
+    profile = ClientProfile(
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout=args.timeout,
+    )
+    scenarios = [
+        {
+            "urls": args.urls,
+            "rate_limit": args.rate_limit,
+            "burst_size": args.burst_size,
+            "concurrent_requests": concurrent_requests,
+            "batch_size": batch_size,
+            "ids_per_request": ids_per_request,
+            "max_retries": args.max_retries,
+            "retry_delay": args.retry_delay,
+            "adaptive": args.adaptive,
+            "storage_format": args.storage_format,
+            "profile": asdict(profile),
+            "seed": args.seed,
+        }
+        for concurrent_requests, batch_size, ids_per_request in itertools.product(
+            args.concurrent_requests, args.batch_size, args.ids_per_request
+        )
+    ]
+
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for scenario in scenarios:
+        print(f"Running {scenario_key(scenario)}...", file=sys.stderr)
+        # A fresh process per scenario keeps the peak RSS of the runs apart
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(run_scenario, scenario).result())
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_results(results, baseline)
+
+    output = {
+        "commit": git_commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(output, indent=2), encoding="utf-8")
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+"""
+Compare bytes on disk and read throughput of the abstract storage formats.
+
+Run from the data_acquisition directory:
+
+    uv run --extra zstd python -m benchmarks.storage_benchmark --abstracts-dir ../data/abstracts
+
+Without --abstracts-dir, synthetic PubMed-like abstracts are used.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from src.abstract_store import AbstractStore, JsonFileStore, SegmentStore, ZstdFileStore
+
+WORDS = (
+    "patients treatment clinical study results disease cells protein expression "
+    "gene analysis risk associated increased significantly cancer therapy outcomes "
+    "mice levels receptor response model trial cohort mortality inflammation"
+).split()
+
+
+def synthetic_abstracts(count: int, seed: int = 0) -> List[Tuple[str, Dict[str, Any]]]:
+    """Create abstracts with the fields and typical sizes of PubMed records."""
+    rng = random.Random(seed)
+    abstracts = []
+    for i in range(count):
+        pubmed_id = str(10000000 + i)
+        abstracts.append(
+            (
+                pubmed_id,
+                {
+                    "id": pubmed_id,
+                    "title": " ".join(rng.choices(WORDS, k=12)).capitalize(),
+                    "abstract": " ".join(rng.choices(WORDS, k=rng.randint(120, 300))),
+                    "authors": [
+                        f"Author{rng.randint(1, 5000)} {chr(65 + rng.randint(0, 25))}"
+                        for _ in range(rng.randint(1, 8))
+                    ],
+                    "publication_date": f"{rng.randint(1990, 2024)} Jan {rng.randint(1, 28)}",
+                    "journal": f"Journal of {rng.choice(WORDS).capitalize()}",
+                    "doi": f"10.{rng.randint(1000, 9999)}/{pubmed_id}",
+                    "keywords": rng.choices(WORDS, k=5),
+                    "mesh_terms": [w.capitalize() for w in rng.choices(WORDS, k=8)],
+                },
+            )
+        )
+    return abstracts
+
+
+def load_abstracts(abstracts_dir: Path, limit: int) -> List[Tuple[str, Dict[str, Any]]]:
+    """Load up to limit abstracts from a directory of JSON files."""
+    store = JsonFileStore(abstracts_dir)
+    pubmed_ids = sorted(store.ids())[:limit]
+    return [(pubmed_id, store.get(pubmed_id)) for pubmed_id in pubmed_ids]
+
+
+def disk_usage(directory: Path) -> Tuple[int, int, int]:
+    """Return the number of files, apparent bytes and allocated bytes of a directory."""
+    files = apparent = allocated = 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            stat = entry.stat()
+            files += 1
+            apparent += stat.st_size
+            allocated += stat.st_blocks * 512
+    return files, apparent, allocated
+
+
+def benchmark_format(
+    name: str,
+    open_store: Callable[[Path], AbstractStore],
+    abstracts: List[Tuple[str, Dict[str, Any]]],
+    work_dir: Path,
+    random_reads: int,
+) -> Dict[str, Any]:
+    """Write all abstracts to a store, then time a full scan and random reads."""
+    directory = work_dir / name
+    store = open_store(directory)
+    start = time.perf_counter()
+    for pubmed_id, abstract in abstracts:
+        store.put(pubmed_id, abstract)
+    store.close()
+    write_seconds = time.perf_counter() - start
+
+    files, apparent, allocated = disk_usage(directory)
+
+    # Reopen so the reads do not benefit from state kept by the writer
+    store = open_store(directory)
+    start = time.perf_counter()
+    scanned = sum(1 for _ in store.iter_records())
+    scan_seconds = time.perf_counter() - start
+
+    sample = random.Random(1).choices([p for p, _ in abstracts], k=random_reads)
+    start = time.perf_counter()
+    for pubmed_id in sample:
+        store.get(pubmed_id)
+    random_seconds = time.perf_counter() - start
+    store.close()
+
+    return {
+        "format": name,
+        "files": files,
+        "apparent_mb": apparent / 1e6,
+        "on_disk_mb": allocated / 1e6,
+        "write_per_sec": len(abstracts) / write_seconds,
+        "scan_per_sec": scanned / scan_seconds,
+        "random_per_sec": len(sample) / random_seconds,
+    }
+
+
+def main():
+    """Run the storage benchmark and print a table of the results."""
+    parser = argparse.ArgumentParser(description="Benchmark abstract storage formats")
+    parser.add_argument(
+        "--abstracts-dir",
+        help="Directory of {pmid}.json abstracts to use instead of synthetic ones",
+    )
+    parser.add_argument(
+        "--count", type=int, default=20000, help="Number of abstracts to store"
+    )
+    parser.add_argument(
+        "--random-reads", type=int, default=2000, help="Number of random reads"
+    )
+    parser.add_argument(
+        "--work-dir", help="Directory for the stores (default: a temporary directory)"
+    )
+    args = parser.parse_args()
+
+    if args.abstracts_dir:
+        abstracts = load_abstracts(Path(args.abstracts_dir), args.count)
+    else:
+        abstracts = synthetic_abstracts(args.count)
+    text_mb = sum(
+        len(json.dumps(abstract, separators=(",", ":")).encode("utf-8"))
+        for _, abstract in abstracts
+    )
+    print(f"{len(abstracts)} abstracts, {text_mb / 1e6:.1f} MB of compact JSON")
+
+    # Train the zstd dictionary on the first records, as the fetcher does
+    train_samples = min(1000, len(abstracts))
+    formats: Dict[str, Callable[[Path], AbstractStore]] = {
+        "json": JsonFileStore,
+        "segments": SegmentStore,
+        "zstd": lambda d: ZstdFileStore(d, train_samples=0),
+        "zstd+dict": lambda d: ZstdFileStore(d, train_samples=train_samples),
+    }
+
+    work_dir = Path(args.work_dir or tempfile.mkdtemp(prefix="storage-benchmark-"))
+    try:
+        results = [
+            benchmark_format(name, open_store, abstracts, work_dir, args.random_reads)
+            for name, open_store in formats.items()
+        ]
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir)
+
+    print(
+        f"{'format':<10} {'files':>7} {'size MB':>9} {'disk MB':>9} "
+        f"{'write/s':>9} {'scan/s':>9} {'random/s':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['format']:<10} {r['files']:>7} {r['apparent_mb']:>9.1f} "
+            f"{r['on_disk_mb']:>9.1f} {r['write_per_sec']:>9.0f} "
+            f"{r['scan_per_sec']:>9.0f} {r['random_per_sec']:>9.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
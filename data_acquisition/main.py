@@ -4,12 +4,22 @@ import asyncio
 import logging
 import os
 import sys
+from pathlib import Path
 
 from dotenv import load_dotenv
 
-from src.clients.biopython_pubmed_client import BioPythonPubMedClient
+from src.clients.httpx_pubmed_client import EUTILS_BASE_URL
 from src.data_fetcher import DataFetcher
+from src.pubmed_url_collector import DEFAULT_RELEASE, PubMedURLCollector
+from src.raw_response_cache import RAW_CACHE_DIR, RawResponseCache
+from src.sharded_fetch import (
+    NCBICredentials,
+    create_pubmed_client,
+    load_credentials,
+    run_sharded_fetch,
+)
 from src.utils.logging_utils import setup_logging
+from src.utils.metrics import MetricsServer, MetricsSnapshotWriter
 
 
 async def main():
@@ -22,11 +32,120 @@ async def main():
         "--email", required=True, help="Email address for NCBI API (required)"
     )
     parser.add_argument("--api-key", help="NCBI API key for higher rate limits")
+    parser.add_argument(
+        "--release",
+        default=DEFAULT_RELEASE,
+        help="BioASQ release directory in the data directory to collect URLs from "
+        "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--delta",
+        action="store_true",
+        help="Only fetch PubMed IDs added since the previously fetched release",
+    )
+    parser.add_argument(
+        "--prioritize",
+        action="store_true",
+        help="Fetch documents of goldset questions first, then those cited by the "
+        "most questions, and report per-question coverage while fetching",
+    )
+    parser.add_argument(
+        "--api-keys",
+        nargs="+",
+        help="Several NCBI API keys: fetch in one process per key, each with its "
+        "own rate limit (also read from NCBI_API_KEYS, comma-separated)",
+    )
+    parser.add_argument(
+        "--credentials-file",
+        help="JSON list of {email, api_key, tool, rate_limit} objects, one fetch "
+        "process each (see src/sharded_fetch.py)",
+    )
+    parser.add_argument(
+        "--client",
+        default="biopython",
+        choices=["biopython", "httpx"],
+        help="PubMed client implementation (httpx uses pooled keep-alive connections)",
+    )
+    parser.add_argument(
+        "--eutils-url",
+        default=EUTILS_BASE_URL,
+        help="Base URL of the E-utilities used by the httpx client, e.g. a local "
+        "src/eutils_simulator.py",
+    )
+    parser.add_argument(
+        "--retmode",
+        default="text",
+        choices=["text", "xml"],
+        help="EFetch response format of the biopython client (xml adds structured fields)",
+    )
+    parser.add_argument(
+        "--decode-processes",
+        type=int,
+        default=0,
+        help="Number of processes decoding large XML responses (0 decodes in-process)",
+    )
+    parser.add_argument(
+        "--raw-cache",
+        action="store_true",
+        help="Also save the raw Medline/XML record of every abstract to "
+        "data-dir/raw_responses, so src/replay_raw_cache.py can rebuild the "
+        "abstracts offline",
+    )
     parser.add_argument(
         "--data-dir", default="data", help="Directory to save abstracts to"
     )
     parser.add_argument(
-        "--batch-size", type=int, default=100, help="Number of abstracts per batch"
+        "--storage-format",
+        default="json",
+        choices=["json", "segments", "zstd"],
+        help="Save abstracts as one JSON file each, packed into segment files, "
+        "or as one zstd-compressed file each",
+    )
+    parser.add_argument(
+        "--write-queue-size",
+        type=int,
+        default=1000,
+        help="Number of fetched abstracts that may wait for the disk before fetching pauses",
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Fsync each batch of written abstracts",
+    )
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        help="Serve Prometheus metrics on this local port at /metrics",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=30.0,
+        help="Seconds between JSON metrics snapshots in data-dir/fetch_metrics.json "
+        "(0 to disable)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=100,
+        help="Number of requests queued ahead of the fetch workers",
+    )
+    parser.add_argument(
+        "--ids-per-request",
+        type=int,
+        default=200,
+        help="Number of PubMed IDs fetched per EFetch request (1 disables batching)",
+    )
+    parser.add_argument(
+        "--use-history-server",
+        action="store_true",
+        help="Upload all IDs once with EPost and page through the NCBI history server",
+    )
+    parser.add_argument(
+        "--history-page-size",
+        type=int,
+        default=1000,
+        help="Number of records per history server page",
     )
     parser.add_argument(
         "--rate-limit",
@@ -34,6 +153,23 @@ async def main():
         default=10,
         help="Maximum requests per second (3 without API key, 10 with API key)",
     )
+    parser.add_argument(
+        "--burst-size",
+        type=int,
+        default=1,
+        help="Number of requests that may be sent back-to-back after idle time",
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Adapt rate and concurrency to 429s, timeouts and latency (AIMD)",
+    )
+    parser.add_argument(
+        "--max-rate-limit",
+        type=float,
+        help="Highest requests per second the adaptive controller may reach "
+        "(default: twice --rate-limit)",
+    )
     parser.add_argument(
         "--max-retries", type=int, default=3, help="Maximum retries for failed requests"
     )
@@ -69,28 +205,142 @@ async def main():
     logger.info("Initializing PubMed abstract fetcher")
     logger.info(f"Using email: {args.email}")
     logger.info(f"API key provided: {bool(api_key)}")
+    logger.info(f"PubMed client: {args.client}")
+    if args.client == "biopython":
+        logger.info(f"EFetch format: {args.retmode}")
     logger.info(f"Data directory: {args.data_dir}")
+    logger.info(f"Storage format: {args.storage_format}")
     logger.info(f"Batch size: {args.batch_size}")
+    logger.info(f"IDs per request: {args.ids_per_request}")
+    if args.use_history_server:
+        logger.info(f"Using history server with page size {args.history_page_size}")
     logger.info(f"Rate limit: {args.rate_limit} requests per second")
+    if args.adaptive:
+        logger.info("Adaptive rate control enabled")
+    if args.raw_cache:
+        logger.info(f"Saving raw responses to {Path(args.data_dir) / RAW_CACHE_DIR}")
 
-    try:
-        # Create the client
-        pubmed_client = BioPythonPubMedClient(
-            email=args.email, api_key=api_key, tool="bioasq-rag"
+    client_options = {
+        "ids_per_request": args.ids_per_request,
+        "retmode": args.retmode,
+        "decode_processes": args.decode_processes,
+        "eutils_url": args.eutils_url,
+    }
+
+    # With several keys, fetch in one process per key
+    api_keys = args.api_keys
+    if not api_keys and os.environ.get("NCBI_API_KEYS"):
+        api_keys = [
+            key.strip() for key in os.environ["NCBI_API_KEYS"].split(",") if key.strip()
+        ]
+    credentials = []
+    if args.credentials_file:
+        credentials = load_credentials(args.credentials_file)
+    elif api_keys:
+        credentials = [
+            NCBICredentials(email=args.email, api_key=key, tool=f"bioasq-rag-{i}")
+            for i, key in enumerate(api_keys)
+        ]
+    if credentials:
+        logger.info(f"Sharded fetch with {len(credentials)} sets of credentials")
+        if args.use_history_server:
+            logger.warning("The history server is not used in sharded fetches")
+        if args.prioritize:
+            logger.warning("Documents are not prioritized in sharded fetches")
+        try:
+            result = run_sharded_fetch(
+                PubMedURLCollector(
+                    data_dir=args.data_dir, release=args.release
+                ).collect_urls(),
+                credentials,
+                data_dir=args.data_dir,
+                storage_format=args.storage_format,
+                client=args.client,
+                client_options=client_options,
+                fetcher_options={
+                    "batch_size": args.batch_size,
+                    "burst_size": args.burst_size,
+                    "adaptive": args.adaptive,
+                    "max_rate_limit_per_sec": args.max_rate_limit,
+                    "max_retries": args.max_retries,
+                    "retry_delay": args.retry_delay,
+                    "ids_per_request": args.ids_per_request,
+                    "write_queue_size": args.write_queue_size,
+                    "fsync_writes": args.fsync,
+                },
+                metrics_interval=args.metrics_interval,
+                log_level=args.log_level,
+                release=args.release,
+                delta=args.delta,
+                raw_cache=args.raw_cache,
+            )
+        except Exception as e:
+            logger.exception(f"Error running sharded fetch: {e}")
+            return 1
+        if not result:
+            logger.error("Fetching failed - no URLs found")
+            return 1
+        logger.info(
+            f"Fetching complete. {result['successful_fetches']}/{result['total_urls']} "
+            f"abstracts successfully fetched. Failed: {result['failed_fetches']}"
         )
+        return 0
+
+    # Create the client
+    raw_cache = None
+    if args.raw_cache:
+        raw_cache = RawResponseCache(Path(args.data_dir) / RAW_CACHE_DIR)
+    pubmed_client = create_pubmed_client(
+        args.client,
+        NCBICredentials(
+            email=args.email,
+            api_key=api_key,
+            tool="bioasq-rag",
+            rate_limit=args.rate_limit,
+        ),
+        raw_cache=raw_cache,
+        **client_options,
+    )
 
-        # Create and run the fetcher
-        data_fetcher = DataFetcher(
-            pubmed_client=pubmed_client,
-            data_dir=args.data_dir,
-            batch_size=args.batch_size,
-            rate_limit_per_sec=args.rate_limit,
-            max_retries=args.max_retries,
-            retry_delay=args.retry_delay,
-            concurrent_requests=args.rate_limit,  # Set concurrent requests to match rate limit
+    # Create the fetcher
+    data_fetcher = DataFetcher(
+        pubmed_client=pubmed_client,
+        data_dir=args.data_dir,
+        batch_size=args.batch_size,
+        rate_limit_per_sec=args.rate_limit,
+        burst_size=args.burst_size,
+        adaptive=args.adaptive,
+        max_rate_limit_per_sec=args.max_rate_limit,
+        max_retries=args.max_retries,
+        retry_delay=args.retry_delay,
+        concurrent_requests=args.rate_limit,  # Set concurrent requests to match rate limit
+        ids_per_request=args.ids_per_request,
+        use_history_server=args.use_history_server,
+        history_page_size=args.history_page_size,
+        storage_format=args.storage_format,
+        write_queue_size=args.write_queue_size,
+        fsync_writes=args.fsync,
+        release=args.release,
+    )
+
+    # Expose the fetcher's metrics while it runs
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = MetricsServer(data_fetcher.metrics, port=args.metrics_port)
+        metrics_server.start()
+        logger.info(f"Serving metrics at {metrics_server.url}")
+    snapshot_writer = None
+    if args.metrics_interval > 0:
+        snapshot_writer = MetricsSnapshotWriter(
+            data_fetcher.metrics,
+            data_fetcher.data_dir / "fetch_metrics.json",
+            interval=args.metrics_interval,
         )
+        snapshot_writer.start()
 
-        result = await data_fetcher.run()
+    try:
+        # Run the fetcher
+        result = await data_fetcher.run(delta=args.delta, prioritize=args.prioritize)
 
         if result:
             logger.info(
@@ -105,6 +355,15 @@ async def main():
     except Exception as e:
         logger.exception(f"Error running fetcher: {e}")
         return 1
+    finally:
+        data_fetcher.close()
+        await pubmed_client.close()
+        if raw_cache is not None:
+            raw_cache.close()
+        if snapshot_writer:
+            snapshot_writer.stop()
+        if metrics_server:
+            metrics_server.stop()
 
     return 0
 
@@ -0,0 +1,645 @@
+"""Storage backends for fetched abstracts."""
+
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from bioasq_common.compressed_abstracts import (
+    ZSTD_DICTIONARY_NAME,
+    ZSTD_SUFFIX,
+    compressed_abstract_id,
+    encode_compressed_record,
+    read_compressed_record,
+)
+from bioasq_common.segment_store import (
+    INDEX_ENTRY,
+    INDEX_NAME,
+    SEGMENT_PATTERN,
+    RecordLocation,
+    decode_segment_record,
+    encode_segment_record,
+    read_segment_indexes,
+    segment_path,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None  # type: ignore[assignment]
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None  # type: ignore[assignment]
+
+STORAGE_FORMATS = ("json", "segments", "zstd")
+
+
+class AbstractStore(ABC):
+    """
+    Abstract base class for abstract storage backends.
+
+    Any storage implementation should inherit from this class and implement
+    the required methods.
+    """
+
+    directory: Path
+
+    @abstractmethod
+    def put(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        """
+        Save an abstract, replacing any earlier version.
+
+        Args:
+            pubmed_id: The PubMed ID of the abstract
+            abstract: The abstract data
+        """
+        pass
+
+    @abstractmethod
+    def get(self, pubmed_id: str) -> Dict[str, Any]:
+        """
+        Load a saved abstract.
+
+        Args:
+            pubmed_id: The PubMed ID of the abstract
+
+        Returns:
+            The saved abstract data
+
+        Raises:
+            KeyError: If no abstract is saved for the ID
+        """
+        pass
+
+    @abstractmethod
+    def ids(self) -> Set[str]:
+        """
+        Return the PubMed IDs of all saved abstracts.
+
+        Returns:
+            Set of PubMed IDs
+        """
+        pass
+
+    @abstractmethod
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Iterate over all saved abstracts in storage order.
+
+        Yields:
+            Tuples of (PubMed ID, abstract data)
+        """
+        pass
+
+    def put_many(
+        self, records: List[Tuple[str, Dict[str, Any]]], fsync: bool = False
+    ) -> None:
+        """
+        Save several abstracts, optionally making them durable together.
+
+        Args:
+            records: Tuples of (PubMed ID, abstract data)
+            fsync: Whether to fsync the saved abstracts before returning
+        """
+        for pubmed_id, abstract in records:
+            self.put(pubmed_id, abstract)
+        if fsync:
+            self.sync([pubmed_id for pubmed_id, _ in records])
+
+    def sync(self, pubmed_ids: List[str]) -> None:
+        """
+        Make saved abstracts durable. The default implementation does nothing.
+
+        Args:
+            pubmed_ids: PubMed IDs of the abstracts saved since the last sync
+        """
+        pass
+
+    def close(self) -> None:
+        """Release any open files. The default implementation does nothing."""
+        pass
+
+
+class JsonFileStore(AbstractStore):
+    """Store that keeps every abstract in its own pretty-printed JSON file."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding one {pmid}.json file per abstract
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def put(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        with open(self.directory / f"{pubmed_id}.json", "w", encoding="utf-8") as f:
+            json.dump(abstract, f, indent=2)
+
+    def get(self, pubmed_id: str) -> Dict[str, Any]:
+        try:
+            with open(self.directory / f"{pubmed_id}.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError as e:
+            raise KeyError(pubmed_id) from e
+
+    def ids(self) -> Set[str]:
+        # A single directory scan, without a stat per file
+        with os.scandir(self.directory) as entries:
+            return {
+                entry.name[: -len(".json")]
+                for entry in entries
+                if entry.name.endswith(".json")
+            }
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for pubmed_id in sorted(self.ids()):
+            yield pubmed_id, self.get(pubmed_id)
+
+    def sync(self, pubmed_ids: List[str]) -> None:
+        _fsync_files(self.directory, [f"{pubmed_id}.json" for pubmed_id in pubmed_ids])
+
+
+class SegmentStore(AbstractStore):
+    """
+    Append-only store that packs abstracts into large segment files.
+
+    Each record is appended to the current segment of this writer as one line of
+    compact JSON, and its location is then appended to the writer's binary
+    index as a fixed-size (PMID, segment, offset, length) entry. A record only
+    becomes visible once its index entry is complete, so a crash can leave
+    unreferenced bytes in a segment but never a half-written record. Several
+    processes can write to the same store as long as each uses its own
+    writer_id; readers merge the indexes of all writers, with later entries
+    replacing earlier ones for the same PMID. PMIDs must be numeric.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        writer_id: str = "main",
+        segment_size: int = 64 * 1024 * 1024,
+        fsync: bool = False,
+    ):
+        """
+        Open (or create) a segment store.
+
+        Args:
+            directory: Directory holding the segment and index files
+            writer_id: Name identifying this writer's segments and index
+            segment_size: Size in bytes after which a new segment is started
+            fsync: Whether to fsync the segment and index after every append
+        """
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.writer_id = writer_id
+        self.segment_size = segment_size
+        self.fsync = fsync
+
+        self._locations: Dict[str, RecordLocation] = {}
+        self._read_handles: Dict[Tuple[str, int], IO[bytes]] = {}
+        self._load_indexes()
+
+        self._index_file: Optional[IO[bytes]] = None
+        self._segment_file: Optional[IO[bytes]] = None
+        self._segment_number = 0
+        self._segment_offset = 0
+        # Guards the locations, read handles and open segment, so records
+        # can be read while a WriteBehindWriter thread appends
+        self._lock = threading.Lock()
+
+    def put(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        data = self._encode_record(abstract)
+        with self._lock:
+            self._append(pubmed_id, data)
+
+    def put_many(
+        self, records: List[Tuple[str, Dict[str, Any]]], fsync: bool = False
+    ) -> None:
+        # Encode outside the lock so readers only wait for the appends
+        encoded = [
+            (pubmed_id, self._encode_record(abstract))
+            for pubmed_id, abstract in records
+        ]
+        with self._lock:
+            for pubmed_id, data in encoded:
+                self._append(pubmed_id, data)
+            if fsync:
+                self._sync_files()
+
+    def get(self, pubmed_id: str) -> Dict[str, Any]:
+        with self._lock:
+            writer_id, number, offset, length = self._locations[pubmed_id]
+            f = self._read_handle(writer_id, number)
+            f.seek(offset)
+            data = f.read(length)
+        return self._decode_record(data)
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            return set(self._locations)
+
+    def __contains__(self, pubmed_id: object) -> bool:
+        return pubmed_id in self._locations
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def ordered_ids(self) -> List[str]:
+        """
+        Return the PubMed IDs in the order their records are stored.
+
+        Reading records in this order reads each segment front to back.
+        """
+        with self._lock:
+            return sorted(self._locations, key=self._locations.__getitem__)
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        # Read each segment front to back so reads stay sequential
+        for pubmed_id in self.ordered_ids():
+            with self._lock:
+                writer_id, number, offset, length = self._locations[pubmed_id]
+                f = self._read_handle(writer_id, number)
+                if f.tell() != offset:
+                    f.seek(offset)
+                data = f.read(length)
+            yield pubmed_id, self._decode_record(data)
+
+    def sync(self, pubmed_ids: List[str]) -> None:
+        # One fsync of the segment and the index covers the whole batch
+        with self._lock:
+            self._sync_files()
+
+    def close(self) -> None:
+        with self._lock:
+            for f in self._read_handles.values():
+                f.close()
+            self._read_handles.clear()
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            if self._index_file is not None:
+                self._index_file.close()
+                self._index_file = None
+
+    def _append(self, pubmed_id: str, data: bytes) -> None:
+        """Append an encoded record and its index entry. Requires the lock."""
+        if self._segment_file is None or (
+            self._segment_offset > 0
+            and self._segment_offset + len(data) > self.segment_size
+        ):
+            self._start_segment()
+        assert self._segment_file is not None and self._index_file is not None
+
+        offset = self._segment_offset
+        self._segment_file.write(data)
+        self._segment_file.flush()
+        self._segment_offset += len(data)
+        if self.fsync:
+            os.fsync(self._segment_file.fileno())
+
+        # The record becomes visible only once its index entry is written
+        self._index_file.write(
+            INDEX_ENTRY.pack(int(pubmed_id), self._segment_number, offset, len(data))
+        )
+        self._index_file.flush()
+        if self.fsync:
+            os.fsync(self._index_file.fileno())
+
+        self._locations[pubmed_id] = (
+            self.writer_id,
+            self._segment_number,
+            offset,
+            len(data),
+        )
+
+    def _sync_files(self) -> None:
+        """Fsync the current segment and the index. Requires the lock."""
+        if self._segment_file is not None:
+            os.fsync(self._segment_file.fileno())
+        if self._index_file is not None:
+            os.fsync(self._index_file.fileno())
+
+    def _encode_record(self, abstract: Dict[str, Any]) -> bytes:
+        """Encode a record as appended to a segment (one line of compact JSON)."""
+        return encode_segment_record(abstract)
+
+    def _decode_record(self, data: bytes) -> Dict[str, Any]:
+        """Decode a record read back from a segment."""
+        return decode_segment_record(data)
+
+    def _load_indexes(self) -> None:
+        """Read the indexes of all writers into memory."""
+        self._locations.update(read_segment_indexes(self.directory))
+
+    def _open_index(self) -> None:
+        """Open this writer's index for appending and take its lock."""
+        path = self.directory / INDEX_NAME.format(writer_id=self.writer_id)
+        self._index_file = open(path, "ab")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._index_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError as e:
+                self._index_file.close()
+                self._index_file = None
+                raise RuntimeError(
+                    f"Writer '{self.writer_id}' is already in use for {self.directory}"
+                ) from e
+        # Drop a trailing entry cut short by a crash before appending
+        size = self._index_file.seek(0, os.SEEK_END)
+        if size % INDEX_ENTRY.size:
+            self._index_file.truncate(size - size % INDEX_ENTRY.size)
+
+    def _start_segment(self) -> None:
+        """Start a new segment file for this writer."""
+        if self._index_file is None:
+            self._open_index()
+            self._segment_number = self._last_segment_number()
+        if self._segment_file is not None:
+            # sync only covers the current segment, so a full one is made
+            # durable before it is closed
+            os.fsync(self._segment_file.fileno())
+            self._segment_file.close()
+
+        # Never append to an existing segment, whose tail may be unreferenced
+        self._segment_number += 1
+        self._segment_offset = 0
+        path = segment_path(self.directory, self.writer_id, self._segment_number)
+        self._segment_file = open(path, "xb")
+        self.logger.debug(f"Started segment {path}")
+
+    def _last_segment_number(self) -> int:
+        """Return the highest segment number used by this writer so far."""
+        numbers: List[int] = [0]
+        for path in self.directory.glob(f"segment-{self.writer_id}-*.seg"):
+            match = SEGMENT_PATTERN.match(path.name)
+            if match and match.group("writer_id") == self.writer_id:
+                numbers.append(int(match.group("number")))
+        return max(numbers)
+
+    def _read_handle(self, writer_id: str, number: int) -> IO[bytes]:
+        """Return a cached read handle for a segment. Requires the lock."""
+        key = (writer_id, number)
+        if key not in self._read_handles:
+            # put flushes every record before indexing it, so the file
+            # already holds everything _locations points at
+            path = segment_path(self.directory, writer_id, number)
+            self._read_handles[key] = open(path, "rb")
+        return self._read_handles[key]
+
+
+class ZstdFileStore(AbstractStore):
+    """
+    Store that keeps every abstract in its own zstd-compressed JSON file.
+
+    Records are compact JSON compressed with a dictionary trained on PubMed
+    abstracts, which lets even small records compress well. The dictionary is
+    saved as abstracts.zdict next to the records. If the store has no dictionary
+    yet, the first ``train_samples`` records are written without one and kept as
+    samples. A dictionary is then trained on them once, in a background thread,
+    so that put never waits for the training. Records written meanwhile are
+    still compressed without a dictionary. Every record names the dictionary it
+    was compressed with (none for those early records), so all of them stay
+    readable. A store that does not train one itself, such as the stores of
+    all but one shard, checks every ``dictionary_check_interval`` records
+    whether another writer has saved a dictionary and then uses it too.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        level: int = 9,
+        train_samples: int = 1000,
+        dictionary_size: int = 112640,
+        dictionary_check_interval: int = 100,
+    ):
+        """
+        Initialize the store.
+
+        Args:
+            directory: Directory holding one {pmid}.json.zst file per abstract
+            level: zstd compression level
+            train_samples: Number of records to train a dictionary on if the
+                store has none yet, or 0 to never train one and wait for another
+                writer of the store to save one
+            dictionary_size: Maximum size in bytes of a trained dictionary
+            dictionary_check_interval: Number of records written without a
+                dictionary between checks for one saved by another writer
+
+        Raises:
+            ImportError: If the zstandard package is not installed
+        """
+        if zstandard is None:
+            raise ImportError(
+                "The zstd storage format requires the zstandard package "
+                "(install the 'zstd' extra)"
+            )
+        self.logger = logging.getLogger(__name__)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.level = level
+        self.train_samples = train_samples
+        self.dictionary_size = dictionary_size
+        self.dictionary_check_interval = dictionary_check_interval
+
+        self.dictionary: Optional["zstandard.ZstdCompressionDict"] = None
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressors = {0: zstandard.ZstdDecompressor()}
+        self._samples: List[bytes] = []
+        self._samples_lock = threading.Lock()
+        self._training: Optional[threading.Thread] = None
+        self._unchecked_records = 0
+
+        self.load_dictionary_if_available()
+
+    def put(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        data = encode_compressed_record(abstract)
+        # Readers never see a partly written record, and a crash never leaves one
+        path = self.directory / f"{pubmed_id}{ZSTD_SUFFIX}"
+        _write_atomic(path, self._compressor.compress(data))
+
+        if self.dictionary is None:
+            if self.train_samples > 0:
+                self._add_sample(data)
+            else:
+                self._unchecked_records += 1
+                if self._unchecked_records >= self.dictionary_check_interval:
+                    self._unchecked_records = 0
+                    self.load_dictionary_if_available()
+
+    def get(self, pubmed_id: str) -> Dict[str, Any]:
+        try:
+            f = open(self.directory / f"{pubmed_id}{ZSTD_SUFFIX}", "rb")
+        except FileNotFoundError as e:
+            raise KeyError(pubmed_id) from e
+        with f:
+            return read_compressed_record(f, self._decompressor)
+
+    def ids(self) -> Set[str]:
+        with os.scandir(self.directory) as entries:
+            return {
+                compressed_abstract_id(entry.name)
+                for entry in entries
+                if entry.name.endswith(ZSTD_SUFFIX)
+            }
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for pubmed_id in sorted(self.ids()):
+            yield pubmed_id, self.get(pubmed_id)
+
+    def sync(self, pubmed_ids: List[str]) -> None:
+        _fsync_files(
+            self.directory, [f"{pubmed_id}{ZSTD_SUFFIX}" for pubmed_id in pubmed_ids]
+        )
+
+    def train_dictionary(self, samples: List[bytes]) -> None:
+        """
+        Train a dictionary on sample records and use it for all later records.
+
+        Args:
+            samples: Uncompressed records to train on
+
+        Raises:
+            zstandard.ZstdError: If there are too few samples to train on
+        """
+        dictionary = zstandard.train_dictionary(self.dictionary_size, samples)
+        _write_atomic(self.directory / ZSTD_DICTIONARY_NAME, dictionary.as_bytes())
+        self._use_dictionary(dictionary.as_bytes())
+        self.logger.info(
+            f"Trained a {len(dictionary.as_bytes())} byte dictionary on "
+            f"{len(samples)} abstracts"
+        )
+
+    def load_dictionary_if_available(self) -> bool:
+        """
+        Use the dictionary saved in the store, if there is one.
+
+        Returns:
+            True if the store now uses a dictionary
+        """
+        try:
+            data = (self.directory / ZSTD_DICTIONARY_NAME).read_bytes()
+        except FileNotFoundError:
+            return False
+        self._use_dictionary(data)
+        return True
+
+    def wait_for_dictionary(self) -> None:
+        """Wait until a dictionary training started by put has finished."""
+        if self._training is not None:
+            self._training.join()
+
+    def close(self) -> None:
+        self.wait_for_dictionary()
+        self._samples.clear()
+
+    def _add_sample(self, data: bytes) -> None:
+        """Keep a record as a training sample, and start training once there are enough."""
+        with self._samples_lock:
+            if self._training is not None:
+                return
+            self._samples.append(data)
+            if len(self._samples) < self.train_samples:
+                return
+            samples, self._samples = self._samples, []
+            self._training = threading.Thread(
+                target=self._train_in_background,
+                args=(samples,),
+                name="zstd-dictionary",
+                daemon=True,
+            )
+            self._training.start()
+
+    def _train_in_background(self, samples: List[bytes]) -> None:
+        """Train the dictionary on samples collected by put."""
+        try:
+            self.train_dictionary(samples)
+        except zstandard.ZstdError as e:
+            # Keep writing records without a dictionary
+            self.logger.warning(f"Could not train a zstd dictionary: {e}")
+            self.train_samples = 0
+
+    def _use_dictionary(self, data: bytes) -> None:
+        """Compress all later records with the given dictionary."""
+        self.dictionary = zstandard.ZstdCompressionDict(data)
+        self._samples.clear()
+        self._compressor = zstandard.ZstdCompressor(
+            level=self.level, dict_data=self.dictionary
+        )
+        self._decompressors[self.dictionary.dict_id()] = zstandard.ZstdDecompressor(
+            dict_data=self.dictionary
+        )
+
+    def _decompressor(self, dict_id: int) -> "zstandard.ZstdDecompressor":
+        """Return the decompressor for records using the given dictionary."""
+        try:
+            return self._decompressors[dict_id]
+        except KeyError:
+            raise ValueError(
+                f"Record compressed with unknown dictionary {dict_id} in {self.directory}"
+            ) from None
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """
+    Write a file under a temporary name and rename it into place.
+
+    The temporary name ends in .tmp, so stores listing their records by suffix
+    never mistake it for a record.
+    """
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _fsync_files(directory: Path, names: List[str]) -> None:
+    """Fsync files of a directory, then the directory once for all of them."""
+    for name in names:
+        fd = os.open(directory / name, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    if names and hasattr(os, "O_DIRECTORY"):
+        fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def open_abstract_store(
+    directory: Union[str, Path], storage_format: str = "json", **kwargs: Any
+) -> AbstractStore:
+    """
+    Open an abstract store of the given format.
+
+    Args:
+        directory: Directory of the store
+        storage_format: "json" for one file per abstract, "segments" for a
+            packed segment store or "zstd" for one compressed file per abstract
+        **kwargs: Additional options passed to the store
+
+    Returns:
+        The opened store
+
+    Raises:
+        ValueError: If the storage format is unknown
+    """
+    if storage_format == "json":
+        return JsonFileStore(directory)
+    if storage_format == "segments":
+        return SegmentStore(directory, **kwargs)
+    if storage_format == "zstd":
+        return ZstdFileStore(directory, **kwargs)
+    raise ValueError(
+        f"Unknown storage format '{storage_format}', expected one of {STORAGE_FORMATS}"
+    )
@@ -0,0 +1,183 @@
+"""Write-behind stage that saves abstracts from a background thread."""
+
+import asyncio
+import collections
+import logging
+import queue
+import threading
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from src.abstract_store import AbstractStore
+
+# Sentinel telling the writer thread that no more abstracts will arrive
+_STOP = object()
+
+
+class WriteBehindWriter:
+    """
+    Saves abstracts to a store from a dedicated thread.
+
+    Coroutines hand abstracts over with ``submit`` and carry on while the thread
+    writes them, so file I/O never blocks the event loop. The thread writes all
+    abstracts waiting in the queue as one batch of up to ``batch_size`` records,
+    with a single grouped fsync per batch if ``fsync`` is set. At most
+    ``max_pending`` abstracts can be waiting or in flight: once the disk falls
+    that far behind, ``submit`` waits for a slot, which in turn holds back the
+    fetch workers until the writer catches up.
+    """
+
+    def __init__(
+        self,
+        store: AbstractStore,
+        max_pending: int = 1000,
+        batch_size: int = 100,
+        fsync: bool = False,
+        on_written: Optional[Callable[[List[str]], None]] = None,
+        on_failed: Optional[Callable[[List[str]], None]] = None,
+    ):
+        """
+        Initialize the writer. The thread is started by the first submit.
+
+        Args:
+            store: Store to save the abstracts to
+            max_pending: Maximum number of abstracts submitted but not yet written
+            batch_size: Maximum number of abstracts written per batch
+            fsync: Whether to fsync each batch before reporting it as written
+            on_written: Optional callback called on the event loop with the
+                PubMed IDs of each batch once it is written
+            on_failed: Optional callback called on the event loop with the
+                PubMed IDs of each batch that could not be written
+
+        Raises:
+            ValueError: If max_pending or batch_size is less than 1
+        """
+        if max_pending < 1 or batch_size < 1:
+            raise ValueError(
+                f"max_pending and batch_size must be at least 1, got {max_pending} and {batch_size}"
+            )
+        self.logger = logging.getLogger(__name__)
+        self.store = store
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.on_written = on_written
+        self.on_failed = on_failed
+
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._slots = asyncio.Semaphore(max_pending)
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._pending = 0
+        # Batches written by the thread but not yet reported on the event loop
+        self._completed: Deque[Tuple[List[str], Optional[BaseException]]] = (
+            collections.deque()
+        )
+        self._error: Optional[BaseException] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def pending(self) -> int:
+        """Number of abstracts submitted but not yet written."""
+        return self._pending
+
+    async def submit(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        """
+        Queue an abstract for writing, waiting while too many are pending.
+
+        Args:
+            pubmed_id: The PubMed ID of the abstract
+            abstract: The abstract data
+
+        Raises:
+            Exception: The error of an earlier failed write
+        """
+        self._raise_error()
+        await self._slots.acquire()
+        self._raise_error()
+        if self._thread is None:
+            self._loop = asyncio.get_running_loop()
+            self._thread = threading.Thread(
+                target=self._run, name="abstract-writer", daemon=True
+            )
+            self._thread.start()
+        self._pending += 1
+        self._idle.clear()
+        self._queue.put((pubmed_id, abstract))
+
+    async def drain(self) -> None:
+        """
+        Wait until every submitted abstract is written.
+
+        Raises:
+            Exception: The error of a failed write
+        """
+        while self._pending:
+            await self._idle.wait()
+        self._raise_error()
+
+    def close(self) -> None:
+        """Write the remaining abstracts and stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._thread = None
+        # Report batches whose notification could not reach the event loop
+        self._report_completed()
+
+    def _raise_error(self) -> None:
+        """Re-raise the error of a failed write on the event loop."""
+        if self._error is not None:
+            raise self._error
+
+    def _run(self) -> None:
+        """Write queued abstracts in batches until the stop sentinel arrives."""
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            error: Optional[BaseException] = None
+            try:
+                self.store.put_many(batch, fsync=self.fsync)
+            except Exception as e:
+                self.logger.error(f"Error writing {len(batch)} abstracts: {e}")
+                error = e
+            self._completed.append(([pubmed_id for pubmed_id, _ in batch], error))
+
+            assert self._loop is not None
+            try:
+                self._loop.call_soon_threadsafe(self._report_completed)
+            except RuntimeError:
+                # The event loop is closed; close() reports the batch instead
+                pass
+
+    def _report_completed(self) -> None:
+        """Release the slots of written batches and report them."""
+        while self._completed:
+            pubmed_ids, error = self._completed.popleft()
+            if error is None:
+                if self.on_written:
+                    self.on_written(pubmed_ids)
+            else:
+                if self.on_failed:
+                    self.on_failed(pubmed_ids)
+                if self._error is None:
+                    self._error = error
+            self._pending -= len(pubmed_ids)
+            for _ in pubmed_ids:
+                self._slots.release()
+        if not self._pending:
+            self._idle.set()
@@ -0,0 +1,166 @@
+import logging
+from abc import abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.clients.pubmed_client import (
+    PubMedClient,
+    PubMedClientError,
+    is_transient_error,
+)
+from src.utils.rate_limiter import AsyncTokenBucket
+
+
+class BatchingPubMedClient(PubMedClient):
+    """
+    Base class for PubMedClient implementations that fetch many IDs per request.
+
+    Subclasses implement _fetch_batch for a single multi-ID request. This class
+    splits ID lists into batches and bisects batches that fail because of the
+    IDs they contain.
+
+    Subclasses call _wait_for_rate_limit before every request they send, so
+    that the extra requests of a bisected batch are rate limited as well.
+    """
+
+    logger: logging.Logger
+    efetch_batch_size: int
+    # Token bucket taken from before every request; DataFetcher replaces it
+    # with its own
+    rate_limiter: Optional[AsyncTokenBucket] = None
+
+    async def _wait_for_rate_limit(self) -> None:
+        """Wait until the next request is allowed by the rate limiter, if any."""
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire()
+
+    @abstractmethod
+    async def _fetch_batch(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several abstracts in a single request.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Formatted abstract data for every record returned
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited
+            PubMedTimeoutError: If the request times out
+            PubMedClientError: If there's another error retrieving the batch
+        """
+        pass
+
+    async def get_abstracts_by_ids(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retrieve multiple PubMed abstracts by their IDs using batched requests.
+
+        IDs are sent in batches of ``efetch_batch_size``. If a batch fails
+        because of the IDs it contains (e.g. HTTP 400 or an unparsable
+        response), it is split in half and each half is retried until the
+        failing IDs are isolated, so one bad ID does not cost the rest of the
+        batch.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            List of dictionaries containing the abstract data
+
+        Raises:
+            PubMedClientError: If a request fails with a transient error (see
+                is_transient_error), such as PubMedRateLimitError or
+                PubMedTimeoutError. Its abstracts attribute holds the abstracts
+                fetched before that.
+        """
+        results: List[Dict[str, Any]] = []
+        failed_ids = []
+
+        for i in range(0, len(pubmed_ids), self.efetch_batch_size):
+            batch_ids = pubmed_ids[i : i + self.efetch_batch_size]
+            try:
+                abstracts, batch_failed_ids = await self._fetch_batch_with_bisection(
+                    batch_ids
+                )
+            except PubMedClientError as e:
+                e.abstracts = results + e.abstracts
+                raise
+            results.extend(abstracts)
+            failed_ids.extend(batch_failed_ids)
+
+        # If any abstracts failed to retrieve, log the error
+        if failed_ids:
+            self.logger.warning(f"Failed to retrieve abstracts for IDs: {failed_ids}")
+
+        return results
+
+    async def _fetch_batch_with_bisection(
+        self, pubmed_ids: List[str]
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Fetch a batch of abstracts, recursively splitting the batch on errors
+        that depend on its IDs.
+
+        Args:
+            pubmed_ids: List of PubMed IDs in the batch
+
+        Returns:
+            Tuple of (fetched abstracts, IDs that could not be retrieved)
+
+        Raises:
+            PubMedClientError: If a request fails with a transient error
+        """
+        if len(pubmed_ids) == 1:
+            try:
+                return [await self.get_abstract_by_id(pubmed_ids[0])], []
+            except PubMedClientError as e:
+                if is_transient_error(e):
+                    raise
+                return [], list(pubmed_ids)
+
+        try:
+            abstracts = await self._fetch_batch(pubmed_ids)
+        except PubMedClientError as e:
+            if is_transient_error(e):
+                raise
+            self.logger.warning(
+                f"Error fetching batch of {len(pubmed_ids)} IDs, splitting: {str(e)}"
+            )
+            return await self._bisect_batch(pubmed_ids)
+
+        # EFetch silently omits IDs it has no record for
+        found_ids = {abstract["id"] for abstract in abstracts}
+        missing_ids = [
+            pubmed_id for pubmed_id in pubmed_ids if pubmed_id not in found_ids
+        ]
+        return abstracts, missing_ids
+
+    async def _bisect_batch(
+        self, pubmed_ids: List[str]
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Split a failed batch in half and fetch each half separately.
+
+        Args:
+            pubmed_ids: List of PubMed IDs in the failed batch
+
+        Returns:
+            Tuple of (fetched abstracts, IDs that could not be retrieved)
+
+        Raises:
+            PubMedClientError: If a request fails with a transient error. Its
+                abstracts attribute holds the abstracts fetched before that.
+        """
+        middle = len(pubmed_ids) // 2
+        left_abstracts, left_failed = await self._fetch_batch_with_bisection(
+            pubmed_ids[:middle]
+        )
+        try:
+            right_abstracts, right_failed = await self._fetch_batch_with_bisection(
+                pubmed_ids[middle:]
+            )
+        except PubMedClientError as e:
+            # The left half is already fetched
+            e.abstracts = left_abstracts + e.abstracts
+            raise
+        return left_abstracts + right_abstracts, left_failed + right_failed
@@ -1,22 +1,40 @@
 import asyncio
+import io
 import logging
+import multiprocessing
 import urllib.error
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple, Union
 
 from Bio import Entrez, Medline
 
+from src.clients.batching_pubmed_client import BatchingPubMedClient
+from src.clients.medline_utils import format_medline_record
 from src.clients.pubmed_client import (
-    PubMedClient,
     PubMedClientError,
+    PubMedConnectionError,
     PubMedRateLimitError,
+    PubMedTimeoutError,
+    parse_retry_after,
 )
+from src.clients.pubmed_summary import parse_esummary_xml
+from src.clients.pubmed_xml import parse_pubmed_xml
+from src.raw_response_cache import RawResponseCache
 
 
-class BioPythonPubMedClient(PubMedClient):
+class BioPythonPubMedClient(BatchingPubMedClient):
     """Implementation of PubMedClient using BioPython."""
 
     def __init__(
-        self, email: str, api_key: Optional[str] = None, tool: str = "bioasq-rag"
+        self,
+        email: str,
+        api_key: Optional[str] = None,
+        tool: str = "bioasq-rag",
+        efetch_batch_size: int = 200,
+        retmode: str = "text",
+        decode_processes: int = 0,
+        process_pool_min_records: int = 100,
+        raw_cache: Optional[RawResponseCache] = None,
     ):
         """
         Initialize the BioPython PubMed client.
@@ -25,13 +43,44 @@ class BioPythonPubMedClient(PubMedClient):
             email: Email address to identify yourself to NCBI
             api_key: Optional NCBI API key for higher request limits
             tool: Name of the application/tool making the request
+            efetch_batch_size: Maximum number of IDs sent in a single EFetch request
+            retmode: EFetch response format, "text" for Medline records or "xml"
+                for PubMed XML decoded incrementally with structured fields
+            decode_processes: Number of worker processes that decode large XML
+                responses (0 decodes every response in the calling thread)
+            process_pool_min_records: Smallest number of requested records for
+                which an XML response is decoded in the process pool
+            raw_cache: Cache that every fetched Medline or XML record is saved
+                to before it is formatted
+
+        Raises:
+            ValueError: If retmode is not "text" or "xml"
         """
+        if retmode not in ("text", "xml"):
+            raise ValueError(f"Unknown retmode '{retmode}', expected 'text' or 'xml'")
         self.logger = logging.getLogger(__name__)
+        self.efetch_batch_size = efetch_batch_size
+        self.retmode = retmode
+        self.process_pool_min_records = process_pool_min_records
+        self.raw_cache = raw_cache
+        # Workers are spawned rather than forked, as requests run in threads
+        self._decode_pool: Optional[ProcessPoolExecutor] = None
+        if retmode == "xml" and decode_processes > 0:
+            self._decode_pool = ProcessPoolExecutor(
+                max_workers=decode_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
         Entrez.email = email  # type: ignore
         Entrez.tool = tool  # type: ignore
         if api_key:
             Entrez.api_key = api_key  # type: ignore
 
+    async def close(self) -> None:
+        """Shut down the decoding process pool, if any."""
+        if self._decode_pool is not None:
+            await asyncio.to_thread(self._decode_pool.shutdown)
+            self._decode_pool = None
+
     async def get_abstract_by_id(self, pubmed_id: str) -> Dict[str, Any]:
         """
         Retrieve a PubMed abstract by its ID using BioPython.
@@ -46,6 +95,15 @@ class BioPythonPubMedClient(PubMedClient):
             PubMedRateLimitError: If the request is rate limited (HTTP 429)
             PubMedClientError: If there's an error retrieving the abstract
         """
+        if self.retmode == "xml":
+            abstracts = await self._efetch_xml(
+                {"id": pubmed_id}, 1, description=f"abstract {pubmed_id}"
+            )
+            if not abstracts:
+                raise PubMedClientError(f"No abstract found for ID: {pubmed_id}")
+            return abstracts[0]
+
+        await self._wait_for_rate_limit()
         try:
             return await asyncio.to_thread(self._fetch_abstract, pubmed_id)
         except urllib.error.HTTPError as e:
@@ -54,7 +112,9 @@ class BioPythonPubMedClient(PubMedClient):
                     f"Rate limit exceeded for PubMed abstract {pubmed_id}: {str(e)}"
                 )
                 raise PubMedRateLimitError(
-                    f"Rate limit exceeded for ID: {pubmed_id}", status_code=429
+                    f"Rate limit exceeded for ID: {pubmed_id}",
+                    status_code=429,
+                    retry_after=_retry_after_from_error(e),
                 ) from e
             self.logger.error(
                 f"HTTP error fetching PubMed abstract {pubmed_id}: {str(e)}"
@@ -63,44 +123,226 @@ class BioPythonPubMedClient(PubMedClient):
                 f"Failed to retrieve abstract for ID: {pubmed_id}", status_code=e.code
             ) from e
         except Exception as e:
+            if _is_timeout(e):
+                self.logger.warning(f"Timeout fetching PubMed abstract {pubmed_id}")
+                raise PubMedTimeoutError(
+                    f"Timed out retrieving abstract for ID: {pubmed_id}"
+                ) from e
+            if _is_connection_error(e):
+                self.logger.warning(
+                    f"Connection error fetching PubMed abstract {pubmed_id}: {str(e)}"
+                )
+                raise PubMedConnectionError(
+                    f"Failed to connect for abstract ID: {pubmed_id}"
+                ) from e
             self.logger.error(f"Error fetching PubMed abstract {pubmed_id}: {str(e)}")
             raise PubMedClientError(
                 f"Failed to retrieve abstract for ID: {pubmed_id}"
             ) from e
 
-    async def get_abstracts_by_ids(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+    async def _fetch_batch(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several abstracts in a single comma-joined EFetch request.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Formatted abstract data for every record returned
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error retrieving the batch
+        """
+        if self.retmode == "xml":
+            abstracts_by_id = {
+                abstract["id"]: abstract
+                for abstract in await self._efetch_xml(
+                    {"id": ",".join(pubmed_ids)},
+                    len(pubmed_ids),
+                    description=f"batch of {len(pubmed_ids)} IDs",
+                )
+            }
+            return [
+                abstracts_by_id[pubmed_id]
+                for pubmed_id in pubmed_ids
+                if pubmed_id in abstracts_by_id
+            ]
+
+        return await self._run_entrez(
+            self._fetch_abstracts,
+            pubmed_ids,
+            description=f"batch of {len(pubmed_ids)} IDs",
+        )
+
+    async def post_ids(self, pubmed_ids: List[str]) -> Tuple[str, str]:
         """
-        Retrieve multiple PubMed abstracts by their IDs using BioPython.
+        Upload PubMed IDs to the NCBI history server using EPost.
 
         Args:
             pubmed_ids: List of PubMed IDs
 
+        Returns:
+            Tuple of (WebEnv, query_key) identifying the uploaded ID set
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error uploading the IDs
+        """
+        return await self._run_entrez(
+            self._post_ids, pubmed_ids, description=f"EPost of {len(pubmed_ids)} IDs"
+        )
+
+    async def get_abstracts_from_history(
+        self, webenv: str, query_key: str, retstart: int, retmax: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve one page of abstracts from the NCBI history server.
+
+        Args:
+            webenv: WebEnv returned by post_ids
+            query_key: Query key returned by post_ids
+            retstart: Index of the first record to retrieve
+            retmax: Maximum number of records to retrieve
+
         Returns:
             List of dictionaries containing the abstract data
 
         Raises:
-            PubMedClientError: If there's an error retrieving the abstracts
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error retrieving the page
         """
-        results = []
-        failed_ids = []
+        if self.retmode == "xml":
+            return await self._efetch_xml(
+                {
+                    "webenv": webenv,
+                    "query_key": query_key,
+                    "retstart": retstart,
+                    "retmax": retmax,
+                },
+                retmax,
+                description=f"history page at retstart={retstart}",
+            )
 
-        # Get abstracts individually instead of in batch
-        for pubmed_id in pubmed_ids:
-            try:
-                abstract = await self.get_abstract_by_id(pubmed_id)
-                results.append(abstract)
-            except PubMedClientError:
-                failed_ids.append(pubmed_id)
+        return await self._run_entrez(
+            self._fetch_history_page,
+            webenv,
+            query_key,
+            retstart,
+            retmax,
+            description=f"history page at retstart={retstart}",
+        )
 
-        # If any abstracts failed to retrieve, log the error
-        if failed_ids:
-            self.logger.warning(f"Failed to retrieve abstracts for IDs: {failed_ids}")
+    async def get_summaries(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retrieve document summaries with a single ESummary request.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Summaries of the IDs that have one
 
-        return results
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error retrieving the summaries
+        """
+        return await self._run_entrez(
+            self._fetch_summaries,
+            pubmed_ids,
+            description=f"ESummary of {len(pubmed_ids)} IDs",
+        )
+
+    async def _run_entrez(
+        self, func: Callable[..., Any], *args: Any, description: str
+    ) -> Any:
+        """
+        Run a synchronous Entrez call in a thread and map its errors.
+
+        The call waits for the client's rate limiter, if it has one.
+
+        Args:
+            func: Synchronous function performing the Entrez request
+            *args: Arguments passed to func
+            description: Description of the request used in error messages
+
+        Returns:
+            The return value of func
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedTimeoutError: If the request times out
+            PubMedConnectionError: If the connection fails
+            PubMedClientError: If there's any other error
+        """
+        await self._wait_for_rate_limit()
+        try:
+            return await asyncio.to_thread(func, *args)
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                self.logger.warning(f"Rate limit exceeded for {description}: {str(e)}")
+                raise PubMedRateLimitError(
+                    f"Rate limit exceeded for {description}",
+                    status_code=429,
+                    retry_after=_retry_after_from_error(e),
+                ) from e
+            self.logger.error(f"HTTP error for {description}: {str(e)}")
+            raise PubMedClientError(
+                f"Failed request for {description}", status_code=e.code
+            ) from e
+        except PubMedClientError:
+            raise
+        except Exception as e:
+            if _is_timeout(e):
+                self.logger.warning(f"Timeout for {description}")
+                raise PubMedTimeoutError(f"Timed out for {description}") from e
+            if _is_connection_error(e):
+                self.logger.warning(f"Connection error for {description}: {str(e)}")
+                raise PubMedConnectionError(
+                    f"Failed to connect for {description}"
+                ) from e
+            self.logger.error(f"Error for {description}: {str(e)}")
+            raise PubMedClientError(f"Failed request for {description}") from e
+
+    async def _efetch_xml(
+        self, params: Dict[str, Any], num_records: int, description: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Run an XML EFetch request and decode the response.
+
+        The request runs in a thread. A response that _fetch_xml leaves for the
+        process pool is decoded there while the event loop awaits the pool's
+        future, so no thread waits for the decoding.
+
+        Args:
+            params: EFetch parameters selecting the records
+            num_records: Number of records requested
+            description: Description of the request used in error messages
+
+        Returns:
+            Formatted abstract data for every record in the response
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's any other error
+        """
+        response = await self._run_entrez(
+            self._fetch_xml, params, num_records, description=description
+        )
+        if not isinstance(response, bytes):
+            return response
+        assert self._decode_pool is not None
+        try:
+            return await asyncio.wrap_future(
+                self._decode_pool.submit(parse_pubmed_xml, response)
+            )
+        except Exception as e:
+            self.logger.error(f"Error decoding {description}: {str(e)}")
+            raise PubMedClientError(f"Failed to decode {description}") from e
 
     def _fetch_abstract(self, pubmed_id: str) -> Dict[str, Any]:
         """
-        Fetch a single abstract using BioPython's synchronous API.
+        Fetch a single Medline record using BioPython's synchronous API.
 
         Args:
             pubmed_id: The PubMed ID
@@ -108,8 +350,8 @@ class BioPythonPubMedClient(PubMedClient):
         Returns:
             Formatted abstract data
         """
-        handle = Entrez.efetch(
-            db="pubmed", id=pubmed_id, rettype="medline", retmode="text"
+        handle = self._record_response(
+            Entrez.efetch(db="pubmed", id=pubmed_id, **self._efetch_format())
         )
         records = Medline.parse(handle)
         record = next(records, None)
@@ -120,6 +362,164 @@ class BioPythonPubMedClient(PubMedClient):
 
         return self._format_record(record, pubmed_id)
 
+    def _fetch_abstracts(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several Medline records in a single EFetch request.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Formatted abstract data for every record returned, in request order
+        """
+        handle = self._record_response(
+            Entrez.efetch(db="pubmed", id=",".join(pubmed_ids), **self._efetch_format())
+        )
+        try:
+            records_by_id = {}
+            for record in Medline.parse(handle):
+                if "PMID" in record:
+                    records_by_id[record["PMID"]] = record
+        finally:
+            handle.close()
+
+        return [
+            self._format_record(records_by_id[pubmed_id], pubmed_id)
+            for pubmed_id in pubmed_ids
+            if pubmed_id in records_by_id
+        ]
+
+    def _post_ids(self, pubmed_ids: List[str]) -> Tuple[str, str]:
+        """
+        Post IDs to the history server using BioPython's synchronous API.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Tuple of (WebEnv, query_key)
+        """
+        handle = Entrez.epost(db="pubmed", id=",".join(pubmed_ids))
+        try:
+            result = Entrez.read(handle)
+        finally:
+            handle.close()
+
+        return result["WebEnv"], result["QueryKey"]
+
+    def _fetch_summaries(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch ESummary document summaries using BioPython's synchronous API.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Summaries of the IDs that have one
+        """
+        handle = Entrez.esummary(db="pubmed", id=",".join(pubmed_ids))
+        try:
+            return parse_esummary_xml(handle.read())
+        finally:
+            handle.close()
+
+    def _fetch_history_page(
+        self, webenv: str, query_key: str, retstart: int, retmax: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch one page of Medline records from the history server.
+
+        Args:
+            webenv: WebEnv of the posted ID set
+            query_key: Query key of the posted ID set
+            retstart: Index of the first record to retrieve
+            retmax: Maximum number of records to retrieve
+
+        Returns:
+            Formatted abstract data for every record in the page
+        """
+        handle = self._record_response(
+            Entrez.efetch(
+                db="pubmed",
+                webenv=webenv,
+                query_key=query_key,
+                retstart=retstart,
+                retmax=retmax,
+                **self._efetch_format(),
+            )
+        )
+        try:
+            return [
+                self._format_record(record, record["PMID"])
+                for record in Medline.parse(handle)
+                if "PMID" in record
+            ]
+        finally:
+            handle.close()
+
+    def _efetch_format(self) -> Dict[str, str]:
+        """Return the EFetch parameters selecting the response format."""
+        if self.retmode == "xml":
+            return {"retmode": "xml"}
+        return {"rettype": "medline", "retmode": "text"}
+
+    def _record_response(self, handle: IO[Any]) -> IO[Any]:
+        """
+        Save the records of an EFetch response to the raw cache, if there is one.
+
+        The response is then read in full, so it is replaced by an in-memory
+        handle over the same content.
+
+        Args:
+            handle: Handle of the EFetch response
+
+        Returns:
+            A handle to parse the response from
+        """
+        if self.raw_cache is None:
+            return handle
+        try:
+            data = handle.read()
+        finally:
+            handle.close()
+        if self.retmode == "xml":
+            self.raw_cache.record_xml(data)
+            return io.BytesIO(data)
+        text = data.decode("utf-8") if isinstance(data, bytes) else data
+        self.raw_cache.record_medline(text)
+        return io.StringIO(text)
+
+    def _fetch_xml(
+        self, params: Dict[str, Any], num_records: int
+    ) -> Union[List[Dict[str, Any]], bytes]:
+        """
+        Fetch an XML EFetch response using BioPython's synchronous API.
+
+        Responses for fewer than process_pool_min_records records are decoded
+        incrementally while they are read. Larger ones are only read, and
+        _efetch_xml decodes them in the process pool.
+
+        Args:
+            params: EFetch parameters selecting the records
+            num_records: Number of records requested
+
+        Returns:
+            Formatted abstract data for every record in the response, or the
+            undecoded payload of a response left for the process pool
+        """
+        handle = self._record_response(
+            Entrez.efetch(db="pubmed", **params, **self._efetch_format())
+        )
+        try:
+            if (
+                self._decode_pool is not None
+                and num_records >= self.process_pool_min_records
+            ):
+                return handle.read()
+            return parse_pubmed_xml(handle)
+        finally:
+            handle.close()
+
     def _format_record(self, record: Dict[str, Any], pubmed_id: str) -> Dict[str, Any]:
         """
         Format a Medline record into the expected abstract format.
@@ -131,24 +531,24 @@ class BioPythonPubMedClient(PubMedClient):
         Returns:
             Formatted abstract data
         """
-        # Extract authors from record
-        authors = []
-        if "AU" in record:
-            authors = record["AU"]
-
-        # Format publication date
-        pub_date = record.get("DP", "Unknown")
-
-        return {
-            "id": record.get("PMID", pubmed_id),
-            "title": record.get("TI", "No title available"),
-            "abstract": record.get("AB", "No abstract available"),
-            "authors": authors,
-            "publication_date": pub_date,
-            "journal": record.get("JT", "Unknown journal"),
-            "doi": record.get("LID", "").replace(" [doi]", "")
-            if "LID" in record
-            else None,
-            "keywords": record.get("MH", []),
-            "mesh_terms": record.get("MH", []),
-        }
+        return format_medline_record(record, pubmed_id)
+
+
+def _retry_after_from_error(error: urllib.error.HTTPError) -> Optional[float]:
+    """Return the Retry-After delay of an HTTP error, if the server sent one."""
+    headers = error.headers
+    return parse_retry_after(headers.get("Retry-After") if headers else None)
+
+
+def _is_timeout(error: BaseException) -> bool:
+    """Return whether an exception raised by urllib represents a timeout."""
+    if isinstance(error, TimeoutError):
+        return True
+    return isinstance(error, urllib.error.URLError) and isinstance(
+        error.reason, TimeoutError
+    )
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    """Return whether an exception raised by urllib represents a failed connection."""
+    return isinstance(error, (urllib.error.URLError, ConnectionError))
@@ -0,0 +1,335 @@
+import asyncio
+import logging
+import time
+import xml.etree.ElementTree as ET
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import httpx
+
+from src.clients.batching_pubmed_client import BatchingPubMedClient
+from src.clients.medline_utils import parse_medline_text
+from src.clients.pubmed_client import (
+    PubMedClientError,
+    PubMedConnectionError,
+    PubMedRateLimitError,
+    PubMedTimeoutError,
+    parse_retry_after,
+)
+from src.clients.pubmed_summary import parse_esummary_xml
+from src.raw_response_cache import RawResponseCache
+from src.utils.rate_limiter import AsyncTokenBucket
+
+EUTILS_BASE_URL = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+
+# Requests per second NCBI allows with and without an API key
+NCBI_RATE_LIMIT_WITH_KEY = 10
+NCBI_RATE_LIMIT = 3
+
+
+@dataclass
+class RequestTiming:
+    """Timing information for a single E-utilities request."""
+
+    endpoint: str
+    status_code: Optional[int]
+    elapsed: float
+    bytes_downloaded: int
+    bytes_decoded: int
+
+
+class HttpxPubMedClient(BatchingPubMedClient):
+    """
+    Implementation of PubMedClient using a pooled asynchronous httpx client.
+
+    Connections are kept alive and reused across requests, responses are
+    gzip-compressed on the wire, and every request is timed in request_timings.
+    Every request takes a token from rate_limiter first, including each request
+    of a bisected batch.
+    """
+
+    def __init__(
+        self,
+        email: str,
+        api_key: Optional[str] = None,
+        tool: str = "bioasq-rag",
+        efetch_batch_size: int = 200,
+        base_url: str = EUTILS_BASE_URL,
+        max_connections: int = 10,
+        timeout: float = 30.0,
+        max_timings: int = 10000,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        raw_cache: Optional[RawResponseCache] = None,
+        rate_limit_per_sec: Optional[float] = None,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
+    ):
+        """
+        Initialize the httpx PubMed client.
+
+        Args:
+            email: Email address to identify yourself to NCBI
+            api_key: Optional NCBI API key for higher request limits
+            tool: Name of the application/tool making the request
+            efetch_batch_size: Maximum number of IDs sent in a single EFetch request
+            base_url: Base URL of the E-utilities endpoints
+            max_connections: Maximum number of pooled keep-alive connections
+            timeout: Timeout in seconds for each request
+            max_timings: Number of most recent request timings to keep
+            transport: Optional httpx transport (used for testing)
+            raw_cache: Cache that every fetched Medline record is saved to
+                before it is formatted
+            rate_limit_per_sec: Maximum number of requests per second (defaults
+                to the NCBI limit: 10 with an API key, 3 without)
+            rate_limiter: Optional token bucket to share with other clients. If
+                not given, one is created from rate_limit_per_sec.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.efetch_batch_size = efetch_batch_size
+        self.base_params = {"email": email, "tool": tool}
+        self.raw_cache = raw_cache
+        if api_key:
+            self.base_params["api_key"] = api_key
+
+        if rate_limit_per_sec is None:
+            rate_limit_per_sec = NCBI_RATE_LIMIT_WITH_KEY if api_key else NCBI_RATE_LIMIT
+        self.rate_limiter = rate_limiter or AsyncTokenBucket(rate=rate_limit_per_sec)
+
+        self.request_timings: Deque[RequestTiming] = deque(maxlen=max_timings)
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Accept-Encoding": "gzip"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def close(self) -> None:
+        """Close all pooled connections."""
+        await self._client.aclose()
+
+    async def get_abstract_by_id(self, pubmed_id: str) -> Dict[str, Any]:
+        """
+        Retrieve a PubMed abstract by its ID.
+
+        Args:
+            pubmed_id: The PubMed ID of the article
+
+        Returns:
+            A dictionary containing the abstract data
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error retrieving the abstract
+        """
+        text = await self._request(
+            "efetch.fcgi",
+            {"db": "pubmed", "id": pubmed_id, "rettype": "medline", "retmode": "text"},
+            description=f"abstract for ID: {pubmed_id}",
+        )
+        await self._record_medline(text)
+        abstracts = parse_medline_text(text)
+        if not abstracts:
+            raise PubMedClientError(
+                f"Failed to retrieve abstract for ID: {pubmed_id} (no record found)"
+            )
+        return abstracts[0]
+
+    async def _fetch_batch(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several abstracts in a single comma-joined EFetch request.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Formatted abstract data for every record returned
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error retrieving the batch
+        """
+        text = await self._request(
+            "efetch.fcgi",
+            {
+                "db": "pubmed",
+                "id": ",".join(pubmed_ids),
+                "rettype": "medline",
+                "retmode": "text",
+            },
+            description=f"batch of {len(pubmed_ids)} IDs",
+        )
+        await self._record_medline(text)
+        return parse_medline_text(text)
+
+    async def post_ids(self, pubmed_ids: List[str]) -> Tuple[str, str]:
+        """
+        Upload PubMed IDs to the NCBI history server using EPost.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Tuple of (WebEnv, query_key) identifying the uploaded ID set
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error uploading the IDs
+        """
+        description = f"EPost of {len(pubmed_ids)} IDs"
+        text = await self._request(
+            "epost.fcgi",
+            {"db": "pubmed", "id": ",".join(pubmed_ids)},
+            description=description,
+        )
+        try:
+            root = ET.fromstring(text)
+        except ET.ParseError as e:
+            raise PubMedClientError(f"Invalid response for {description}") from e
+
+        webenv = root.findtext("WebEnv")
+        query_key = root.findtext("QueryKey")
+        if not webenv or not query_key:
+            error = root.findtext("ERROR") or "missing WebEnv or QueryKey"
+            raise PubMedClientError(f"Failed request for {description}: {error}")
+        return webenv, query_key
+
+    async def get_abstracts_from_history(
+        self, webenv: str, query_key: str, retstart: int, retmax: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve one page of abstracts from the NCBI history server.
+
+        Args:
+            webenv: WebEnv returned by post_ids
+            query_key: Query key returned by post_ids
+            retstart: Index of the first record to retrieve
+            retmax: Maximum number of records to retrieve
+
+        Returns:
+            List of dictionaries containing the abstract data
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error retrieving the page
+        """
+        text = await self._request(
+            "efetch.fcgi",
+            {
+                "db": "pubmed",
+                "rettype": "medline",
+                "retmode": "text",
+                "WebEnv": webenv,
+                "query_key": query_key,
+                "retstart": retstart,
+                "retmax": retmax,
+            },
+            description=f"history page at retstart={retstart}",
+        )
+        await self._record_medline(text)
+        return parse_medline_text(text)
+
+    async def get_summaries(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retrieve document summaries with a single ESummary request.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Summaries of the IDs that have one
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedClientError: If there's an error retrieving the summaries
+        """
+        description = f"ESummary of {len(pubmed_ids)} IDs"
+        text = await self._request(
+            "esummary.fcgi",
+            {"db": "pubmed", "id": ",".join(pubmed_ids)},
+            description=description,
+        )
+        try:
+            return parse_esummary_xml(text)
+        except ValueError as e:
+            raise PubMedClientError(f"Invalid response for {description}") from e
+
+    async def _record_medline(self, text: str) -> None:
+        """Save the records of a Medline response to the raw cache, if there is one."""
+        if self.raw_cache is not None:
+            # Compressing and appending the records stays off the event loop
+            await asyncio.to_thread(self.raw_cache.record_medline, text)
+
+    async def _request(
+        self, endpoint: str, params: Dict[str, Any], description: str
+    ) -> str:
+        """
+        Send a POST request to an E-utilities endpoint and record its timing.
+
+        POST is used for every request so long ID lists never exceed URL limits.
+        The request waits for a token from the client's rate limiter first.
+
+        Args:
+            endpoint: E-utilities endpoint, e.g. "efetch.fcgi"
+            params: Request parameters (credentials are added automatically)
+            description: Description of the request used in error messages
+
+        Returns:
+            Decoded response body
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited (HTTP 429)
+            PubMedTimeoutError: If the request times out
+            PubMedConnectionError: If the connection fails
+            PubMedClientError: If the request fails or returns an error status
+        """
+        await self._wait_for_rate_limit()
+        start = time.perf_counter()
+        try:
+            response = await self._client.post(
+                endpoint, data={**params, **self.base_params}
+            )
+        except httpx.HTTPError as e:
+            self.request_timings.append(
+                RequestTiming(endpoint, None, time.perf_counter() - start, 0, 0)
+            )
+            if isinstance(e, httpx.TimeoutException):
+                self.logger.warning(f"Timeout for {description}")
+                raise PubMedTimeoutError(f"Timed out for {description}") from e
+            if isinstance(e, httpx.TransportError):
+                self.logger.warning(f"Connection error for {description}: {str(e)}")
+                raise PubMedConnectionError(
+                    f"Failed to connect for {description}"
+                ) from e
+            self.logger.error(f"Error for {description}: {str(e)}")
+            raise PubMedClientError(f"Failed request for {description}") from e
+
+        self.request_timings.append(
+            RequestTiming(
+                endpoint,
+                response.status_code,
+                time.perf_counter() - start,
+                response.num_bytes_downloaded,
+                len(response.content),
+            )
+        )
+
+        if response.status_code == 429:
+            self.logger.warning(f"Rate limit exceeded for {description}")
+            raise PubMedRateLimitError(
+                f"Rate limit exceeded for {description}",
+                status_code=429,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        if response.status_code >= 400:
+            self.logger.error(
+                f"HTTP error for {description}: status {response.status_code}"
+            )
+            raise PubMedClientError(
+                f"Failed request for {description}",
+                status_code=response.status_code,
+            )
+        return response.text
@@ -0,0 +1,55 @@
+"""Helpers for turning Medline records into the abstract format."""
+
+import io
+from typing import Any, Dict, List
+
+from Bio import Medline
+
+
+def format_medline_record(record: Dict[str, Any], pubmed_id: str) -> Dict[str, Any]:
+    """
+    Format a Medline record into the expected abstract format.
+
+    Args:
+        record: Medline record from BioPython
+        pubmed_id: The PubMed ID (used as fallback if not in record)
+
+    Returns:
+        Formatted abstract data
+    """
+    # Extract authors from record
+    authors = []
+    if "AU" in record:
+        authors = record["AU"]
+
+    # Format publication date
+    pub_date = record.get("DP", "Unknown")
+
+    return {
+        "id": record.get("PMID", pubmed_id),
+        "title": record.get("TI", "No title available"),
+        "abstract": record.get("AB", "No abstract available"),
+        "authors": authors,
+        "publication_date": pub_date,
+        "journal": record.get("JT", "Unknown journal"),
+        "doi": record.get("LID", "").replace(" [doi]", "") if "LID" in record else None,
+        "keywords": record.get("MH", []),
+        "mesh_terms": record.get("MH", []),
+    }
+
+
+def parse_medline_text(text: str) -> List[Dict[str, Any]]:
+    """
+    Parse a Medline text payload holding one or more records.
+
+    Args:
+        text: Medline formatted text as returned by EFetch
+
+    Returns:
+        Formatted abstract data for every record with a PMID
+    """
+    return [
+        format_medline_record(record, record["PMID"])
+        for record in Medline.parse(io.StringIO(text))
+        if "PMID" in record
+    ]
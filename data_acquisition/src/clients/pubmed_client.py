@@ -1,5 +1,7 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional, Tuple
 
 
 class PubMedClient(ABC):
@@ -44,31 +46,188 @@ class PubMedClient(ABC):
         """
         pass
 
+    @property
+    def supports_history_server(self) -> bool:
+        """Whether the client implements post_ids and get_abstracts_from_history."""
+        cls = type(self)
+        return (
+            cls.post_ids is not PubMedClient.post_ids
+            and cls.get_abstracts_from_history
+            is not PubMedClient.get_abstracts_from_history
+        )
+
+    @property
+    def supports_esummary(self) -> bool:
+        """Whether the client implements get_summaries."""
+        return type(self).get_summaries is not PubMedClient.get_summaries
+
+    async def post_ids(self, pubmed_ids: List[str]) -> Tuple[str, str]:
+        """
+        Upload PubMed IDs to the NCBI history server (EPost).
+
+        Implementations that do not support the history server can leave this
+        method and get_abstracts_from_history as is, which makes
+        supports_history_server False; DataFetcher then falls back to EFetch
+        requests for batches of IDs.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Tuple of (WebEnv, query_key) identifying the uploaded ID set
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited
+            PubMedClientError: If there's another error uploading the IDs
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support the history server"
+        )
+
+    async def get_abstracts_from_history(
+        self, webenv: str, query_key: str, retstart: int, retmax: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Retrieve one page of abstracts from an ID set on the NCBI history server.
+
+        Args:
+            webenv: WebEnv returned by post_ids
+            query_key: Query key returned by post_ids
+            retstart: Index of the first record to retrieve
+            retmax: Maximum number of records to retrieve
+
+        Returns:
+            List of dictionaries containing the abstract data
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited
+            PubMedClientError: If there's another error retrieving the abstracts
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support the history server"
+        )
+
+    async def get_summaries(self, pubmed_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Retrieve lightweight document summaries (ESummary) for PubMed IDs.
+
+        Implementations that do not support ESummary can leave this method as is,
+        which makes supports_esummary False; callers check it before asking for
+        summaries.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            List of summaries as returned by parse_esummary_xml; IDs without a
+            summary (e.g. deleted records) are missing from the list
+
+        Raises:
+            PubMedRateLimitError: If the request is rate limited
+            PubMedClientError: If there's another error retrieving the summaries
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support ESummary")
+
+    async def close(self) -> None:
+        """Release any resources (such as open connections) held by the client."""
+        pass
+
 
 class PubMedClientError(Exception):
     """Base exception for PubMed client errors."""
 
-    def __init__(self, message: str, status_code: Optional[int] = None):
+    def __init__(
+        self,
+        message: str,
+        status_code: Optional[int] = None,
+        abstracts: Optional[List[Dict[str, Any]]] = None,
+    ):
         """
         Initialize the exception.
 
         Args:
             message: Error message
             status_code: Optional HTTP status code
+            abstracts: Abstracts a multi-request call fetched before it failed,
+                so the caller only needs to retry the rest
         """
         self.status_code = status_code
+        self.abstracts = abstracts if abstracts is not None else []
         super().__init__(message)
 
 
 class PubMedRateLimitError(PubMedClientError):
     """Exception for rate limit errors when accessing PubMed API."""
 
-    def __init__(self, message: str, status_code: int = 429):
+    def __init__(
+        self,
+        message: str,
+        status_code: int = 429,
+        retry_after: Optional[float] = None,
+        abstracts: Optional[List[Dict[str, Any]]] = None,
+    ):
         """
         Initialize the rate limit exception.
 
         Args:
             message: Error message
             status_code: HTTP status code (defaults to 429 Too Many Requests)
+            retry_after: Seconds to wait before retrying, from the Retry-After header
+            abstracts: Abstracts a multi-request call fetched before it was rate
+                limited, so the caller only needs to retry the rest
         """
-        super().__init__(message, status_code)
+        self.retry_after = retry_after
+        super().__init__(message, status_code, abstracts)
+
+
+class PubMedTimeoutError(PubMedClientError):
+    """Exception for requests to the PubMed API that timed out."""
+
+
+class PubMedConnectionError(PubMedClientError):
+    """Exception for requests to the PubMed API that failed to connect."""
+
+
+def is_transient_error(error: PubMedClientError) -> bool:
+    """
+    Return whether a failed request may succeed if it is sent again unchanged.
+
+    Rate limits, timeouts, connection failures and server errors (5xx) do not
+    depend on the IDs requested; other errors, such as a 400 or a response that
+    cannot be parsed, may.
+
+    Args:
+        error: The error raised by the request
+
+    Returns:
+        True if the request should be retried as is
+    """
+    if isinstance(
+        error, (PubMedRateLimitError, PubMedTimeoutError, PubMedConnectionError)
+    ):
+        return True
+    return error.status_code is not None and error.status_code >= 500
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value into a number of seconds.
+
+    Args:
+        value: Header value, either delay-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait (never negative), or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
@@ -0,0 +1,92 @@
+"""Parse ESummary document summaries into the fields that reveal changed records."""
+
+import hashlib
+import json
+import xml.etree.ElementTree as ET
+from typing import Any, Dict, List, Union
+
+# DocSum items whose values change when a record is corrected, retracted or
+# indexed for MEDLINE
+_LIST_ITEMS = {"PubTypeList": "pub_types", "References": "references"}
+
+
+def parse_esummary_xml(source: Union[bytes, str]) -> List[Dict[str, Any]]:
+    """
+    Parse an eSummaryResult (ESummary version 1.0 XML).
+
+    IDs without a summary (e.g. deleted records) are reported as ERROR elements
+    and have no entry in the result.
+
+    Args:
+        source: The response body
+
+    Returns:
+        One summary per DocSum with the keys id, title, doi, record_status,
+        pub_types, references, history (PubStatus to date) and last_modified
+        (the latest history date)
+
+    Raises:
+        ValueError: If the response is not valid XML
+    """
+    try:
+        root = ET.fromstring(source)
+    except ET.ParseError as e:
+        raise ValueError(f"Invalid ESummary response: {e}") from e
+
+    summaries = []
+    for doc in root.iter("DocSum"):
+        pubmed_id = (doc.findtext("Id") or "").strip()
+        if not pubmed_id:
+            continue
+        summary: Dict[str, Any] = {
+            "id": pubmed_id,
+            "title": "",
+            "doi": "",
+            "record_status": "",
+            "pub_types": [],
+            "references": [],
+            "history": {},
+        }
+        for item in doc.findall("Item"):
+            name = item.get("Name", "")
+            if name == "Title":
+                summary["title"] = (item.text or "").strip()
+            elif name == "DOI":
+                summary["doi"] = (item.text or "").strip()
+            elif name == "RecordStatus":
+                summary["record_status"] = (item.text or "").strip()
+            elif name in _LIST_ITEMS:
+                summary[_LIST_ITEMS[name]] = [
+                    f"{child.get('Name', '')}: {(child.text or '').strip()}"
+                    if name == "References"
+                    else (child.text or "").strip()
+                    for child in item.findall("Item")
+                ]
+            elif name == "History":
+                summary["history"] = {
+                    child.get("Name", ""): (child.text or "").strip()
+                    for child in item.findall("Item")
+                }
+        # History dates are "YYYY/MM/DD HH:MM", so they sort as strings
+        summary["last_modified"] = max(summary["history"].values(), default="")
+        summaries.append(summary)
+    return summaries
+
+
+def summary_fingerprint(summary: Dict[str, Any]) -> str:
+    """
+    Return a digest of the fields of a summary that change with a new revision.
+
+    Args:
+        summary: Summary returned by parse_esummary_xml
+
+    Returns:
+        Hex digest that differs between revisions of a record
+    """
+    fields = {
+        key: summary.get(key)
+        for key in ("title", "doi", "record_status", "pub_types", "references")
+    }
+    fields["history"] = sorted(summary.get("history", {}).items())
+    encoded = json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
@@ -0,0 +1,156 @@
+"""Streaming decoder for PubMed EFetch XML (retmode=xml)."""
+
+import io
+import xml.etree.ElementTree as ET
+from typing import IO, Any, Dict, Iterator, List, Optional, Union
+
+
+def iter_pubmed_xml(source: Union[bytes, IO[bytes]]) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally decode a PubmedArticleSet into the abstract format.
+
+    Each PubmedArticle element is turned into a dictionary as soon as it has
+    been read and is then cleared, so the decoded tree never holds more than
+    one article. The dictionaries have the keys produced by
+    format_medline_record, plus structured fields the Medline text format
+    does not keep apart:
+
+    - abstract_sections: list of {"label", "text"} for structured abstracts
+    - authors_full: full author names as "LastName, ForeName"
+    - keywords: the author keywords of the article (format_medline_record
+      repeats the MeSH headings here)
+
+    Args:
+        source: XML payload as bytes or a binary file object
+
+    Yields:
+        Formatted abstract data for every article with a PMID
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    # Only end events: reporting start events as well doubles the decoding cost
+    for _, elem in ET.iterparse(source, events=("end",)):
+        if elem.tag != "PubmedArticle":
+            continue
+        abstract = _format_article(elem)
+        # Free the decoded article, leaving an empty element in the article set
+        elem.clear()
+        if abstract is not None:
+            yield abstract
+
+
+def parse_pubmed_xml(source: Union[bytes, IO[bytes]]) -> List[Dict[str, Any]]:
+    """
+    Decode a PubmedArticleSet into a list of abstracts.
+
+    This is a module-level function so it can be sent to a process pool.
+
+    Args:
+        source: XML payload as bytes or a binary file object
+
+    Returns:
+        Formatted abstract data for every article with a PMID
+    """
+    return list(iter_pubmed_xml(source))
+
+
+def _text(elem: Optional[ET.Element]) -> str:
+    """Return the text of an element including inline markup, or ''."""
+    if elem is None:
+        return ""
+    return "".join(elem.itertext()).strip()
+
+
+def _format_article(article: ET.Element) -> Optional[Dict[str, Any]]:
+    """Format one PubmedArticle element, or return None if it has no PMID."""
+    citation = article.find("MedlineCitation")
+    if citation is None:
+        return None
+    pubmed_id = _text(citation.find("PMID"))
+    if not pubmed_id:
+        return None
+    info = citation.find("Article")
+    if info is None:
+        info = ET.Element("Article")
+
+    sections = [
+        {"label": section.get("Label", ""), "text": _text(section)}
+        for section in info.findall("Abstract/AbstractText")
+    ]
+    # Join labelled sections the way the Medline AB field does
+    abstract_text = " ".join(
+        f"{s['label']}: {s['text']}" if s["label"] else s["text"] for s in sections
+    )
+
+    authors = []
+    authors_full = []
+    for author in info.findall("AuthorList/Author"):
+        collective = _text(author.find("CollectiveName"))
+        if collective:
+            authors.append(collective)
+            authors_full.append(collective)
+            continue
+        last_name = _text(author.find("LastName"))
+        if not last_name:
+            continue
+        initials = _text(author.find("Initials"))
+        fore_name = _text(author.find("ForeName"))
+        authors.append(f"{last_name} {initials}".strip())
+        authors_full.append(f"{last_name}, {fore_name}" if fore_name else last_name)
+
+    return {
+        "id": pubmed_id,
+        "title": _text(info.find("ArticleTitle")) or "No title available",
+        "abstract": abstract_text or "No abstract available",
+        "authors": authors,
+        "publication_date": _publication_date(info) or "Unknown",
+        "journal": _text(info.find("Journal/Title")) or "Unknown journal",
+        "doi": _doi(article, info),
+        "keywords": [
+            _text(keyword)
+            for keyword in citation.findall("KeywordList/Keyword")
+            if _text(keyword)
+        ],
+        "mesh_terms": [
+            _mesh_term(heading)
+            for heading in citation.findall("MeshHeadingList/MeshHeading")
+        ],
+        "abstract_sections": sections,
+        "authors_full": authors_full,
+    }
+
+
+def _publication_date(info: ET.Element) -> str:
+    """Return the journal issue date in the format of the Medline DP field."""
+    pub_date = info.find("Journal/JournalIssue/PubDate")
+    if pub_date is None:
+        return ""
+    medline_date = _text(pub_date.find("MedlineDate"))
+    if medline_date:
+        return medline_date
+    parts = [_text(pub_date.find(tag)) for tag in ("Year", "Season", "Month", "Day")]
+    return " ".join(part for part in parts if part)
+
+
+def _doi(article: ET.Element, info: ET.Element) -> Optional[str]:
+    """Return the DOI of an article, if it has one."""
+    for location in info.findall("ELocationID"):
+        if location.get("EIdType") == "doi" and _text(location):
+            return _text(location)
+    for article_id in article.findall("PubmedData/ArticleIdList/ArticleId"):
+        if article_id.get("IdType") == "doi" and _text(article_id):
+            return _text(article_id)
+    return None
+
+
+def _mesh_term(heading: ET.Element) -> str:
+    """Format a MeshHeading like the Medline MH field, e.g. '*Disease/genetics'."""
+    descriptor = heading.find("DescriptorName")
+    term = _text(descriptor)
+    if descriptor is not None and descriptor.get("MajorTopicYN") == "Y":
+        term = f"*{term}"
+    for qualifier in heading.findall("QualifierName"):
+        major = "*" if qualifier.get("MajorTopicYN") == "Y" else ""
+        term += f"/{major}{_text(qualifier)}"
+    return term
@@ -1,16 +1,54 @@
 import asyncio
+import hashlib
 import json
 import logging
+import math
 import time
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import (
+    Any,
+    AsyncContextManager,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
+
+from bioasq_common.pmid_set import PMIDSet
+from bioasq_common.question_cache import QUESTION_CACHE_DIR
 
+from src.abstract_store import AbstractStore, open_abstract_store
+from src.abstract_writer import WriteBehindWriter
+from src.clients.batching_pubmed_client import BatchingPubMedClient
 from src.clients.pubmed_client import (
     PubMedClient,
     PubMedClientError,
     PubMedRateLimitError,
+    PubMedTimeoutError,
+    is_transient_error,
 )
-from src.pubmed_url_collector import PubMedURLCollector
+from src.fetch_journal import FetchJournal
+from src.fetch_stats import FetchStats, FetchStatus
+from src.pubmed_url_collector import DEFAULT_RELEASE, PubMedURLCollector
+from src.question_coverage import PriorityFunction, QuestionCoverage
+from src.release_delta import compute_release_delta, release_report_path
+from src.utils.adaptive_controller import AIMDController
+from src.utils.metrics import MetricsRegistry
+from src.utils.rate_limiter import AsyncTokenBucket
+from src.utils.worker_pool import run_worker_pool
+
+T = TypeVar("T")
+
+# Directory inside data_dir used for each storage format
+STORE_DIRECTORIES = {
+    "json": "abstracts",
+    "segments": "abstract_segments",
+    "zstd": "abstracts_zstd",
+}
 
 
 class DataFetcher:
@@ -28,6 +66,21 @@ class DataFetcher:
         max_retries: int = 3,
         retry_delay: int = 5,
         concurrent_requests: int = 10,
+        ids_per_request: int = 1,
+        use_history_server: bool = False,
+        history_page_size: int = 1000,
+        burst_size: int = 1,
+        rate_limiter: Optional[AsyncTokenBucket] = None,
+        adaptive: bool = False,
+        max_rate_limit_per_sec: Optional[float] = None,
+        journal: Optional[FetchJournal] = None,
+        storage_format: str = "json",
+        store: Optional[AbstractStore] = None,
+        write_queue_size: int = 1000,
+        fsync_writes: bool = False,
+        metrics: Optional[MetricsRegistry] = None,
+        release: str = DEFAULT_RELEASE,
+        priority: Optional[PriorityFunction] = None,
     ):
         """
         Initialize the DataFetcher with a PubMedClient implementation.
@@ -35,40 +88,255 @@ class DataFetcher:
         Args:
             pubmed_client: An implementation of PubMedClient
             data_dir: Directory to save abstracts to
-            batch_size: Number of abstracts to fetch in a single batch
+            batch_size: Maximum number of requests queued ahead of the workers
             rate_limit_per_sec: Maximum number of API requests per second
             max_retries: Maximum number of retries for failed requests
             retry_delay: Delay in seconds between retries
             concurrent_requests: Number of concurrent requests to process
+            ids_per_request: Number of PubMed IDs sent in a single request. Values
+                above 1 use the client's batched get_abstracts_by_ids path.
+            use_history_server: Whether run() uploads all IDs once with EPost and
+                pages through them on the NCBI history server
+            history_page_size: Number of records retrieved per history server page
+            burst_size: Number of requests that may be sent back-to-back after idle time
+            rate_limiter: Optional token bucket to share with other fetchers or clients.
+                If not given, one is created from rate_limit_per_sec and burst_size.
+                It replaces the rate limiter of a BatchingPubMedClient, which
+                then takes a token for each request it sends.
+            adaptive: Whether to adjust the request rate and concurrency at runtime
+                (AIMD), starting from rate_limit_per_sec and concurrent_requests
+            max_rate_limit_per_sec: Highest rate the adaptive controller may reach
+                (defaults to twice rate_limit_per_sec)
+            journal: Optional fetch journal. If not given, the journal at
+                data_dir/fetch_journal.sqlite is opened (and created if needed).
+            storage_format: How abstracts are saved: "json" for one file per
+                abstract in data_dir/abstracts, "segments" for a packed segment
+                store in data_dir/abstract_segments, or "zstd" for one compressed
+                file per abstract in data_dir/abstracts_zstd
+            store: Optional abstract store to use instead of storage_format
+            write_queue_size: Maximum number of fetched abstracts waiting to be
+                written before fetching pauses
+            fsync_writes: Whether to fsync each batch of written abstracts
+            metrics: Optional registry to record the fetcher's metrics in. If not
+                given, a new registry is created.
+            release: BioASQ release whose URLs run() collects, e.g. "BioASQ-13b"
+            priority: Optional function scoring PubMed IDs. IDs with higher
+                scores are requested first; without one, IDs are requested in
+                no particular order.
         """
         self.pubmed_client = pubmed_client
         self.logger = logging.getLogger(__name__)
         self.data_dir = Path(data_dir)
-        self.abstracts_dir = self.data_dir / "abstracts"
-        self.abstracts_dir.mkdir(parents=True, exist_ok=True)
+        # An empty store is falsy, so test for None explicitly
+        if store is None:
+            store = open_abstract_store(
+                self.data_dir / STORE_DIRECTORIES[storage_format], storage_format
+            )
+        self.store = store
+        self.abstracts_dir = self.store.directory
 
         self.batch_size = batch_size
         self.rate_limit_per_sec = rate_limit_per_sec
         self.max_retries = max_retries
         self.retry_delay = retry_delay
         self.concurrent_requests = concurrent_requests
+        self.ids_per_request = ids_per_request
+        self.use_history_server = use_history_server
+        self.history_page_size = history_page_size
+        self.history_state_path = self.data_dir / "history_state.json"
+        self.priority = priority
+        self.coverage_report_path = self.data_dir / "question_coverage.json"
 
-        # Calculate delay between requests to respect rate limit
-        self.request_delay = 1.0 / rate_limit_per_sec
+        # Token bucket shared by all requests to respect the rate limit
+        self.rate_limiter = rate_limiter or AsyncTokenBucket(
+            rate=rate_limit_per_sec, burst=burst_size
+        )
+        # A batching client takes a token for every request it sends, so the
+        # extra requests of a bisected batch are rate limited too
+        if isinstance(pubmed_client, BatchingPubMedClient):
+            pubmed_client.rate_limiter = self.rate_limiter
 
         # Semaphore to control concurrent requests
         self.semaphore = asyncio.Semaphore(concurrent_requests)
 
-        # For tracking rate limits
-        self.last_request_time = 0.0
+        # Optional controller that adapts rate and concurrency to server feedback
+        self.controller: Optional[AIMDController] = None
+        if adaptive:
+            max_rate = max_rate_limit_per_sec or rate_limit_per_sec * 2
+            self.controller = AIMDController(
+                self.rate_limiter,
+                min_rate=min(1.0, rate_limit_per_sec),
+                max_rate=max_rate,
+                max_concurrency=max(concurrent_requests, math.ceil(max_rate)),
+            )
+
+        # For logging the achieved request rate
         self.request_count = 0
         self.request_window_start = time.time()
 
         # URL collector for getting PubMed URLs
-        self.url_collector = PubMedURLCollector(data_dir=data_dir)
+        self.release = release
+        self.url_collector = PubMedURLCollector(data_dir=data_dir, release=release)
+        # Whole questions are only loaded for the question coverage
+        self.question_cache_dir = self.data_dir / QUESTION_CACHE_DIR
+
+        # Fetches in flight by PubMed ID, joined by concurrent callers, and
+        # fetched abstracts the writer has not saved yet, so that no abstract
+        # is requested or written twice
+        self._pending_fetches: Dict[
+            str, "asyncio.Future[Optional[Dict[str, Any]]]"
+        ] = {}
+        self._unwritten: Dict[str, Dict[str, Any]] = {}
+
+        # Track the IDs of URLs that failed in this run (membership tests accept
+        # the URLs themselves)
+        self.failed_urls = PMIDSet()
+
+        # Persistent per-PMID fetch status
+        self.journal = journal or FetchJournal(self.data_dir / "fetch_journal.sqlite")
+
+        # PMIDs already saved, read once from the journal so resumed runs skip
+        # them cheaply. A new journal is seeded with a scan of the abstracts.
+        if self.journal.is_empty():
+            self.journal.import_fetched(self._scan_existing_abstracts())
+        self.existing_ids = self.journal.ids_with_status(FetchStatus.FETCHED)
+        self.logger.info(
+            f"Found {len(self.existing_ids)} already downloaded abstracts in {self.journal.path}"
+        )
+
+        # Abstracts are written by a background thread, off the event loop
+        self.writer = WriteBehindWriter(
+            self.store,
+            max_pending=write_queue_size,
+            fsync=fsync_writes,
+            on_written=self._on_abstracts_written,
+            on_failed=self._on_abstracts_failed,
+        )
+
+        # Request, retry and queue metrics, scraped or snapshotted by the caller
+        self.metrics = metrics or MetricsRegistry()
+        self._register_metrics()
+
+    def close(self) -> None:
+        """Write pending abstracts and journal updates, then close the journal and the store."""
+        self.writer.close()
+        self.journal.close()
+        self.store.close()
+
+    def _register_metrics(self) -> None:
+        """Create the fetcher's metrics in the registry."""
+        m = self.metrics
+        self._requests = m.counter(
+            "fetcher_requests", "E-utilities requests by outcome"
+        )
+        self._retries = m.counter("fetcher_retries", "Requests retried after a failure")
+        self._skipped = m.counter(
+            "fetcher_skipped", "PubMed IDs skipped because they are already saved"
+        )
+        self._coalesced = m.counter(
+            "fetcher_coalesced",
+            "Requests for a PubMed ID that joined a fetch already in flight",
+        )
+        self._written = m.counter(
+            "fetcher_abstracts_written", "Abstracts written to the store"
+        )
+        self._failed = m.counter(
+            "fetcher_abstracts_failed", "PubMed IDs whose abstract could not be fetched"
+        )
+        self._latency = m.histogram(
+            "fetcher_request_latency_seconds", "Duration of E-utilities requests"
+        )
+        self._backoff_time = m.histogram(
+            "fetcher_backoff_seconds", "Delays waited before retrying a request"
+        )
+        self._in_flight = m.gauge(
+            "fetcher_requests_in_flight", "E-utilities requests currently in flight"
+        )
+        self._pending_urls = m.gauge(
+            "fetcher_pending_urls", "URLs of the current fetch not yet processed"
+        )
+        m.gauge(
+            "fetcher_write_queue_depth", "Abstracts waiting to be written"
+        ).set_function(lambda: self.writer.pending)
+        m.gauge(
+            "fetcher_rate_limit_per_second", "Current request rate limit"
+        ).set_function(lambda: self.rate_limiter.rate)
+        m.gauge(
+            "fetcher_concurrency_limit", "Current limit of concurrent requests"
+        ).set_function(
+            lambda: (
+                self.controller.concurrency
+                if self.controller
+                else self.concurrent_requests
+            )
+        )
+
+    def _scan_existing_abstracts(self) -> Set[str]:
+        """
+        Collect the PubMed IDs of all abstracts in the store.
+
+        Returns:
+            Set of PubMed IDs that already have a saved abstract
+        """
+        existing_ids = self.store.ids()
+        self.logger.info(
+            f"Found {len(existing_ids)} abstracts in {self.abstracts_dir} to add to the journal"
+        )
+        return existing_ids
+
+    def _load_abstract(self, pubmed_id: str) -> Dict[str, Any]:
+        """
+        Load a saved abstract from the store.
+
+        Args:
+            pubmed_id: The PubMed ID of the abstract
+
+        Returns:
+            The saved abstract data
+        """
+        return self.store.get(pubmed_id)
+
+    async def _save_abstract(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        """
+        Queue an abstract for the background writer.
+
+        Waits while the writer is too far behind, so fetching slows down to the
+        speed of the disk.
+
+        Args:
+            pubmed_id: The PubMed ID of the abstract
+            abstract: The abstract data
+        """
+        self._unwritten[pubmed_id] = abstract
+        try:
+            await self.writer.submit(pubmed_id, abstract)
+        except BaseException:
+            # Never serve an abstract the writer did not accept
+            self._unwritten.pop(pubmed_id, None)
+            raise
 
-        # Track failed URLs
-        self.failed_urls: Set[str] = set()
+    def _on_abstracts_written(self, pubmed_ids: List[str]) -> None:
+        """
+        Add written abstracts to the index of saved abstracts and the journal.
+
+        Args:
+            pubmed_ids: PubMed IDs of the abstracts written to the store
+        """
+        self.existing_ids.update(pubmed_ids)
+        for pubmed_id in pubmed_ids:
+            self._unwritten.pop(pubmed_id, None)
+        self.journal.record_fetched(pubmed_ids)
+        self._written.inc(len(pubmed_ids))
+
+    def _on_abstracts_failed(self, pubmed_ids: List[str]) -> None:
+        """
+        Forget abstracts the writer could not save.
+
+        Args:
+            pubmed_ids: PubMed IDs of the abstracts whose write failed
+        """
+        for pubmed_id in pubmed_ids:
+            self._unwritten.pop(pubmed_id, None)
 
     def _extract_pubmed_id(self, url: str) -> str:
         """
@@ -83,10 +351,173 @@ class DataFetcher:
         # Simple extraction based on URL structure
         return url.split("/")[-1]
 
+    def _by_priority(self, pubmed_ids: Iterable[str]) -> List[str]:
+        """
+        Order PubMed IDs highest priority first.
+
+        Args:
+            pubmed_ids: The IDs to order
+
+        Returns:
+            The IDs by descending priority, ties in ascending ID order
+        """
+        ordered = sorted(pubmed_ids)
+        if self.priority is not None:
+            # The sort is stable, so IDs with equal scores stay in ID order
+            ordered.sort(key=self.priority, reverse=True)
+        return ordered
+
+    def _request_slot(self) -> AsyncContextManager[Any]:
+        """Return the context manager that limits concurrent requests."""
+        if self.controller:
+            return self.controller.slot()
+        return self.semaphore
+
+    async def _send(self, request: Awaitable[T]) -> T:
+        """
+        Await an E-utilities request, counting it as in flight meanwhile.
+
+        The gauge is decremented exactly once however the request ends, so it
+        stays correct whether or not _record_outcome is called for it.
+
+        Args:
+            request: The client call to await
+
+        Returns:
+            The result of the request
+        """
+        self._in_flight.inc()
+        try:
+            return await request
+        finally:
+            self._in_flight.dec()
+
+    def _record_outcome(
+        self,
+        latency: float,
+        error: Optional[BaseException] = None,
+        pubmed_ids: Iterable[str] = (),
+    ) -> None:
+        """
+        Report the outcome of a request to the journal and the adaptive controller.
+
+        The in-flight gauge is kept by _send, not here.
+
+        Args:
+            latency: Duration of the request in seconds
+            error: The exception raised by the request, or None on success
+            pubmed_ids: PubMed IDs included in the request
+        """
+        for pubmed_id in pubmed_ids:
+            self.journal.record_attempt(pubmed_id, error)
+
+        self._latency.observe(latency)
+        if error is None:
+            outcome = "success"
+        elif isinstance(error, PubMedRateLimitError):
+            outcome = "rate_limited"
+        elif isinstance(error, PubMedTimeoutError):
+            outcome = "timeout"
+        else:
+            outcome = "error"
+        self._requests.inc(outcome=outcome)
+
+        if not self.controller:
+            return
+        if error is None:
+            self.controller.record_success(latency)
+        elif isinstance(error, PubMedRateLimitError):
+            self.controller.record_throttle(error.retry_after)
+        elif isinstance(error, PubMedTimeoutError):
+            self.controller.record_timeout()
+        else:
+            self.controller.record_error()
+
+    def _rate_limit_backoff(self, error: PubMedRateLimitError, attempt: int) -> float:
+        """
+        Return how long to wait after a rate limit error.
+
+        Args:
+            error: The rate limit error
+            attempt: Zero-based attempt number
+
+        Returns:
+            The server's Retry-After delay if given, else exponential backoff
+        """
+        if error.retry_after is not None:
+            return error.retry_after
+        return self.retry_delay * (2**attempt)
+
+    async def _backoff(self, wait_time: float) -> None:
+        """
+        Wait before retrying a failed request.
+
+        Args:
+            wait_time: Seconds to wait
+        """
+        self._retries.inc()
+        self._backoff_time.observe(wait_time)
+        await asyncio.sleep(wait_time)
+
+    async def _wait_for_rate_limit(self) -> None:
+        """Wait until the next request is allowed by the rate limit."""
+        if self.controller:
+            await self.controller.wait_for_backoff()
+        # A client sharing the rate limiter takes the token for each request
+        if getattr(self.pubmed_client, "rate_limiter", None) is not self.rate_limiter:
+            await self.rate_limiter.acquire()
+
+        # Track request rate for logging
+        now = time.time()
+        self.request_count += 1
+        if now - self.request_window_start >= 10:  # Log every 10 seconds
+            requests_per_sec = self.request_count / (now - self.request_window_start)
+            self.logger.info(
+                f"Current request rate: {requests_per_sec:.2f} requests/second"
+            )
+            self.request_count = 0
+            self.request_window_start = now
+
+    def _saved_abstract(self, pubmed_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return an abstract that is saved or waiting for the writer.
+
+        Args:
+            pubmed_id: The PubMed ID of the abstract
+
+        Returns:
+            The abstract, or None if it has not been fetched
+        """
+        if pubmed_id in self.existing_ids:
+            self.logger.debug(f"Abstract for {pubmed_id} already exists. Skipping.")
+            return self._load_abstract(pubmed_id)
+        return self._unwritten.get(pubmed_id)
+
+    def _share_fetch(
+        self, pubmed_id: str, fetch: "asyncio.Future[Optional[Dict[str, Any]]]"
+    ) -> None:
+        """
+        Register the fetch of a PubMed ID for concurrent callers to join.
+
+        Args:
+            pubmed_id: The PubMed ID being fetched
+            fetch: Future resolved with the abstract, or None if the fetch failed
+        """
+        self._pending_fetches[pubmed_id] = fetch
+
+        def forget(done: "asyncio.Future[Optional[Dict[str, Any]]]") -> None:
+            if self._pending_fetches.get(pubmed_id) is done:
+                del self._pending_fetches[pubmed_id]
+
+        fetch.add_done_callback(forget)
+
     async def fetch_single_abstract(self, url: str) -> Optional[Dict[str, Any]]:
         """
         Fetch a single abstract from a PubMed URL with retry logic.
 
+        Concurrent calls for the same PubMed ID, including IDs that are part of
+        a batch in flight, share one request instead of sending their own.
+
         Args:
             url: PubMed URL
 
@@ -96,55 +527,52 @@ class DataFetcher:
         pubmed_id = self._extract_pubmed_id(url)
 
         # Check if already saved
-        abstract_path = self.abstracts_dir / f"{pubmed_id}.json"
-        if abstract_path.exists():
-            self.logger.info(f"Abstract for {pubmed_id} already exists. Skipping.")
-            with open(abstract_path, "r", encoding="utf-8") as f:
-                return json.load(f)
+        abstract = self._saved_abstract(pubmed_id)
+        if abstract is not None:
+            return abstract
 
-        async with self.semaphore:
-            # Implement rate limiting
-            now = time.time()
-            elapsed = now - self.last_request_time
-            if elapsed < self.request_delay:
-                await asyncio.sleep(self.request_delay - elapsed)
+        fetch = self._pending_fetches.get(pubmed_id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._request_single_abstract(url, pubmed_id))
+            self._share_fetch(pubmed_id, fetch)
+        else:
+            self.logger.debug(f"Joining the request in flight for {pubmed_id}")
+            self._coalesced.inc()
+        # A cancelled caller must not cancel the request others are waiting for
+        return await asyncio.shield(fetch)
 
-            self.last_request_time = time.time()
+    async def _request_single_abstract(
+        self, url: str, pubmed_id: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Request a single abstract, retrying rate-limited and failed requests.
 
-            # Track request rate for logging
-            self.request_count += 1
-            if now - self.request_window_start >= 10:  # Log every 10 seconds
-                requests_per_sec = self.request_count / (
-                    now - self.request_window_start
-                )
-                self.logger.info(
-                    f"Current request rate: {requests_per_sec:.2f} requests/second"
-                )
-                self.request_count = 0
-                self.request_window_start = now
+        Args:
+            url: PubMed URL
+            pubmed_id: The PubMed ID in the URL
 
+        Returns:
+            Dictionary containing abstract data or None if retrieval failed
+        """
+        async with self._request_slot():
             # Retry logic
             for attempt in range(self.max_retries):
+                await self._wait_for_rate_limit()
+                start = time.monotonic()
                 try:
                     self.logger.info(f"Fetching abstract for URL: {url}")
-                    abstract = await self.pubmed_client.get_abstract_by_id(pubmed_id)
-                    self.logger.info(f"Successfully fetched abstract for {url}")
-
-                    # Save the abstract
-                    with open(abstract_path, "w", encoding="utf-8") as f:
-                        json.dump(abstract, f, indent=2)
-
-                    return abstract
-                except PubMedRateLimitError:
+                    abstract = await self._send(
+                        self.pubmed_client.get_abstract_by_id(pubmed_id)
+                    )
+                except PubMedRateLimitError as e:
                     # Handle rate limit errors specifically with exponential backoff
+                    self._record_outcome(time.monotonic() - start, e, [pubmed_id])
                     if attempt < self.max_retries - 1:
-                        wait_time = self.retry_delay * (
-                            2**attempt
-                        )  # Exponential backoff
+                        wait_time = self._rate_limit_backoff(e, attempt)
                         self.logger.warning(
                             f"Rate limit hit for {url} (HTTP 429). Retrying in {wait_time} seconds..."
                         )
-                        await asyncio.sleep(wait_time)
+                        await self._backoff(wait_time)
                     else:
                         self.logger.error(
                             f"Rate limit exceeded for {url} after {self.max_retries} attempts."
@@ -152,78 +580,694 @@ class DataFetcher:
                         # Add to failed URLs
                         self.failed_urls.add(url)
                         return None
+                except PubMedTimeoutError as e:
+                    # Timeouts are transient, so retry with a growing delay
+                    self._record_outcome(time.monotonic() - start, e, [pubmed_id])
+                    if attempt < self.max_retries - 1:
+                        wait_time = self.retry_delay * (attempt + 1)
+                        self.logger.warning(
+                            f"Timeout fetching {url}. Retrying in {wait_time} seconds..."
+                        )
+                        await self._backoff(wait_time)
+                    else:
+                        self.logger.error(
+                            f"Timed out fetching {url} after {self.max_retries} attempts."
+                        )
+                        self.failed_urls.add(url)
+                        return None
                 except PubMedClientError as e:
                     # Other client errors - generally not worth retrying
+                    self._record_outcome(time.monotonic() - start, e, [pubmed_id])
                     self.logger.error(f"Error fetching abstract for {url}: {str(e)}")
                     # Add to failed URLs
                     self.failed_urls.add(url)
                     return None
                 except Exception as e:
                     # Unexpected errors
+                    self._record_outcome(time.monotonic() - start, e, [pubmed_id])
                     self.logger.error(
                         f"Unexpected error fetching abstract for {url}: {str(e)}"
                     )
                     if attempt < self.max_retries - 1:
                         wait_time = self.retry_delay * (attempt + 1)
                         self.logger.warning(f"Retrying in {wait_time} seconds...")
-                        await asyncio.sleep(wait_time)
+                        await self._backoff(wait_time)
                     else:
                         # Add to failed URLs
                         self.failed_urls.add(url)
                         return None
+                else:
+                    self._record_outcome(
+                        time.monotonic() - start, pubmed_ids=[pubmed_id]
+                    )
+                    self.logger.info(f"Successfully fetched abstract for {url}")
+                    break
+            else:
+                # Add to failed URLs if all retries fail
+                self.failed_urls.add(url)
+                return None
 
-            # Add to failed URLs if all retries fail
-            self.failed_urls.add(url)
-            return None
+            # Saved outside the request's error handling: a failed write stops
+            # the run instead of being retried as a failed request
+            if abstract:
+                await self._save_abstract(pubmed_id, abstract)
+            return abstract
+
+    async def fetch_abstract_batch(self, urls: List[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch several abstracts with a single batched request, with retry logic.
+
+        Abstracts that already exist on disk are loaded instead of fetched. IDs
+        already being fetched by another call wait for that request instead of
+        being requested again. IDs the client could not retrieve are added to the
+        failed URLs.
+
+        Args:
+            urls: List of PubMed URLs
+
+        Returns:
+            List of successfully fetched (or already saved) abstracts
+        """
+        abstracts = []
+        ids_to_urls = {}
+        joined = []
+        for url in urls:
+            pubmed_id = self._extract_pubmed_id(url)
+            abstract = self._saved_abstract(pubmed_id)
+            if abstract is not None:
+                abstracts.append(abstract)
+            elif pubmed_id in self._pending_fetches:
+                joined.append(self._pending_fetches[pubmed_id])
+            else:
+                ids_to_urls[pubmed_id] = url
+        self._coalesced.inc(len(joined))
+
+        fetches = []
+        if ids_to_urls:
+            batch = asyncio.ensure_future(self._request_abstract_batch(ids_to_urls))
+            loop = asyncio.get_running_loop()
+            futures = {pubmed_id: loop.create_future() for pubmed_id in ids_to_urls}
+            for pubmed_id, future in futures.items():
+                self._share_fetch(pubmed_id, future)
+
+            def resolve(done: "asyncio.Future[Dict[str, Dict[str, Any]]]") -> None:
+                for pubmed_id, future in futures.items():
+                    if future.done():
+                        continue
+                    if done.cancelled():
+                        future.cancel()
+                    elif done.exception() is not None:
+                        future.set_exception(done.exception())
+                    else:
+                        future.set_result(done.result().get(pubmed_id))
+
+            batch.add_done_callback(resolve)
+            fetches = list(futures.values())
+
+        # A cancelled caller must not cancel the requests others are waiting for
+        for abstract in await asyncio.shield(asyncio.gather(*fetches, *joined)):
+            if abstract is not None:
+                abstracts.append(abstract)
+        return abstracts
+
+    async def _request_abstract_batch(
+        self, ids_to_urls: Dict[str, str]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Request several abstracts with one batched request, with retry logic.
+
+        Abstracts the client fetched before it was rate limited are kept, and
+        only the remaining IDs are requested again.
+
+        Args:
+            ids_to_urls: PubMed IDs to request and their URLs
 
-    async def fetch_all_abstracts(self, urls: Set[str]) -> List[Dict[str, Any]]:
+        Returns:
+            The abstracts retrieved, by PubMed ID
+        """
+        async with self._request_slot():
+            fetched: List[Dict[str, Any]] = []
+            pending = list(ids_to_urls)
+            for attempt in range(self.max_retries):
+                await self._wait_for_rate_limit()
+                start = time.monotonic()
+                try:
+                    self.logger.info(f"Fetching batch of {len(pending)} abstracts")
+                    fetched += await self._send(
+                        self.pubmed_client.get_abstracts_by_ids(pending)
+                    )
+                except PubMedClientError as e:
+                    if not is_transient_error(e):
+                        self._record_outcome(time.monotonic() - start, e, pending)
+                        self.logger.error(
+                            f"Error fetching batch of abstracts: {str(e)}"
+                        )
+                        break
+                    # Abstracts fetched before the error are kept and not
+                    # requested again
+                    fetched += e.abstracts
+                    partial_ids = {
+                        str(abstract.get("id", "")) for abstract in e.abstracts
+                    }
+                    for pubmed_id in partial_ids & set(pending):
+                        self.journal.record_attempt(pubmed_id)
+                    pending = [
+                        pubmed_id
+                        for pubmed_id in pending
+                        if pubmed_id not in partial_ids
+                    ]
+                    self._record_outcome(time.monotonic() - start, e, pending)
+                    if attempt == self.max_retries - 1:
+                        self.logger.error(
+                            f"Giving up on batch after {self.max_retries} attempts: {str(e)}"
+                        )
+                    elif isinstance(e, PubMedRateLimitError):
+                        wait_time = self._rate_limit_backoff(e, attempt)
+                        self.logger.warning(
+                            f"Rate limit hit for batch (HTTP 429). Retrying in {wait_time} seconds..."
+                        )
+                        await self._backoff(wait_time)
+                    else:
+                        # Timeouts and server errors are transient, so retry
+                        # with a growing delay
+                        wait_time = self.retry_delay * (attempt + 1)
+                        self.logger.warning(
+                            f"Error fetching batch: {str(e)}. Retrying in {wait_time} seconds..."
+                        )
+                        await self._backoff(wait_time)
+                except Exception as e:
+                    self._record_outcome(time.monotonic() - start, e, pending)
+                    self.logger.error(f"Error fetching batch of abstracts: {str(e)}")
+                    break
+                else:
+                    self._record_outcome(time.monotonic() - start, pubmed_ids=pending)
+                    break
+
+        # Saved outside the request's error handling: a failed write stops the
+        # run instead of being retried as a failed request
+        abstracts: Dict[str, Dict[str, Any]] = {}
+        for abstract in fetched:
+            pubmed_id = str(abstract.get("id", ""))
+            if pubmed_id not in ids_to_urls:
+                continue
+            await self._save_abstract(pubmed_id, abstract)
+            abstracts[pubmed_id] = abstract
+
+        for pubmed_id, url in ids_to_urls.items():
+            if pubmed_id not in abstracts:
+                self.failed_urls.add(url)
+
+        self.logger.info(
+            f"Successfully fetched {len(abstracts)}/{len(ids_to_urls)} abstracts in batch"
+        )
+        return abstracts
+
+    async def fetch_summaries(
+        self, pubmed_ids: List[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch the ESummary document summaries of PubMed IDs, with retry logic.
+
+        Summary requests share the rate limiter, concurrency limit and metrics of
+        abstract requests, but are not counted as attempts in the journal.
+
+        Args:
+            pubmed_ids: List of PubMed IDs
+
+        Returns:
+            Summaries of the IDs that have one, or None if the request failed
+
+        Raises:
+            ValueError: If the client does not support ESummary
+        """
+        if not self.pubmed_client.supports_esummary:
+            raise ValueError(
+                f"{type(self.pubmed_client).__name__} does not support ESummary"
+            )
+        async with self._request_slot():
+            for attempt in range(self.max_retries):
+                await self._wait_for_rate_limit()
+                start = time.monotonic()
+                try:
+                    summaries = await self._send(
+                        self.pubmed_client.get_summaries(pubmed_ids)
+                    )
+                    self._record_outcome(time.monotonic() - start)
+                    return summaries
+                except PubMedRateLimitError as e:
+                    self._record_outcome(time.monotonic() - start, e)
+                    if attempt < self.max_retries - 1:
+                        wait_time = self._rate_limit_backoff(e, attempt)
+                        self.logger.warning(
+                            f"Rate limit hit for summaries (HTTP 429). Retrying in {wait_time} seconds..."
+                        )
+                        await self._backoff(wait_time)
+                    else:
+                        self.logger.error(
+                            f"Rate limit exceeded for summaries after {self.max_retries} attempts."
+                        )
+                except Exception as e:
+                    self._record_outcome(time.monotonic() - start, e)
+                    self.logger.error(
+                        f"Error fetching summaries of {len(pubmed_ids)} IDs: {str(e)}"
+                    )
+                    break
+        return None
+
+    async def fetch_all_abstracts(
+        self,
+        urls: Set[str],
+        on_complete: Optional[Callable[[List[str], List[Dict[str, Any]]], None]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch all abstracts from a set of URLs and return the newly fetched ones.
+
+        This keeps every fetched abstract in memory; use stream_all_abstracts to
+        only keep track of the outcome per PubMed ID.
+
+        Args:
+            urls: Set of PubMed URLs to fetch
+            on_complete: Optional callback called after each request with the URLs
+                it covered and the abstracts retrieved for them
+
+        Returns:
+            List of newly fetched abstracts
+        """
+        all_abstracts: List[Dict[str, Any]] = []
+
+        def collect(group: List[str], abstracts: List[Dict[str, Any]]) -> None:
+            all_abstracts.extend(abstracts)
+            if on_complete:
+                on_complete(group, abstracts)
+
+        await self.stream_all_abstracts(urls, on_complete=collect)
+        return all_abstracts
+
+    async def stream_all_abstracts(
+        self,
+        urls: Set[str],
+        on_complete: Optional[Callable[[List[str], List[Dict[str, Any]]], None]] = None,
+    ) -> FetchStats:
         """
         Fetch all abstracts from a set of URLs concurrently while respecting rate limits.
 
+        URLs whose abstracts are already saved are skipped without being read, and
+        only the remaining ones are fed to a pool of long-lived workers. Each worker
+        starts its next request as soon as the previous one is done, so a slow or
+        backing-off request never holds back the others. Fetched abstracts are saved
+        and then dropped, so memory use does not grow with the number of abstracts.
+
         Args:
             urls: Set of PubMed URLs to fetch
+            on_complete: Optional callback called after each request with the URLs
+                it covered and the abstracts retrieved for them
 
         Returns:
-            List of successfully fetched abstracts
+            Outcome of every requested PubMed ID
         """
-        all_abstracts = []
-        url_list = list(urls)
+        stats = FetchStats()
+        url_list = []
+        for url in urls:
+            pubmed_id = self._extract_pubmed_id(url)
+            if pubmed_id in self.existing_ids:
+                stats.record(pubmed_id, FetchStatus.ALREADY_DOWNLOADED)
+            else:
+                url_list.append(url)
+        ids_to_urls = {self._extract_pubmed_id(url): url for url in url_list}
+        self.journal.register(ids_to_urls)
+        if self.priority is not None:
+            url_list = [
+                ids_to_urls[pubmed_id] for pubmed_id in self._by_priority(ids_to_urls)
+            ]
         total_urls = len(url_list)
+        completed_urls = 0
+        self._skipped.inc(stats.already_downloaded)
+        self._pending_urls.set(total_urls)
+        if stats.already_downloaded:
+            self.logger.info(
+                f"Skipping {stats.already_downloaded} already downloaded abstracts"
+            )
+
+        # Each work item covers ids_per_request URLs
+        groups = [
+            url_list[i : i + self.ids_per_request]
+            for i in range(0, total_urls, self.ids_per_request)
+        ]
+        # With adaptive control the slots limit concurrency, so run enough
+        # workers for the highest concurrency the controller may allow
+        num_workers = (
+            self.controller.max_concurrency
+            if self.controller
+            else self.concurrent_requests
+        )
 
         self.logger.info(
-            f"Starting to fetch {total_urls} abstracts with max {self.concurrent_requests} concurrent requests"
+            f"Starting to fetch {total_urls} abstracts with max {num_workers} concurrent requests"
         )
 
-        # Process URLs in batches to avoid creating too many tasks at once
-        for i in range(0, total_urls, self.batch_size):
-            batch_urls = url_list[i : i + self.batch_size]
-            self.logger.info(
-                f"Processing batch {i // self.batch_size + 1}/{(total_urls - 1) // self.batch_size + 1} with {len(batch_urls)} URLs"
-            )
+        async def fetch_group(group: List[str]) -> List[Dict[str, Any]]:
+            if self.ids_per_request > 1:
+                return await self.fetch_abstract_batch(group)
+            abstract = await self.fetch_single_abstract(group[0])
+            return [abstract] if abstract else []
+
+        def record_group(group: List[str], abstracts: List[Dict[str, Any]]) -> None:
+            nonlocal completed_urls
+            if self.ids_per_request > 1:
+                fetched_ids = {str(abstract.get("id", "")) for abstract in abstracts}
+            else:
+                # A single request is saved under the requested ID
+                fetched_ids = (
+                    {self._extract_pubmed_id(group[0])} if abstracts else set()
+                )
+            for url in group:
+                pubmed_id = self._extract_pubmed_id(url)
+                status = (
+                    FetchStatus.FETCHED
+                    if pubmed_id in fetched_ids
+                    else FetchStatus.FAILED
+                )
+                stats.record(pubmed_id, status)
+                # Fetched IDs are journaled once the writer has saved them
+                if status is FetchStatus.FAILED:
+                    self.journal.record_status(pubmed_id, url, status)
+                    self._failed.inc()
+            previous = completed_urls
+            completed_urls += len(group)
+            self._pending_urls.set(total_urls - completed_urls)
+            if on_complete:
+                on_complete(group, abstracts)
+
+            # Log progress every batch_size requests' worth of URLs
+            urls_per_log = self.batch_size * self.ids_per_request
+            if (
+                completed_urls // urls_per_log > previous // urls_per_log
+                or completed_urls == total_urls
+            ):
+                self.logger.info(
+                    f"Total progress: {completed_urls}/{total_urls} URLs processed, {stats.fetched} abstracts fetched ({completed_urls / total_urls * 100:.1f}%)"
+                )
+
+        await run_worker_pool(
+            groups,
+            fetch_group,
+            num_workers=num_workers,
+            on_complete=record_group,
+            max_pending=self.batch_size,
+        )
+        await self.writer.drain()
+        self.journal.flush()
+
+        return stats
 
-            # Create tasks for each URL in the batch
-            tasks = [self.fetch_single_abstract(url) for url in batch_urls]
+    async def fetch_via_history(self, urls: Set[str]) -> List[Dict[str, Any]]:
+        """
+        Fetch abstracts through the history server and return the newly fetched ones.
 
-            # Run concurrent tasks
-            batch_results = await asyncio.gather(*tasks)
+        This keeps every fetched abstract in memory; use stream_via_history to only
+        keep track of the outcome per PubMed ID.
 
-            # Collect successful results
-            successful_results = [result for result in batch_results if result]
-            all_abstracts.extend(successful_results)
+        Args:
+            urls: Set of PubMed URLs to fetch
 
+        Returns:
+            List of newly fetched abstracts
+        """
+        all_abstracts: List[Dict[str, Any]] = []
+        await self.stream_via_history(
+            urls, on_complete=lambda page_urls, page: all_abstracts.extend(page)
+        )
+        return all_abstracts
+
+    async def stream_via_history(
+        self,
+        urls: Set[str],
+        on_complete: Optional[Callable[[List[str], List[Dict[str, Any]]], None]] = None,
+    ) -> FetchStats:
+        """
+        Fetch abstracts by posting all IDs once and paging through the history server.
+
+        Only IDs without a saved abstract are posted. Progress is saved to
+        history_state.json after every page, so an interrupted run resumes from
+        the last completed page of the same ID set. Each page is saved and then
+        dropped, so memory use does not grow with the number of abstracts.
+        Clients without history server support fall back to
+        stream_all_abstracts.
+
+        Args:
+            urls: Set of PubMed URLs to fetch
+            on_complete: Optional callback called after each page with the URLs it
+                covered and the abstracts it contained
+
+        Returns:
+            Outcome of every requested PubMed ID
+        """
+        if not self.pubmed_client.supports_history_server:
+            self.logger.warning(
+                f"{type(self.pubmed_client).__name__} does not support the history server. Fetching abstracts with EFetch requests instead."
+            )
+            return await self.stream_all_abstracts(urls, on_complete=on_complete)
+
+        ids_to_urls = {self._extract_pubmed_id(url): url for url in urls}
+        requested_hash = hashlib.sha256(
+            ",".join(sorted(ids_to_urls)).encode("utf-8")
+        ).hexdigest()
+
+        stats = FetchStats()
+        for pubmed_id in ids_to_urls:
+            if pubmed_id in self.existing_ids:
+                stats.record(pubmed_id, FetchStatus.ALREADY_DOWNLOADED)
+        self._skipped.inc(stats.already_downloaded)
+
+        state = self._load_history_state()
+        posted = True
+        if (
+            state
+            and state["requested_hash"] == requested_hash
+            and state["page_size"] == self.history_page_size
+        ):
             self.logger.info(
-                f"Batch complete: fetched {len(successful_results)}/{len(batch_urls)} abstracts"
+                f"Resuming history server fetch at record {state['next_retstart']}/{len(state['posted_ids'])}"
+            )
+        else:
+            posted_ids = [
+                pubmed_id
+                for pubmed_id in self._by_priority(ids_to_urls)
+                if pubmed_id not in self.existing_ids
+            ]
+            if not posted_ids:
+                self.logger.info("All abstracts already exist. Nothing to fetch.")
+                return stats
+
+            state = {
+                "requested_hash": requested_hash,
+                "page_size": self.history_page_size,
+                "posted_ids": posted_ids,
+                "next_retstart": 0,
+            }
+            self.journal.register(
+                {pubmed_id: ids_to_urls[pubmed_id] for pubmed_id in posted_ids}
             )
+            posted = await self._post_history_ids(state)
+
+        total_posted = len(state["posted_ids"])
+        # IDs that could not be posted are recorded as failed below
+        while posted and state["next_retstart"] < total_posted:
+            retstart = state["next_retstart"]
+            self._pending_urls.set(total_posted - retstart)
+            await self._wait_for_rate_limit()
+            page = await self._fetch_history_page(state, retstart)
+            if page is None:
+                break
+
+            page_urls = []
+            for abstract in page:
+                pubmed_id = str(abstract.get("id", ""))
+                await self._save_abstract(pubmed_id, abstract)
+                if pubmed_id in ids_to_urls:
+                    stats.record(pubmed_id, FetchStatus.FETCHED)
+                    page_urls.append(ids_to_urls[pubmed_id])
+            if on_complete:
+                on_complete(page_urls, page)
+
+            # Only move past the page once all of it is on disk
+            await self.writer.drain()
+            state["next_retstart"] = retstart + self.history_page_size
+            self._save_history_state(state)
             self.logger.info(
-                f"Total progress: {len(all_abstracts)}/{total_urls} ({len(all_abstracts) / total_urls * 100:.1f}%)"
+                f"History page complete: fetched {len(page)} abstracts, progress {min(state['next_retstart'], total_posted)}/{total_posted}"
             )
 
-        return all_abstracts
+        self._pending_urls.set(max(0, total_posted - state["next_retstart"]))
+        if state["next_retstart"] >= total_posted:
+            self.history_state_path.unlink(missing_ok=True)
+
+        for pubmed_id, url in ids_to_urls.items():
+            if pubmed_id not in stats.statuses:
+                stats.record(pubmed_id, FetchStatus.FAILED)
+                self.journal.record_status(pubmed_id, url, FetchStatus.FAILED)
+                self._failed.inc()
+                self.failed_urls.add(url)
+        self.journal.flush()
+        return stats
+
+    async def _post_history_ids(
+        self, state: Dict[str, Any], max_attempts: Optional[int] = None
+    ) -> bool:
+        """
+        Upload the posted IDs of a history state and store the returned WebEnv.
+
+        Rate-limited and failed uploads are retried with the same backoff as
+        requests for abstracts.
+
+        Args:
+            state: History state containing the IDs to post
+            max_attempts: Maximum number of attempts (default: max_retries)
+
+        Returns:
+            Whether the IDs were posted
+        """
+        max_attempts = max_attempts or self.max_retries
+        self.logger.info(
+            f"Posting {len(state['posted_ids'])} IDs to the NCBI history server"
+        )
+        for attempt in range(max_attempts):
+            await self._wait_for_rate_limit()
+            start = time.monotonic()
+            try:
+                webenv, query_key = await self._send(
+                    self.pubmed_client.post_ids(state["posted_ids"])
+                )
+            except PubMedRateLimitError as e:
+                self._record_outcome(time.monotonic() - start, e)
+                if attempt < max_attempts - 1:
+                    wait_time = self._rate_limit_backoff(e, attempt)
+                    self.logger.warning(
+                        f"Rate limit hit posting IDs (HTTP 429). Retrying in {wait_time} seconds..."
+                    )
+                    await self._backoff(wait_time)
+            except PubMedClientError as e:
+                self._record_outcome(time.monotonic() - start, e)
+                if attempt < max_attempts - 1:
+                    wait_time = self.retry_delay * (attempt + 1)
+                    self.logger.warning(
+                        f"Error posting IDs: {str(e)}. Retrying in {wait_time} seconds..."
+                    )
+                    await self._backoff(wait_time)
+                else:
+                    self.logger.error(f"Error posting IDs: {str(e)}")
+            else:
+                self._record_outcome(time.monotonic() - start)
+                state["webenv"] = webenv
+                state["query_key"] = query_key
+                self._save_history_state(state)
+                return True
+
+        self.logger.error(f"Failed to post IDs after {max_attempts} attempts.")
+        return False
 
-    async def run(self) -> Optional[Dict[str, Any]]:
+    async def _fetch_history_page(
+        self, state: Dict[str, Any], retstart: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch one history server page with retry logic.
+
+        If the page cannot be fetched with the stored WebEnv (for example because
+        it expired between runs), the IDs are posted again before retrying.
+
+        Args:
+            state: Current history state
+            retstart: Index of the first record in the page
+
+        Returns:
+            List of abstracts in the page, or None if the page could not be fetched
+        """
+        page_ids = state["posted_ids"][retstart : retstart + self.history_page_size]
+        for attempt in range(self.max_retries):
+            start = time.monotonic()
+            try:
+                page = await self._send(
+                    self.pubmed_client.get_abstracts_from_history(
+                        state["webenv"],
+                        state["query_key"],
+                        retstart,
+                        self.history_page_size,
+                    )
+                )
+                self._record_outcome(time.monotonic() - start, pubmed_ids=page_ids)
+                return page
+            except PubMedRateLimitError as e:
+                self._record_outcome(time.monotonic() - start, e, page_ids)
+                if attempt < self.max_retries - 1:
+                    wait_time = self._rate_limit_backoff(e, attempt)
+                    self.logger.warning(
+                        f"Rate limit hit for history page at {retstart} (HTTP 429). Retrying in {wait_time} seconds..."
+                    )
+                    await self._backoff(wait_time)
+            except PubMedClientError as e:
+                self._record_outcome(time.monotonic() - start, e, page_ids)
+                self.logger.warning(
+                    f"Error fetching history page at {retstart}: {str(e)}. Re-posting IDs..."
+                )
+                if attempt < self.max_retries - 1:
+                    self._retries.inc()
+                    # The page is retried as a whole, so each re-post is tried once
+                    await self._post_history_ids(state, max_attempts=1)
+
+        self.logger.error(
+            f"Failed to fetch history page at {retstart} after {self.max_retries} attempts."
+        )
+        return None
+
+    def _load_history_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the saved history server state, if any.
+
+        Returns:
+            The saved state or None if there is no usable state
+        """
+        if not self.history_state_path.exists():
+            return None
+        try:
+            with open(self.history_state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            self.logger.warning(f"Ignoring unreadable history state: {str(e)}")
+            return None
+
+    def _save_history_state(self, state: Dict[str, Any]) -> None:
+        """
+        Atomically save the history server state.
+
+        Args:
+            state: History state to save
+        """
+        tmp_path = self.history_state_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        tmp_path.replace(self.history_state_path)
+
+    async def run(
+        self, delta: bool = False, prioritize: bool = False
+    ) -> Optional[Dict[str, Any]]:
         """
         Run the DataFetcher to fetch all abstracts from the URL collector.
 
+        The PubMed IDs of the release are compared with the previously recorded
+        release, the counts of added, removed and unchanged IDs are written to
+        data_dir/release_delta-<release>.json, and the release is recorded in the
+        journal for the next comparison.
+
+        Args:
+            delta: Whether to only fetch IDs added since the previous release.
+                Unchanged IDs that are still missing are left to
+                retry_failed_urls instead of being requested again.
+            prioritize: Whether to fetch the documents of goldset questions
+                first, then documents cited by more questions before those
+                cited by fewer (unless the fetcher has its own priority), and
+                to report the share of each question's documents that is
+                available while fetching (data_dir/question_coverage.json)
+
         Returns:
             Dictionary with summary of the fetch operation
         """
@@ -231,49 +1275,89 @@ class DataFetcher:
 
         # Get all URLs from the collector
         urls = self.url_collector.collect_urls()
-        total_urls = len(urls)
-        self.logger.info(f"Collected {total_urls} URLs from PubMedURLCollector")
+        self.logger.info(f"Collected {len(urls)} URLs from PubMedURLCollector")
 
         if not urls:
             self.logger.warning("No URLs found. Nothing to fetch.")
             return None
 
-        # Fetch all abstracts
-        abstracts = await self.fetch_all_abstracts(urls)
-        successful_fetches = len(abstracts)
-
-        # Save failed URLs to file
-        if self.failed_urls:
-            failed_urls_path = self.data_dir / "failed_urls.json"
-            with open(failed_urls_path, "w", encoding="utf-8") as f:
-                json.dump(list(self.failed_urls), f, indent=2)
+        ids_to_urls = {self._extract_pubmed_id(url): url for url in urls}
+        release_delta = compute_release_delta(
+            self.journal, self.release, ids_to_urls, self.existing_ids
+        )
+        self.logger.info(
+            f"{self.release} compared with {release_delta.previous_release or 'saved abstracts'}: "
+            f"{len(release_delta.added)} added, {len(release_delta.removed)} removed, "
+            f"{len(release_delta.unchanged)} unchanged"
+        )
+        if delta:
+            urls = release_delta.delta_urls(ids_to_urls, self.existing_ids)
             self.logger.info(
-                f"Saved {len(self.failed_urls)} failed URLs to {failed_urls_path}"
+                f"Delta mode: fetching {len(release_delta.to_fetch)} new IDs, "
+                f"skipping {len(release_delta.missing)} missing unchanged IDs"
+            )
+        total_urls = len(urls)
+
+        coverage = None
+        if prioritize:
+            training_files, goldset_files = self.url_collector.dataset_files()
+            coverage = QuestionCoverage.from_files(
+                training_files,
+                goldset_files,
+                self.question_cache_dir,
+                report_path=self.coverage_report_path,
             )
+            if self.priority is None:
+                self.priority = coverage.priority
+            coverage.mark_available(self.existing_ids)
+            coverage.report()
+        on_complete = coverage.record if coverage is not None else None
+
+        # Fetch all abstracts, keeping only the outcome per PubMed ID in memory
+        if self.use_history_server:
+            stats = await self.stream_via_history(urls, on_complete=on_complete)
+        else:
+            stats = await self.stream_all_abstracts(urls, on_complete=on_complete)
+        successful_fetches = stats.successful
+        already_downloaded = stats.already_downloaded
 
         # Summary
+        self.journal.record_run(total_urls, stats)
+        self.journal.record_release(self.release, ids_to_urls)
+        report_path = release_report_path(self.data_dir, self.release)
+        release_delta.write_report(report_path)
         summary = {
             "total_urls": total_urls,
             "successful_fetches": successful_fetches,
+            "already_downloaded": already_downloaded,
             "failed_fetches": total_urls - successful_fetches,
             "abstracts_dir": str(self.abstracts_dir),
-            "failed_urls_file": str(self.data_dir / "failed_urls.json")
-            if self.failed_urls
-            else None,
+            "journal_file": str(self.journal.path),
+            "release": release_delta.counts(),
         }
-
-        # Save summary to file
-        summary_path = self.data_dir / "fetch_summary.json"
-        with open(summary_path, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2)
+        if coverage is not None:
+            summary["coverage"] = coverage.report()
 
         # Print summary
         print("\nAbstract fetching complete:")
         print(f"Total URLs: {total_urls}")
         print(f"Successfully fetched: {successful_fetches}")
+        print(f"Already downloaded: {already_downloaded}")
         print(f"Failed: {total_urls - successful_fetches}")
+        print(
+            f"Release {self.release}: {len(release_delta.added)} added, "
+            f"{len(release_delta.removed)} removed, "
+            f"{len(release_delta.unchanged)} unchanged"
+        )
         print(f"Abstracts saved to: {self.abstracts_dir}")
-        if self.failed_urls:
-            print(f"Failed URLs saved to: {self.data_dir / 'failed_urls.json'}")
+        print(f"Fetch status saved to: {self.journal.path}")
+        print(f"Release delta saved to: {report_path}")
+        if coverage is not None:
+            for name in ("goldset", "all"):
+                part = summary["coverage"][name]
+                print(
+                    f"Answerable {name} questions: {part['answerable']}/{part['questions']}"
+                )
+            print(f"Question coverage saved to: {self.coverage_report_path}")
 
         return summary
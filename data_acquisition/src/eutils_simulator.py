@@ -0,0 +1,642 @@
+#!/usr/bin/env python
+"""
+Local stand-in for the NCBI E-utilities used by the PubMed clients.
+
+The simulator serves EFetch (Medline text or PubMed XML), EPost and ESummary
+responses for a fixture corpus of abstracts, and can inject latency, 429s with
+Retry-After, 5xx errors, truncated bodies and a server-side rate limit, so the
+fetcher can be benchmarked and regression-tested without contacting NCBI.
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from src.abstract_store import STORAGE_FORMATS, open_abstract_store
+from src.utils.logging_utils import setup_logging
+
+EUTILS_PATH = "/entrez/eutils/"
+
+LATENCY_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+
+@dataclass
+class LatencyDistribution:
+    """
+    Distribution of the delay added before each response.
+
+    Attributes:
+        distribution: "constant", "uniform" (mean +/- spread), "exponential"
+            (with the given mean) or "lognormal" (with the given mean and a
+            log-space standard deviation of spread)
+        mean: Mean delay in seconds
+        spread: Width parameter of the uniform and lognormal distributions
+    """
+
+    distribution: str = "constant"
+    mean: float = 0.0
+    spread: float = 0.0
+
+    def __post_init__(self) -> None:
+        if self.distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown latency distribution '{self.distribution}', "
+                f"expected one of {LATENCY_DISTRIBUTIONS}"
+            )
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """
+        Parse a specification such as "exponential:0.2" or "lognormal:0.2:0.5".
+
+        Args:
+            spec: Distribution name, mean and optional spread separated by colons
+
+        Returns:
+            The latency distribution
+        """
+        name, *values = spec.split(":")
+        numbers = [float(value) for value in values]
+        return cls(name, *numbers)
+
+    def sample(self, rng: random.Random) -> float:
+        """Draw one delay in seconds."""
+        if self.mean <= 0:
+            return 0.0
+        if self.distribution == "uniform":
+            return max(
+                0.0, rng.uniform(self.mean - self.spread, self.mean + self.spread)
+            )
+        if self.distribution == "exponential":
+            return rng.expovariate(1 / self.mean)
+        if self.distribution == "lognormal":
+            # Pick mu so that the distribution has the requested mean
+            mu = math.log(self.mean) - self.spread**2 / 2
+            return rng.lognormvariate(mu, self.spread)
+        return self.mean
+
+
+@dataclass
+class FaultConfig:
+    """
+    Faults injected by the simulator.
+
+    Attributes:
+        latency: Delay added before every response
+        rate_limit: Requests per second accepted before answering 429, like the
+            NCBI limit (None for no limit)
+        throttle_rate: Probability of answering 429 regardless of the rate
+        retry_after: Retry-After seconds sent with 429s (None to omit the header)
+        error_rate: Probability of answering with error_status
+        error_status: Status code of injected server errors
+        truncate_rate: Probability of closing the connection halfway through
+            the body
+    """
+
+    latency: LatencyDistribution = field(default_factory=LatencyDistribution)
+    rate_limit: Optional[float] = None
+    throttle_rate: float = 0.0
+    retry_after: Optional[float] = 1.0
+    error_rate: float = 0.0
+    error_status: int = 503
+    truncate_rate: float = 0.0
+
+
+class EUtilsSimulator:
+    """
+    HTTP server answering efetch.fcgi, epost.fcgi and esummary.fcgi requests.
+
+    Each connection is handled in its own thread. Point HttpxPubMedClient at
+    ``base_url`` to use it. Counts of requests and responses by kind are kept
+    in ``stats``.
+    """
+
+    def __init__(
+        self,
+        corpus: Dict[str, Dict[str, Any]],
+        faults: Optional[FaultConfig] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initialize the simulator.
+
+        Args:
+            corpus: Abstracts served by the simulator, keyed by PubMed ID
+            faults: Faults to inject (none by default)
+            host: Address to listen on
+            port: Port to listen on (0 picks a free port)
+            seed: Seed of the random faults and latencies
+        """
+        self.logger = logging.getLogger(__name__)
+        self.corpus = corpus
+        self.faults = faults or FaultConfig()
+        self.stats: Counter = Counter()
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._histories: Dict[str, List[str]] = {}
+        self._webenv_ids = itertools.count(1)
+        self._tokens = self.faults.rate_limit or 0.0
+        self._last_refill = time.monotonic()
+
+        simulator = self
+
+        class Handler(_EUtilsHandler):
+            pass
+
+        Handler.simulator = simulator
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL of the E-utilities endpoints served by the simulator."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{EUTILS_PATH}"
+
+    def start(self) -> None:
+        """Start serving requests in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="eutils-simulator", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving requests and close the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        """Serve requests in the calling thread until interrupted."""
+        self._server.serve_forever()
+
+    def __enter__(self) -> "EUtilsSimulator":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def random(self) -> float:
+        """Return a random number in [0, 1) from the seeded generator."""
+        with self._lock:
+            return self._rng.random()
+
+    def sample_latency(self) -> float:
+        """Draw the delay of the next response."""
+        with self._lock:
+            return self.faults.latency.sample(self._rng)
+
+    def take_token(self) -> Optional[float]:
+        """
+        Take a token from the server-side rate limit.
+
+        Returns:
+            None if the request is allowed, else seconds until the next token
+        """
+        rate = self.faults.rate_limit
+        if not rate:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(rate, self._tokens + (now - self._last_refill) * rate)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / rate
+
+    def post(self, pubmed_ids: List[str]) -> Tuple[str, str]:
+        """Store an ID list for history requests and return (WebEnv, query_key)."""
+        with self._lock:
+            webenv = f"MCID_SIMULATOR_{next(self._webenv_ids)}"
+            self._histories[webenv] = pubmed_ids
+        return webenv, "1"
+
+    def history(self, webenv: str) -> Optional[List[str]]:
+        """Return the ID list posted under a WebEnv."""
+        with self._lock:
+            return self._histories.get(webenv)
+
+    def count(self, key: str) -> None:
+        """Increment a counter in stats."""
+        with self._lock:
+            self.stats[key] += 1
+
+
+class _EUtilsHandler(BaseHTTPRequestHandler):
+    """Request handler of the simulator, bound to it by a subclass."""
+
+    simulator: EUtilsSimulator
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        self._handle(urlsplit(self.path).query)
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8")
+        query = urlsplit(self.path).query
+        self._handle("&".join(part for part in (query, body) if part))
+
+    def log_message(self, format: str, *args: Any) -> None:
+        self.simulator.logger.debug(format % args)
+
+    def _handle(self, query: str) -> None:
+        """Answer a request, injecting the configured faults."""
+        simulator = self.simulator
+        faults = simulator.faults
+        endpoint = urlsplit(self.path).path.rsplit("/", 1)[-1]
+        params = {key.lower(): values[0] for key, values in parse_qs(query).items()}
+        simulator.count(f"requests:{endpoint}")
+
+        delay = simulator.sample_latency()
+        if delay:
+            time.sleep(delay)
+
+        wait = simulator.take_token()
+        if wait is not None or simulator.random() < faults.throttle_rate:
+            simulator.count("responses:429")
+            retry_after = faults.retry_after
+            if wait is not None and retry_after is not None:
+                retry_after = max(retry_after, math.ceil(wait))
+            headers = {}
+            if retry_after is not None:
+                headers["Retry-After"] = f"{retry_after:g}"
+            self._send(
+                429,
+                json.dumps({"error": "API rate limit exceeded"}).encode("utf-8"),
+                "application/json",
+                headers,
+            )
+            return
+        if simulator.random() < faults.error_rate:
+            simulator.count(f"responses:{faults.error_status}")
+            self._send(faults.error_status, b"Internal error", "text/plain")
+            return
+
+        if endpoint == "efetch.fcgi":
+            status, body, content_type = self._efetch(params)
+        elif endpoint == "epost.fcgi":
+            status, body, content_type = self._epost(params)
+        elif endpoint == "esummary.fcgi":
+            status, body, content_type = self._esummary(params)
+        else:
+            status, body, content_type = 404, b"Unknown endpoint", "text/plain"
+
+        truncate = status == 200 and simulator.random() < faults.truncate_rate
+        simulator.count("responses:truncated" if truncate else f"responses:{status}")
+        self._send(status, body, content_type, truncate=truncate)
+
+    def _requested_ids(self, params: Dict[str, str]) -> Optional[List[str]]:
+        """Return the IDs of a request, from the id list or a posted history."""
+        if "webenv" in params:
+            posted = self.simulator.history(params["webenv"])
+            if posted is None:
+                return None
+            retstart = int(params.get("retstart", 0))
+            retmax = int(params.get("retmax", 20))
+            return posted[retstart : retstart + retmax]
+        return [pubmed_id for pubmed_id in params.get("id", "").split(",") if pubmed_id]
+
+    def _efetch(self, params: Dict[str, str]) -> Tuple[int, bytes, str]:
+        pubmed_ids = self._requested_ids(params)
+        if pubmed_ids is None:
+            return 400, _error_xml("Unable to obtain query #1"), "text/xml"
+        records = [
+            (pubmed_id, self.simulator.corpus[pubmed_id])
+            for pubmed_id in pubmed_ids
+            if pubmed_id in self.simulator.corpus
+        ]
+        if params.get("retmode") == "xml":
+            return 200, format_pubmed_xml(records), "text/xml"
+        text = "\n".join(
+            format_medline(pubmed_id, abstract) for pubmed_id, abstract in records
+        )
+        return 200, text.encode("utf-8"), "text/plain"
+
+    def _epost(self, params: Dict[str, str]) -> Tuple[int, bytes, str]:
+        pubmed_ids = [
+            pubmed_id for pubmed_id in params.get("id", "").split(",") if pubmed_id
+        ]
+        if not pubmed_ids:
+            return 200, _error_xml("Empty ID list"), "text/xml"
+        webenv, query_key = self.simulator.post(pubmed_ids)
+        root = ET.Element("ePostResult")
+        ET.SubElement(root, "QueryKey").text = query_key
+        ET.SubElement(root, "WebEnv").text = webenv
+        return 200, ET.tostring(root, encoding="utf-8"), "text/xml"
+
+    def _esummary(self, params: Dict[str, str]) -> Tuple[int, bytes, str]:
+        pubmed_ids = self._requested_ids(params)
+        if pubmed_ids is None:
+            return 400, _error_xml("Unable to obtain query #1"), "text/xml"
+        root = ET.Element("eSummaryResult")
+        for pubmed_id in pubmed_ids:
+            abstract = self.simulator.corpus.get(pubmed_id)
+            if abstract is None:
+                ET.SubElement(
+                    root, "ERROR"
+                ).text = f"UID={pubmed_id}: cannot get document summary"
+                continue
+            doc = ET.SubElement(root, "DocSum")
+            ET.SubElement(doc, "Id").text = pubmed_id
+            items = {
+                "PubDate": ("Date", abstract.get("publication_date", "")),
+                "Source": ("String", abstract.get("journal", "")),
+                "Title": ("String", abstract.get("title", "")),
+                "DOI": ("String", abstract.get("doi") or ""),
+            }
+            for name, (item_type, value) in items.items():
+                item = ET.SubElement(doc, "Item", Name=name, Type=item_type)
+                item.text = value
+            author_list = ET.SubElement(doc, "Item", Name="AuthorList", Type="List")
+            for author in abstract.get("authors", []):
+                ET.SubElement(
+                    author_list, "Item", Name="Author", Type="String"
+                ).text = author
+            # Revision metadata can be set in the corpus to simulate updated records
+            ET.SubElement(
+                doc, "Item", Name="RecordStatus", Type="String"
+            ).text = abstract.get("record_status", "PubMed - indexed for MEDLINE")
+            pub_types = ET.SubElement(doc, "Item", Name="PubTypeList", Type="List")
+            for pub_type in abstract.get("pub_types", ["Journal Article"]):
+                ET.SubElement(
+                    pub_types, "Item", Name="PubType", Type="String"
+                ).text = pub_type
+            history = ET.SubElement(doc, "Item", Name="History", Type="List")
+            for pub_status, date in abstract.get("history", {}).items():
+                ET.SubElement(history, "Item", Name=pub_status, Type="Date").text = date
+        return 200, ET.tostring(root, encoding="utf-8"), "text/xml"
+
+    def _send(
+        self,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: Optional[Dict[str, str]] = None,
+        truncate: bool = False,
+    ) -> None:
+        """Send a response, gzip-compressed if the client accepts it."""
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            headers = {**(headers or {}), "Content-Encoding": "gzip"}
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if truncate:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+        # A truncated body stops halfway, short of the announced length
+        self.wfile.write(body[: len(body) // 2] if truncate else body)
+
+
+def _error_xml(message: str) -> bytes:
+    """Return an E-utilities error document."""
+    root = ET.Element("eResult")
+    ET.SubElement(root, "ERROR").text = message
+    return ET.tostring(root, encoding="utf-8")
+
+
+def format_medline(pubmed_id: str, abstract: Dict[str, Any]) -> str:
+    """
+    Format an abstract as a Medline text record.
+
+    Args:
+        pubmed_id: The PubMed ID
+        abstract: Abstract data in the format saved by DataFetcher
+
+    Returns:
+        The Medline record, ending with a blank line
+    """
+    lines = [f"PMID- {pubmed_id}"]
+    fields = [
+        ("TI", abstract.get("title")),
+        ("AB", abstract.get("abstract")),
+        ("DP", abstract.get("publication_date")),
+        ("JT", abstract.get("journal")),
+    ]
+    for tag, value in fields:
+        if value:
+            lines.append(f"{tag:<4}- {value}")
+    for author in abstract.get("authors", []):
+        lines.append(f"AU  - {author}")
+    if abstract.get("doi"):
+        lines.append(f"LID - {abstract['doi']} [doi]")
+    for term in abstract.get("mesh_terms", []):
+        lines.append(f"MH  - {term}")
+    return "\n".join(lines) + "\n"
+
+
+def format_pubmed_xml(records: List[Tuple[str, Dict[str, Any]]]) -> bytes:
+    """
+    Format abstracts as an EFetch PubmedArticleSet.
+
+    Args:
+        records: Tuples of (PubMed ID, abstract data)
+
+    Returns:
+        The XML document
+    """
+    root = ET.Element("PubmedArticleSet")
+    for pubmed_id, abstract in records:
+        article = ET.SubElement(root, "PubmedArticle")
+        citation = ET.SubElement(article, "MedlineCitation")
+        ET.SubElement(citation, "PMID").text = pubmed_id
+        info = ET.SubElement(citation, "Article")
+        journal = ET.SubElement(info, "Journal")
+        issue = ET.SubElement(journal, "JournalIssue")
+        pub_date = ET.SubElement(issue, "PubDate")
+        ET.SubElement(pub_date, "MedlineDate").text = abstract.get(
+            "publication_date", ""
+        )
+        ET.SubElement(journal, "Title").text = abstract.get("journal", "")
+        ET.SubElement(info, "ArticleTitle").text = abstract.get("title", "")
+        if abstract.get("doi"):
+            ET.SubElement(info, "ELocationID", EIdType="doi").text = abstract["doi"]
+        abstract_element = ET.SubElement(info, "Abstract")
+        ET.SubElement(abstract_element, "AbstractText").text = abstract.get(
+            "abstract", ""
+        )
+        author_list = ET.SubElement(info, "AuthorList")
+        for author in abstract.get("authors", []):
+            last_name, _, initials = author.rpartition(" ")
+            author_element = ET.SubElement(author_list, "Author")
+            ET.SubElement(author_element, "LastName").text = last_name or initials
+            if last_name:
+                ET.SubElement(author_element, "Initials").text = initials
+        mesh_list = ET.SubElement(citation, "MeshHeadingList")
+        for term in abstract.get("mesh_terms", []):
+            heading = ET.SubElement(mesh_list, "MeshHeading")
+            ET.SubElement(heading, "DescriptorName").text = term
+        keyword_list = ET.SubElement(citation, "KeywordList")
+        for keyword in abstract.get("keywords", []):
+            ET.SubElement(keyword_list, "Keyword").text = keyword
+    return ET.tostring(root, encoding="utf-8", xml_declaration=True)
+
+
+def synthetic_corpus(count: int, first_id: int = 10000000) -> Dict[str, Dict[str, Any]]:
+    """
+    Create a corpus of small synthetic abstracts.
+
+    Args:
+        count: Number of abstracts
+        first_id: PubMed ID of the first abstract
+
+    Returns:
+        Abstracts keyed by PubMed ID
+    """
+    corpus = {}
+    for i in range(count):
+        pubmed_id = str(first_id + i)
+        corpus[pubmed_id] = {
+            "id": pubmed_id,
+            "title": f"Synthetic article {pubmed_id}",
+            "abstract": f"Abstract of synthetic article {pubmed_id}.",
+            "authors": [f"Author{i % 97} A", f"Writer{i % 89} B"],
+            "publication_date": f"{2000 + i % 25} Jan",
+            "journal": f"Journal of Simulation {i % 7}",
+            "doi": f"10.5555/sim.{pubmed_id}",
+            "keywords": ["simulation"],
+            "mesh_terms": ["Humans"],
+        }
+    return corpus
+
+
+def load_corpus(
+    directory: str, storage_format: str = "json"
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Load a fixture corpus from an abstract store.
+
+    Args:
+        directory: Directory of the store
+        storage_format: Format of the store
+
+    Returns:
+        Abstracts keyed by PubMed ID
+    """
+    store = open_abstract_store(Path(directory), storage_format)
+    try:
+        return dict(store.iter_records())
+    finally:
+        store.close()
+
+
+def main():
+    """Run the simulator until interrupted."""
+    parser = argparse.ArgumentParser(
+        description="Serve a local stand-in for the NCBI E-utilities"
+    )
+    parser.add_argument(
+        "--corpus-dir", help="Abstract store to serve (default: synthetic abstracts)"
+    )
+    parser.add_argument(
+        "--storage-format",
+        default="json",
+        choices=list(STORAGE_FORMATS),
+        help="Format of the abstract store in --corpus-dir",
+    )
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        default=10000,
+        help="Number of synthetic abstracts to serve without --corpus-dir",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument(
+        "--latency",
+        default="constant:0",
+        help="Response delay as distribution:mean[:spread], e.g. exponential:0.2",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        help="Requests per second accepted before answering 429",
+    )
+    parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="Probability of a random 429"
+    )
+    parser.add_argument(
+        "--retry-after",
+        type=float,
+        default=1.0,
+        help="Retry-After seconds sent with 429s (negative to omit the header)",
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Probability of a 5xx response"
+    )
+    parser.add_argument(
+        "--error-status", type=int, default=503, help="Status of injected errors"
+    )
+    parser.add_argument(
+        "--truncate-rate",
+        type=float,
+        default=0.0,
+        help="Probability of a truncated response body",
+    )
+    parser.add_argument("--seed", type=int, help="Seed of the injected faults")
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Set the logging level",
+    )
+    args = parser.parse_args()
+
+    setup_logging(args.log_level, None)
+    logger = logging.getLogger(__name__)
+
+    if args.corpus_dir:
+        corpus = load_corpus(args.corpus_dir, args.storage_format)
+    else:
+        corpus = synthetic_corpus(args.synthetic)
+    faults = FaultConfig(
+        latency=LatencyDistribution.parse(args.latency),
+        rate_limit=args.rate_limit,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after if args.retry_after >= 0 else None,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        truncate_rate=args.truncate_rate,
+    )
+    simulator = EUtilsSimulator(
+        corpus, faults, host=args.host, port=args.port, seed=args.seed
+    )
+    logger.info(f"Serving {len(corpus)} abstracts at {simulator.base_url}")
+    try:
+        simulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+        logger.info(f"Request statistics: {dict(simulator.stats)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,444 @@
+"""Persistent per-PMID fetch journal backed by SQLite."""
+
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from src.fetch_stats import FetchStats, FetchStatus
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fetches (
+    pmid TEXT PRIMARY KEY,
+    url TEXT,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS fetches_status ON fetches (status);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    finished_at REAL NOT NULL,
+    total_urls INTEGER NOT NULL,
+    fetched INTEGER NOT NULL,
+    already_downloaded INTEGER NOT NULL,
+    failed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS releases (
+    name TEXT PRIMARY KEY,
+    recorded_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS release_ids (
+    release TEXT NOT NULL,
+    pmid TEXT NOT NULL,
+    PRIMARY KEY (release, pmid)
+);
+CREATE TABLE IF NOT EXISTS summaries (
+    pmid TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    last_modified TEXT,
+    checked_at REAL NOT NULL
+);
+"""
+
+_REGISTER_SQL = """
+INSERT INTO fetches (pmid, url, status, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (pmid) DO NOTHING
+"""
+
+_ATTEMPT_SQL = """
+INSERT INTO fetches (pmid, status, attempts, last_error, created_at, updated_at)
+VALUES (?, 'pending', 1, ?, ?, ?)
+ON CONFLICT (pmid) DO UPDATE SET
+    attempts = attempts + 1,
+    last_error = excluded.last_error,
+    updated_at = excluded.updated_at
+"""
+
+_STATUS_SQL = """
+INSERT INTO fetches (pmid, url, status, created_at, updated_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (pmid) DO UPDATE SET
+    url = excluded.url,
+    status = excluded.status,
+    updated_at = excluded.updated_at
+"""
+
+_IMPORT_SQL = """
+INSERT INTO fetches (pmid, status, created_at, updated_at)
+VALUES (?, ?, ?, ?)
+ON CONFLICT (pmid) DO UPDATE SET
+    status = excluded.status,
+    updated_at = excluded.updated_at
+"""
+
+
+class FetchJournal:
+    """
+    Journal of the fetch status of every requested PubMed ID.
+
+    Each ID has a status (pending, fetched or failed), the number of requests
+    that included it, the class of the last error and creation/update timestamps.
+    Updates are buffered and written in a single transaction once ``flush_every``
+    updates have accumulated or ``flush_interval`` seconds have passed, so the
+    journal can be updated as each request completes without a commit per ID.
+    The database is opened in WAL mode, so several processes can share it.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        flush_every: int = 500,
+        flush_interval: float = 5.0,
+        clock: Callable[[], float] = time.time,
+        timeout: float = 5.0,
+    ):
+        """
+        Open (or create) a fetch journal.
+
+        Args:
+            path: Path of the SQLite database file
+            flush_every: Number of buffered updates that triggers a write
+            flush_interval: Seconds after which buffered updates are written
+            clock: Function returning the current time in seconds
+            timeout: Seconds to wait for a lock held by another process sharing
+                the journal
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._clock = clock
+
+        self._connection = sqlite3.connect(self.path, timeout=timeout)
+        # With a write-ahead log, one process flushing its updates does not
+        # block the other processes sharing the journal (sharded fetches).
+        # synchronous=NORMAL skips the fsync per commit: a power loss can drop
+        # the last flushes, which a resumed run fetches again.
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._pending: List[Tuple[str, Tuple[Any, ...]]] = []
+        self._last_flush = clock()
+
+    def close(self) -> None:
+        """Write any buffered updates and close the database."""
+        self.flush()
+        self._connection.close()
+
+    def __enter__(self) -> "FetchJournal":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def register(self, ids_to_urls: Dict[str, str]) -> None:
+        """
+        Add requested PubMed IDs as pending, keeping any existing entries.
+
+        Args:
+            ids_to_urls: Mapping of PubMed IDs to their URLs
+        """
+        now = self._clock()
+        with self._connection:
+            self._connection.executemany(
+                _REGISTER_SQL,
+                (
+                    (pubmed_id, url, FetchStatus.PENDING.value, now, now)
+                    for pubmed_id, url in ids_to_urls.items()
+                ),
+            )
+
+    def import_fetched(self, pubmed_ids: Iterable[str]) -> None:
+        """
+        Mark PubMed IDs as fetched, e.g. abstracts saved before the journal existed.
+
+        Args:
+            pubmed_ids: PubMed IDs whose abstracts are already saved
+        """
+        now = self._clock()
+        with self._connection:
+            self._connection.executemany(
+                _IMPORT_SQL,
+                (
+                    (pubmed_id, FetchStatus.FETCHED.value, now, now)
+                    for pubmed_id in pubmed_ids
+                ),
+            )
+
+    def record_attempt(
+        self, pubmed_id: str, error: Optional[BaseException] = None
+    ) -> None:
+        """
+        Record one request that included a PubMed ID.
+
+        Args:
+            pubmed_id: The PubMed ID
+            error: The exception raised by the request, or None on success
+        """
+        now = self._clock()
+        error_class = type(error).__name__ if error is not None else None
+        self._buffer(_ATTEMPT_SQL, (pubmed_id, error_class, now, now))
+
+    def record_fetched(self, pubmed_ids: Iterable[str]) -> None:
+        """
+        Record that the abstracts of PubMed IDs have been saved.
+
+        Args:
+            pubmed_ids: PubMed IDs whose abstracts were written to the store
+        """
+        now = self._clock()
+        for pubmed_id in pubmed_ids:
+            self._buffer(_IMPORT_SQL, (pubmed_id, FetchStatus.FETCHED.value, now, now))
+
+    def record_status(self, pubmed_id: str, url: str, status: FetchStatus) -> None:
+        """
+        Record the outcome of fetching a PubMed ID.
+
+        Args:
+            pubmed_id: The PubMed ID
+            url: The URL of the PubMed ID
+            status: The new status
+        """
+        now = self._clock()
+        self._buffer(_STATUS_SQL, (pubmed_id, url, status.value, now, now))
+
+    def flush(self) -> None:
+        """Write all buffered updates in a single transaction."""
+        self._last_flush = self._clock()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        with self._connection:
+            for sql, params in pending:
+                self._connection.execute(sql, params)
+        self.logger.debug(f"Wrote {len(pending)} updates to {self.path}")
+
+    def ids_with_status(self, *statuses: FetchStatus) -> Set[str]:
+        """
+        Return the PubMed IDs that have one of the given statuses.
+
+        Args:
+            statuses: Statuses to select
+
+        Returns:
+            Set of matching PubMed IDs
+        """
+        return {row[0] for row in self._select("pmid", statuses)}
+
+    def urls_with_status(self, *statuses: FetchStatus) -> List[str]:
+        """
+        Return the URLs of the PubMed IDs that have one of the given statuses.
+
+        Args:
+            statuses: Statuses to select
+
+        Returns:
+            List of matching URLs
+        """
+        return [row[0] for row in self._select("url", statuses)]
+
+    def status_counts(self) -> Dict[str, int]:
+        """
+        Count the journaled PubMed IDs per status.
+
+        Returns:
+            Mapping of status to number of PubMed IDs
+        """
+        self.flush()
+        rows = self._connection.execute(
+            "SELECT status, COUNT(*) FROM fetches GROUP BY status"
+        )
+        return dict(rows.fetchall())
+
+    def get(self, pubmed_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the journal entry of a PubMed ID.
+
+        Args:
+            pubmed_id: The PubMed ID
+
+        Returns:
+            The entry as a dictionary, or None if the ID is not journaled
+        """
+        self.flush()
+        cursor = self._connection.execute(
+            "SELECT * FROM fetches WHERE pmid = ?", (pubmed_id,)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def is_empty(self) -> bool:
+        """Return whether the journal has no entries yet."""
+        self.flush()
+        return (
+            self._connection.execute("SELECT 1 FROM fetches LIMIT 1").fetchone() is None
+        )
+
+    def record_run(self, total_urls: int, stats: FetchStats) -> None:
+        """
+        Store the summary of a completed run.
+
+        Args:
+            total_urls: Number of URLs requested in the run
+            stats: Outcome of the run
+        """
+        self.flush()
+        with self._connection:
+            self._connection.execute(
+                "INSERT INTO runs (finished_at, total_urls, fetched, already_downloaded, failed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    self._clock(),
+                    total_urls,
+                    stats.fetched,
+                    stats.already_downloaded,
+                    stats.failed,
+                ),
+            )
+
+    def last_run(self) -> Optional[Dict[str, Any]]:
+        """
+        Return the summary of the most recent run.
+
+        Returns:
+            The run summary as a dictionary, or None if no run was recorded
+        """
+        cursor = self._connection.execute("SELECT * FROM runs ORDER BY id DESC LIMIT 1")
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def record_release(self, release: str, pubmed_ids: Iterable[str]) -> None:
+        """
+        Store the PubMed IDs requested by a dataset release, replacing any
+        previous record of the same release.
+
+        Args:
+            release: Name of the release, e.g. "BioASQ-13b"
+            pubmed_ids: PubMed IDs referenced by the release
+        """
+        pubmed_ids = set(pubmed_ids)
+        with self._connection:
+            self._connection.execute(
+                "DELETE FROM release_ids WHERE release = ?", (release,)
+            )
+            self._connection.executemany(
+                "INSERT INTO release_ids (release, pmid) VALUES (?, ?)",
+                ((release, pubmed_id) for pubmed_id in pubmed_ids),
+            )
+            self._connection.execute(
+                "INSERT INTO releases (name, recorded_at, size) VALUES (?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET "
+                "recorded_at = excluded.recorded_at, size = excluded.size",
+                (release, self._clock(), len(pubmed_ids)),
+            )
+
+    def release_ids(self, release: str) -> Set[str]:
+        """
+        Return the PubMed IDs recorded for a release.
+
+        Args:
+            release: Name of the release
+
+        Returns:
+            Set of PubMed IDs (empty if the release was not recorded)
+        """
+        rows = self._connection.execute(
+            "SELECT pmid FROM release_ids WHERE release = ?", (release,)
+        )
+        return {row[0] for row in rows}
+
+    def latest_release(self, exclude: Optional[str] = None) -> Optional[str]:
+        """
+        Return the most recently recorded release.
+
+        Args:
+            exclude: Release to ignore, e.g. the one about to be recorded again
+
+        Returns:
+            Name of the release, or None if no other release was recorded
+        """
+        row = self._connection.execute(
+            "SELECT name FROM releases WHERE name IS NOT ? "
+            "ORDER BY recorded_at DESC, rowid DESC LIMIT 1",
+            (exclude,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def record_summaries(self, summaries: Dict[str, Tuple[str, str]]) -> None:
+        """
+        Store the ESummary fingerprint of saved abstracts.
+
+        Args:
+            summaries: Mapping of PubMed IDs to (fingerprint, last modified date)
+        """
+        now = self._clock()
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO summaries (pmid, fingerprint, last_modified, checked_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (pmid) DO UPDATE SET "
+                "fingerprint = excluded.fingerprint, "
+                "last_modified = excluded.last_modified, "
+                "checked_at = excluded.checked_at",
+                (
+                    (pubmed_id, fingerprint, last_modified, now)
+                    for pubmed_id, (fingerprint, last_modified) in summaries.items()
+                ),
+            )
+
+    def summary_fingerprints(self) -> Dict[str, str]:
+        """
+        Return the stored ESummary fingerprints.
+
+        Returns:
+            Mapping of PubMed IDs to the fingerprint recorded for their abstract
+        """
+        rows = self._connection.execute("SELECT pmid, fingerprint FROM summaries")
+        return dict(rows.fetchall())
+
+    def fetched_times(self) -> Dict[str, float]:
+        """
+        Return when the abstracts fetched through the journal were saved.
+
+        Abstracts marked with import_fetched were never requested, so when they
+        were saved is unknown and they are left out.
+
+        Returns:
+            Mapping of PubMed IDs to the time their abstract was last saved
+        """
+        self.flush()
+        rows = self._connection.execute(
+            "SELECT pmid, updated_at FROM fetches WHERE status = ? AND attempts > 0",
+            (FetchStatus.FETCHED.value,),
+        )
+        return dict(rows.fetchall())
+
+    def _buffer(self, sql: str, params: Tuple[Any, ...]) -> None:
+        """Queue an update, writing the queue if it is full or old enough."""
+        self._pending.append((sql, params))
+        if (
+            len(self._pending) >= self.flush_every
+            or self._clock() - self._last_flush >= self.flush_interval
+        ):
+            self.flush()
+
+    def _select(
+        self, column: str, statuses: Iterable[FetchStatus]
+    ) -> List[Tuple[Any, ...]]:
+        """Select one column of the entries with the given statuses."""
+        self.flush()
+        values = [status.value for status in statuses]
+        placeholders = ", ".join("?" for _ in values)
+        cursor = self._connection.execute(
+            f"SELECT {column} FROM fetches WHERE status IN ({placeholders})", values
+        )
+        return cursor.fetchall()
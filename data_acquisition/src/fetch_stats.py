@@ -0,0 +1,68 @@
+"""Constant-size bookkeeping for fetch runs."""
+
+from collections import Counter
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Dict
+
+
+class FetchStatus(str, Enum):
+    """Outcome of fetching a single PubMed ID."""
+
+    # Requested but not yet attempted (only stored in the fetch journal)
+    PENDING = "pending"
+    FETCHED = "fetched"
+    ALREADY_DOWNLOADED = "already_downloaded"
+    FAILED = "failed"
+
+
+@dataclass
+class FetchStats:
+    """
+    Per-PMID status codes and counters for a fetch run.
+
+    Only the status of each ID is kept, never the abstracts themselves, so the
+    memory used does not depend on the size of the fetched records.
+    """
+
+    statuses: Dict[str, FetchStatus] = field(default_factory=dict)
+    counts: Counter = field(default_factory=Counter)
+
+    def record(self, pubmed_id: str, status: FetchStatus) -> None:
+        """
+        Record the outcome for a PubMed ID, replacing any earlier outcome.
+
+        Args:
+            pubmed_id: The PubMed ID
+            status: The outcome of fetching it
+        """
+        previous = self.statuses.get(pubmed_id)
+        if previous is not None:
+            self.counts[previous] -= 1
+        self.statuses[pubmed_id] = status
+        self.counts[status] += 1
+
+    @property
+    def total(self) -> int:
+        """Number of PubMed IDs with a recorded outcome."""
+        return len(self.statuses)
+
+    @property
+    def fetched(self) -> int:
+        """Number of abstracts fetched in this run."""
+        return self.counts[FetchStatus.FETCHED]
+
+    @property
+    def already_downloaded(self) -> int:
+        """Number of abstracts that were already saved before this run."""
+        return self.counts[FetchStatus.ALREADY_DOWNLOADED]
+
+    @property
+    def failed(self) -> int:
+        """Number of abstracts that could not be fetched."""
+        return self.counts[FetchStatus.FAILED]
+
+    @property
+    def successful(self) -> int:
+        """Number of abstracts available on disk after this run."""
+        return self.fetched + self.already_downloaded
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+import argparse
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+from src.abstract_store import AbstractStore, ZstdFileStore, open_abstract_store
+from src.utils.logging_utils import setup_logging
+
+# Number of copied files synced at once before they are removed
+REMOVE_BATCH_SIZE = 1000
+
+
+def migrate_abstracts(
+    abstracts_dir: str,
+    store_dir: str,
+    writer_id: str = "migration",
+    remove_source: bool = False,
+    storage_format: str = "segments",
+) -> int:
+    """
+    Copy an abstracts directory of {pmid}.json files into a packed or compressed store.
+
+    Abstracts already in the store are skipped, so an interrupted migration can
+    simply be run again. A new zstd store first trains its dictionary on a
+    sample of the abstracts, so that every record is compressed with it. With
+    remove_source, JSON files are only deleted in batches once the store has
+    made their abstracts durable.
+
+    Args:
+        abstracts_dir: Directory containing one JSON file per abstract
+        store_dir: Directory of the store to write to
+        writer_id: Writer name used for the migrated segments
+        remove_source: Whether to delete each JSON file once its copy is synced
+        storage_format: Format of the store, "segments" or "zstd"
+
+    Returns:
+        Number of abstracts copied
+    """
+    logger = logging.getLogger(__name__)
+    source = Path(abstracts_dir)
+    if storage_format == "segments":
+        store = open_abstract_store(store_dir, storage_format, writer_id=writer_id)
+    else:
+        store = open_abstract_store(store_dir, storage_format)
+    existing_ids = store.ids()
+    migrated = 0
+    # Copied files waiting for the store to sync them before they are removed
+    to_remove: List[Tuple[str, str]] = []
+
+    try:
+        if isinstance(store, ZstdFileStore) and store.dictionary is None:
+            _train_dictionary(store, source)
+
+        with os.scandir(source) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json"):
+                    continue
+                pubmed_id = entry.name[: -len(".json")]
+                if pubmed_id not in existing_ids:
+                    try:
+                        with open(entry.path, "r", encoding="utf-8") as f:
+                            abstract = json.load(f)
+                    except (OSError, json.JSONDecodeError) as e:
+                        logger.error(f"Skipping unreadable abstract {entry.path}: {e}")
+                        continue
+                    store.put(pubmed_id, abstract)
+                    migrated += 1
+
+                    if migrated % 1000 == 0:
+                        logger.info(f"Migrated {migrated} abstracts...")
+
+                if remove_source:
+                    to_remove.append((pubmed_id, entry.path))
+                    if len(to_remove) >= REMOVE_BATCH_SIZE:
+                        _sync_and_remove(store, to_remove)
+
+        _sync_and_remove(store, to_remove)
+    finally:
+        store.close()
+
+    logger.info(f"Migrated {migrated} abstracts from {source} to {store_dir}")
+    return migrated
+
+
+def _sync_and_remove(store: AbstractStore, to_remove: List[Tuple[str, str]]) -> None:
+    """Make copied abstracts durable in the store, then delete their source files."""
+    if not to_remove:
+        return
+    store.sync([pubmed_id for pubmed_id, _ in to_remove])
+    for _, path in to_remove:
+        os.remove(path)
+    to_remove.clear()
+
+
+def _train_dictionary(store: ZstdFileStore, source: Path) -> None:
+    """Train the dictionary of a zstd store on the first abstracts in a directory."""
+    samples = []
+    with os.scandir(source) as entries:
+        for entry in entries:
+            if len(samples) >= store.train_samples:
+                break
+            if entry.name.endswith(".json"):
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    try:
+                        abstract = json.load(f)
+                    except json.JSONDecodeError:
+                        continue
+                samples.append(
+                    json.dumps(abstract, separators=(",", ":")).encode("utf-8")
+                )
+    try:
+        store.train_dictionary(samples)
+    except Exception as e:
+        # Too few or too uniform samples; the store trains on later records
+        logging.getLogger(__name__).warning(f"Could not train a zstd dictionary: {e}")
+
+
+def main():
+    """Run the migration from an abstracts directory to a segment store."""
+    parser = argparse.ArgumentParser(
+        description="Pack an abstracts directory of JSON files into a segment store "
+        "or compress it with zstd"
+    )
+    parser.add_argument(
+        "--abstracts-dir",
+        default="data/abstracts",
+        help="Directory containing one JSON file per abstract",
+    )
+    parser.add_argument(
+        "--store-dir",
+        default="data/abstract_segments",
+        help="Directory of the store to write to",
+    )
+    parser.add_argument(
+        "--storage-format",
+        default="segments",
+        choices=["segments", "zstd"],
+        help="Format of the store to write to",
+    )
+    parser.add_argument(
+        "--remove-source",
+        action="store_true",
+        help="Delete each JSON file once it has been copied",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Set the logging level",
+    )
+    args = parser.parse_args()
+
+    setup_logging(args.log_level, None)
+
+    try:
+        migrated = migrate_abstracts(
+            args.abstracts_dir,
+            args.store_dir,
+            remove_source=args.remove_source,
+            storage_format=args.storage_format,
+        )
+    except Exception as e:
+        logging.getLogger(__name__).exception(f"Error migrating abstracts: {e}")
+        return 1
+
+    print(f"Migrated {migrated} abstracts to {args.store_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
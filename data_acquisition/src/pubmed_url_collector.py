@@ -1,12 +1,71 @@
 import json
 import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Set
+from typing import List, Optional, Set, Tuple
+
+from bioasq_common.pmid_set import FILE_SUFFIX, PMIDSet
 
 from src.utils.logging_utils import setup_logging
 
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None  # type: ignore[assignment]
+
 logger = logging.getLogger(__name__)
 
+# BioASQ release read when none is given
+DEFAULT_RELEASE = "BioASQ-12b"
+
+# Bytes of files besides the largest one below which reading them alongside it
+# in worker processes saves less time than spawning the processes costs
+PARALLEL_MIN_BYTES = 16 * 1024 * 1024
+
+
+def extract_document_urls(file_path: Path) -> Set[str]:
+    """
+    Extract the URLs in the 'documents' field of every question of a BioASQ file.
+
+    With ijson installed, the file is parsed incrementally and only the
+    documents arrays are materialized, so memory use does not grow with the
+    size of the snippets and triples in the file. Otherwise the whole file is
+    loaded with json.load. The question cache (bioasq_common.question_cache) is
+    not used here: it holds whole questions, which would cost far more memory
+    than streaming the URLs.
+
+    Args:
+        file_path: Path to the BioASQ dataset file
+
+    Returns:
+        A set of unique PubMed URLs found in the file
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file is not valid JSON
+    """
+    if ijson is None:
+        with open(file_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        urls = set()
+        for question in data.get("questions", []):
+            if "documents" in question:
+                urls.update(question["documents"])
+        return urls
+
+    with open(file_path, "rb") as f:
+        try:
+            return set(ijson.items(f, "questions.item.documents.item"))
+        except ijson.JSONError as e:
+            raise ValueError(f"Invalid JSON in {file_path}: {e}") from e
+
+
+def pmid_set_path(urls_path: Path) -> Path:
+    """Return the path of the PMID set file saved next to a URL list file."""
+    return urls_path.with_name(urls_path.stem.replace("urls", "ids") + FILE_SUFFIX)
+
 
 class PubMedURLCollector:
     """
@@ -16,16 +75,30 @@ class PubMedURLCollector:
     all unique PubMed URLs from the 'documents' field of each question.
     """
 
-    def __init__(self, data_dir: str = "data"):
+    def __init__(
+        self,
+        data_dir: str = "data",
+        release: str = DEFAULT_RELEASE,
+        processes: Optional[int] = None,
+        parallel_min_bytes: int = PARALLEL_MIN_BYTES,
+    ):
         """
         Initialize the PubMedURLCollector with the path to the data directory.
 
         Args:
             data_dir: Path to the directory containing BioASQ datasets
+            release: Name of the BioASQ release directory inside data_dir
+            processes: Number of worker processes reading files in parallel
+                (defaults to the number of CPUs; 1 reads files one by one)
+            parallel_min_bytes: Total size of the files other than the largest
+                one below which all files are read one by one in this process
         """
         self.data_dir = Path(data_dir)
-        self.training_dir = self.data_dir / "BioASQ-12b" / "training"
-        self.goldset_dir = self.data_dir / "BioASQ-12b" / "goldset"
+        self.processes = processes or os.cpu_count() or 1
+        self.parallel_min_bytes = parallel_min_bytes
+        self.release = release
+        self.training_dir = self.data_dir / release / "training"
+        self.goldset_dir = self.data_dir / release / "goldset"
         self.unique_urls: Set[str] = set()
 
     def _extract_urls_from_file(self, file_path: Path) -> Set[str]:
@@ -42,19 +115,77 @@ class PubMedURLCollector:
         urls = set()
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # Extract URLs from the 'documents' field of each question
-            for question in data.get("questions", []):
-                if "documents" in question:
-                    urls.update(question["documents"])
+            urls = extract_document_urls(file_path)
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {e}")
 
         logger.info(f"Found {len(urls)} URLs in {file_path.name}")
         return urls
 
+    def _extract_urls_in_parallel(self, files: List[Path]) -> Set[str]:
+        """
+        Extract PubMed URLs from several files in worker processes.
+
+        Files are submitted largest first, so the large training file starts
+        right away and the goldset files are read alongside it.
+
+        Args:
+            files: Paths of the BioASQ dataset files
+
+        Returns:
+            A set of the unique PubMed URLs found in all files
+        """
+        files = sorted(files, key=lambda path: path.stat().st_size, reverse=True)
+        urls: Set[str] = set()
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=min(self.processes, len(files)), mp_context=context
+        ) as pool:
+            futures = {
+                file_path: pool.submit(extract_document_urls, file_path)
+                for file_path in files
+            }
+            for file_path, future in futures.items():
+                try:
+                    file_urls = future.result()
+                except Exception as e:
+                    logger.error(f"Error processing file {file_path}: {e}")
+                    continue
+                logger.info(f"Found {len(file_urls)} URLs in {file_path.name}")
+                urls.update(file_urls)
+        return urls
+
+    def _worth_parallel(self, files: List[Path]) -> bool:
+        """
+        Check whether reading files in worker processes would save time.
+
+        The largest file takes as long in a worker as in this process, so only
+        the other files can be read sooner, and spawning workers costs a fresh
+        interpreter each.
+
+        Args:
+            files: Paths of the BioASQ dataset files
+
+        Returns:
+            True if the files other than the largest add up to parallel_min_bytes
+        """
+        if len(files) < 2:
+            return False
+        sizes = sorted(path.stat().st_size for path in files)
+        return sum(sizes[:-1]) >= self.parallel_min_bytes
+
+    def dataset_files(self) -> Tuple[List[Path], List[Path]]:
+        """
+        List the BioASQ dataset files of the release.
+
+        Returns:
+            The training files and the goldset files
+        """
+        return (
+            list(self.training_dir.glob("*.json")),
+            list(self.goldset_dir.glob("*.json")),
+        )
+
     def collect_urls(self) -> Set[str]:
         """
         Collect all unique PubMed URLs from all BioASQ dataset files.
@@ -62,29 +193,41 @@ class PubMedURLCollector:
         Returns:
             A set of all unique PubMed URLs
         """
-        # Process training files
-        training_files = list(self.training_dir.glob("*.json"))
+        training_files, goldset_files = self.dataset_files()
         logger.info(f"Found {len(training_files)} training files")
-
-        for file_path in training_files:
-            self.unique_urls.update(self._extract_urls_from_file(file_path))
-
-        # Process goldset files
-        goldset_files = list(self.goldset_dir.glob("*.json"))
         logger.info(f"Found {len(goldset_files)} goldset files")
 
-        for file_path in goldset_files:
-            self.unique_urls.update(self._extract_urls_from_file(file_path))
+        files = training_files + goldset_files
+        if self.processes > 1 and self._worth_parallel(files):
+            self.unique_urls.update(self._extract_urls_in_parallel(files))
+        else:
+            for file_path in files:
+                self.unique_urls.update(self._extract_urls_from_file(file_path))
 
         logger.info(f"Total unique PubMed URLs: {len(self.unique_urls)}")
         return self.unique_urls
 
+    def pmids(self) -> PMIDSet:
+        """
+        Return the PubMed IDs of the collected URLs as a compact set.
+
+        Returns:
+            The IDs of all collected URLs that contain one
+        """
+        if not self.unique_urls:
+            self.collect_urls()
+        return PMIDSet.from_urls(self.unique_urls)
+
     def save_urls_to_file(
         self, output_path: str = "data/unique_pubmed_urls.txt"
     ) -> None:
         """
         Save all collected unique PubMed URLs to a file.
 
+        The IDs are also saved as a PMID set file next to it (e.g.
+        unique_pubmed_ids.pmids next to unique_pubmed_urls.txt), which
+        PMIDSet.load reads much faster than the text file can be parsed.
+
         Args:
             output_path: Path to save the URLs
         """
@@ -100,6 +243,10 @@ class PubMedURLCollector:
 
         logger.info(f"Saved {len(self.unique_urls)} unique URLs to {output_path}")
 
+        pmids_file = pmid_set_path(output_file)
+        self.pmids().save(pmids_file)
+        logger.info(f"Saved the PubMed IDs to {pmids_file}")
+
 
 if __name__ == "__main__":
     # Set up logging to both console and file
@@ -0,0 +1,248 @@
+"""Track which BioASQ questions are answerable from the abstracts saved so far."""
+
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Union
+
+from bioasq_common.pmid_set import parse_pmid
+from bioasq_common.question_cache import load_questions
+
+logger = logging.getLogger(__name__)
+
+# Scores a PubMed ID; IDs with higher scores are fetched first
+PriorityFunction = Callable[[str], float]
+
+
+class QuestionCoverage:
+    """
+    Share of each question's documents whose abstracts are available.
+
+    Built from the questions of a release, it also provides the default fetch
+    priority (see priority()) and can be passed as the on_complete callback of
+    DataFetcher.stream_all_abstracts and stream_via_history to follow a crawl
+    while it runs.
+    """
+
+    def __init__(
+        self,
+        report_path: Optional[Union[str, Path]] = None,
+        report_interval: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Initialize an empty coverage tracker.
+
+        Args:
+            report_path: Path the JSON coverage report is written to, or None to
+                only log the coverage
+            report_interval: Minimum number of seconds between progress reports
+                while fetching
+            clock: Monotonic clock used for the report interval
+        """
+        self.report_path = Path(report_path) if report_path else None
+        self.report_interval = report_interval
+        self._clock = clock
+        self._last_report = clock()
+
+        self.question_ids: List[str] = []
+        self._goldset: List[bool] = []
+        self._documents: List[int] = []
+        self._available: List[int] = []
+        # Indexes of the questions citing each PubMed ID
+        self._citing: Dict[str, List[int]] = {}
+        self._index: Dict[str, int] = {}
+        self._available_ids: Set[str] = set()
+
+    def add_questions(
+        self, questions: Iterable[Dict[str, Any]], goldset: bool = False
+    ) -> None:
+        """
+        Add questions and the PubMed IDs of their documents.
+
+        A question that appears in several files (e.g. a goldset question that
+        was added to a later training set) is counted once, with the union of
+        its documents, and as a goldset question if any of its files is one.
+
+        Args:
+            questions: Questions with "id" and "documents" fields
+            goldset: Whether the questions come from a goldset file
+        """
+        for question in questions:
+            pubmed_ids = {
+                str(pmid)
+                for pmid in map(parse_pmid, question.get("documents", []))
+                if pmid is not None
+            }
+            if not pubmed_ids:
+                continue
+            question_id = str(question.get("id", f"question-{len(self._index)}"))
+            index = self._index.get(question_id)
+            if index is None:
+                index = len(self.question_ids)
+                self._index[question_id] = index
+                self.question_ids.append(question_id)
+                self._goldset.append(goldset)
+                self._documents.append(0)
+                self._available.append(0)
+            else:
+                self._goldset[index] = self._goldset[index] or goldset
+            for pubmed_id in pubmed_ids:
+                citing = self._citing.setdefault(pubmed_id, [])
+                if index in citing:
+                    continue
+                citing.append(index)
+                self._documents[index] += 1
+                if pubmed_id in self._available_ids:
+                    self._available[index] += 1
+
+    @classmethod
+    def from_files(
+        cls,
+        training_files: Iterable[Path],
+        goldset_files: Iterable[Path],
+        cache_dir: Optional[Union[str, Path]] = None,
+        **kwargs: Any,
+    ) -> "QuestionCoverage":
+        """
+        Build a tracker from BioASQ training and goldset files.
+
+        Files that cannot be read are logged and skipped.
+
+        Args:
+            training_files: Paths of the training files
+            goldset_files: Paths of the goldset files
+            cache_dir: Directory of the question cache, or None to parse the files
+            **kwargs: Arguments passed on to QuestionCoverage
+
+        Returns:
+            The tracker, with no documents available yet
+        """
+        coverage = cls(**kwargs)
+        for files, goldset in ((training_files, False), (goldset_files, True)):
+            for file_path in files:
+                try:
+                    questions = load_questions(file_path, cache_dir)
+                except Exception as e:
+                    logger.error(f"Error reading questions from {file_path}: {e}")
+                    continue
+                coverage.add_questions(questions, goldset=goldset)
+        return coverage
+
+    def citations(self, pubmed_id: str) -> int:
+        """Return the number of questions citing a PubMed ID."""
+        return len(self._citing.get(pubmed_id, ()))
+
+    def is_goldset(self, pubmed_id: str) -> bool:
+        """Return whether a goldset question cites a PubMed ID."""
+        return any(self._goldset[index] for index in self._citing.get(pubmed_id, ()))
+
+    def priority(self, pubmed_id: str) -> float:
+        """
+        Score a PubMed ID: documents of goldset questions first, then by citations.
+
+        Args:
+            pubmed_id: The PubMed ID
+
+        Returns:
+            The number of questions citing the ID, raised above every
+            non-goldset score if a goldset question cites it
+        """
+        score = self.citations(pubmed_id)
+        if self.is_goldset(pubmed_id):
+            # No ID is cited by more questions than there are
+            score += len(self.question_ids) + 1
+        return score
+
+    def mark_available(self, pubmed_ids: Iterable[str]) -> None:
+        """
+        Record that the abstracts of PubMed IDs are saved.
+
+        Args:
+            pubmed_ids: IDs whose abstracts are available
+        """
+        for pubmed_id in pubmed_ids:
+            if pubmed_id in self._available_ids:
+                continue
+            self._available_ids.add(pubmed_id)
+            for index in self._citing.get(pubmed_id, ()):
+                self._available[index] += 1
+
+    def record(self, urls: List[str], abstracts: List[Dict[str, Any]]) -> None:
+        """
+        Mark fetched abstracts as available and report at most once per interval.
+
+        Matches the on_complete callback of DataFetcher.stream_all_abstracts.
+
+        Args:
+            urls: URLs covered by the request
+            abstracts: Abstracts retrieved for them
+        """
+        self.mark_available(str(abstract.get("id", "")) for abstract in abstracts)
+        if self._clock() - self._last_report >= self.report_interval:
+            self.report()
+
+    def coverage(self, question_id: str) -> float:
+        """Return the share of a question's documents that are available."""
+        index = self._index[question_id]
+        return self._available[index] / self._documents[index]
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the coverage of all questions and of the goldset questions.
+
+        Returns:
+            For "all" and "goldset": the number of questions, the number whose
+            documents are all available ("answerable"), the number with at least
+            one available document and the mean share of available documents
+        """
+        summary = {}
+        for name, selected in (
+            ("all", range(len(self.question_ids))),
+            ("goldset", [i for i, gold in enumerate(self._goldset) if gold]),
+        ):
+            shares = [self._available[i] / self._documents[i] for i in selected]
+            summary[name] = {
+                "questions": len(shares),
+                "answerable": sum(share == 1 for share in shares),
+                "partially_answerable": sum(0 < share < 1 for share in shares),
+                "mean_coverage": sum(shares) / len(shares) if shares else 0.0,
+            }
+        summary["documents"] = len(self._citing)
+        summary["available_documents"] = sum(
+            pubmed_id in self._available_ids for pubmed_id in self._citing
+        )
+        return summary
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Log the coverage summary and write the report file if one is set.
+
+        The report holds the summary and, per question, whether it is a
+        goldset question and how many of its documents are available.
+
+        Returns:
+            The summary
+        """
+        self._last_report = self._clock()
+        summary = self.summary()
+        for name in ("goldset", "all"):
+            part = summary[name]
+            logger.info(
+                f"Coverage of {name} questions: {part['answerable']}/{part['questions']} "
+                f"answerable, mean {part['mean_coverage'] * 100:.1f}% of documents available"
+            )
+        if self.report_path:
+            report = dict(summary)
+            report["questions"] = {
+                question_id: {
+                    "goldset": self._goldset[index],
+                    "documents": self._documents[index],
+                    "available": self._available[index],
+                }
+                for index, question_id in enumerate(self.question_ids)
+            }
+            with open(self.report_path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return summary
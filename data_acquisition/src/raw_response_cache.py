@@ -0,0 +1,161 @@
+"""
+Cache of the raw EFetch records behind every fetched abstract.
+
+The clients write the Medline or XML record of each PubMed ID here exactly as
+NCBI returned it, so the formatted abstracts can be rebuilt offline whenever
+the formatting changes (see src/replay_raw_cache.py) instead of fetching
+everything again.
+"""
+
+import re
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from src.abstract_store import SegmentStore
+from src.clients.medline_utils import parse_medline_text
+from src.clients.pubmed_xml import parse_pubmed_xml
+
+# Directory inside the data directory holding the cache
+RAW_CACHE_DIR = "raw_responses"
+
+# Record formats and the tag byte that precedes their compressed payload
+RAW_FORMATS = {"medline": b"M", "xml": b"X"}
+_FORMAT_NAMES = {tag: name for name, tag in RAW_FORMATS.items()}
+
+# Medline records are separated by blank lines and start with their PMID
+MEDLINE_SEPARATOR = re.compile(r"\n[ \t\r]*\n")
+MEDLINE_PMID = re.compile(r"^PMID- *(\d+)", re.MULTILINE)
+# The first PMID of an article is its own, later ones are cited articles
+PUBMED_ARTICLE = re.compile(rb"<PubmedArticle\b[^>]*>.*?</PubmedArticle>", re.DOTALL)
+ARTICLE_PMID = re.compile(rb"<PMID\b[^>]*>\s*(\d+)\s*</PMID>")
+
+
+def split_medline_records(text: str) -> Iterator[Tuple[str, str]]:
+    """
+    Split a Medline text payload into the records of each PubMed ID.
+
+    Args:
+        text: Medline formatted text as returned by EFetch
+
+    Yields:
+        (PubMed ID, record text) for every record with a PMID
+    """
+    for record in MEDLINE_SEPARATOR.split(text):
+        match = MEDLINE_PMID.search(record)
+        if match:
+            yield match.group(1), record.strip("\r\n") + "\n"
+
+
+def split_pubmed_articles(data: bytes) -> Iterator[Tuple[str, bytes]]:
+    """
+    Split a PubmedArticleSet into the PubmedArticle elements of each PubMed ID.
+
+    Args:
+        data: XML payload as returned by EFetch with retmode=xml
+
+    Yields:
+        (PubMed ID, PubmedArticle element) for every article with a PMID
+    """
+    for match in PUBMED_ARTICLE.finditer(data):
+        article = match.group(0)
+        pmid = ARTICLE_PMID.search(article)
+        if pmid:
+            yield pmid.group(1).decode("ascii"), article
+
+
+def format_raw_record(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Format a cached record the way the client that fetched it does.
+
+    This is a module-level function so it can run in a process pool.
+
+    Args:
+        record: Record returned by RawResponseCache.get
+
+    Returns:
+        Formatted abstract data, or None if the record holds no article
+    """
+    if record["format"] == "xml":
+        abstracts = parse_pubmed_xml(
+            b"<PubmedArticleSet>" + record["payload"] + b"</PubmedArticleSet>"
+        )
+    else:
+        abstracts = parse_medline_text(record["payload"].decode("utf-8"))
+    return abstracts[0] if abstracts else None
+
+
+class RawResponseCache(SegmentStore):
+    """
+    Segment store of raw EFetch records, one per PubMed ID.
+
+    Records are {"format": "medline" or "xml", "payload": bytes} and are
+    stored as a format tag followed by the zlib-compressed payload. As in any
+    segment store, a record fetched again replaces the earlier one and each
+    writing process needs its own writer_id. The clients record responses from
+    several threads, which the segment store's lock makes safe.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        writer_id: str = "main",
+        compression_level: int = 6,
+        **kwargs: Any,
+    ):
+        """
+        Open (or create) a raw response cache.
+
+        Args:
+            directory: Directory holding the segment and index files
+            writer_id: Name identifying this writer's segments and index
+            compression_level: zlib compression level of the payloads
+            **kwargs: Arguments passed on to SegmentStore
+        """
+        super().__init__(directory, writer_id=writer_id, **kwargs)
+        self.compression_level = compression_level
+
+    def record_medline(self, text: str) -> List[str]:
+        """
+        Save every record of a Medline text response.
+
+        Args:
+            text: Medline formatted text as returned by EFetch
+
+        Returns:
+            PubMed IDs of the saved records
+        """
+        saved = []
+        for pubmed_id, record in split_medline_records(text):
+            self.put(
+                pubmed_id, {"format": "medline", "payload": record.encode("utf-8")}
+            )
+            saved.append(pubmed_id)
+        return saved
+
+    def record_xml(self, data: bytes) -> List[str]:
+        """
+        Save every article of an XML response.
+
+        Args:
+            data: XML payload as returned by EFetch with retmode=xml
+
+        Returns:
+            PubMed IDs of the saved articles
+        """
+        saved = []
+        for pubmed_id, article in split_pubmed_articles(data):
+            self.put(pubmed_id, {"format": "xml", "payload": article})
+            saved.append(pubmed_id)
+        return saved
+
+    def _encode_record(self, abstract: Dict[str, Any]) -> bytes:
+        return RAW_FORMATS[abstract["format"]] + zlib.compress(
+            abstract["payload"], self.compression_level
+        )
+
+    def _decode_record(self, data: bytes) -> Dict[str, Any]:
+        return {
+            "format": _FORMAT_NAMES[data[:1]],
+            "payload": zlib.decompress(data[1:]),
+        }
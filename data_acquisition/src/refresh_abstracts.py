@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from src.abstract_store import STORAGE_FORMATS
+from src.clients.biopython_pubmed_client import BioPythonPubMedClient
+from src.clients.pubmed_client import PubMedClient
+from src.clients.pubmed_summary import summary_fingerprint
+from src.data_fetcher import DataFetcher
+from src.fetch_stats import FetchStatus
+from src.utils.logging_utils import setup_logging
+from src.utils.worker_pool import run_worker_pool
+
+PUBMED_URL = "http://www.ncbi.nlm.nih.gov/pubmed/{}"
+# ESummary history dates are in NCBI's local time without a time zone, so a
+# record counts as modified since it was saved if its latest date is within a
+# day of the save
+HISTORY_DATE_SLACK = 24 * 3600
+
+
+async def refresh_abstracts(
+    email: str,
+    api_key: Optional[str] = None,
+    data_dir: str = "data",
+    storage_format: str = "json",
+    summary_batch_size: int = 500,
+    ids_per_request: int = 200,
+    rate_limit: int = 3,
+    max_retries: int = 3,
+    retry_delay: int = 5,
+    dry_run: bool = False,
+    pubmed_client: Optional[PubMedClient] = None,
+) -> Dict[str, Any]:
+    """
+    Re-fetch saved abstracts whose PubMed record changed since they were saved.
+
+    The ESummary of every saved abstract is requested in large batches and
+    reduced to a fingerprint of its revision fields (title, DOI, record status,
+    publication types, correction references and history dates). Abstracts
+    whose fingerprint differs from the one stored in the fetch journal are
+    fetched again. Abstracts without a stored fingerprint (the first refresh)
+    are fetched again if their latest history date is later than the time the
+    journal recorded them as fetched; the others, including abstracts saved
+    before the journal existed, only get a fingerprint recorded as a baseline.
+
+    Args:
+        email: Email address for NCBI API
+        api_key: NCBI API key for higher rate limits
+        data_dir: Directory containing data files
+        storage_format: Storage format of the saved abstracts
+        summary_batch_size: Number of PubMed IDs per ESummary request
+        ids_per_request: Number of PubMed IDs per EFetch request when re-fetching
+        rate_limit: Maximum requests per second
+        max_retries: Maximum number of retries for failed requests
+        retry_delay: Delay in seconds between retries
+        dry_run: Only report changed records without re-fetching them
+        pubmed_client: Client to use instead of a new BioPythonPubMedClient
+
+    Returns:
+        Summary of the refresh
+
+    Raises:
+        ValueError: If pubmed_client does not support ESummary
+    """
+    logger = logging.getLogger(__name__)
+    owns_client = pubmed_client is None
+    if pubmed_client is None:
+        pubmed_client = BioPythonPubMedClient(
+            email=email,
+            api_key=api_key,
+            tool="bioasq-rag-refresh",
+            efetch_batch_size=ids_per_request,
+        )
+    elif not pubmed_client.supports_esummary:
+        raise ValueError(
+            f"{type(pubmed_client).__name__} does not support ESummary, "
+            "which is needed to detect changed records"
+        )
+    data_fetcher = DataFetcher(
+        pubmed_client=pubmed_client,
+        data_dir=data_dir,
+        rate_limit_per_sec=rate_limit,
+        max_retries=max_retries,
+        retry_delay=retry_delay,
+        concurrent_requests=rate_limit,
+        ids_per_request=ids_per_request,
+        storage_format=storage_format,
+    )
+    try:
+        pubmed_ids = sorted(data_fetcher.existing_ids)
+        stored = data_fetcher.journal.summary_fingerprints()
+        fetched_times = data_fetcher.journal.fetched_times()
+        logger.info(
+            f"Checking {len(pubmed_ids)} saved abstracts in ESummary batches of "
+            f"{summary_batch_size}"
+        )
+
+        current: Dict[str, Tuple[str, str]] = {}
+        unchecked: Set[str] = set()
+        missing: Set[str] = set()
+
+        def collect(
+            batch: List[str], summaries: Optional[List[Dict[str, Any]]]
+        ) -> None:
+            if summaries is None:
+                unchecked.update(batch)
+                return
+            for summary in summaries:
+                current[summary["id"]] = (
+                    summary_fingerprint(summary),
+                    summary["last_modified"],
+                )
+            # Deleted or withdrawn records have no summary
+            missing.update(pubmed_id for pubmed_id in batch if pubmed_id not in current)
+
+        batches = [
+            pubmed_ids[i : i + summary_batch_size]
+            for i in range(0, len(pubmed_ids), summary_batch_size)
+        ]
+        await run_worker_pool(
+            batches,
+            data_fetcher.fetch_summaries,
+            num_workers=data_fetcher.concurrent_requests,
+            on_complete=collect,
+        )
+
+        changed = {
+            pubmed_id
+            for pubmed_id, (fingerprint, last_modified) in current.items()
+            if (
+                stored[pubmed_id] != fingerprint
+                if pubmed_id in stored
+                else _modified_since(last_modified, fetched_times.get(pubmed_id))
+            )
+        }
+        baseline = {
+            pubmed_id
+            for pubmed_id in current
+            if pubmed_id not in stored and pubmed_id not in changed
+        }
+        refreshed: Set[str] = set()
+        if changed and not dry_run:
+            logger.info(f"Re-fetching {len(changed)} changed abstracts")
+            # Changed abstracts are fetched again and overwrite the saved ones
+            data_fetcher.existing_ids -= changed
+            stats = await data_fetcher.stream_all_abstracts(
+                {PUBMED_URL.format(pubmed_id) for pubmed_id in changed}
+            )
+            refreshed = {
+                pubmed_id
+                for pubmed_id, status in stats.statuses.items()
+                if status is FetchStatus.FETCHED
+            }
+            # The previous version of an abstract that failed is still saved
+            for pubmed_id in changed - refreshed:
+                data_fetcher.journal.record_status(
+                    pubmed_id, PUBMED_URL.format(pubmed_id), FetchStatus.FETCHED
+                )
+
+        # Changed abstracts keep their old fingerprint until they are re-fetched.
+        # Those without one get an empty fingerprint, which differs from every
+        # summary, since restoring their status above moved their fetch time.
+        data_fetcher.journal.record_summaries(
+            {
+                pubmed_id: summary
+                for pubmed_id, summary in current.items()
+                if pubmed_id not in changed or pubmed_id in refreshed
+            }
+        )
+        data_fetcher.journal.record_summaries(
+            {
+                pubmed_id: ("", current[pubmed_id][1])
+                for pubmed_id in changed - refreshed
+                if pubmed_id not in stored
+            }
+        )
+    finally:
+        data_fetcher.close()
+        if owns_client:
+            await pubmed_client.close()
+
+    summary = {
+        "checked": len(current) + len(missing),
+        "unchanged": len(current) - len(baseline) - len(changed),
+        "baseline": len(baseline),
+        "changed": len(changed),
+        "refreshed": len(refreshed),
+        "failed": 0 if dry_run else len(changed) - len(refreshed),
+        "missing": len(missing),
+        "unchecked": len(unchecked),
+        "summary_requests": len(batches),
+        "changed_ids": sorted(changed),
+        "missing_ids": sorted(missing),
+    }
+    report_path = Path(data_dir) / "refresh_report.json"
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+    print("\nRefresh complete:")
+    print(f"Abstracts checked: {summary['checked']} in {len(batches)} requests")
+    print(f"Unchanged: {summary['unchanged']}")
+    print(f"First check (baseline recorded): {summary['baseline']}")
+    print(f"Changed: {summary['changed']}")
+    print(f"Re-fetched: {summary['refreshed']}")
+    print(f"No longer in PubMed: {summary['missing']}")
+    print(f"Not checked (request failed): {summary['unchecked']}")
+    print(f"Report saved to: {report_path}")
+
+    return summary
+
+
+def _modified_since(last_modified: str, fetched_at: Optional[float]) -> bool:
+    """
+    Check whether a record may have changed after its abstract was saved.
+
+    Args:
+        last_modified: Latest ESummary history date ("YYYY/MM/DD HH:MM")
+        fetched_at: Time the abstract was saved, or None if it is unknown
+
+    Returns:
+        True if the record was modified later than HISTORY_DATE_SLACK before
+        the save
+    """
+    if fetched_at is None or not last_modified:
+        return False
+    earliest = time.gmtime(fetched_at - HISTORY_DATE_SLACK)
+    return last_modified >= time.strftime("%Y/%m/%d %H:%M", earliest)
+
+
+async def main():
+    """Run the refresh script to re-fetch PubMed abstracts that changed."""
+    # Load environment variables from .env file
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Re-fetch saved PubMed abstracts whose records changed"
+    )
+    parser.add_argument(
+        "--email", required=True, help="Email address for NCBI API (required)"
+    )
+    parser.add_argument("--api-key", help="NCBI API key for higher rate limits")
+    parser.add_argument(
+        "--data-dir", default="data", help="Directory containing data files"
+    )
+    parser.add_argument(
+        "--storage-format",
+        choices=STORAGE_FORMATS,
+        default="json",
+        help="Storage format of the saved abstracts",
+    )
+    parser.add_argument(
+        "--summary-batch-size",
+        type=int,
+        default=500,
+        help="Number of PubMed IDs per ESummary request",
+    )
+    parser.add_argument(
+        "--ids-per-request",
+        type=int,
+        default=200,
+        help="Number of PubMed IDs per EFetch request when re-fetching",
+    )
+    parser.add_argument(
+        "--rate-limit",
+        type=int,
+        default=3,
+        help="Maximum requests per second (3 without API key, 10 with API key)",
+    )
+    parser.add_argument(
+        "--max-retries", type=int, default=3, help="Maximum retries for failed requests"
+    )
+    parser.add_argument(
+        "--retry-delay",
+        type=int,
+        default=5,
+        help="Delay in seconds between retries",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report changed records without re-fetching them",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Set the logging level",
+    )
+    parser.add_argument(
+        "--log-file",
+        default="pubmed_refresh.log",
+        help="File to save logs to (use 'none' to disable file logging)",
+    )
+
+    args = parser.parse_args()
+
+    # Set up logging
+    log_file = None if args.log_file.lower() == "none" else args.log_file
+    setup_logging(args.log_level, log_file)
+
+    logger = logging.getLogger(__name__)
+
+    # Use the API key from .env file if not provided via command line
+    api_key = args.api_key or os.environ.get("NCBI_API_KEY")
+
+    logger.info("Initializing refresh script for saved PubMed abstracts")
+    logger.info(f"Using email: {args.email}")
+    logger.info(f"API key provided: {bool(api_key)}")
+    logger.info(f"Data directory: {args.data_dir}")
+
+    try:
+        summary = await refresh_abstracts(
+            email=args.email,
+            api_key=api_key,
+            data_dir=args.data_dir,
+            storage_format=args.storage_format,
+            summary_batch_size=args.summary_batch_size,
+            ids_per_request=args.ids_per_request,
+            rate_limit=args.rate_limit,
+            max_retries=args.max_retries,
+            retry_delay=args.retry_delay,
+            dry_run=args.dry_run,
+        )
+
+        logger.info(
+            f"Refresh complete. Re-fetched {summary['refreshed']} of "
+            f"{summary['changed']} changed abstracts."
+        )
+
+    except Exception as e:
+        logger.exception(f"Error running refresh script: {e}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,126 @@
+"""Compare the PubMed IDs of a BioASQ release with those already known."""
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Set, Union
+
+from src.fetch_journal import FetchJournal
+
+
+@dataclass
+class ReleaseDelta:
+    """
+    Difference between a release and the previous one.
+
+    Attributes:
+        release: Name of the new release
+        previous_release: Name of the release compared against, or None if no
+            release was recorded and the saved abstracts were used instead
+        added: IDs referenced by the new release but not by the previous one
+        removed: IDs referenced by the previous release but not by the new one
+        unchanged: IDs referenced by both
+        to_fetch: Added IDs whose abstracts are not saved yet
+        missing: Unchanged IDs whose abstracts are not saved (left to
+            retry_failed_urls in delta mode)
+    """
+
+    release: str
+    previous_release: Optional[str]
+    added: Set[str] = field(default_factory=set)
+    removed: Set[str] = field(default_factory=set)
+    unchanged: Set[str] = field(default_factory=set)
+    to_fetch: Set[str] = field(default_factory=set)
+    missing: Set[str] = field(default_factory=set)
+
+    def counts(self) -> Dict[str, Any]:
+        """Return the size of each part of the delta."""
+        return {
+            "release": self.release,
+            "previous_release": self.previous_release,
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "unchanged": len(self.unchanged),
+            "to_fetch": len(self.to_fetch),
+            "missing": len(self.missing),
+        }
+
+    def delta_urls(
+        self, ids_to_urls: Dict[str, str], existing_ids: Set[str]
+    ) -> Set[str]:
+        """
+        Select the URLs requested in delta mode.
+
+        Saved IDs are still requested so they are counted as downloaded, while
+        the missing unchanged IDs are left out.
+
+        Args:
+            ids_to_urls: URL of every PubMed ID of the release
+            existing_ids: PubMed IDs whose abstracts are already saved
+
+        Returns:
+            URLs of the IDs to fetch and of the saved IDs
+        """
+        return {
+            ids_to_urls[pubmed_id]
+            for pubmed_id in self.to_fetch | (ids_to_urls.keys() & existing_ids)
+        }
+
+    def write_report(self, path: Union[str, Path]) -> None:
+        """
+        Write the counts and the added and removed IDs as JSON.
+
+        Args:
+            path: Path of the report file
+        """
+        report = self.counts()
+        report["added_ids"] = sorted(self.added)
+        report["removed_ids"] = sorted(self.removed)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+def release_report_path(data_dir: Union[str, Path], release: str) -> Path:
+    """Return the path of the delta report of a release in data_dir."""
+    return Path(data_dir) / f"release_delta-{release}.json"
+
+
+def compute_release_delta(
+    journal: FetchJournal,
+    release: str,
+    pubmed_ids: Iterable[str],
+    existing_ids: Set[str],
+) -> ReleaseDelta:
+    """
+    Compare the PubMed IDs of a release with the most recent other release.
+
+    Without a recorded release (e.g. the first run after upgrading), the IDs of
+    the saved abstracts stand in for the previous release.
+
+    Args:
+        journal: Fetch journal holding the recorded releases
+        release: Name of the new release
+        pubmed_ids: PubMed IDs referenced by the new release
+        existing_ids: PubMed IDs whose abstracts are already saved
+
+    Returns:
+        The delta
+    """
+    current = set(pubmed_ids)
+    previous_release = journal.latest_release(exclude=release)
+    if previous_release is None:
+        previous = existing_ids
+    else:
+        previous = journal.release_ids(previous_release)
+
+    added = current - previous
+    unchanged = current & previous
+    return ReleaseDelta(
+        release=release,
+        previous_release=previous_release,
+        added=added,
+        removed=previous - current,
+        unchanged=unchanged,
+        to_fetch=added - existing_ids,
+        missing=unchanged - existing_ids,
+    )
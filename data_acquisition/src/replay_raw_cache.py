@@ -0,0 +1,228 @@
+#!/usr/bin/env python
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from src.abstract_store import STORAGE_FORMATS, open_abstract_store
+from src.data_fetcher import STORE_DIRECTORIES
+from src.fetch_journal import FetchJournal
+from src.raw_response_cache import RAW_CACHE_DIR, RawResponseCache, format_raw_record
+from src.utils.logging_utils import setup_logging
+
+# Cache opened once in each worker process
+_worker_cache: Optional[RawResponseCache] = None
+
+
+def _open_worker_cache(cache_dir: str) -> None:
+    """Open the raw cache in a worker process (the pool initializer)."""
+    global _worker_cache
+    _worker_cache = RawResponseCache(cache_dir)
+
+
+def _close_worker_cache() -> None:
+    global _worker_cache
+    if _worker_cache is not None:
+        _worker_cache.close()
+        _worker_cache = None
+
+
+def _format_chunk(
+    pubmed_ids: List[str],
+) -> List[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Format the cached records of a chunk of PubMed IDs.
+
+    Args:
+        pubmed_ids: IDs in the order their records are stored
+
+    Returns:
+        (PubMed ID, formatted abstract) for every ID, with None for records
+        that could not be formatted
+    """
+    assert _worker_cache is not None
+    logger = logging.getLogger(__name__)
+    results = []
+    for pubmed_id in pubmed_ids:
+        try:
+            abstract = format_raw_record(_worker_cache.get(pubmed_id))
+        except Exception as e:
+            logger.error(f"Error formatting raw record {pubmed_id}: {e}")
+            abstract = None
+        results.append((pubmed_id, abstract))
+    return results
+
+
+def _format_chunks(
+    cache_dir: Path, chunks: List[List[str]], processes: int
+) -> Iterator[List[Tuple[str, Optional[Dict[str, Any]]]]]:
+    """Format chunks in a process pool, or in-process with a single process."""
+    if processes <= 1:
+        _open_worker_cache(str(cache_dir))
+        try:
+            yield from map(_format_chunk, chunks)
+        finally:
+            _close_worker_cache()
+        return
+
+    # Spawned rather than forked, like the client's decoding pool
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_open_worker_cache,
+        initargs=(str(cache_dir),),
+    ) as executor:
+        yield from executor.map(_format_chunk, chunks)
+
+
+def replay_raw_cache(
+    data_dir: str = "data",
+    storage_format: str = "json",
+    processes: Optional[int] = None,
+    chunk_size: int = 1000,
+) -> Dict[str, Any]:
+    """
+    Rebuild the saved abstracts from the raw response cache without any request.
+
+    Every cached Medline or XML record is formatted again with the current
+    formatting code, in a pool of worker processes that each read their own
+    chunks of the cache, and the abstract is saved over the earlier version.
+    Abstracts rebuilt this way are marked as fetched in the fetch journal.
+
+    Args:
+        data_dir: Directory containing data files and data_dir/raw_responses
+        storage_format: Storage format of the abstracts to write
+        processes: Number of formatting processes (default: one per CPU)
+        chunk_size: Number of records formatted per task
+
+    Returns:
+        Summary of the replay
+    """
+    logger = logging.getLogger(__name__)
+    data_path = Path(data_dir)
+    cache_dir = data_path / RAW_CACHE_DIR
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    cache = RawResponseCache(cache_dir)
+    try:
+        # Chunks follow the storage order so every worker reads sequentially
+        pubmed_ids = cache.ordered_ids()
+    finally:
+        cache.close()
+    chunks = [
+        pubmed_ids[i : i + chunk_size] for i in range(0, len(pubmed_ids), chunk_size)
+    ]
+    logger.info(
+        f"Replaying {len(pubmed_ids)} raw records from {cache_dir} in "
+        f"{len(chunks)} chunks with {processes} processes"
+    )
+
+    store_options: Dict[str, Any] = {}
+    if storage_format == "segments":
+        store_options["writer_id"] = "replay"
+    store = open_abstract_store(
+        data_path / STORE_DIRECTORIES[storage_format], storage_format, **store_options
+    )
+    journal = FetchJournal(data_path / "fetch_journal.sqlite")
+    start = time.monotonic()
+    rebuilt = 0
+    failed: List[str] = []
+    try:
+        for number, results in enumerate(
+            _format_chunks(cache_dir, chunks, processes), 1
+        ):
+            saved = []
+            for pubmed_id, abstract in results:
+                if abstract is None:
+                    failed.append(pubmed_id)
+                    continue
+                store.put(pubmed_id, abstract)
+                saved.append(pubmed_id)
+            journal.record_fetched(saved)
+            rebuilt += len(saved)
+            if number % 10 == 0:
+                logger.info(f"Rebuilt {rebuilt}/{len(pubmed_ids)} abstracts...")
+    finally:
+        store.close()
+        journal.close()
+    elapsed = time.monotonic() - start
+
+    summary = {
+        "records": len(pubmed_ids),
+        "rebuilt": rebuilt,
+        "failed": len(failed),
+        "failed_ids": sorted(failed),
+        "seconds": elapsed,
+        "abstracts_dir": str(store.directory),
+    }
+    logger.info(
+        f"Rebuilt {rebuilt} of {len(pubmed_ids)} abstracts in {elapsed:.1f} "
+        f"seconds ({len(failed)} failed)"
+    )
+    return summary
+
+
+def main():
+    """Run the replay of the raw response cache."""
+    parser = argparse.ArgumentParser(
+        description="Rebuild the saved PubMed abstracts from the raw response cache "
+        "(no network requests)"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default="data",
+        help="Directory containing data files and the raw_responses cache",
+    )
+    parser.add_argument(
+        "--storage-format",
+        choices=STORAGE_FORMATS,
+        default="json",
+        help="Storage format of the abstracts to write",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Number of formatting processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        help="Number of records formatted per task",
+    )
+    parser.add_argument(
+        "--log-level",
+        default="INFO",
+        choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+        help="Set the logging level",
+    )
+    args = parser.parse_args()
+
+    setup_logging(args.log_level, None)
+
+    try:
+        summary = replay_raw_cache(
+            data_dir=args.data_dir,
+            storage_format=args.storage_format,
+            processes=args.processes,
+            chunk_size=args.chunk_size,
+        )
+    except Exception as e:
+        logging.getLogger(__name__).exception(f"Error replaying raw cache: {e}")
+        return 1
+
+    print(
+        f"Rebuilt {summary['rebuilt']}/{summary['records']} abstracts in "
+        f"{summary['abstracts_dir']} ({summary['failed']} failed)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,8 +9,12 @@ from typing import List, Optional, Set
 
 from dotenv import load_dotenv
 
+from src.abstract_store import STORAGE_FORMATS
 from src.clients.biopython_pubmed_client import BioPythonPubMedClient
+from src.clients.pubmed_client import PubMedClient
 from src.data_fetcher import DataFetcher
+from src.fetch_journal import FetchJournal
+from src.fetch_stats import FetchStatus
 from src.utils.logging_utils import setup_logging
 
 
@@ -22,74 +26,90 @@ async def retry_failed_urls(
     rate_limit: int = 3,
     max_retries: int = 5,
     retry_delay: int = 10,
+    adaptive: bool = False,
+    max_rate_limit: Optional[float] = None,
+    storage_format: str = "json",
+    pubmed_client: Optional[PubMedClient] = None,
 ):
     """
-    Retry fetching abstracts for URLs that previously failed.
+    Retry fetching abstracts for URLs marked as failed in the fetch journal.
 
     Args:
         email: Email address for NCBI API
         api_key: NCBI API key for higher rate limits
         data_dir: Directory containing data files
-        batch_size: Number of abstracts to fetch in a single batch
+        batch_size: Number of requests queued ahead of the fetch workers
         rate_limit: Maximum requests per second
         max_retries: Maximum number of retries for failed requests
         retry_delay: Delay in seconds between retries
+        adaptive: Whether to adapt rate and concurrency to server feedback
+        max_rate_limit: Highest requests per second the adaptive controller may reach
+        storage_format: Storage format of the saved abstracts
+        pubmed_client: Client to fetch with instead of a new BioPythonPubMedClient
 
     Returns:
         Number of successfully fetched abstracts
     """
     logger = logging.getLogger(__name__)
     data_dir_path = Path(data_dir)
-    failed_urls_path = data_dir_path / "failed_urls.json"
+    journal_path = data_dir_path / "fetch_journal.sqlite"
+    legacy_failed_urls_path = data_dir_path / "failed_urls.json"
 
-    if not failed_urls_path.exists():
-        logger.error(f"Failed URLs file not found at {failed_urls_path}")
+    if not journal_path.exists() and not legacy_failed_urls_path.exists():
+        logger.error(f"Fetch journal not found at {journal_path}")
         return 0
 
-    # Load failed URLs
-    with open(failed_urls_path, "r", encoding="utf-8") as f:
-        failed_urls: List[str] = json.load(f)
-
-    if not failed_urls:
-        logger.info("No failed URLs to retry")
-        return 0
-
-    logger.info(f"Found {len(failed_urls)} failed URLs to retry")
-
-    # Create the client - using lower rate limits and more retries
-    pubmed_client = BioPythonPubMedClient(
-        email=email, api_key=api_key, tool="bioasq-rag-retry"
-    )
-
-    # Create a data fetcher with more conservative settings
-    data_fetcher = DataFetcher(
-        pubmed_client=pubmed_client,
-        data_dir=data_dir,
-        batch_size=batch_size,
-        rate_limit_per_sec=rate_limit,
-        max_retries=max_retries,
-        retry_delay=retry_delay,
-        concurrent_requests=min(rate_limit, 5),  # Limit concurrent requests
-    )
-
-    # Convert list to set
-    urls_to_retry: Set[str] = set(failed_urls)
-
-    # Fetch the abstracts
-    abstracts = await data_fetcher.fetch_all_abstracts(urls_to_retry)
-    successful_fetches = len(abstracts)
-
-    # Update the failed URLs file with remaining failures
-    if data_fetcher.failed_urls:
-        with open(failed_urls_path, "w", encoding="utf-8") as f:
-            json.dump(list(data_fetcher.failed_urls), f, indent=2)
-        logger.info(
-            f"Updated failed URLs file with {len(data_fetcher.failed_urls)} remaining failed URLs"
+    journal = FetchJournal(journal_path)
+    owns_client = pubmed_client is None
+    data_fetcher: Optional[DataFetcher] = None
+    try:
+        if legacy_failed_urls_path.exists():
+            _import_legacy_failed_urls(journal, legacy_failed_urls_path)
+
+        # Indexed lookup of the URLs that failed in earlier runs
+        failed_urls = journal.urls_with_status(FetchStatus.FAILED)
+        if not failed_urls:
+            logger.info("No failed URLs to retry")
+            return 0
+
+        logger.info(f"Found {len(failed_urls)} failed URLs to retry")
+
+        # Create the client - using lower rate limits and more retries
+        if pubmed_client is None:
+            pubmed_client = BioPythonPubMedClient(
+                email=email, api_key=api_key, tool="bioasq-rag-retry"
+            )
+
+        # Create a data fetcher with more conservative settings
+        data_fetcher = DataFetcher(
+            pubmed_client=pubmed_client,
+            data_dir=data_dir,
+            batch_size=batch_size,
+            rate_limit_per_sec=rate_limit,
+            max_retries=max_retries,
+            retry_delay=retry_delay,
+            concurrent_requests=min(rate_limit, 5),  # Limit concurrent requests
+            adaptive=adaptive,
+            max_rate_limit_per_sec=max_rate_limit,
+            storage_format=storage_format,
+            journal=journal,
         )
-    else:
-        # All URLs were fetched successfully, so remove the file
-        failed_urls_path.unlink(missing_ok=True)
-        logger.info("All URLs fetched successfully. Removed failed URLs file.")
+
+        # Convert list to set
+        urls_to_retry: Set[str] = set(failed_urls)
+
+        # The journal is updated as each request completes. Abstracts saved since
+        # the failure are skipped and count as successful.
+        stats = await data_fetcher.stream_all_abstracts(urls_to_retry)
+        successful_fetches = stats.successful
+    finally:
+        # Closing the fetcher writes pending abstracts and closes the journal
+        if data_fetcher is not None:
+            data_fetcher.close()
+        else:
+            journal.close()
+        if owns_client and pubmed_client is not None:
+            await pubmed_client.close()
 
     # Print summary
     print("\nRetry complete:")
@@ -101,6 +121,25 @@ async def retry_failed_urls(
     return successful_fetches
 
 
+def _import_legacy_failed_urls(journal: FetchJournal, path: Path) -> None:
+    """
+    Move the URLs of a failed_urls.json file from older runs into the journal.
+
+    Args:
+        journal: Journal to record the failed URLs in
+        path: Path of the failed_urls.json file, which is removed afterwards
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        failed_urls: List[str] = json.load(f)
+    for url in failed_urls:
+        journal.record_status(url.split("/")[-1], url, FetchStatus.FAILED)
+    journal.flush()
+    path.unlink()
+    logging.getLogger(__name__).info(
+        f"Imported {len(failed_urls)} failed URLs from {path} into the fetch journal"
+    )
+
+
 async def main():
     """Run the retry script to fetch previously failed PubMed abstracts."""
     # Load environment variables from .env file
@@ -117,7 +156,10 @@ async def main():
         "--data-dir", default="data", help="Directory containing data files"
     )
     parser.add_argument(
-        "--batch-size", type=int, default=10, help="Number of abstracts per batch"
+        "--batch-size",
+        type=int,
+        default=10,
+        help="Number of requests queued ahead of the fetch workers",
     )
     parser.add_argument(
         "--rate-limit",
@@ -134,6 +176,22 @@ async def main():
         default=10,
         help="Delay in seconds between retries",
     )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Adapt rate and concurrency to 429s, timeouts and latency (AIMD)",
+    )
+    parser.add_argument(
+        "--max-rate-limit",
+        type=float,
+        help="Highest requests per second the adaptive controller may reach",
+    )
+    parser.add_argument(
+        "--storage-format",
+        choices=STORAGE_FORMATS,
+        default="json",
+        help="Storage format of the saved abstracts",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
@@ -177,6 +235,9 @@ async def main():
             rate_limit=args.rate_limit,
             max_retries=args.max_retries,
             retry_delay=args.retry_delay,
+            adaptive=args.adaptive,
+            max_rate_limit=args.max_rate_limit,
+            storage_format=args.storage_format,
         )
 
         logger.info(
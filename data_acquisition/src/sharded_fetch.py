@@ -0,0 +1,402 @@
+"""Fetch abstracts with several NCBI API keys, one worker process per key."""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Union
+
+from src.abstract_store import open_abstract_store
+from src.clients.biopython_pubmed_client import BioPythonPubMedClient
+from src.clients.httpx_pubmed_client import EUTILS_BASE_URL, HttpxPubMedClient
+from src.clients.pubmed_client import PubMedClient
+from src.data_fetcher import STORE_DIRECTORIES, DataFetcher
+from src.fetch_journal import FetchJournal
+from src.fetch_stats import FetchStats, FetchStatus
+from src.pubmed_url_collector import DEFAULT_RELEASE
+from src.raw_response_cache import RAW_CACHE_DIR, RawResponseCache
+from src.release_delta import compute_release_delta, release_report_path
+from src.utils.logging_utils import setup_logging
+from src.utils.metrics import MetricsSnapshotWriter
+
+# Seconds a worker waits for another worker's journal transaction
+JOURNAL_TIMEOUT = 60.0
+
+
+@dataclass
+class NCBICredentials:
+    """
+    Identity and request limit used by one worker.
+
+    Attributes:
+        email: Email address to identify yourself to NCBI
+        api_key: NCBI API key (None for the keyless limit)
+        tool: Name of the tool registered with the key
+        rate_limit: Requests per second (defaults to the NCBI limit: 10 with
+            a key, 3 without)
+    """
+
+    email: str
+    api_key: Optional[str] = None
+    tool: str = "bioasq-rag"
+    rate_limit: Optional[int] = None
+
+    @property
+    def requests_per_second(self) -> int:
+        """Request rate allowed for these credentials."""
+        if self.rate_limit:
+            return self.rate_limit
+        return 10 if self.api_key else 3
+
+    def describe(self) -> str:
+        """Return a label for logs that does not reveal the key."""
+        key = f"key ...{self.api_key[-4:]}" if self.api_key else "no key"
+        return f"{self.tool} ({key})"
+
+
+def load_credentials(path: Union[str, Path]) -> List[NCBICredentials]:
+    """
+    Load credentials from a JSON file.
+
+    The file holds a list of objects with the fields of NCBICredentials, e.g.
+    [{"email": "me@example.org", "api_key": "...", "tool": "bioasq-rag-1"}].
+
+    Args:
+        path: Path of the JSON file
+
+    Returns:
+        List of credentials
+
+    Raises:
+        ValueError: If the file does not contain a non-empty list
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    if not isinstance(entries, list) or not entries:
+        raise ValueError(f"Expected a non-empty list of credentials in {path}")
+    return [NCBICredentials(**entry) for entry in entries]
+
+
+def create_pubmed_client(
+    client: str,
+    credentials: NCBICredentials,
+    ids_per_request: int = 1,
+    retmode: str = "text",
+    decode_processes: int = 0,
+    eutils_url: str = EUTILS_BASE_URL,
+    raw_cache: Optional[RawResponseCache] = None,
+) -> PubMedClient:
+    """
+    Create a PubMed client for a set of credentials.
+
+    Args:
+        client: "biopython" or "httpx"
+        credentials: Credentials of the client
+        ids_per_request: Maximum number of IDs sent in a single EFetch request
+        retmode: EFetch response format of the biopython client
+        decode_processes: Decoding processes of the biopython client
+        eutils_url: Base URL of the E-utilities used by the httpx client
+        raw_cache: Cache the raw EFetch records are saved to, if any
+
+    Returns:
+        The client
+    """
+    if client == "httpx":
+        return HttpxPubMedClient(
+            email=credentials.email,
+            api_key=credentials.api_key,
+            tool=credentials.tool,
+            efetch_batch_size=ids_per_request,
+            base_url=eutils_url,
+            max_connections=credentials.requests_per_second,
+            raw_cache=raw_cache,
+            rate_limit_per_sec=credentials.requests_per_second,
+        )
+    return BioPythonPubMedClient(
+        email=credentials.email,
+        api_key=credentials.api_key,
+        tool=credentials.tool,
+        efetch_batch_size=ids_per_request,
+        retmode=retmode,
+        decode_processes=decode_processes,
+        raw_cache=raw_cache,
+    )
+
+
+def shard_for(pubmed_id: str, num_shards: int) -> int:
+    """
+    Return the shard of a PubMed ID.
+
+    The hash is stable across processes and runs (unlike the built-in hash),
+    so a resumed fetch sends every ID to the same shard again.
+
+    Args:
+        pubmed_id: The PubMed ID
+        num_shards: Number of shards
+
+    Returns:
+        Shard number between 0 and num_shards - 1
+    """
+    return zlib.crc32(pubmed_id.encode("utf-8")) % num_shards
+
+
+@dataclass
+class ShardTask:
+    """Work of one worker process."""
+
+    index: int
+    credentials: NCBICredentials
+    urls: List[str]
+    data_dir: str
+    storage_format: str
+    client: str = "biopython"
+    client_options: Dict[str, Any] = field(default_factory=dict)
+    fetcher_options: Dict[str, Any] = field(default_factory=dict)
+    metrics_interval: float = 0.0
+    log_level: str = "INFO"
+    raw_cache: bool = False
+
+
+def _fetch_shard(task: ShardTask) -> Dict[str, Any]:
+    """Fetch the URLs of one shard (the entry point of worker processes)."""
+    setup_logging(task.log_level, None)
+    return asyncio.run(_fetch_shard_async(task))
+
+
+async def _fetch_shard_async(task: ShardTask) -> Dict[str, Any]:
+    logger = logging.getLogger(__name__)
+    credentials = task.credentials
+    logger.info(
+        f"Shard {task.index}: fetching {len(task.urls)} URLs as {credentials.describe()} "
+        f"at {credentials.requests_per_second} requests per second"
+    )
+
+    store_dir = Path(task.data_dir) / STORE_DIRECTORIES[task.storage_format]
+    store_options: Dict[str, Any] = {}
+    if task.storage_format == "segments":
+        # Each process appends to its own segments and index
+        store_options["writer_id"] = f"shard{task.index}"
+    elif task.storage_format == "zstd" and task.index > 0:
+        # Only one process may write the shared dictionary; the others pick it
+        # up once it is saved
+        store_options["train_samples"] = 0
+    store = open_abstract_store(store_dir, task.storage_format, **store_options)
+    raw_cache = None
+    if task.raw_cache:
+        raw_cache = RawResponseCache(
+            Path(task.data_dir) / RAW_CACHE_DIR, writer_id=f"shard{task.index}"
+        )
+
+    pubmed_client = create_pubmed_client(
+        task.client, credentials, raw_cache=raw_cache, **task.client_options
+    )
+    fetcher = DataFetcher(
+        pubmed_client=pubmed_client,
+        data_dir=task.data_dir,
+        rate_limit_per_sec=credentials.requests_per_second,
+        concurrent_requests=credentials.requests_per_second,
+        journal=FetchJournal(
+            Path(task.data_dir) / "fetch_journal.sqlite", timeout=JOURNAL_TIMEOUT
+        ),
+        store=store,
+        **task.fetcher_options,
+    )
+    snapshot_writer = None
+    if task.metrics_interval > 0:
+        snapshot_writer = MetricsSnapshotWriter(
+            fetcher.metrics,
+            Path(task.data_dir) / f"fetch_metrics-shard{task.index}.json",
+            interval=task.metrics_interval,
+        )
+        snapshot_writer.start()
+
+    start = time.monotonic()
+    try:
+        stats = await fetcher.stream_all_abstracts(set(task.urls))
+    finally:
+        fetcher.close()
+        await pubmed_client.close()
+        if raw_cache is not None:
+            raw_cache.close()
+        if snapshot_writer:
+            snapshot_writer.stop()
+    elapsed = time.monotonic() - start
+
+    logger.info(
+        f"Shard {task.index}: fetched {stats.fetched}, already downloaded "
+        f"{stats.already_downloaded}, failed {stats.failed} in {elapsed:.0f} seconds"
+    )
+    return {
+        "shard": task.index,
+        "credentials": credentials.describe(),
+        "rate_limit": credentials.requests_per_second,
+        "urls": len(task.urls),
+        "seconds": elapsed,
+        "stats": stats,
+    }
+
+
+def run_sharded_fetch(
+    urls: Set[str],
+    credentials: List[NCBICredentials],
+    data_dir: str = "data",
+    storage_format: str = "json",
+    client: str = "biopython",
+    client_options: Optional[Dict[str, Any]] = None,
+    fetcher_options: Optional[Dict[str, Any]] = None,
+    metrics_interval: float = 0.0,
+    log_level: str = "INFO",
+    release: str = DEFAULT_RELEASE,
+    delta: bool = False,
+    raw_cache: bool = False,
+) -> Optional[Dict[str, Any]]:
+    """
+    Fetch abstracts in one process per set of credentials.
+
+    PubMed IDs are partitioned by a stable hash, so each worker fetches its
+    own share with its own key and rate limiter. All workers write to the same
+    abstract store (segment stores get one writer per shard) and fetch
+    journal, and their outcomes are merged into one summary recorded in the
+    journal.
+
+    Args:
+        urls: Set of PubMed URLs to fetch
+        credentials: Credentials of each worker
+        data_dir: Directory to save abstracts to
+        storage_format: Storage format of the abstracts
+        client: PubMed client implementation, "biopython" or "httpx"
+        client_options: Additional options of create_pubmed_client
+        fetcher_options: Additional DataFetcher options, e.g. ids_per_request
+            (the rate limit and concurrency come from the credentials)
+        metrics_interval: Seconds between per-shard metrics snapshots in
+            data_dir (0 to disable)
+        log_level: Logging level of the workers
+        release: BioASQ release the URLs were collected from
+        delta: Whether to only fetch IDs added since the previous release (see
+            DataFetcher.run)
+        raw_cache: Whether to save the raw EFetch records of every shard to
+            data_dir/raw_responses
+
+    Returns:
+        Summary of the fetch, or None if there were no URLs
+
+    Raises:
+        ValueError: If no credentials are given
+    """
+    logger = logging.getLogger(__name__)
+    if not credentials:
+        raise ValueError("At least one set of credentials is required")
+    if not urls:
+        logger.warning("No URLs found. Nothing to fetch.")
+        return None
+
+    data_path = Path(data_dir)
+    data_path.mkdir(parents=True, exist_ok=True)
+    journal = FetchJournal(data_path / "fetch_journal.sqlite", timeout=JOURNAL_TIMEOUT)
+    try:
+        # Seed a new journal once here rather than in every worker
+        if journal.is_empty():
+            store = open_abstract_store(
+                data_path / STORE_DIRECTORIES[storage_format], storage_format
+            )
+            try:
+                journal.import_fetched(store.ids())
+            finally:
+                store.close()
+        existing_ids = journal.ids_with_status(FetchStatus.FETCHED)
+        ids_to_urls = {url.split("/")[-1]: url for url in urls}
+        release_delta = compute_release_delta(
+            journal, release, ids_to_urls, existing_ids
+        )
+    finally:
+        journal.close()
+    if delta:
+        logger.info(
+            f"Delta mode: fetching {len(release_delta.to_fetch)} new IDs, "
+            f"skipping {len(release_delta.missing)} missing unchanged IDs"
+        )
+        urls = release_delta.delta_urls(ids_to_urls, existing_ids)
+
+    stats = FetchStats()
+    shard_urls: List[List[str]] = [[] for _ in credentials]
+    for url in sorted(urls):
+        pubmed_id = url.split("/")[-1]
+        if pubmed_id in existing_ids:
+            stats.record(pubmed_id, FetchStatus.ALREADY_DOWNLOADED)
+        else:
+            shard_urls[shard_for(pubmed_id, len(credentials))].append(url)
+    logger.info(
+        f"Fetching {sum(map(len, shard_urls))} URLs in {len(credentials)} shards "
+        f"({stats.already_downloaded} already downloaded)"
+    )
+
+    tasks = [
+        ShardTask(
+            index=index,
+            credentials=shard_credentials,
+            urls=shard_urls[index],
+            data_dir=str(data_dir),
+            storage_format=storage_format,
+            client=client,
+            client_options=client_options or {},
+            fetcher_options=fetcher_options or {},
+            metrics_interval=metrics_interval,
+            log_level=log_level,
+            raw_cache=raw_cache,
+        )
+        for index, shard_credentials in enumerate(credentials)
+        if shard_urls[index]
+    ]
+    shard_results = []
+    if tasks:
+        # Spawned workers start with a fresh Entrez module and event loop
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(tasks), mp_context=context) as pool:
+            shard_results = list(pool.map(_fetch_shard, tasks))
+
+    for result in shard_results:
+        for pubmed_id, status in result.pop("stats").statuses.items():
+            stats.record(pubmed_id, status)
+        result["urls_per_sec"] = (
+            result["urls"] / result["seconds"] if result["seconds"] else 0.0
+        )
+
+    with FetchJournal(
+        data_path / "fetch_journal.sqlite", timeout=JOURNAL_TIMEOUT
+    ) as journal:
+        journal.record_run(len(urls), stats)
+        journal.record_release(release, ids_to_urls)
+    release_delta.write_report(release_report_path(data_path, release))
+
+    summary = {
+        "total_urls": len(urls),
+        "successful_fetches": stats.successful,
+        "already_downloaded": stats.already_downloaded,
+        "failed_fetches": len(urls) - stats.successful,
+        "abstracts_dir": str(data_path / STORE_DIRECTORIES[storage_format]),
+        "journal_file": str(data_path / "fetch_journal.sqlite"),
+        "shards": shard_results,
+        "release": release_delta.counts(),
+    }
+
+    print("\nSharded abstract fetching complete:")
+    print(f"Total URLs: {summary['total_urls']}")
+    print(f"Successfully fetched: {summary['successful_fetches']}")
+    print(f"Already downloaded: {summary['already_downloaded']}")
+    print(f"Failed: {summary['failed_fetches']}")
+    print(
+        f"Release {release}: {len(release_delta.added)} added, "
+        f"{len(release_delta.removed)} removed, "
+        f"{len(release_delta.unchanged)} unchanged"
+    )
+    for result in shard_results:
+        print(
+            f"  Shard {result['shard']} [{result['credentials']}]: {result['urls']} URLs "
+            f"in {result['seconds']:.0f} seconds ({result['urls_per_sec']:.1f} URLs/second)"
+        )
+    return summary
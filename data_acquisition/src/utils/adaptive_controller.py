@@ -0,0 +1,198 @@
+"""Adaptive (AIMD) rate and concurrency control."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Optional
+
+from src.utils.rate_limiter import AsyncTokenBucket
+
+
+class AIMDController:
+    """
+    Additive-increase/multiplicative-decrease controller for request throughput.
+
+    Outcomes are collected in windows of ``window_size`` requests. When a window
+    completes with low latency and a low error rate, the request rate and the
+    concurrency limit are raised by a fixed step. A rate limit (HTTP 429) or
+    timeout cuts both multiplicatively right away, at most once per
+    ``decrease_cooldown`` seconds so that a burst of errors from requests that
+    were already in flight only counts once. A Retry-After delay pauses all
+    requests until it has passed.
+    """
+
+    def __init__(
+        self,
+        rate_limiter: AsyncTokenBucket,
+        min_rate: float = 1.0,
+        max_rate: float = 20.0,
+        rate_increase: float = 0.5,
+        max_concurrency: int = 20,
+        decrease_factor: float = 0.5,
+        latency_threshold: float = 2.0,
+        error_rate_threshold: float = 0.05,
+        window_size: int = 20,
+        decrease_cooldown: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        """
+        Initialize the controller.
+
+        The starting rate is taken from the rate limiter, and the starting
+        concurrency limit is the rate rounded up.
+
+        Args:
+            rate_limiter: Token bucket whose rate is adjusted
+            min_rate: Lowest request rate the controller will set
+            max_rate: Highest request rate the controller will set
+            rate_increase: Requests per second added after a healthy window
+            max_concurrency: Highest concurrency limit the controller will set
+            decrease_factor: Factor applied to rate and concurrency on throttling
+            latency_threshold: Average latency in seconds above which a window
+                is not considered healthy
+            error_rate_threshold: Error rate above which a window is not
+                considered healthy
+            window_size: Number of outcomes evaluated together
+            decrease_cooldown: Minimum seconds between two decreases
+            clock: Function returning the current time in seconds
+            sleep: Coroutine function used to wait (replaceable in tests)
+        """
+        self.logger = logging.getLogger(__name__)
+        self.rate_limiter = rate_limiter
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.rate_increase = rate_increase
+        self.max_concurrency = max_concurrency
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.window_size = window_size
+        self.decrease_cooldown = decrease_cooldown
+        self._clock = clock
+        self._sleep = sleep
+
+        self.rate = min(max(rate_limiter.rate, min_rate), max_rate)
+        self.rate_limiter.set_rate(self.rate)
+        self.concurrency = min(max(1, int(-(-self.rate // 1))), max_concurrency)
+
+        self._latencies: Deque[float] = deque()
+        self._errors = 0
+        self._last_decrease: Optional[float] = None
+        self._paused_until = 0.0
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """Hold one of the ``concurrency`` request slots for the duration."""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.concurrency)
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._in_flight -= 1
+                self._condition.notify_all()
+
+    async def wait_for_backoff(self) -> float:
+        """
+        Wait while requests are paused by a Retry-After delay.
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        wait_time = self._paused_until - self._clock()
+        if wait_time > 0:
+            await self._sleep(wait_time)
+            return wait_time
+        return 0.0
+
+    def record_success(self, latency: float) -> None:
+        """
+        Record a successful request.
+
+        Args:
+            latency: Duration of the request in seconds
+        """
+        self._latencies.append(latency)
+        self._evaluate_window()
+
+    def record_error(self) -> None:
+        """Record a failed request that was not caused by throttling."""
+        self._errors += 1
+        self._evaluate_window()
+
+    def record_throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Record a rate-limited request (HTTP 429).
+
+        Args:
+            retry_after: Seconds the server asked us to wait, if given
+        """
+        if retry_after:
+            self._paused_until = max(self._paused_until, self._clock() + retry_after)
+        self._decrease("rate limit")
+
+    def record_timeout(self) -> None:
+        """Record a request that timed out."""
+        self._decrease("timeout")
+
+    def _evaluate_window(self) -> None:
+        """Raise the limits if the current window is complete and healthy."""
+        total = len(self._latencies) + self._errors
+        if total < self.window_size:
+            return
+
+        average_latency = (
+            sum(self._latencies) / len(self._latencies) if self._latencies else 0.0
+        )
+        error_rate = self._errors / total
+        self._latencies.clear()
+        self._errors = 0
+
+        if (
+            average_latency <= self.latency_threshold
+            and error_rate <= self.error_rate_threshold
+        ):
+            self._set_limits(
+                self.rate + self.rate_increase,
+                self.concurrency + 1,
+            )
+        else:
+            self.logger.info(
+                f"Holding rate at {self.rate:.2f} requests/second "
+                f"(average latency {average_latency:.2f}s, error rate {error_rate:.1%})"
+            )
+
+    def _decrease(self, reason: str) -> None:
+        """Cut the limits multiplicatively, unless we just did so."""
+        now = self._clock()
+        if (
+            self._last_decrease is not None
+            and now - self._last_decrease < self.decrease_cooldown
+        ):
+            return
+        self._last_decrease = now
+        self._latencies.clear()
+        self._errors = 0
+        self._set_limits(
+            self.rate * self.decrease_factor,
+            int(self.concurrency * self.decrease_factor),
+        )
+        self.logger.warning(
+            f"Reduced rate to {self.rate:.2f} requests/second and concurrency to "
+            f"{self.concurrency} after {reason}"
+        )
+
+    def _set_limits(self, rate: float, concurrency: int) -> None:
+        """Apply new limits, clamped to their configured bounds."""
+        self.rate = min(max(rate, self.min_rate), self.max_rate)
+        self.rate_limiter.set_rate(self.rate)
+        self.concurrency = min(max(concurrency, 1), self.max_concurrency)
+        self.logger.debug(
+            f"Rate set to {self.rate:.2f} requests/second, concurrency {self.concurrency}"
+        )
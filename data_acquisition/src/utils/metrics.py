@@ -0,0 +1,426 @@
+"""Counters, gauges and histograms exposed in Prometheus text format and as JSON."""
+
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Label values of one series, sorted by label name
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Upper bounds in seconds suited to E-utilities requests and backoff delays
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (
+        name
+        + '="'
+        + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        + '"'
+        for name, value in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    """Base class of metrics, holding one value per combination of labels."""
+
+    type_name = ""
+
+    def __init__(self, name: str, description: str, lock: threading.Lock):
+        self.name = name
+        self.description = description
+        self._lock = lock
+
+    @abstractmethod
+    def samples(self) -> List[Tuple[str, LabelKey, Optional[Tuple[str, str]], float]]:
+        """Return (sample name, labels, extra label, value) for every series."""
+        pass
+
+    @abstractmethod
+    def snapshot(self) -> Any:
+        """Return the values of the metric in a JSON-serializable form."""
+        pass
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. of requests."""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, description: str, lock: threading.Lock):
+        super().__init__(name, description, lock)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """
+        Increase the counter.
+
+        Args:
+            amount: Non-negative amount to add
+            **labels: Labels of the series to increase
+
+        Raises:
+            ValueError: If amount is negative
+        """
+        if amount < 0:
+            raise ValueError(f"Counters can only increase, got {amount}")
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        """Return the count of a series."""
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def samples(self) -> List[Tuple[str, LabelKey, Optional[Tuple[str, str]], float]]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [(f"{self.name}_total", key, None, value) for key, value in values]
+
+    def snapshot(self) -> Any:
+        with self._lock:
+            return _series_snapshot(dict(self._values))
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. the number of requests in flight."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, description: str, lock: threading.Lock):
+        super().__init__(name, description, lock)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: Any) -> None:
+        """Set the value of a series."""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        """Add to the value of a series."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        """Subtract from the value of a series."""
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """
+        Read the value from a function whenever the gauge is collected.
+
+        Args:
+            function: Function returning the current value
+        """
+        self._function = function
+
+    def value(self, **labels: Any) -> float:
+        """Return the value of a series."""
+        if self._function is not None:
+            return float(self._function())
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def _current(self) -> Dict[LabelKey, float]:
+        if self._function is not None:
+            return {(): float(self._function())}
+        with self._lock:
+            return dict(self._values)
+
+    def samples(self) -> List[Tuple[str, LabelKey, Optional[Tuple[str, str]], float]]:
+        return [
+            (self.name, key, None, value)
+            for key, value in sorted(self._current().items())
+        ]
+
+    def snapshot(self) -> Any:
+        return _series_snapshot(self._current())
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, e.g. of latencies."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        lock: threading.Lock,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, description, lock)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: count per bucket (the last one is +Inf), sum and count
+        self._values: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: The observed value
+            **labels: Labels of the series
+        """
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, totals = self._values.setdefault(
+                key, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            totals[0] += value
+
+    def count(self, **labels: Any) -> int:
+        """Return the number of observations of a series."""
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[Tuple[str, LabelKey, Optional[Tuple[str, str]], float]]:
+        samples = []
+        for key, (counts, total) in self._copy():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                samples.append(
+                    (
+                        f"{self.name}_bucket",
+                        key,
+                        ("le", _format_value(bound)),
+                        cumulative,
+                    )
+                )
+            samples.append((f"{self.name}_sum", key, None, total))
+            samples.append((f"{self.name}_count", key, None, cumulative))
+        return samples
+
+    def snapshot(self) -> Any:
+        series = {}
+        for key, (counts, total) in self._copy():
+            count = sum(counts)
+            series[_format_labels(key)] = {
+                "count": count,
+                "sum": total,
+                "mean": total / count if count else None,
+                "buckets": {
+                    _format_value(bound): bucket_count
+                    for bound, bucket_count in zip(self.buckets + (math.inf,), counts)
+                },
+            }
+        if list(series) == [""]:
+            return series[""]
+        return series
+
+    def _copy(self) -> List[Tuple[LabelKey, Tuple[List[int], float]]]:
+        """Return the bucket counts and sum of every series, sorted by labels."""
+        with self._lock:
+            return [
+                (key, (list(counts), totals[0]))
+                for key, (counts, totals) in sorted(self._values.items())
+            ]
+
+
+def _series_snapshot(values: Dict[LabelKey, float]) -> Any:
+    """Return a single value for an unlabelled metric, else a value per label set."""
+    if list(values) in ([], [()]):
+        return values.get((), 0.0)
+    return {_format_labels(key): value for key, value in sorted(values.items())}
+
+
+class MetricsRegistry:
+    """Collection of named metrics, safe to update from several threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, description: str) -> Counter:
+        """Return the counter with the given name, creating it if needed."""
+        return self._register(Counter, name, description)
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        """Return the gauge with the given name, creating it if needed."""
+        return self._register(Gauge, name, description)
+
+    def histogram(
+        self, name: str, description: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Return the histogram with the given name, creating it if needed."""
+        return self._register(Histogram, name, description, buckets=buckets)
+
+    def _register(self, cls: type, name: str, description: str, **kwargs: Any) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = cls(name, description, self._lock, **kwargs)
+            self._metrics[name] = metric
+        elif not isinstance(metric, cls):
+            raise ValueError(
+                f"Metric {name} is already registered as a {metric.type_name}"
+            )
+        return metric
+
+    def render_prometheus(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.description}")
+            lines.append(f"# TYPE {name} {metric.type_name}")
+            for sample_name, key, extra, value in metric.samples():
+                lines.append(
+                    f"{sample_name}{_format_labels(key, extra)} {_format_value(value)}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the current value of every metric as a JSON-serializable dictionary."""
+        metrics = {
+            name: metric.snapshot() for name, metric in sorted(self._metrics.items())
+        }
+        return {"timestamp": time.time(), "metrics": metrics}
+
+    def write_snapshot(self, path: Union[str, Path]) -> None:
+        """
+        Atomically write a JSON snapshot of the metrics.
+
+        Args:
+            path: File to write the snapshot to
+        """
+        path = Path(path)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+class MetricsServer:
+    """HTTP server exposing a registry at /metrics for Prometheus to scrape."""
+
+    def __init__(
+        self, registry: MetricsRegistry, host: str = "127.0.0.1", port: int = 0
+    ):
+        """
+        Initialize the server. Requests are served once start is called.
+
+        Args:
+            registry: Metrics to expose
+            host: Address to listen on (local only by default)
+            port: Port to listen on (0 picks a free port)
+        """
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                logging.getLogger(__name__).debug(format % args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """URL of the metrics endpoint."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self) -> None:
+        """Serve requests from a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="metrics-server", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop serving and close the listening socket."""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+class MetricsSnapshotWriter:
+    """Background thread writing a JSON snapshot of a registry at a fixed interval."""
+
+    def __init__(
+        self, registry: MetricsRegistry, path: Union[str, Path], interval: float = 30.0
+    ):
+        """
+        Initialize the snapshot writer. Snapshots are written once start is called.
+
+        Args:
+            registry: Metrics to write
+            path: File to write the snapshots to
+            interval: Seconds between snapshots
+
+        Raises:
+            ValueError: If interval is not positive
+        """
+        if interval <= 0:
+            raise ValueError(f"Snapshot interval must be positive, got {interval}")
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry
+        self.path = Path(path)
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Start writing snapshots."""
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-snapshot", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        if self._thread is not None:
+            self._stopped.set()
+            self._thread.join()
+            self._thread = None
+        self._write()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._write()
+
+    def _write(self) -> None:
+        try:
+            self.registry.write_snapshot(self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not write metrics snapshot to {self.path}: {e}")
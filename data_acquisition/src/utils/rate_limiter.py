@@ -0,0 +1,92 @@
+"""Asynchronous rate limiting utilities."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket rate limiter that can be shared by many coroutines.
+
+    Tokens refill continuously at ``rate`` per second up to ``burst``. Each
+    acquire() reserves a token immediately, letting the balance go negative, and
+    then sleeps until that token would have been available. Because the
+    reservation happens before any await, concurrent callers are spaced out
+    correctly instead of all reading the same state and firing together.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        """
+        Initialize the token bucket.
+
+        Args:
+            rate: Number of tokens added per second
+            burst: Maximum number of tokens that can accumulate
+            clock: Function returning the current time in seconds
+            sleep: Coroutine function used to wait (replaceable in tests)
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        if burst < 1:
+            raise ValueError(f"Burst must be at least 1, got {burst}")
+
+        self.rate = float(rate)
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._last_refill = clock()
+
+        # Statistics
+        self.acquired = 0
+        self.total_wait_time = 0.0
+
+    def _refill(self) -> None:
+        """Add the tokens accumulated since the last refill."""
+        now = self._clock()
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+        self._last_refill = now
+
+    def set_rate(self, rate: float) -> None:
+        """
+        Change the refill rate, keeping the tokens accumulated so far.
+
+        Args:
+            rate: New number of tokens added per second
+        """
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self._refill()
+        self.rate = float(rate)
+
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting until it is available.
+
+        Returns:
+            Number of seconds spent waiting
+        """
+        self._refill()
+        self._tokens -= 1
+        wait_time = -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+        if wait_time > 0:
+            try:
+                await self._sleep(wait_time)
+            except asyncio.CancelledError:
+                # Give the reserved token back so other callers are not delayed
+                self._tokens += 1
+                raise
+
+        self.acquired += 1
+        self.total_wait_time += wait_time
+        return wait_time
@@ -0,0 +1,70 @@
+"""Queue-fed pool of long-lived asyncio workers."""
+
+import asyncio
+from typing import Awaitable, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Sentinel telling a worker that no more items will arrive
+_STOP = object()
+
+
+async def run_worker_pool(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    num_workers: int,
+    on_complete: Optional[Callable[[T, R], None]] = None,
+    max_pending: Optional[int] = None,
+) -> None:
+    """
+    Process items with a fixed number of long-lived workers.
+
+    Items are fed through a bounded queue, so at most ``max_pending`` items are
+    waiting for a worker at any time and the item iterable is consumed lazily.
+    Each worker picks up the next item as soon as it finishes the previous one,
+    so a slow item only occupies its own worker instead of holding back a whole
+    batch.
+
+    Args:
+        items: Items to process
+        worker: Coroutine function called once per item
+        num_workers: Number of workers processing items concurrently
+        on_complete: Optional callback called with each item and its result as
+            soon as the item is done
+        max_pending: Maximum number of queued items (defaults to num_workers)
+
+    Raises:
+        ValueError: If num_workers is less than 1
+        Exception: The first exception raised by worker or on_complete; the
+            remaining workers are cancelled
+    """
+    if num_workers < 1:
+        raise ValueError(f"Number of workers must be at least 1, got {num_workers}")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending or num_workers)
+
+    async def produce() -> None:
+        for item in items:
+            await queue.put(item)
+        for _ in range(num_workers):
+            await queue.put(_STOP)
+
+    async def consume() -> None:
+        while True:
+            item = await queue.get()
+            if item is _STOP:
+                return
+            result = await worker(item)
+            if on_complete:
+                on_complete(item, result)
+
+    tasks = [asyncio.create_task(produce())]
+    tasks.extend(asyncio.create_task(consume()) for _ in range(num_workers))
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
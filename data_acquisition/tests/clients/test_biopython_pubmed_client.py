@@ -1,4 +1,6 @@
+import io
 import urllib.error
+from email.message import Message
 from typing import Any, Dict
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -8,7 +10,9 @@ from src.clients.biopython_pubmed_client import BioPythonPubMedClient
 from src.clients.pubmed_client import (
     PubMedClientError,
     PubMedRateLimitError,
+    PubMedTimeoutError,
 )
+from src.raw_response_cache import RawResponseCache, format_raw_record
 
 
 @pytest.fixture
@@ -117,113 +121,431 @@ async def test_get_abstract_by_id_rate_limit_error(biopython_pubmed_client):
         # Check error details
         assert "Rate limit exceeded" in str(exc_info.value)
         assert exc_info.value.status_code == 429
+        assert exc_info.value.retry_after is None
+
+
+@pytest.mark.asyncio
+async def test_get_abstract_by_id_rate_limit_retry_after(biopython_pubmed_client):
+    """Test that the Retry-After header is passed on with the error."""
+    http_error = urllib.error.HTTPError(
+        url="https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi",
+        code=429,
+        msg="Too Many Requests",
+        hdrs=Message(),
+        fp=None,
+    )
+    http_error.headers["Retry-After"] = "3"
+
+    with patch("Bio.Entrez.efetch", side_effect=http_error):
+        with pytest.raises(PubMedRateLimitError) as exc_info:
+            await biopython_pubmed_client.get_abstract_by_id("12345")
+
+    assert exc_info.value.retry_after == 3
+
+
+@pytest.mark.asyncio
+async def test_get_abstract_by_id_timeout(biopython_pubmed_client):
+    """Test that socket timeouts raise PubMedTimeoutError."""
+    with patch("Bio.Entrez.efetch", side_effect=urllib.error.URLError(TimeoutError())):
+        with pytest.raises(PubMedTimeoutError):
+            await biopython_pubmed_client.get_abstract_by_id("12345")
 
 
 @pytest.mark.asyncio
 async def test_get_abstracts_by_ids_success(
     biopython_pubmed_client, mock_record, mock_handle
 ):
-    """Test successful retrieval of multiple abstracts."""
-    record1 = mock_record
+    """Test that multiple abstracts are retrieved with one batched request."""
     record2 = {**mock_record, "PMID": "67890", "TI": "Second Test Article"}
 
-    with patch.object(
-        biopython_pubmed_client, "get_abstract_by_id", new_callable=AsyncMock
-    ) as mock_get_abstract:
-        # Configure the mock to return different abstract for each ID
-        mock_get_abstract.side_effect = [
-            # Format each record with _format_record
-            {
-                "id": "12345",
-                "title": "Test Article Title",
-                "abstract": "This is a test abstract for the BioPython PubMed client.",
-                "authors": ["Smith, John", "Doe, Jane"],
-                "publication_date": "2024 Jan 15",
-                "journal": "Journal of Testing",
-                "doi": "10.1234/test.12345",
-                "keywords": ["Bioinformatics", "Testing", "Python"],
-                "mesh_terms": ["Bioinformatics", "Testing", "Python"],
-            },
-            {
-                "id": "67890",
-                "title": "Second Test Article",
-                "abstract": "This is a test abstract for the BioPython PubMed client.",
-                "authors": ["Smith, John", "Doe, Jane"],
-                "publication_date": "2024 Jan 15",
-                "journal": "Journal of Testing",
-                "doi": "10.1234/test.12345",
-                "keywords": ["Bioinformatics", "Testing", "Python"],
-                "mesh_terms": ["Bioinformatics", "Testing", "Python"],
-            },
+    with (
+        patch("Bio.Entrez.efetch", return_value=mock_handle) as mock_efetch,
+        patch("Bio.Medline.parse", return_value=iter([mock_record, record2])),
+    ):
+        results = await biopython_pubmed_client.get_abstracts_by_ids(["12345", "67890"])
+
+    # Verify the results
+    assert len(results) == 2
+    assert results[0]["id"] == "12345"
+    assert results[1]["id"] == "67890"
+    assert results[1]["title"] == "Second Test Article"
+
+    # Verify a single comma-joined EFetch was made
+    mock_efetch.assert_called_once()
+    assert mock_efetch.call_args.kwargs["id"] == "12345,67890"
+    mock_handle.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_by_ids_respects_efetch_batch_size(mock_record):
+    """Test that IDs are split into batches of efetch_batch_size."""
+    client = BioPythonPubMedClient(email="test@example.com", efetch_batch_size=2)
+    pubmed_ids = ["1", "2", "3", "4", "5"]
+
+    def fetch_abstracts(batch_ids):
+        return [
+            client._format_record({**mock_record, "PMID": pid}, pid)
+            for pid in batch_ids
         ]
 
-        # Call the method
+    with (
+        patch.object(
+            client, "_fetch_abstracts", side_effect=fetch_abstracts
+        ) as mock_fetch,
+        patch.object(
+            client, "get_abstract_by_id", new_callable=AsyncMock
+        ) as mock_get_abstract,
+    ):
+        mock_get_abstract.side_effect = lambda pid: fetch_abstracts([pid])[0]
+        results = await client.get_abstracts_by_ids(pubmed_ids)
+
+    assert [r["id"] for r in results] == pubmed_ids
+    # Two full batches go through _fetch_abstracts, the single leftover ID is
+    # fetched on its own
+    assert mock_fetch.call_count == 2
+    mock_get_abstract.assert_called_once_with("5")
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_by_ids_missing_records(
+    biopython_pubmed_client, mock_record, mock_handle
+):
+    """Test handling when some records are not found."""
+    with (
+        patch("Bio.Entrez.efetch", return_value=mock_handle),
+        patch("Bio.Medline.parse", return_value=iter([mock_record])),
+    ):
+        # Should not raise an exception but return partial results
         results = await biopython_pubmed_client.get_abstracts_by_ids(["12345", "67890"])
 
-        # Verify the results
-        assert len(results) == 2
-        assert results[0]["id"] == "12345"
-        assert results[1]["id"] == "67890"
-        assert results[1]["title"] == "Second Test Article"
+    # Should only have one result
+    assert len(results) == 1
+    assert results[0]["id"] == "12345"
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_by_ids_bisects_failed_batch(
+    biopython_pubmed_client, mock_record
+):
+    """Test that a failing batch is split until the bad ID is isolated."""
+    pubmed_ids = ["1", "2", "3", "4"]
+
+    def fetch_abstracts(batch_ids):
+        if "3" in batch_ids:
+            raise ValueError("Malformed response")
+        return [
+            biopython_pubmed_client._format_record({**mock_record, "PMID": pid}, pid)
+            for pid in batch_ids
+        ]
+
+    async def get_abstract(pubmed_id):
+        if pubmed_id == "3":
+            raise PubMedClientError(f"Failed to retrieve abstract for ID: {pubmed_id}")
+        return fetch_abstracts([pubmed_id])[0]
 
-        # Verify get_abstract_by_id was called for each ID
-        assert mock_get_abstract.call_count == 2
-        mock_get_abstract.assert_any_call("12345")
-        mock_get_abstract.assert_any_call("67890")
+    with (
+        patch.object(
+            biopython_pubmed_client, "_fetch_abstracts", side_effect=fetch_abstracts
+        ) as mock_fetch,
+        patch.object(
+            biopython_pubmed_client, "get_abstract_by_id", side_effect=get_abstract
+        ),
+    ):
+        results = await biopython_pubmed_client.get_abstracts_by_ids(pubmed_ids)
+
+    assert [r["id"] for r in results] == ["1", "2", "4"]
+    # Full batch fails, then ["1", "2"] succeeds and ["3", "4"] fails
+    assert mock_fetch.call_count == 3
 
 
 @pytest.mark.asyncio
-async def test_get_abstracts_by_ids_missing_records(biopython_pubmed_client):
-    """Test handling when some records are not found."""
+async def test_get_abstracts_by_ids_raises_timeouts_instead_of_bisecting(mock_record):
+    """Test that a timed-out batch is raised with the abstracts fetched before it."""
+    client = BioPythonPubMedClient(email="test@example.com", efetch_batch_size=2)
+
+    def fetch_abstracts(batch_ids):
+        if "3" in batch_ids:
+            raise TimeoutError("timed out")
+        return [
+            client._format_record({**mock_record, "PMID": pid}, pid)
+            for pid in batch_ids
+        ]
+
     with patch.object(
-        biopython_pubmed_client, "get_abstract_by_id", new_callable=AsyncMock
-    ) as mock_get_abstract:
-        # Configure mock to raise exception for some IDs
-        async def side_effect(pubmed_id):
-            if pubmed_id == "12345":
-                return {
-                    "id": "12345",
-                    "title": "Test Article Title",
-                    "abstract": "This is a test abstract.",
-                    "authors": ["Smith, John"],
-                    "publication_date": "2024 Jan 15",
-                    "journal": "Journal of Testing",
-                    "doi": "10.1234/test.12345",
-                    "keywords": ["Testing"],
-                    "mesh_terms": ["Testing"],
-                }
-            else:
-                raise PubMedClientError(f"No abstract found for ID: {pubmed_id}")
-
-        mock_get_abstract.side_effect = side_effect
-
-        # Call the method - should not raise an exception but return partial results
-        results = await biopython_pubmed_client.get_abstracts_by_ids(["12345", "67890"])
+        client, "_fetch_abstracts", side_effect=fetch_abstracts
+    ) as mock_fetch:
+        with pytest.raises(PubMedTimeoutError) as exc_info:
+            await client.get_abstracts_by_ids(["1", "2", "3", "4"])
 
-        # Should only have one result
-        assert len(results) == 1
-        assert results[0]["id"] == "12345"
+    assert [r["id"] for r in exc_info.value.abstracts] == ["1", "2"]
+    assert mock_fetch.call_count == 2
 
-        # Verify get_abstract_by_id was called for each ID
-        assert mock_get_abstract.call_count == 2
-        mock_get_abstract.assert_any_call("12345")
-        mock_get_abstract.assert_any_call("67890")
+
+@pytest.mark.asyncio
+async def test_bisected_requests_each_take_a_token(mock_record, make_token_bucket):
+    """Test that every request of a bisected batch waits for the rate limiter."""
+    client = BioPythonPubMedClient(email="test@example.com")
+    client.rate_limiter = make_token_bucket(rate=3)
+
+    def fetch_abstracts(batch_ids):
+        if "3" in batch_ids:
+            raise ValueError("Malformed response")
+        return [
+            client._format_record({**mock_record, "PMID": pid}, pid)
+            for pid in batch_ids
+        ]
+
+    def fetch_abstract(pubmed_id):
+        return fetch_abstracts([pubmed_id])[0]
+
+    with (
+        patch.object(client, "_fetch_abstracts", side_effect=fetch_abstracts),
+        patch.object(client, "_fetch_abstract", side_effect=fetch_abstract),
+    ):
+        results = await client.get_abstracts_by_ids(["1", "2", "3", "4"])
+
+    assert [r["id"] for r in results] == ["1", "2", "4"]
+    # [1-4] fails, [1, 2] succeeds, [3, 4] fails, then 3 and 4 alone
+    assert client.rate_limiter.acquired == 5
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_by_ids_rate_limit_error(biopython_pubmed_client):
+    """Test that HTTP 429 on a batch is raised instead of bisected."""
+    http_error = urllib.error.HTTPError(
+        url="https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi",
+        code=429,
+        msg="Too Many Requests",
+        hdrs={},
+        fp=None,
+    )
+
+    with patch("Bio.Entrez.efetch", side_effect=http_error) as mock_efetch:
+        with pytest.raises(PubMedRateLimitError):
+            await biopython_pubmed_client.get_abstracts_by_ids(["12345", "67890"])
+
+    mock_efetch.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_during_bisection_keeps_fetched_abstracts(mock_record):
+    """Test that abstracts fetched before a 429 are returned with the error."""
+    client = BioPythonPubMedClient(email="test@example.com", efetch_batch_size=4)
+    pubmed_ids = ["1", "2", "3", "4", "5", "6", "7", "8"]
+
+    def fetch_abstracts(batch_ids):
+        if "7" in batch_ids:
+            raise PubMedRateLimitError("Rate limit exceeded")
+        if "4" in batch_ids and len(batch_ids) > 1:
+            raise ValueError("Malformed response")
+        return [
+            client._format_record({**mock_record, "PMID": pid}, pid)
+            for pid in batch_ids
+        ]
+
+    async def get_abstract(pubmed_id):
+        return fetch_abstracts([pubmed_id])[0]
+
+    with (
+        patch.object(client, "_fetch_abstracts", side_effect=fetch_abstracts),
+        patch.object(client, "get_abstract_by_id", side_effect=get_abstract),
+    ):
+        with pytest.raises(PubMedRateLimitError) as exc_info:
+            await client.get_abstracts_by_ids(pubmed_ids)
+
+    # The first batch was bisected, the second was rate limited at its first
+    # request
+    assert [r["id"] for r in exc_info.value.abstracts] == ["1", "2", "3", "4"]
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_in_second_half_keeps_first_half(mock_record):
+    """Test that a 429 partway through bisection keeps the halves fetched."""
+    client = BioPythonPubMedClient(email="test@example.com")
+    pubmed_ids = ["1", "2", "3", "4"]
+
+    def fetch_abstracts(batch_ids):
+        if len(batch_ids) == 4:
+            raise ValueError("Malformed response")
+        if "3" in batch_ids:
+            raise PubMedRateLimitError("Rate limit exceeded")
+        return [
+            client._format_record({**mock_record, "PMID": pid}, pid)
+            for pid in batch_ids
+        ]
+
+    with patch.object(client, "_fetch_abstracts", side_effect=fetch_abstracts):
+        with pytest.raises(PubMedRateLimitError) as exc_info:
+            await client.get_abstracts_by_ids(pubmed_ids)
+
+    assert [r["id"] for r in exc_info.value.abstracts] == ["1", "2"]
 
 
 @pytest.mark.asyncio
 async def test_get_abstracts_by_ids_api_error(biopython_pubmed_client):
     """Test handling when API errors occur for all IDs."""
-    with patch.object(
-        biopython_pubmed_client, "get_abstract_by_id", new_callable=AsyncMock
-    ) as mock_get_abstract:
-        # Configure mock to raise exception for all IDs
-        mock_get_abstract.side_effect = PubMedClientError("API error")
-
-        # Call the method - should not raise but return empty results
+    with patch("Bio.Entrez.efetch", side_effect=Exception("API error")) as mock_efetch:
+        # Should not raise but return empty results
         results = await biopython_pubmed_client.get_abstracts_by_ids(["12345", "67890"])
 
-        # Should have no results
-        assert len(results) == 0
+    # Should have no results
+    assert len(results) == 0
+
+    # One batched request, then one request per ID after bisection
+    assert mock_efetch.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_post_ids(biopython_pubmed_client, mock_handle):
+    """Test uploading IDs to the history server with EPost."""
+    with (
+        patch("Bio.Entrez.epost", return_value=mock_handle) as mock_epost,
+        patch(
+            "Bio.Entrez.read",
+            return_value={"WebEnv": "MCID_123", "QueryKey": "1"},
+        ),
+    ):
+        webenv, query_key = await biopython_pubmed_client.post_ids(["12345", "67890"])
+
+    assert webenv == "MCID_123"
+    assert query_key == "1"
+    assert mock_epost.call_args.kwargs["id"] == "12345,67890"
+    mock_handle.close.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_from_history(
+    biopython_pubmed_client, mock_record, mock_handle
+):
+    """Test fetching a page of records from the history server."""
+    record2 = {**mock_record, "PMID": "67890"}
+
+    with (
+        patch("Bio.Entrez.efetch", return_value=mock_handle) as mock_efetch,
+        patch("Bio.Medline.parse", return_value=iter([mock_record, record2])),
+    ):
+        results = await biopython_pubmed_client.get_abstracts_from_history(
+            "MCID_123", "1", retstart=500, retmax=500
+        )
+
+    assert [r["id"] for r in results] == ["12345", "67890"]
+    kwargs = mock_efetch.call_args.kwargs
+    assert kwargs["webenv"] == "MCID_123"
+    assert kwargs["query_key"] == "1"
+    assert kwargs["retstart"] == 500
+    assert kwargs["retmax"] == 500
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_from_history_rate_limit_error(biopython_pubmed_client):
+    """Test that HTTP 429 from the history server raises PubMedRateLimitError."""
+    http_error = urllib.error.HTTPError(
+        url="https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi",
+        code=429,
+        msg="Too Many Requests",
+        hdrs={},
+        fp=None,
+    )
+
+    with patch("Bio.Entrez.efetch", side_effect=http_error):
+        with pytest.raises(PubMedRateLimitError):
+            await biopython_pubmed_client.get_abstracts_from_history(
+                "MCID_123", "1", retstart=0, retmax=500
+            )
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_by_ids_xml(pubmed_xml_payload):
+    """Test that retmode=xml requests XML and decodes it incrementally."""
+    client = BioPythonPubMedClient(email="test@example.com", retmode="xml")
+
+    with patch(
+        "Bio.Entrez.efetch", return_value=io.BytesIO(pubmed_xml_payload)
+    ) as mock_efetch:
+        results = await client.get_abstracts_by_ids(["12345678", "15858239", "999"])
+
+    # Results follow the request order and missing IDs are left out
+    assert [r["id"] for r in results] == ["12345678", "15858239"]
+    assert results[1]["keywords"] == ["RET gene", "enteric nervous system"]
+    assert mock_efetch.call_args.kwargs["retmode"] == "xml"
+    assert "rettype" not in mock_efetch.call_args.kwargs
+
+
+@pytest.mark.asyncio
+async def test_get_abstract_by_id_xml_no_record():
+    """Test that an empty XML response raises PubMedClientError."""
+    client = BioPythonPubMedClient(email="test@example.com", retmode="xml")
+
+    with patch("Bio.Entrez.efetch", return_value=io.BytesIO(b"<PubmedArticleSet/>")):
+        with pytest.raises(PubMedClientError):
+            await client.get_abstract_by_id("12345")
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_from_history_xml_uses_process_pool(pubmed_xml_payload):
+    """Test that large XML pages are decoded in the process pool."""
+    client = BioPythonPubMedClient(
+        email="test@example.com",
+        retmode="xml",
+        decode_processes=1,
+        process_pool_min_records=2,
+    )
+
+    try:
+        with patch("Bio.Entrez.efetch", return_value=io.BytesIO(pubmed_xml_payload)):
+            results = await client.get_abstracts_from_history("env", "1", 0, 2)
+    finally:
+        await client.close()
+
+    assert [r["id"] for r in results] == ["15858239", "12345678"]
+    assert results[0]["authors_full"][0] == "Smigiel, Robert"
+
+
+@pytest.mark.asyncio
+async def test_large_xml_response_is_left_for_the_process_pool(pubmed_xml_payload):
+    """Test that the request thread returns large payloads undecoded."""
+    client = BioPythonPubMedClient(
+        email="test@example.com",
+        retmode="xml",
+        decode_processes=1,
+        process_pool_min_records=2,
+    )
+
+    try:
+        with patch("Bio.Entrez.efetch", return_value=io.BytesIO(pubmed_xml_payload)):
+            assert client._fetch_xml({"id": "1,2"}, 2) == pubmed_xml_payload
+        with patch("Bio.Entrez.efetch", return_value=io.BytesIO(pubmed_xml_payload)):
+            assert len(client._fetch_xml({"id": "1"}, 1)) == 2
+
+        # Decoding errors in the pool are client errors
+        with patch("Bio.Entrez.efetch", return_value=io.BytesIO(b"<PubmedArticleSet>")):
+            with pytest.raises(PubMedClientError):
+                await client.get_abstracts_from_history("env", "1", 0, 2)
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("retmode", ["text", "xml"])
+async def test_responses_are_saved_to_raw_cache(retmode, pubmed_xml_payload, tmp_path):
+    """Test that each fetched record is cached and formats like the response."""
+    payload = pubmed_xml_payload
+    if retmode == "text":
+        payload = b"PMID- 15858239\nTI  - First\n\nPMID- 12345678\nTI  - Second\n"
+    raw_cache = RawResponseCache(tmp_path / "raw")
+    client = BioPythonPubMedClient(
+        email="test@example.com", retmode=retmode, raw_cache=raw_cache
+    )
+
+    with patch("Bio.Entrez.efetch", return_value=io.BytesIO(payload)):
+        results = await client.get_abstracts_by_ids(["15858239", "12345678"])
+
+    assert raw_cache.ids() == {"15858239", "12345678"}
+    assert [format_raw_record(raw_cache.get(r["id"])) for r in results] == results
+    raw_cache.close()
+
 
-        # Verify get_abstract_by_id was called for each ID
-        assert mock_get_abstract.call_count == 2
+def test_rejects_unknown_retmode():
+    """Test that only the text and xml formats are accepted."""
+    with pytest.raises(ValueError):
+        BioPythonPubMedClient(email="test@example.com", retmode="json")
@@ -0,0 +1,278 @@
+import gzip
+from urllib.parse import parse_qs
+
+import httpx
+import pytest
+
+from src.clients.httpx_pubmed_client import HttpxPubMedClient
+from src.clients.pubmed_client import (
+    PubMedClientError,
+    PubMedConnectionError,
+    PubMedRateLimitError,
+    PubMedTimeoutError,
+)
+from src.raw_response_cache import RawResponseCache, format_raw_record
+
+MEDLINE_TEXT = """PMID- 12345
+TI  - Test Article Title
+AB  - This is a test abstract for the httpx PubMed client.
+AU  - Smith J
+AU  - Doe J
+DP  - 2024 Jan 15
+JT  - Journal of Testing
+LID - 10.1234/test.12345 [doi]
+MH  - Bioinformatics
+MH  - Testing
+
+PMID- 67890
+TI  - Second Test Article
+AB  - Another abstract.
+DP  - 2023
+JT  - Journal of Testing
+"""
+
+
+def make_client(handler) -> HttpxPubMedClient:
+    """Create a client whose requests are answered by handler."""
+    return HttpxPubMedClient(
+        email="test@example.com",
+        api_key="test-key",
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def form_data(request: httpx.Request) -> dict:
+    """Decode the form-encoded body of a request."""
+    return {k: v[0] for k, v in parse_qs(request.content.decode()).items()}
+
+
+@pytest.mark.asyncio
+async def test_get_abstract_by_id_success():
+    """Test successful retrieval of a single abstract."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(200, text=MEDLINE_TEXT.split("\n\n")[0])
+
+    client = make_client(handler)
+    result = await client.get_abstract_by_id("12345")
+    await client.close()
+
+    assert result["id"] == "12345"
+    assert result["title"] == "Test Article Title"
+    assert result["authors"] == ["Smith J", "Doe J"]
+    assert result["doi"] == "10.1234/test.12345"
+
+    # Credentials are sent with every request and gzip is accepted
+    data = form_data(requests[0])
+    assert requests[0].url.path.endswith("/efetch.fcgi")
+    assert data["id"] == "12345"
+    assert data["email"] == "test@example.com"
+    assert data["api_key"] == "test-key"
+    assert "gzip" in requests[0].headers["Accept-Encoding"]
+
+
+@pytest.mark.asyncio
+async def test_gzip_response_is_decoded_and_timed():
+    """Test that gzip-encoded responses are decoded and timings recorded."""
+    body = gzip.compress(MEDLINE_TEXT.encode())
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body, headers={"Content-Encoding": "gzip"})
+
+    client = make_client(handler)
+    results = await client.get_abstracts_by_ids(["12345", "67890"])
+    await client.close()
+
+    assert [r["id"] for r in results] == ["12345", "67890"]
+    assert len(client.request_timings) == 1
+    timing = client.request_timings[0]
+    assert timing.endpoint == "efetch.fcgi"
+    assert timing.status_code == 200
+    assert timing.elapsed >= 0
+    assert timing.bytes_decoded == len(MEDLINE_TEXT.encode())
+
+
+@pytest.mark.asyncio
+async def test_responses_are_saved_to_raw_cache(tmp_path):
+    """Test that each fetched Medline record is cached before formatting."""
+    raw_cache = RawResponseCache(tmp_path / "raw")
+    client = HttpxPubMedClient(
+        email="test@example.com",
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, text=MEDLINE_TEXT)
+        ),
+        raw_cache=raw_cache,
+    )
+    results = await client.get_abstracts_by_ids(["12345", "67890"])
+    await client.close()
+
+    assert raw_cache.ids() == {"12345", "67890"}
+    assert [format_raw_record(raw_cache.get(r["id"])) for r in results] == results
+    raw_cache.close()
+
+
+@pytest.mark.asyncio
+async def test_get_abstract_by_id_no_record():
+    """Test error handling when no record is found."""
+    client = make_client(lambda request: httpx.Response(200, text="\n"))
+
+    with pytest.raises(PubMedClientError) as exc_info:
+        await client.get_abstract_by_id("99999")
+    await client.close()
+
+    assert "Failed to retrieve abstract" in str(exc_info.value)
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_error():
+    """Test that HTTP 429 responses raise PubMedRateLimitError."""
+    client = make_client(
+        lambda request: httpx.Response(429, headers={"Retry-After": "7"})
+    )
+
+    with pytest.raises(PubMedRateLimitError) as exc_info:
+        await client.get_abstract_by_id("12345")
+    await client.close()
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after == 7
+
+
+@pytest.mark.asyncio
+async def test_timeout_error():
+    """Test that request timeouts raise PubMedTimeoutError."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("Timed out")
+
+    client = make_client(handler)
+
+    with pytest.raises(PubMedTimeoutError):
+        await client.get_abstract_by_id("12345")
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_network_error():
+    """Test that transport errors raise PubMedConnectionError."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("Connection refused")
+
+    client = make_client(handler)
+
+    with pytest.raises(PubMedConnectionError):
+        await client.get_abstract_by_id("12345")
+    await client.close()
+
+    assert client.request_timings[0].status_code is None
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_by_ids_bisects_bad_requests():
+    """Test that a batch failing with 400 is bisected."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        ids = form_data(request)["id"].split(",")
+        if "67890" in ids:
+            return httpx.Response(400)
+        return httpx.Response(200, text=MEDLINE_TEXT.split("\n\n")[0])
+
+    client = make_client(handler)
+    results = await client.get_abstracts_by_ids(["12345", "67890"])
+    await client.close()
+
+    assert [r["id"] for r in results] == ["12345"]
+    # One batch request, then one request per ID
+    assert len(client.request_timings) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_abstracts_by_ids_raises_server_errors():
+    """Test that a batch failing with 5xx is raised instead of bisected."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(503)
+
+    client = make_client(handler)
+    with pytest.raises(PubMedClientError) as exc_info:
+        await client.get_abstracts_by_ids(["12345", "67890"])
+    await client.close()
+
+    assert exc_info.value.status_code == 503
+    assert len(client.request_timings) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_requests_are_rate_limited(make_token_bucket, manual_clock):
+    """Test that every request of a bisected batch is spaced by the rate limit."""
+    request_times = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        request_times.append(manual_clock.now)
+        ids = form_data(request)["id"].split(",")
+        if "3" in ids:
+            return httpx.Response(400)
+        return httpx.Response(
+            200,
+            text="\n\n".join(f"PMID- {pubmed_id}\nTI  - Title" for pubmed_id in ids),
+        )
+
+    client = HttpxPubMedClient(
+        email="test@example.com",
+        transport=httpx.MockTransport(handler),
+        rate_limiter=make_token_bucket(rate=3),
+    )
+    results = await client.get_abstracts_by_ids(["1", "2", "3", "4"])
+    await client.close()
+
+    assert [r["id"] for r in results] == ["1", "2", "4"]
+    # [1-4] fails, [1, 2] succeeds, [3, 4] fails, then 3 and 4 alone
+    assert len(request_times) == 5
+    assert [b - a for a, b in zip(request_times, request_times[1:])] == (
+        [pytest.approx(1 / 3)] * 4
+    )
+
+
+@pytest.mark.asyncio
+async def test_post_ids_and_history_page():
+    """Test EPost and paging through the history server."""
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        data = form_data(request)
+        if request.url.path.endswith("/epost.fcgi"):
+            return httpx.Response(
+                200,
+                text="<ePostResult><QueryKey>1</QueryKey>"
+                "<WebEnv>MCID_123</WebEnv></ePostResult>",
+            )
+        assert data["WebEnv"] == "MCID_123"
+        assert data["query_key"] == "1"
+        assert data["retstart"] == "0"
+        return httpx.Response(200, text=MEDLINE_TEXT)
+
+    client = make_client(handler)
+    webenv, query_key = await client.post_ids(["12345", "67890"])
+    results = await client.get_abstracts_from_history(webenv, query_key, 0, 500)
+    await client.close()
+
+    assert (webenv, query_key) == ("MCID_123", "1")
+    assert [r["id"] for r in results] == ["12345", "67890"]
+
+
+@pytest.mark.asyncio
+async def test_post_ids_error_response():
+    """Test that an EPost error payload raises PubMedClientError."""
+    client = make_client(
+        lambda request: httpx.Response(
+            200, text="<ePostResult><ERROR>Invalid uid</ERROR></ePostResult>"
+        )
+    )
+
+    with pytest.raises(PubMedClientError) as exc_info:
+        await client.post_ids(["abc"])
+    await client.close()
+
+    assert "Invalid uid" in str(exc_info.value)
@@ -2,7 +2,12 @@ from typing import Any, Dict, List
 
 import pytest
 
-from src.clients.pubmed_client import PubMedClient, PubMedClientError
+from src.clients.pubmed_client import (
+    PubMedClient,
+    PubMedClientError,
+    PubMedRateLimitError,
+    parse_retry_after,
+)
 
 
 class MockPubMedClient(PubMedClient):
@@ -32,6 +37,31 @@ def pubmed_client() -> PubMedClient:
     return MockPubMedClient()
 
 
+def test_supports_history_server(pubmed_client: PubMedClient):
+    """Test that history server support is detected from the implemented methods."""
+
+    class HistoryPubMedClient(MockPubMedClient):
+        async def post_ids(self, pubmed_ids):
+            return "MCID_123", "1"
+
+        async def get_abstracts_from_history(self, webenv, query_key, retstart, retmax):
+            return []
+
+    assert not pubmed_client.supports_history_server
+    assert HistoryPubMedClient().supports_history_server
+
+
+def test_supports_esummary(pubmed_client: PubMedClient):
+    """Test that ESummary support is detected from the implemented method."""
+
+    class SummaryPubMedClient(MockPubMedClient):
+        async def get_summaries(self, pubmed_ids):
+            return []
+
+    assert not pubmed_client.supports_esummary
+    assert SummaryPubMedClient().supports_esummary
+
+
 @pytest.mark.asyncio
 async def test_get_abstract_by_id_success(pubmed_client: PubMedClient):
     """Test successful retrieval of a single abstract."""
@@ -67,3 +97,20 @@ async def test_get_abstracts_by_ids_error(pubmed_client: PubMedClient):
     with pytest.raises(PubMedClientError) as exc_info:
         await pubmed_client.get_abstracts_by_ids(["12345", "ERROR_ID", "67890"])
     assert "Failed to retrieve" in str(exc_info.value)
+
+
+def test_rate_limit_error_retry_after():
+    """Test that rate limit errors carry the Retry-After delay."""
+    error = PubMedRateLimitError("Rate limit exceeded", retry_after=5)
+    assert error.status_code == 429
+    assert error.retry_after == 5
+    assert PubMedRateLimitError("Rate limit exceeded").retry_after is None
+
+
+def test_parse_retry_after():
+    """Test parsing of both Retry-After header formats."""
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("not a date") is None
+    # HTTP dates in the past mean "retry now"
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
@@ -0,0 +1,55 @@
+"""Tests for parsing ESummary responses."""
+
+import pytest
+
+from src.clients.pubmed_summary import parse_esummary_xml, summary_fingerprint
+
+ESUMMARY_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<eSummaryResult>
+<DocSum>
+    <Id>15858239</Id>
+    <Item Name="PubDate" Type="Date">2004 Jul-Sep</Item>
+    <Item Name="Title" Type="String">The role of ret gene in Hirschsprung disease.</Item>
+    <Item Name="PubTypeList" Type="List">
+        <Item Name="PubType" Type="String">Journal Article</Item>
+    </Item>
+    <Item Name="RecordStatus" Type="String">PubMed - indexed for MEDLINE</Item>
+    <Item Name="History" Type="List">
+        <Item Name="pubmed" Type="Date">2005/04/29 09:00</Item>
+        <Item Name="medline" Type="Date">2005/06/16 09:00</Item>
+    </Item>
+    <Item Name="References" Type="List"></Item>
+    <Item Name="DOI" Type="String">10.1000/test.12345</Item>
+</DocSum>
+<ERROR>UID=1: cannot get document summary</ERROR>
+</eSummaryResult>
+"""
+
+
+def test_parse_esummary_xml():
+    """Test that DocSums are parsed and IDs without a summary are skipped."""
+    summaries = parse_esummary_xml(ESUMMARY_XML)
+
+    assert len(summaries) == 1
+    summary = summaries[0]
+    assert summary["id"] == "15858239"
+    assert summary["title"] == "The role of ret gene in Hirschsprung disease."
+    assert summary["pub_types"] == ["Journal Article"]
+    assert summary["record_status"] == "PubMed - indexed for MEDLINE"
+    assert summary["last_modified"] == "2005/06/16 09:00"
+    assert summary["doi"] == "10.1000/test.12345"
+
+    with pytest.raises(ValueError):
+        parse_esummary_xml(b"<eSummaryResult>")
+
+
+def test_summary_fingerprint_tracks_revisions():
+    """Test that a retraction changes the fingerprint and reordering does not."""
+    summary = parse_esummary_xml(ESUMMARY_XML)[0]
+    fingerprint = summary_fingerprint(summary)
+
+    reordered = {**summary, "history": dict(reversed(summary["history"].items()))}
+    retracted = {**summary, "pub_types": ["Journal Article", "Retracted Publication"]}
+
+    assert summary_fingerprint(reordered) == fingerprint
+    assert summary_fingerprint(retracted) != fingerprint
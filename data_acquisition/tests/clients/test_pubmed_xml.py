@@ -0,0 +1,70 @@
+import io
+
+from src.clients.pubmed_xml import iter_pubmed_xml, parse_pubmed_xml
+
+
+def test_parse_pubmed_xml_matches_medline_shape(pubmed_xml_payload):
+    """Test that XML records are decoded into the Medline abstract format."""
+    first, second = parse_pubmed_xml(pubmed_xml_payload)
+
+    assert first["id"] == "15858239"
+    assert first["title"] == "The role of RET gene in Hirschsprung disease."
+    assert first["abstract"] == (
+        "BACKGROUND: RET is a proto-oncogene. RESULTS: Mutations were found."
+    )
+    assert first["authors"] == ["Smigiel R", "Patkowski D", "Hirschsprung Study Group"]
+    assert first["publication_date"] == "2004 Jul-Sep"
+    assert first["journal"] == "Medycyna wieku rozwojowego"
+    assert first["doi"] == "10.1000/test.12345"
+    assert first["mesh_terms"] == ["Hirschsprung Disease/*genetics", "*Humans"]
+
+    assert second["publication_date"] == "2023 Jan 15"
+    assert second["abstract"] == "Unstructured abstract."
+    assert second["doi"] == "10.1234/second"
+
+
+def test_parse_pubmed_xml_structured_fields(pubmed_xml_payload):
+    """Test the fields the Medline text format does not keep apart."""
+    first, second = parse_pubmed_xml(pubmed_xml_payload)
+
+    assert first["abstract_sections"] == [
+        {"label": "BACKGROUND", "text": "RET is a proto-oncogene."},
+        {"label": "RESULTS", "text": "Mutations were found."},
+    ]
+    assert first["authors_full"] == [
+        "Smigiel, Robert",
+        "Patkowski, Dariusz",
+        "Hirschsprung Study Group",
+    ]
+    # Real author keywords instead of a copy of the MeSH headings
+    assert first["keywords"] == ["RET gene", "enteric nervous system"]
+    assert second["keywords"] == []
+    assert second["authors"] == []
+    assert second["title"] == "Second article"
+
+
+def test_iter_pubmed_xml_streams_from_file(pubmed_xml_payload):
+    """Test that records are yielded one at a time from a binary stream."""
+    records = iter_pubmed_xml(io.BytesIO(pubmed_xml_payload))
+
+    assert next(records)["id"] == "15858239"
+    assert next(records)["id"] == "12345678"
+    assert next(records, None) is None
+
+
+def test_parse_pubmed_xml_defaults_for_missing_fields():
+    """Test the fallbacks for articles without title, abstract or journal."""
+    xml = (
+        b"<PubmedArticleSet><PubmedArticle><MedlineCitation><PMID>1</PMID>"
+        b"</MedlineCitation></PubmedArticle>"
+        b"<PubmedArticle><MedlineCitation></MedlineCitation></PubmedArticle>"
+        b"</PubmedArticleSet>"
+    )
+
+    (record,) = parse_pubmed_xml(xml)
+
+    assert record["title"] == "No title available"
+    assert record["abstract"] == "No abstract available"
+    assert record["journal"] == "Unknown journal"
+    assert record["publication_date"] == "Unknown"
+    assert record["doi"] is None
@@ -1,11 +1,36 @@
 """Shared pytest fixtures for all tests."""
 
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, List
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 
 from src.clients.pubmed_client import PubMedClient
+from src.utils.rate_limiter import AsyncTokenBucket
+
+
+class ManualClock:
+    """
+    Deterministic clock for testing rate limiting without real waiting.
+
+    sleep() yields to the event loop and then advances the clock to the
+    sleeper's deadline, so concurrent sleepers wake up in deadline order and
+    the final time equals the latest deadline.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+        self.sleeps: List[float] = []
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float) -> None:
+        deadline = self.now + delay
+        self.sleeps.append(delay)
+        await asyncio.sleep(0)
+        self.now = max(self.now, deadline)
 
 
 @pytest.fixture
@@ -35,3 +60,82 @@ def mock_pubmed_abstract() -> Dict[str, Any]:
             "Humans",
         ],
     }
+
+
+@pytest.fixture
+def pubmed_xml_payload() -> bytes:
+    """Return an EFetch XML response holding two PubMed articles."""
+    return b"""<?xml version="1.0" ?>
+<!DOCTYPE PubmedArticleSet PUBLIC "-//NLM//DTD PubMedArticle, 1st January 2024//EN" "https://dtd.nlm.nih.gov/ncbi/pubmed/out/pubmed_240101.dtd">
+<PubmedArticleSet>
+<PubmedArticle>
+  <MedlineCitation Status="MEDLINE" Owner="NLM">
+    <PMID Version="1">15858239</PMID>
+    <Article PubModel="Print">
+      <Journal>
+        <JournalIssue CitedMedium="Print">
+          <PubDate><MedlineDate>2004 Jul-Sep</MedlineDate></PubDate>
+        </JournalIssue>
+        <Title>Medycyna wieku rozwojowego</Title>
+      </Journal>
+      <ArticleTitle>The role of <i>RET</i> gene in Hirschsprung disease.</ArticleTitle>
+      <ELocationID EIdType="doi" ValidYN="Y">10.1000/test.12345</ELocationID>
+      <Abstract>
+        <AbstractText Label="BACKGROUND" NlmCategory="BACKGROUND">RET is a proto-oncogene.</AbstractText>
+        <AbstractText Label="RESULTS" NlmCategory="RESULTS">Mutations were found.</AbstractText>
+      </Abstract>
+      <AuthorList CompleteYN="Y">
+        <Author ValidYN="Y"><LastName>Smigiel</LastName><ForeName>Robert</ForeName><Initials>R</Initials></Author>
+        <Author ValidYN="Y"><LastName>Patkowski</LastName><ForeName>Dariusz</ForeName><Initials>D</Initials></Author>
+        <Author ValidYN="Y"><CollectiveName>Hirschsprung Study Group</CollectiveName></Author>
+      </AuthorList>
+    </Article>
+    <MeshHeadingList>
+      <MeshHeading><DescriptorName UI="D006627" MajorTopicYN="N">Hirschsprung Disease</DescriptorName><QualifierName UI="Q000235" MajorTopicYN="Y">genetics</QualifierName></MeshHeading>
+      <MeshHeading><DescriptorName UI="D006801" MajorTopicYN="Y">Humans</DescriptorName></MeshHeading>
+    </MeshHeadingList>
+    <KeywordList Owner="NOTNLM">
+      <Keyword MajorTopicYN="N">RET gene</Keyword>
+      <Keyword MajorTopicYN="N">enteric nervous system</Keyword>
+    </KeywordList>
+  </MedlineCitation>
+  <PubmedData>
+    <ArticleIdList><ArticleId IdType="pubmed">15858239</ArticleId></ArticleIdList>
+  </PubmedData>
+</PubmedArticle>
+<PubmedArticle>
+  <MedlineCitation Status="MEDLINE" Owner="NLM">
+    <PMID Version="1">12345678</PMID>
+    <Article PubModel="Print">
+      <Journal>
+        <JournalIssue><PubDate><Year>2023</Year><Month>Jan</Month><Day>15</Day></PubDate></JournalIssue>
+        <Title>Journal of Testing</Title>
+      </Journal>
+      <ArticleTitle>Second article</ArticleTitle>
+      <Abstract><AbstractText>Unstructured abstract.</AbstractText></Abstract>
+    </Article>
+  </MedlineCitation>
+  <PubmedData>
+    <ArticleIdList><ArticleId IdType="doi">10.1234/second</ArticleId></ArticleIdList>
+  </PubmedData>
+</PubmedArticle>
+</PubmedArticleSet>
+"""
+
+
+@pytest.fixture
+def manual_clock() -> ManualClock:
+    """Return a deterministic clock starting at zero."""
+    return ManualClock()
+
+
+@pytest.fixture
+def make_token_bucket(manual_clock):
+    """Return a factory for token buckets driven by the manual clock."""
+
+    def factory(rate: float, burst: int = 1) -> AsyncTokenBucket:
+        return AsyncTokenBucket(
+            rate=rate, burst=burst, clock=manual_clock.time, sleep=manual_clock.sleep
+        )
+
+    return factory
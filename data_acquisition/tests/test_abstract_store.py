@@ -0,0 +1,302 @@
+import json
+import threading
+from unittest.mock import patch
+
+import pytest
+from bioasq_common.segment_store import INDEX_ENTRY, is_segment_store
+
+from src.abstract_store import (
+    ZSTD_DICTIONARY_NAME,
+    JsonFileStore,
+    SegmentStore,
+    ZstdFileStore,
+    open_abstract_store,
+)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+requires_zstd = pytest.mark.skipif(zstandard is None, reason="zstandard not installed")
+
+
+def make_abstract(pubmed_id: str) -> dict:
+    """Create a small abstract record."""
+    return {
+        "id": pubmed_id,
+        "title": f"Title {pubmed_id}",
+        "abstract": "Text with unicode: éβ",
+        "authors": ["Smith J"],
+    }
+
+
+def make_pubmed_abstract(i: int) -> dict:
+    """Create an abstract record with PubMed-like fields for dictionary training."""
+    return {
+        "id": str(i),
+        "title": f"Effects of treatment {i} on patients with chronic disease",
+        "abstract": f"BACKGROUND: Study {i} examined outcomes. RESULTS: {i % 7} cases improved.",
+        "authors": [f"Author {i % 13}", f"Author {i % 17}"],
+        "publication_date": f"20{i % 25:02d} Jan {i % 28 + 1:02d}",
+        "journal": f"Journal of Medicine {i % 5}",
+        "doi": f"10.1000/jm.{i}",
+        "keywords": ["treatment", "outcome"],
+        "mesh_terms": ["Humans", "Chronic Disease"],
+    }
+
+
+@pytest.mark.parametrize(
+    "storage_format",
+    ["json", "segments", pytest.param("zstd", marks=requires_zstd)],
+)
+def test_put_get_and_ids(tmp_path, storage_format):
+    """Test the basic store operations for both formats."""
+    store = open_abstract_store(tmp_path / "store", storage_format)
+    for pubmed_id in ["3", "1", "2"]:
+        store.put(pubmed_id, make_abstract(pubmed_id))
+
+    assert store.ids() == {"1", "2", "3"}
+    assert store.get("2") == make_abstract("2")
+    assert sorted(pubmed_id for pubmed_id, _ in store.iter_records()) == [
+        "1",
+        "2",
+        "3",
+    ]
+    with pytest.raises(KeyError):
+        store.get("4")
+    store.close()
+
+
+@pytest.mark.parametrize(
+    "storage_format",
+    ["json", "segments", pytest.param("zstd", marks=requires_zstd)],
+)
+def test_put_many_with_fsync(tmp_path, storage_format):
+    """Test that a batch of abstracts can be saved and synced together."""
+    store = open_abstract_store(tmp_path / "store", storage_format)
+    store.put_many(
+        [(pubmed_id, make_abstract(pubmed_id)) for pubmed_id in ["1", "2"]],
+        fsync=True,
+    )
+
+    assert store.ids() == {"1", "2"}
+    assert store.get("1") == make_abstract("1")
+    store.close()
+
+
+def test_json_store_layout(tmp_path):
+    """Test that the JSON store keeps one file per abstract."""
+    store = JsonFileStore(tmp_path)
+    store.put("1", make_abstract("1"))
+
+    with open(tmp_path / "1.json", encoding="utf-8") as f:
+        assert json.load(f) == make_abstract("1")
+
+
+def test_segment_store_persists_and_replaces(tmp_path):
+    """Test that records survive reopening and later versions win."""
+    store = SegmentStore(tmp_path)
+    store.put("1", make_abstract("1"))
+    store.put("2", make_abstract("2"))
+    store.put("1", {**make_abstract("1"), "title": "Updated"})
+    store.close()
+
+    reopened = SegmentStore(tmp_path)
+    assert len(reopened) == 2
+    assert reopened.get("1")["title"] == "Updated"
+    assert is_segment_store(tmp_path)
+    reopened.close()
+
+
+def test_segment_store_rolls_over_segments(tmp_path):
+    """Test that a new segment is started once segment_size is reached."""
+    store = SegmentStore(tmp_path, segment_size=200)
+    for i in range(1, 11):
+        store.put(str(i), make_abstract(str(i)))
+    store.close()
+
+    assert len(list(tmp_path.glob("segment-main-*.seg"))) > 1
+    reopened = SegmentStore(tmp_path)
+    assert dict(reopened.iter_records()) == {
+        str(i): make_abstract(str(i)) for i in range(1, 11)
+    }
+    reopened.close()
+
+
+def test_segment_store_reads_while_writer_rolls_segments(tmp_path):
+    """Test that get sees complete records while another thread appends."""
+    store = SegmentStore(tmp_path, segment_size=200)
+    store.put("1", make_abstract("1"))
+    errors = []
+
+    def write():
+        try:
+            for i in range(2, 501):
+                store.put(str(i), make_abstract(str(i)))
+        except Exception as e:  # pragma: no cover - reported below
+            errors.append(e)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    while writer.is_alive():
+        for pubmed_id in list(store.ids())[-20:]:
+            assert store.get(pubmed_id) == make_abstract(pubmed_id)
+    writer.join()
+
+    assert errors == []
+    assert len(list(tmp_path.glob("segment-main-*.seg"))) > 100
+    assert len(store) == 500
+    store.close()
+
+
+def test_segment_store_ignores_torn_index_entry(tmp_path):
+    """Test that a partially written index entry is ignored and repaired."""
+    store = SegmentStore(tmp_path)
+    store.put("1", make_abstract("1"))
+    store.close()
+    index_path = tmp_path / "index-main.idx"
+    with open(index_path, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    reopened = SegmentStore(tmp_path)
+    assert reopened.ids() == {"1"}
+    reopened.put("2", make_abstract("2"))
+    reopened.close()
+
+    assert index_path.stat().st_size == 2 * INDEX_ENTRY.size
+    assert SegmentStore(tmp_path).ids() == {"1", "2"}
+
+
+def test_segment_store_merges_writers(tmp_path):
+    """Test that readers see the records of every writer."""
+    first = SegmentStore(tmp_path, writer_id="a")
+    second = SegmentStore(tmp_path, writer_id="b")
+    first.put("1", make_abstract("1"))
+    second.put("2", make_abstract("2"))
+    first.close()
+    second.close()
+
+    reader = SegmentStore(tmp_path)
+    assert reader.ids() == {"1", "2"}
+    assert reader.get("2") == make_abstract("2")
+    reader.close()
+
+
+def test_segment_store_rejects_shared_writer(tmp_path):
+    """Test that two open stores cannot append with the same writer_id."""
+    first = SegmentStore(tmp_path)
+    first.put("1", make_abstract("1"))
+    second = SegmentStore(tmp_path)
+
+    with pytest.raises(RuntimeError):
+        second.put("2", make_abstract("2"))
+
+    first.close()
+    second.close()
+
+
+def test_unknown_storage_format(tmp_path):
+    """Test that an unknown format raises ValueError."""
+    with pytest.raises(ValueError):
+        open_abstract_store(tmp_path, "parquet")
+
+
+@requires_zstd
+def test_zstd_store_trains_dictionary(tmp_path):
+    """Test that a dictionary is trained after train_samples records."""
+    store = ZstdFileStore(tmp_path, train_samples=200)
+    for i in range(1, 201):
+        store.put(str(i), make_pubmed_abstract(i))
+    store.wait_for_dictionary()
+    for i in range(201, 251):
+        store.put(str(i), make_pubmed_abstract(i))
+    store.close()
+
+    assert (tmp_path / ZSTD_DICTIONARY_NAME).exists()
+    first = zstandard.get_frame_parameters((tmp_path / "1.json.zst").read_bytes())
+    last = zstandard.get_frame_parameters((tmp_path / "250.json.zst").read_bytes())
+    assert first.dict_id == 0
+    assert last.dict_id == store.dictionary.dict_id()
+
+    # Records written before and after training stay readable after reopening
+    reopened = ZstdFileStore(tmp_path)
+    assert reopened.get("1") == make_pubmed_abstract(1)
+    assert reopened.get("250") == make_pubmed_abstract(250)
+    assert len(reopened.ids()) == 250
+
+
+@requires_zstd
+def test_zstd_store_picks_up_dictionary_of_another_writer(tmp_path):
+    """Test that a store that does not train uses a dictionary saved later."""
+    trainer = ZstdFileStore(tmp_path, train_samples=200)
+    follower = ZstdFileStore(tmp_path, train_samples=0, dictionary_check_interval=10)
+    follower.put("1001", make_pubmed_abstract(1001))
+    for i in range(1, 201):
+        trainer.put(str(i), make_pubmed_abstract(i))
+    trainer.close()
+
+    # The dictionary is noticed within dictionary_check_interval records
+    for i in range(1002, 1012):
+        follower.put(str(i), make_pubmed_abstract(i))
+    follower.put("1012", make_pubmed_abstract(1012))
+
+    assert follower.dictionary is not None
+    assert follower.dictionary.dict_id() == trainer.dictionary.dict_id()
+    last = zstandard.get_frame_parameters((tmp_path / "1012.json.zst").read_bytes())
+    assert last.dict_id == trainer.dictionary.dict_id()
+    assert ZstdFileStore(tmp_path).get("1001") == make_pubmed_abstract(1001)
+
+
+@requires_zstd
+def test_zstd_store_writes_atomically(tmp_path):
+    """Test that records replace files whole and temporary files are not listed."""
+    store = ZstdFileStore(tmp_path, train_samples=0)
+    store.put("1", make_pubmed_abstract(1))
+    store.put("1", {**make_pubmed_abstract(1), "title": "Updated"})
+    # A temporary file left behind by a crash is not a record
+    (tmp_path / "2.json.zst.123.tmp").write_bytes(b"partial")
+
+    assert store.ids() == {"1"}
+    assert store.get("1")["title"] == "Updated"
+    assert not list(tmp_path.glob("1.json.zst.*.tmp"))
+
+
+@requires_zstd
+def test_zstd_store_trains_outside_put(tmp_path):
+    """Test that put keeps writing while the dictionary is trained."""
+    release = threading.Event()
+    train = zstandard.train_dictionary
+
+    def slow_train(*args, **kwargs):
+        release.wait(timeout=10)
+        return train(*args, **kwargs)
+
+    store = ZstdFileStore(tmp_path, train_samples=200)
+    with patch("src.abstract_store.zstandard.train_dictionary", side_effect=slow_train):
+        for i in range(1, 301):
+            store.put(str(i), make_pubmed_abstract(i))
+        # Records after the samples are written while training is blocked
+        assert store.dictionary is None
+        assert len(store.ids()) == 300
+        release.set()
+        store.close()
+
+    assert store.dictionary is not None
+    assert ZstdFileStore(tmp_path).get("300") == make_pubmed_abstract(300)
+
+
+@requires_zstd
+def test_zstd_store_is_smaller_than_json(tmp_path):
+    """Test that compressed records take less space than pretty-printed JSON."""
+    json_store = JsonFileStore(tmp_path / "json")
+    zstd_store = ZstdFileStore(tmp_path / "zstd", train_samples=100)
+    for i in range(1, 201):
+        json_store.put(str(i), make_pubmed_abstract(i))
+        zstd_store.put(str(i), make_pubmed_abstract(i))
+        if i == 100:
+            zstd_store.wait_for_dictionary()
+
+    json_size = sum(p.stat().st_size for p in (tmp_path / "json").glob("*.json"))
+    zstd_size = sum(p.stat().st_size for p in (tmp_path / "zstd").glob("*.zst"))
+    assert zstd_size < json_size / 2
@@ -0,0 +1,150 @@
+import asyncio
+import threading
+from typing import Any, Dict, Iterator, List, Set, Tuple
+
+import pytest
+
+from src.abstract_store import AbstractStore
+from src.abstract_writer import WriteBehindWriter
+
+
+class RecordingStore(AbstractStore):
+    """In-memory store that records batches and can block or fail writes."""
+
+    def __init__(self):
+        self.records: Dict[str, Dict[str, Any]] = {}
+        self.batches: List[List[str]] = []
+        self.synced: List[List[str]] = []
+        self.threads: Set[str] = set()
+        self.release = threading.Event()
+        self.release.set()
+        self.error: Exception = None
+
+    def put(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        self.records[pubmed_id] = abstract
+
+    def put_many(self, records, fsync: bool = False) -> None:
+        self.release.wait()
+        self.threads.add(threading.current_thread().name)
+        if self.error:
+            raise self.error
+        self.batches.append([pubmed_id for pubmed_id, _ in records])
+        super().put_many(records, fsync)
+
+    def sync(self, pubmed_ids: List[str]) -> None:
+        self.synced.append(pubmed_ids)
+
+    def get(self, pubmed_id: str) -> Dict[str, Any]:
+        return self.records[pubmed_id]
+
+    def ids(self) -> Set[str]:
+        return set(self.records)
+
+    def iter_records(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(self.records.items())
+
+
+@pytest.mark.asyncio
+async def test_writes_off_the_event_loop_and_reports_batches():
+    """Test that abstracts are written by the writer thread and reported once written."""
+    store = RecordingStore()
+    written: List[str] = []
+    writer = WriteBehindWriter(store, batch_size=10, on_written=written.extend)
+
+    for i in range(25):
+        await writer.submit(str(i), {"id": str(i)})
+    await writer.drain()
+
+    assert writer.pending == 0
+    assert sorted(written, key=int) == [str(i) for i in range(25)]
+    assert len(store.records) == 25
+    assert all(len(batch) <= 10 for batch in store.batches)
+    assert store.threads == {"abstract-writer"}
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_groups_fsync_per_batch():
+    """Test that each written batch is synced once when fsync is enabled."""
+    store = RecordingStore()
+    store.release.clear()
+    writer = WriteBehindWriter(store, batch_size=50, fsync=True)
+
+    for i in range(20):
+        await writer.submit(str(i), {"id": str(i)})
+    store.release.set()
+    await writer.drain()
+
+    # Abstracts queued while the disk was busy are written and synced together
+    assert store.synced == store.batches
+    assert len(store.synced) < 20
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_backpressure_when_the_disk_falls_behind():
+    """Test that submit waits once max_pending abstracts are unwritten."""
+    store = RecordingStore()
+    store.release.clear()
+    writer = WriteBehindWriter(store, max_pending=2)
+
+    await writer.submit("1", {"id": "1"})
+    await writer.submit("2", {"id": "2"})
+    third = asyncio.create_task(writer.submit("3", {"id": "3"}))
+    done, _ = await asyncio.wait({third}, timeout=0.05)
+
+    # The event loop keeps running while the third abstract waits for a slot
+    assert not done
+    assert writer.pending == 2
+
+    store.release.set()
+    await third
+    await writer.drain()
+    assert set(store.records) == {"1", "2", "3"}
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_write_errors_are_raised_on_the_event_loop():
+    """Test that a failed write is raised by drain and later submits."""
+    store = RecordingStore()
+    store.error = OSError("disk full")
+    written: List[str] = []
+    failed: List[str] = []
+    writer = WriteBehindWriter(
+        store, on_written=written.extend, on_failed=failed.extend
+    )
+
+    await writer.submit("1", {"id": "1"})
+    with pytest.raises(OSError):
+        await writer.drain()
+    with pytest.raises(OSError):
+        await writer.submit("2", {"id": "2"})
+
+    assert written == []
+    assert failed == ["1"]
+    writer.close()
+
+
+def test_close_writes_remaining_abstracts_after_the_loop_ends():
+    """Test that close() writes and reports abstracts submitted before the loop ended."""
+    store = RecordingStore()
+    store.release.clear()
+    written: List[str] = []
+    writer = WriteBehindWriter(store, on_written=written.extend)
+
+    async def submit() -> None:
+        await writer.submit("1", {"id": "1"})
+
+    asyncio.run(submit())
+    store.release.set()
+    writer.close()
+
+    assert store.records == {"1": {"id": "1"}}
+    assert written == ["1"]
+
+
+def test_rejects_invalid_sizes():
+    """Test that the queue and batch sizes must be positive."""
+    with pytest.raises(ValueError):
+        WriteBehindWriter(RecordingStore(), max_pending=0)
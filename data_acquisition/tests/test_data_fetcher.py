@@ -1,16 +1,20 @@
+import asyncio
 import json
-from pathlib import Path
 from typing import Any, Dict
 from unittest.mock import AsyncMock, MagicMock, mock_open, patch
 
 import pytest
 
+from src.abstract_store import JsonFileStore, SegmentStore
+from src.clients.biopython_pubmed_client import BioPythonPubMedClient
 from src.clients.pubmed_client import (
     PubMedClient,
     PubMedClientError,
     PubMedRateLimitError,
+    PubMedTimeoutError,
 )
 from src.data_fetcher import DataFetcher
+from src.fetch_stats import FetchStats, FetchStatus
 from src.pubmed_url_collector import PubMedURLCollector
 
 
@@ -98,6 +102,7 @@ async def test_fetch_single_abstract_success(
     with patch("builtins.open", mock_open()) as mock_file:
         with patch("json.dump") as mock_json_dump:
             result = await data_fetcher.fetch_single_abstract(url)
+            await data_fetcher.writer.drain()
 
     # Verify the result
     assert result is not None
@@ -120,16 +125,15 @@ async def test_fetch_single_abstract_already_exists(
     data_fetcher, mock_pubmed_client, mock_pubmed_abstract
 ):
     """Test fetching an abstract that already exists."""
-    # Configure Path.exists to return True
-    with patch.object(Path, "exists", return_value=True):
-        # Mock open to return the abstract
-        with patch(
-            "builtins.open", mock_open(read_data=json.dumps(mock_pubmed_abstract))
-        ):
-            with patch("json.load", return_value=mock_pubmed_abstract):
-                result = await data_fetcher.fetch_single_abstract(
-                    "http://www.ncbi.nlm.nih.gov/pubmed/15858239"
-                )
+    # Mark the abstract as already downloaded
+    data_fetcher.existing_ids.add("15858239")
+
+    # Mock open to return the abstract
+    with patch("builtins.open", mock_open(read_data=json.dumps(mock_pubmed_abstract))):
+        with patch("json.load", return_value=mock_pubmed_abstract):
+            result = await data_fetcher.fetch_single_abstract(
+                "http://www.ncbi.nlm.nih.gov/pubmed/15858239"
+            )
 
     # Verify the result is from the file
     assert result is not None
@@ -139,6 +143,132 @@ async def test_fetch_single_abstract_already_exists(
     mock_pubmed_client.get_abstract_by_id.assert_not_called()
 
 
+@pytest.mark.asyncio
+async def test_fetch_all_abstracts_skips_existing_without_reading(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path
+):
+    """Test that a resumed run schedules only abstracts missing on disk."""
+    abstracts_dir = tmp_path / "abstracts"
+    abstracts_dir.mkdir()
+    for pubmed_id in ["1", "2", "3"]:
+        (abstracts_dir / f"{pubmed_id}.json").write_text("{}")
+    (abstracts_dir / "notes.txt").write_text("not an abstract")
+
+    fetcher = DataFetcher(mock_pubmed_client, data_dir=str(tmp_path))
+    assert fetcher.existing_ids == {"1", "2", "3"}
+
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: {
+        **mock_pubmed_abstract,
+        "id": pubmed_id,
+    }
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(1, 6)}
+
+    with patch.object(fetcher, "_load_abstract") as mock_load:
+        results = await fetcher.fetch_all_abstracts(urls)
+
+    mock_load.assert_not_called()
+    assert sorted(r["id"] for r in results) == ["4", "5"]
+    assert mock_pubmed_client.get_abstract_by_id.call_count == 2
+    assert fetcher.existing_ids == {"1", "2", "3", "4", "5"}
+
+
+@pytest.mark.asyncio
+async def test_resume_reads_saved_ids_from_journal(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path
+):
+    """Test that outcomes are journaled and a new fetcher resumes from the journal."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: (
+        {**mock_pubmed_abstract, "id": pubmed_id} if pubmed_id != "2" else None
+    )
+    fetcher = DataFetcher(mock_pubmed_client, data_dir=str(tmp_path), max_retries=1)
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(1, 4)}
+
+    await fetcher.stream_all_abstracts(urls)
+    fetcher.close()
+
+    with patch.object(DataFetcher, "_scan_existing_abstracts") as mock_scan:
+        resumed = DataFetcher(mock_pubmed_client, data_dir=str(tmp_path))
+
+    mock_scan.assert_not_called()
+    assert resumed.existing_ids == {"1", "3"}
+    assert resumed.journal.urls_with_status(FetchStatus.FAILED) == [
+        "http://www.ncbi.nlm.nih.gov/pubmed/2"
+    ]
+    assert resumed.journal.get("1")["attempts"] == 1
+    resumed.close()
+
+
+@pytest.mark.asyncio
+async def test_segment_storage_format(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path
+):
+    """Test that abstracts can be packed into a segment store."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: {
+        **mock_pubmed_abstract,
+        "id": pubmed_id,
+    }
+    fetcher = DataFetcher(
+        mock_pubmed_client, data_dir=str(tmp_path), storage_format="segments"
+    )
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(1, 4)}
+
+    await fetcher.stream_all_abstracts(urls)
+    fetcher.close()
+
+    assert fetcher.abstracts_dir == tmp_path / "abstract_segments"
+    assert not list(fetcher.abstracts_dir.glob("*.json"))
+    store = SegmentStore(fetcher.abstracts_dir)
+    assert store.ids() == {"1", "2", "3"}
+    assert store.get("2")["id"] == "2"
+    store.close()
+
+
+class FailingStore(JsonFileStore):
+    """Store whose writes always fail."""
+
+    def put(self, pubmed_id: str, abstract: Dict[str, Any]) -> None:
+        raise OSError("No space left on device")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ids_per_request", [1, 2])
+async def test_write_error_stops_the_run_without_refetching(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path, ids_per_request
+):
+    """Test that a failed write is raised instead of retried as a failed request."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: {
+        **mock_pubmed_abstract,
+        "id": pubmed_id,
+    }
+    mock_pubmed_client.get_abstracts_by_ids.side_effect = lambda pubmed_ids: [
+        {**mock_pubmed_abstract, "id": pubmed_id} for pubmed_id in pubmed_ids
+    ]
+    fetcher = DataFetcher(
+        mock_pubmed_client,
+        data_dir=str(tmp_path),
+        store=FailingStore(tmp_path / "abstracts"),
+        ids_per_request=ids_per_request,
+        concurrent_requests=1,
+    )
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(1, 3)}
+
+    with pytest.raises(OSError):
+        await fetcher.stream_all_abstracts(urls)
+    fetcher.close()
+
+    requests = (
+        mock_pubmed_client.get_abstract_by_id.call_count
+        + mock_pubmed_client.get_abstracts_by_ids.call_count
+    )
+    assert requests <= 2 // ids_per_request
+    metrics = fetcher.metrics.snapshot()["metrics"]
+    assert metrics["fetcher_requests"] == {'{outcome="success"}': requests}
+    assert metrics["fetcher_requests_in_flight"] == 0
+    # Nothing that failed to save is served as saved
+    assert not fetcher._unwritten
+    assert fetcher._saved_abstract("1") is None
+
+
 @pytest.mark.asyncio
 async def test_fetch_single_abstract_rate_limit(data_fetcher, mock_pubmed_client):
     """Test rate limit handling during single abstract fetching."""
@@ -168,6 +298,43 @@ async def test_fetch_single_abstract_rate_limit(data_fetcher, mock_pubmed_client
     assert mock_pubmed_client.get_abstract_by_id.call_count == 2
 
 
+@pytest.mark.asyncio
+async def test_metrics_record_requests_retries_and_skips(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path
+):
+    """Test that requests, 429s, retries, backoff and skips are counted."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = [
+        PubMedRateLimitError("Rate limit exceeded", status_code=429, retry_after=2),
+        {**mock_pubmed_abstract, "id": "1"},
+    ]
+    fetcher = DataFetcher(
+        mock_pubmed_client, data_dir=str(tmp_path), rate_limit_per_sec=100
+    )
+    fetcher.existing_ids.add("2")
+    urls = {
+        "http://www.ncbi.nlm.nih.gov/pubmed/1",
+        "http://www.ncbi.nlm.nih.gov/pubmed/2",
+    }
+
+    with patch("asyncio.sleep", new=AsyncMock()):
+        await fetcher.stream_all_abstracts(urls)
+    fetcher.close()
+
+    metrics = fetcher.metrics.snapshot()["metrics"]
+    assert metrics["fetcher_requests"] == {
+        '{outcome="rate_limited"}': 1,
+        '{outcome="success"}': 1,
+    }
+    assert metrics["fetcher_retries"] == 1
+    assert metrics["fetcher_backoff_seconds"]["sum"] == 2
+    assert metrics["fetcher_request_latency_seconds"]["count"] == 2
+    assert metrics["fetcher_skipped"] == 1
+    assert metrics["fetcher_abstracts_written"] == 1
+    assert metrics["fetcher_requests_in_flight"] == 0
+    assert metrics["fetcher_pending_urls"] == 0
+    assert metrics["fetcher_write_queue_depth"] == 0
+
+
 @pytest.mark.asyncio
 async def test_fetch_single_abstract_error(data_fetcher, mock_pubmed_client):
     """Test error handling during single abstract fetching."""
@@ -186,6 +353,418 @@ async def test_fetch_single_abstract_error(data_fetcher, mock_pubmed_client):
     mock_pubmed_client.get_abstract_by_id.assert_called_with("15858239")
 
 
+@pytest.mark.asyncio
+async def test_fetch_abstract_batch(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test fetching several abstracts with one batched client request."""
+    mock_pubmed_client.get_abstracts_by_ids.return_value = [
+        mock_pubmed_abstract,
+        {**mock_pubmed_abstract, "id": "12345678"},
+    ]
+    urls = [
+        "http://www.ncbi.nlm.nih.gov/pubmed/15858239",
+        "http://www.ncbi.nlm.nih.gov/pubmed/12345678",
+        "http://www.ncbi.nlm.nih.gov/pubmed/87654321",
+    ]
+
+    results = await data_fetcher.fetch_abstract_batch(urls)
+    await data_fetcher.writer.drain()
+
+    # One request for all three IDs
+    mock_pubmed_client.get_abstracts_by_ids.assert_called_once_with(
+        ["15858239", "12345678", "87654321"]
+    )
+    assert [r["id"] for r in results] == ["15858239", "12345678"]
+
+    # Fetched abstracts are saved and the missing one is marked failed
+    assert (data_fetcher.abstracts_dir / "15858239.json").exists()
+    assert (data_fetcher.abstracts_dir / "12345678.json").exists()
+    assert data_fetcher.failed_urls == {urls[2]}
+
+
+@pytest.mark.asyncio
+async def test_fetch_abstract_batch_keeps_abstracts_fetched_before_rate_limit(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that only the IDs left after a partial 429 are requested again."""
+    first = {**mock_pubmed_abstract, "id": "1"}
+    second = {**mock_pubmed_abstract, "id": "2"}
+    mock_pubmed_client.get_abstracts_by_ids.side_effect = [
+        PubMedRateLimitError("Rate limit exceeded", abstracts=[first]),
+        [second],
+    ]
+    urls = [f"http://www.ncbi.nlm.nih.gov/pubmed/{pid}" for pid in ["1", "2"]]
+
+    with patch("asyncio.sleep", return_value=None):
+        results = await data_fetcher.fetch_abstract_batch(urls)
+
+    assert [r["id"] for r in results] == ["1", "2"]
+    calls = mock_pubmed_client.get_abstracts_by_ids.call_args_list
+    assert [call.args[0] for call in calls] == [["1", "2"], ["2"]]
+    assert not data_fetcher.failed_urls
+    data_fetcher.journal.flush()
+    assert data_fetcher.journal.get("1")["attempts"] == 1
+    assert data_fetcher.journal.get("2")["attempts"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_abstract_batch_retries_timeouts(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that a timed-out batch is retried for the IDs not fetched before it."""
+    first = {**mock_pubmed_abstract, "id": "1"}
+    second = {**mock_pubmed_abstract, "id": "2"}
+    mock_pubmed_client.get_abstracts_by_ids.side_effect = [
+        PubMedTimeoutError("Timed out", abstracts=[first]),
+        [second],
+    ]
+    urls = [f"http://www.ncbi.nlm.nih.gov/pubmed/{pid}" for pid in ["1", "2"]]
+
+    with patch("asyncio.sleep", return_value=None):
+        results = await data_fetcher.fetch_abstract_batch(urls)
+
+    assert [r["id"] for r in results] == ["1", "2"]
+    calls = mock_pubmed_client.get_abstracts_by_ids.call_args_list
+    assert [call.args[0] for call in calls] == [["1", "2"], ["2"]]
+    assert not data_fetcher.failed_urls
+
+
+@pytest.mark.asyncio
+async def test_batching_client_shares_the_rate_limiter(tmp_path, make_token_bucket):
+    """Test that a batching client takes the only token for each request."""
+    client = BioPythonPubMedClient(email="test@example.com")
+    fetcher = DataFetcher(
+        client, data_dir=str(tmp_path), rate_limiter=make_token_bucket(rate=10)
+    )
+    assert client.rate_limiter is fetcher.rate_limiter
+
+    with patch.object(
+        client, "_fetch_abstract", return_value={"id": "1", "title": "Title"}
+    ):
+        await fetcher.fetch_single_abstract("http://www.ncbi.nlm.nih.gov/pubmed/1")
+    fetcher.close()
+
+    assert fetcher.rate_limiter.acquired == 1
+
+
+@pytest.mark.asyncio
+async def test_fetch_all_abstracts_with_ids_per_request(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that fetch_all_abstracts groups URLs when ids_per_request > 1."""
+    data_fetcher.ids_per_request = 2
+    mock_pubmed_client.get_abstracts_by_ids.side_effect = lambda ids: [
+        {**mock_pubmed_abstract, "id": pid} for pid in ids
+    ]
+    urls = {
+        "http://www.ncbi.nlm.nih.gov/pubmed/15858239",
+        "http://www.ncbi.nlm.nih.gov/pubmed/12345678",
+        "http://www.ncbi.nlm.nih.gov/pubmed/87654321",
+    }
+
+    results = await data_fetcher.fetch_all_abstracts(urls)
+
+    assert len(results) == 3
+    # Three URLs with two IDs per request means two requests
+    assert mock_pubmed_client.get_abstracts_by_ids.call_count == 2
+    mock_pubmed_client.get_abstract_by_id.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stream_all_abstracts_keeps_only_statuses(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that streaming mode reports per-ID outcomes without keeping abstracts."""
+    data_fetcher.existing_ids.add("1")
+
+    def get_abstract(pubmed_id):
+        if pubmed_id == "3":
+            raise PubMedClientError("Not found")
+        return {**mock_pubmed_abstract, "id": pubmed_id}
+
+    mock_pubmed_client.get_abstract_by_id.side_effect = get_abstract
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(1, 5)}
+
+    stats = await data_fetcher.stream_all_abstracts(urls)
+
+    assert stats.statuses == {
+        "1": FetchStatus.ALREADY_DOWNLOADED,
+        "2": FetchStatus.FETCHED,
+        "3": FetchStatus.FAILED,
+        "4": FetchStatus.FETCHED,
+    }
+    assert (stats.total, stats.successful, stats.failed) == (4, 3, 1)
+    assert data_fetcher.failed_urls == {"http://www.ncbi.nlm.nih.gov/pubmed/3"}
+
+
+@pytest.mark.asyncio
+async def test_fetch_via_history(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test posting IDs once and paging through the history server."""
+    data_fetcher.history_page_size = 2
+    mock_pubmed_client.post_ids = AsyncMock(return_value=("MCID_123", "1"))
+    posted_ids = ["12345678", "15858239", "87654321"]
+    mock_pubmed_client.get_abstracts_from_history = AsyncMock(
+        side_effect=lambda webenv, query_key, retstart, retmax: [
+            {**mock_pubmed_abstract, "id": pid}
+            for pid in posted_ids[retstart : retstart + retmax]
+        ]
+    )
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{pid}" for pid in posted_ids}
+
+    results = await data_fetcher.fetch_via_history(urls)
+
+    assert sorted(r["id"] for r in results) == posted_ids
+    mock_pubmed_client.post_ids.assert_called_once_with(posted_ids)
+    # Three IDs with a page size of two means two pages
+    assert mock_pubmed_client.get_abstracts_from_history.call_count == 2
+    assert not data_fetcher.failed_urls
+    # State is removed once every page has been fetched
+    assert not data_fetcher.history_state_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_fetch_via_history_retries_post(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that a throttled or failed EPost is retried with backoff."""
+    data_fetcher.max_retries = 3
+    data_fetcher.retry_delay = 1
+    mock_pubmed_client.post_ids = AsyncMock(
+        side_effect=[
+            PubMedRateLimitError("Rate limit exceeded", retry_after=3),
+            PubMedClientError("Bad gateway", 502),
+            ("MCID_123", "1"),
+        ]
+    )
+    mock_pubmed_client.get_abstracts_from_history = AsyncMock(
+        return_value=[{**mock_pubmed_abstract, "id": "12345678"}]
+    )
+
+    with patch("asyncio.sleep", return_value=None) as mock_sleep:
+        results = await data_fetcher.fetch_via_history(
+            {"http://www.ncbi.nlm.nih.gov/pubmed/12345678"}
+        )
+
+    assert [r["id"] for r in results] == ["12345678"]
+    assert mock_pubmed_client.post_ids.call_count == 3
+    # Retry-After for the 429, then the growing retry delay
+    assert [call.args[0] for call in mock_sleep.call_args_list] == [3, 2]
+    metrics = data_fetcher.metrics.snapshot()["metrics"]
+    assert metrics["fetcher_retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_fetch_via_history_post_failure_marks_ids_failed(
+    data_fetcher, mock_pubmed_client
+):
+    """Test that IDs that cannot be posted are recorded as failed."""
+    mock_pubmed_client.post_ids = AsyncMock(
+        side_effect=PubMedClientError("Bad gateway", 502)
+    )
+    mock_pubmed_client.get_abstracts_from_history = AsyncMock()
+    urls = {"http://www.ncbi.nlm.nih.gov/pubmed/1"}
+
+    with patch("asyncio.sleep", return_value=None):
+        stats = await data_fetcher.stream_via_history(urls)
+
+    assert mock_pubmed_client.post_ids.call_count == data_fetcher.max_retries
+    mock_pubmed_client.get_abstracts_from_history.assert_not_called()
+    assert stats.statuses == {"1": FetchStatus.FAILED}
+    assert data_fetcher.failed_urls == urls
+    assert not data_fetcher.history_state_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_history_without_client_support_falls_back(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that clients without history server support fetch with EFetch."""
+    mock_pubmed_client.supports_history_server = False
+    mock_pubmed_client.get_abstract_by_id.return_value = mock_pubmed_abstract
+
+    results = await data_fetcher.fetch_via_history(
+        {"http://www.ncbi.nlm.nih.gov/pubmed/15858239"}
+    )
+
+    assert [r["id"] for r in results] == ["15858239"]
+    mock_pubmed_client.post_ids.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_summaries_without_client_support_raise(data_fetcher, mock_pubmed_client):
+    """Test that summaries are not requested from clients without ESummary."""
+    mock_pubmed_client.supports_esummary = False
+
+    with pytest.raises(ValueError):
+        await data_fetcher.fetch_summaries(["1"])
+
+    mock_pubmed_client.get_summaries.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_unexpected_history_error_leaves_no_request_in_flight(
+    data_fetcher, mock_pubmed_client
+):
+    """Test that the in-flight gauge is decremented when a request raises."""
+    mock_pubmed_client.post_ids = AsyncMock(return_value=("MCID_123", "1"))
+    mock_pubmed_client.get_abstracts_from_history = AsyncMock(
+        side_effect=RuntimeError("connection reset")
+    )
+
+    with pytest.raises(RuntimeError):
+        await data_fetcher.stream_via_history({"http://www.ncbi.nlm.nih.gov/pubmed/1"})
+
+    metrics = data_fetcher.metrics.snapshot()["metrics"]
+    assert metrics["fetcher_requests_in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_fetch_via_history_resumes(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that an interrupted history fetch resumes from the last page."""
+    data_fetcher.history_page_size = 2
+    posted_ids = ["12345678", "15858239", "87654321"]
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{pid}" for pid in posted_ids}
+    mock_pubmed_client.post_ids = AsyncMock(return_value=("MCID_123", "1"))
+
+    # First run: the second page fails on every attempt
+    async def first_run_page(webenv, query_key, retstart, retmax):
+        if retstart > 0:
+            raise PubMedRateLimitError("Rate limit exceeded")
+        return [
+            {**mock_pubmed_abstract, "id": pid}
+            for pid in posted_ids[retstart : retstart + retmax]
+        ]
+
+    mock_pubmed_client.get_abstracts_from_history = AsyncMock(
+        side_effect=first_run_page
+    )
+    with patch("asyncio.sleep", return_value=None):
+        results = await data_fetcher.fetch_via_history(urls)
+
+    assert len(results) == 2
+    assert data_fetcher.history_state_path.exists()
+
+    # Second run picks up at the second page without posting again
+    data_fetcher.failed_urls.clear()
+    mock_pubmed_client.post_ids.reset_mock()
+    mock_pubmed_client.get_abstracts_from_history = AsyncMock(
+        return_value=[{**mock_pubmed_abstract, "id": "87654321"}]
+    )
+    results = await data_fetcher.fetch_via_history(urls)
+
+    # Only the abstract from the remaining page is new
+    assert [r["id"] for r in results] == ["87654321"]
+    assert data_fetcher.existing_ids == set(posted_ids)
+    mock_pubmed_client.post_ids.assert_not_called()
+    mock_pubmed_client.get_abstracts_from_history.assert_called_once_with(
+        "MCID_123", "1", 2, 2
+    )
+    assert not data_fetcher.failed_urls
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_under_heavy_concurrency(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path, make_token_bucket, manual_clock
+):
+    """Test that the achieved request rate matches rate_limit_per_sec."""
+    request_times = []
+
+    async def get_abstract(pubmed_id):
+        request_times.append(manual_clock.now)
+        return {**mock_pubmed_abstract, "id": pubmed_id}
+
+    mock_pubmed_client.get_abstract_by_id.side_effect = get_abstract
+    fetcher = DataFetcher(
+        mock_pubmed_client,
+        data_dir=str(tmp_path),
+        batch_size=200,
+        rate_limit_per_sec=10,
+        concurrent_requests=50,
+        rate_limiter=make_token_bucket(rate=10),
+    )
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(200)}
+
+    results = await fetcher.fetch_all_abstracts(urls)
+
+    assert len(results) == 200
+    achieved_rate = (len(request_times) - 1) / (max(request_times) - min(request_times))
+    assert achieved_rate == pytest.approx(10, rel=0.01)
+
+
+@pytest.mark.asyncio
+async def test_fetch_single_abstract_honors_retry_after(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that a Retry-After delay replaces exponential backoff."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = [
+        PubMedRateLimitError("Rate limit exceeded", retry_after=42),
+        mock_pubmed_abstract,
+    ]
+
+    with patch("asyncio.sleep", return_value=None) as mock_sleep:
+        result = await data_fetcher.fetch_single_abstract(
+            "http://www.ncbi.nlm.nih.gov/pubmed/15858239"
+        )
+
+    assert result == mock_pubmed_abstract
+    mock_sleep.assert_any_call(42)
+
+
+@pytest.mark.asyncio
+async def test_fetch_single_abstract_retries_timeouts(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that timeouts are retried rather than failing immediately."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = [
+        PubMedTimeoutError("Timed out"),
+        mock_pubmed_abstract,
+    ]
+
+    with patch("asyncio.sleep", return_value=None):
+        result = await data_fetcher.fetch_single_abstract(
+            "http://www.ncbi.nlm.nih.gov/pubmed/15858239"
+        )
+
+    assert result == mock_pubmed_abstract
+    assert mock_pubmed_client.get_abstract_by_id.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_adaptive_mode_reacts_to_throttling(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path
+):
+    """Test that adaptive mode lowers the rate on 429 and raises it on success."""
+    fetcher = DataFetcher(
+        mock_pubmed_client,
+        data_dir=str(tmp_path),
+        rate_limit_per_sec=10,
+        max_retries=2,
+        concurrent_requests=10,
+        adaptive=True,
+        max_rate_limit_per_sec=20,
+    )
+    assert fetcher.controller is not None
+    fetcher.controller.window_size = 1
+
+    mock_pubmed_client.get_abstract_by_id.side_effect = [
+        PubMedRateLimitError("Rate limit exceeded"),
+        mock_pubmed_abstract,
+    ]
+    with patch("asyncio.sleep", return_value=None):
+        await fetcher.fetch_single_abstract(
+            "http://www.ncbi.nlm.nih.gov/pubmed/15858239"
+        )
+
+    # Halved on the 429, then one additive step after the success
+    assert fetcher.controller.rate == pytest.approx(5.5)
+    assert fetcher.rate_limiter.rate == pytest.approx(5.5)
+
+
 @pytest.mark.asyncio
 async def test_fetch_batch(data_fetcher, mock_pubmed_client, mock_pubmed_abstract):
     """Test fetching a batch of abstracts."""
@@ -193,6 +772,121 @@ async def test_fetch_batch(data_fetcher, mock_pubmed_client, mock_pubmed_abstrac
     pass
 
 
+@pytest.mark.asyncio
+async def test_fetch_all_abstracts_slow_url_does_not_stall_others(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that one slow request does not hold back the remaining URLs."""
+    release = asyncio.Event()
+    fetched_ids = []
+
+    async def get_abstract(pubmed_id):
+        if pubmed_id == "1":
+            await release.wait()
+        fetched_ids.append(pubmed_id)
+        if len(fetched_ids) == 5:
+            release.set()
+        return {**mock_pubmed_abstract, "id": pubmed_id}
+
+    mock_pubmed_client.get_abstract_by_id.side_effect = get_abstract
+    urls = [f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(1, 7)]
+    completed = []
+
+    # batch_size=2 would have put the slow URL in a batch barrier before
+    results = await asyncio.wait_for(
+        data_fetcher.fetch_all_abstracts(
+            urls, on_complete=lambda group, abstracts: completed.append(group)
+        ),
+        timeout=1,
+    )
+
+    assert len(results) == 6
+    assert fetched_ids[-1] == "1"
+    assert len(completed) == 6
+    assert completed[-1] == ["http://www.ncbi.nlm.nih.gov/pubmed/1"]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_fetches_of_one_id_share_a_request(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that overlapping callers for one PubMed ID send a single request."""
+    release = asyncio.Event()
+
+    async def get_abstract(pubmed_id):
+        await release.wait()
+        return {**mock_pubmed_abstract, "id": pubmed_id}
+
+    mock_pubmed_client.get_abstract_by_id.side_effect = get_abstract
+    url = "http://www.ncbi.nlm.nih.gov/pubmed/1"
+
+    callers = [
+        asyncio.ensure_future(data_fetcher.fetch_single_abstract(url)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    # A cancelled caller does not cancel the request the others wait for
+    callers[0].cancel()
+    release.set()
+    results = await asyncio.gather(*callers[1:])
+
+    assert results[0]["id"] == "1" and results[1] is results[0]
+    mock_pubmed_client.get_abstract_by_id.assert_called_once_with("1")
+    assert data_fetcher.metrics.snapshot()["metrics"]["fetcher_coalesced"] == 2
+
+    # Fetched but possibly not yet written: served without a new request
+    assert (await data_fetcher.fetch_single_abstract(url))["id"] == "1"
+    await data_fetcher.writer.drain()
+    mock_pubmed_client.get_abstract_by_id.assert_called_once()
+    assert data_fetcher.existing_ids == {"1"}
+    assert not data_fetcher._pending_fetches
+    assert not data_fetcher._unwritten
+
+
+@pytest.mark.asyncio
+async def test_batch_and_single_fetches_share_requests(
+    data_fetcher, mock_pubmed_client, mock_pubmed_abstract
+):
+    """Test that single fetches and overlapping batches join a batch in flight."""
+    release = asyncio.Event()
+
+    async def get_abstracts(pubmed_ids):
+        await release.wait()
+        return [
+            {**mock_pubmed_abstract, "id": pubmed_id}
+            for pubmed_id in pubmed_ids
+            if pubmed_id != "2"
+        ]
+
+    mock_pubmed_client.get_abstracts_by_ids.side_effect = get_abstracts
+    urls = [f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in range(1, 5)]
+
+    first = asyncio.ensure_future(data_fetcher.fetch_abstract_batch(urls[:3]))
+    await asyncio.sleep(0)
+    single = asyncio.ensure_future(data_fetcher.fetch_single_abstract(urls[0]))
+    failed = asyncio.ensure_future(data_fetcher.fetch_single_abstract(urls[1]))
+    second = asyncio.ensure_future(data_fetcher.fetch_abstract_batch(urls[2:]))
+    await asyncio.sleep(0)
+    release.set()
+
+    (
+        first_abstracts,
+        single_abstract,
+        failed_abstract,
+        second_abstracts,
+    ) = await asyncio.gather(first, single, failed, second)
+
+    assert sorted(a["id"] for a in first_abstracts) == ["1", "3"]
+    assert single_abstract["id"] == "1"
+    assert failed_abstract is None
+    assert sorted(a["id"] for a in second_abstracts) == ["3", "4"]
+    requested = [
+        call.args[0] for call in mock_pubmed_client.get_abstracts_by_ids.call_args_list
+    ]
+    assert requested == [["1", "2", "3"], ["4"]]
+    mock_pubmed_client.get_abstract_by_id.assert_not_called()
+    assert data_fetcher.failed_urls == {urls[1]}
+
+
 @pytest.mark.asyncio
 async def test_fetch_all_abstracts(
     data_fetcher, mock_pubmed_client, mock_pubmed_abstract
@@ -249,16 +943,15 @@ async def test_fetch_all_abstracts(
 @pytest.mark.asyncio
 async def test_run_success(data_fetcher, mock_pubmed_client, mock_pubmed_abstract):
     """Test successful run method."""
-    # Mock fetch_all_abstracts to control test flow
+    stats = FetchStats()
+    for pubmed_id in ["15858239", "12345678", "87654321"]:
+        stats.record(pubmed_id, FetchStatus.FETCHED)
+
+    # Mock stream_all_abstracts to control test flow
     with patch.object(
-        data_fetcher, "fetch_all_abstracts", new_callable=AsyncMock
+        data_fetcher, "stream_all_abstracts", new_callable=AsyncMock
     ) as mock_fetch_all:
-        # Configure mock to return a list of abstracts
-        mock_fetch_all.return_value = [
-            mock_pubmed_abstract,
-            {**mock_pubmed_abstract, "id": "12345678"},
-            {**mock_pubmed_abstract, "id": "87654321"},
-        ]
+        mock_fetch_all.return_value = stats
 
         # Mock file operations
         with patch("builtins.open", mock_open()) as mock_file:
@@ -272,21 +965,23 @@ async def test_run_success(data_fetcher, mock_pubmed_client, mock_pubmed_abstrac
     assert result["successful_fetches"] == 3
     assert result["failed_fetches"] == 0  # All abstracts were fetched
 
-    # Verify fetch_all_abstracts was called
+    # Verify stream_all_abstracts was called
     mock_fetch_all.assert_called_once()
 
 
 @pytest.mark.asyncio
 async def test_run_with_errors(data_fetcher, mock_pubmed_client):
     """Test run method with failed fetches."""
-    # Mock fetch_all_abstracts to return a partial list (simulating some failures)
+    stats = FetchStats()
+    stats.record("15858239", FetchStatus.FETCHED)
+    stats.record("12345678", FetchStatus.FAILED)
+    stats.record("87654321", FetchStatus.FAILED)
+
+    # Mock stream_all_abstracts to report some failures
     with patch.object(
-        data_fetcher, "fetch_all_abstracts", new_callable=AsyncMock
+        data_fetcher, "stream_all_abstracts", new_callable=AsyncMock
     ) as mock_fetch_all:
-        # Return only 1 abstract even though we have 3 URLs
-        mock_fetch_all.return_value = [
-            {"id": "15858239", "title": "Test Abstract", "abstract": "Test"}
-        ]
+        mock_fetch_all.return_value = stats
 
         # Mock file operations
         with patch("builtins.open", mock_open()) as mock_file:
@@ -314,6 +1009,100 @@ async def test_run_no_urls(data_fetcher):
     assert result is None
 
 
+def write_release(data_dir, release, pubmed_ids):
+    """Write a BioASQ training file referencing the given PubMed IDs."""
+    training_dir = data_dir / release / "training"
+    training_dir.mkdir(parents=True)
+    documents = [f"http://www.ncbi.nlm.nih.gov/pubmed/{i}" for i in pubmed_ids]
+    (training_dir / "training.json").write_text(
+        json.dumps({"questions": [{"body": "?", "documents": documents}]})
+    )
+
+
+@pytest.mark.asyncio
+async def test_run_delta_fetches_only_new_ids(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path
+):
+    """Test that a delta run for a new release requests only the added IDs."""
+    write_release(tmp_path, "BioASQ-12b", ["1", "2", "3"])
+    write_release(tmp_path, "BioASQ-13b", ["2", "3", "4"])
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: (
+        {**mock_pubmed_abstract, "id": pubmed_id} if pubmed_id != "3" else None
+    )
+
+    fetcher = DataFetcher(mock_pubmed_client, data_dir=str(tmp_path), max_retries=1)
+    with patch("builtins.print"):
+        await fetcher.run()
+    fetcher.close()
+    mock_pubmed_client.get_abstract_by_id.reset_mock()
+
+    fetcher = DataFetcher(
+        mock_pubmed_client, data_dir=str(tmp_path), release="BioASQ-13b"
+    )
+    with patch("builtins.print"):
+        result = await fetcher.run(delta=True)
+    fetcher.close()
+
+    # 3 failed in 12b and is left to retry_failed_urls
+    mock_pubmed_client.get_abstract_by_id.assert_called_once_with("4")
+    assert result["release"]["previous_release"] == "BioASQ-12b"
+    assert result["release"]["added"] == 1
+    assert result["release"]["removed"] == 1
+    assert result["release"]["unchanged"] == 2
+    assert result["release"]["missing"] == 1
+    assert result["already_downloaded"] == 1
+    assert result["successful_fetches"] == 2
+    report = json.loads((tmp_path / "release_delta-BioASQ-13b.json").read_text())
+    assert report["added_ids"] == ["4"]
+    assert report["removed_ids"] == ["1"]
+
+
+@pytest.mark.asyncio
+async def test_run_prioritize_fetches_goldset_documents_first(
+    mock_pubmed_client, mock_pubmed_abstract, tmp_path
+):
+    """Test that goldset documents come first, then the most cited documents."""
+    url = "http://www.ncbi.nlm.nih.gov/pubmed/{}"
+    training_dir = tmp_path / "BioASQ-12b" / "training"
+    goldset_dir = tmp_path / "BioASQ-12b" / "goldset"
+    training_dir.mkdir(parents=True)
+    goldset_dir.mkdir(parents=True)
+    training = [
+        {"id": "q1", "documents": [url.format(i) for i in (1, 2, 3)]},
+        {"id": "q2", "documents": [url.format(i) for i in (3, 4)]},
+    ]
+    (training_dir / "training.json").write_text(json.dumps({"questions": training}))
+    goldset = [{"id": "q3", "documents": [url.format(5)]}]
+    (goldset_dir / "goldset.json").write_text(json.dumps({"questions": goldset}))
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: (
+        {**mock_pubmed_abstract, "id": pubmed_id} if pubmed_id != "4" else None
+    )
+
+    fetcher = DataFetcher(
+        mock_pubmed_client,
+        data_dir=str(tmp_path),
+        concurrent_requests=1,
+        max_retries=1,
+    )
+    with patch("builtins.print"):
+        result = await fetcher.run(prioritize=True)
+    fetcher.close()
+
+    requested = [
+        call.args[0] for call in mock_pubmed_client.get_abstract_by_id.call_args_list
+    ]
+    assert requested == ["5", "3", "1", "2", "4"]
+    assert result["coverage"]["goldset"]["answerable"] == 1
+    assert result["coverage"]["all"]["answerable"] == 2
+    assert result["coverage"]["all"]["partially_answerable"] == 1
+    report = json.loads((tmp_path / "question_coverage.json").read_text())
+    assert report["questions"]["q2"] == {
+        "goldset": False,
+        "documents": 2,
+        "available": 1,
+    }
+
+
 @pytest.mark.asyncio
 async def test_process_batch(data_fetcher, mock_pubmed_client, mock_pubmed_abstract):
     """Test removed process_batch method - this test is no longer needed."""
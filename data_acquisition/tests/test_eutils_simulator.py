@@ -0,0 +1,199 @@
+import random
+
+import httpx
+import pytest
+
+from src.clients.httpx_pubmed_client import HttpxPubMedClient
+from src.clients.pubmed_client import PubMedClientError, PubMedRateLimitError
+from src.clients.pubmed_xml import parse_pubmed_xml
+from src.data_fetcher import DataFetcher
+from src.eutils_simulator import (
+    EUtilsSimulator,
+    FaultConfig,
+    LatencyDistribution,
+    synthetic_corpus,
+)
+
+
+@pytest.fixture
+def corpus():
+    """Return a small synthetic corpus."""
+    return synthetic_corpus(50, first_id=1000)
+
+
+@pytest.fixture
+def simulator(corpus):
+    """Return a running simulator without faults."""
+    with EUtilsSimulator(corpus, seed=0) as simulator:
+        yield simulator
+
+
+def make_client(simulator: EUtilsSimulator) -> HttpxPubMedClient:
+    """Create an httpx client pointed at the simulator."""
+    return HttpxPubMedClient(
+        email="test@example.com",
+        base_url=simulator.base_url,
+        efetch_batch_size=20,
+        timeout=5.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_efetch_batch(simulator, corpus):
+    """Test that batched EFetch requests return the corpus abstracts."""
+    client = make_client(simulator)
+    ids = [str(i) for i in range(1000, 1030)] + ["999"]
+    abstracts = await client.get_abstracts_by_ids(ids)
+    await client.close()
+
+    assert sorted(a["id"] for a in abstracts) == ids[:-1]
+    first = next(a for a in abstracts if a["id"] == "1000")
+    assert first["title"] == corpus["1000"]["title"]
+    assert first["authors"] == corpus["1000"]["authors"]
+    assert first["doi"] == corpus["1000"]["doi"]
+    assert simulator.stats["requests:efetch.fcgi"] == 2
+
+
+@pytest.mark.asyncio
+async def test_epost_and_history_pages(simulator):
+    """Test that posted IDs can be fetched page by page."""
+    client = make_client(simulator)
+    ids = [str(i) for i in range(1010, 1025)]
+    webenv, query_key = await client.post_ids(ids)
+    first_page = await client.get_abstracts_from_history(webenv, query_key, 0, 10)
+    second_page = await client.get_abstracts_from_history(webenv, query_key, 10, 10)
+    await client.close()
+
+    assert [a["id"] for a in first_page + second_page] == ids
+
+
+def test_efetch_xml(simulator, corpus):
+    """Test that retmode=xml returns a PubmedArticleSet."""
+    response = httpx.post(
+        simulator.base_url + "efetch.fcgi",
+        data={"db": "pubmed", "id": "1000,1001", "retmode": "xml"},
+    )
+    abstracts = parse_pubmed_xml(response.content)
+
+    assert [a["id"] for a in abstracts] == ["1000", "1001"]
+    assert abstracts[0]["abstract"] == corpus["1000"]["abstract"]
+    assert abstracts[0]["publication_date"] == corpus["1000"]["publication_date"]
+
+
+def test_esummary(simulator, corpus):
+    """Test that ESummary returns a DocSum per ID and an error for unknown IDs."""
+    response = httpx.get(
+        simulator.base_url + "esummary.fcgi", params={"db": "pubmed", "id": "1000,1"}
+    )
+
+    assert response.status_code == 200
+    assert "<Id>1000</Id>" in response.text
+    assert corpus["1000"]["title"] in response.text
+    assert "UID=1: cannot get document summary" in response.text
+
+
+@pytest.mark.asyncio
+async def test_throttling_sends_retry_after(corpus):
+    """Test that injected 429s carry the configured Retry-After."""
+    faults = FaultConfig(throttle_rate=1.0, retry_after=7)
+    with EUtilsSimulator(corpus, faults) as simulator:
+        client = make_client(simulator)
+        with pytest.raises(PubMedRateLimitError) as exc_info:
+            await client.get_abstract_by_id("1000")
+        await client.close()
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after == 7
+    assert simulator.stats["responses:429"] == 1
+
+
+def test_server_side_rate_limit(corpus):
+    """Test that requests beyond the server-side rate limit are answered with 429."""
+    faults = FaultConfig(rate_limit=3)
+    with EUtilsSimulator(corpus, faults) as simulator:
+        with httpx.Client(base_url=simulator.base_url) as client:
+            statuses = [
+                client.post("efetch.fcgi", data={"id": "1000"}).status_code
+                for _ in range(6)
+            ]
+
+    assert statuses[:3] == [200, 200, 200]
+    assert 429 in statuses[3:]
+
+
+@pytest.mark.asyncio
+async def test_server_errors(corpus):
+    """Test that injected server errors surface as client errors with their status."""
+    faults = FaultConfig(error_rate=1.0, error_status=502)
+    with EUtilsSimulator(corpus, faults) as simulator:
+        client = make_client(simulator)
+        with pytest.raises(PubMedClientError) as exc_info:
+            await client.get_abstract_by_id("1000")
+        await client.close()
+
+    assert exc_info.value.status_code == 502
+
+
+@pytest.mark.asyncio
+async def test_truncated_body(corpus):
+    """Test that a body cut short of its Content-Length fails the request."""
+    faults = FaultConfig(truncate_rate=1.0)
+    with EUtilsSimulator(corpus, faults) as simulator:
+        client = make_client(simulator)
+        with pytest.raises(PubMedClientError):
+            await client.get_abstract_by_id("1000")
+        await client.close()
+
+    assert simulator.stats["responses:truncated"] == 1
+
+
+def test_latency_distribution():
+    """Test latency parsing and sampling."""
+    rng = random.Random(0)
+    latency = LatencyDistribution.parse("lognormal:0.2:0.5")
+    samples = [latency.sample(rng) for _ in range(2000)]
+
+    assert latency.distribution == "lognormal"
+    assert sum(samples) / len(samples) == pytest.approx(0.2, rel=0.1)
+    assert LatencyDistribution.parse("constant:0.1").sample(rng) == 0.1
+    with pytest.raises(ValueError):
+        LatencyDistribution("pareto", 1.0)
+
+
+@pytest.mark.asyncio
+async def test_data_fetcher_recovers_from_faults(corpus, tmp_path):
+    """Test that a fetch interrupted by faults is completed by a resumed run."""
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{pubmed_id}" for pubmed_id in corpus}
+    faults = FaultConfig(error_rate=0.4, truncate_rate=0.2)
+    with EUtilsSimulator(corpus, faults, seed=1) as simulator:
+        client = make_client(simulator)
+        fetcher = DataFetcher(
+            client,
+            data_dir=str(tmp_path),
+            rate_limit_per_sec=1000,
+            burst_size=100,
+            ids_per_request=5,
+            max_retries=1,
+        )
+        stats = await fetcher.stream_all_abstracts(urls)
+        fetcher.close()
+
+        assert 0 < stats.fetched < len(corpus)
+        assert stats.fetched + stats.failed == len(corpus)
+
+        # Resume once the server has recovered
+        simulator.faults = FaultConfig()
+        resumed = DataFetcher(
+            client,
+            data_dir=str(tmp_path),
+            rate_limit_per_sec=1000,
+            burst_size=100,
+            ids_per_request=5,
+        )
+        stats = await resumed.stream_all_abstracts(urls)
+        resumed.close()
+        await client.close()
+
+    assert stats.already_downloaded + stats.fetched == len(corpus)
+    assert resumed.existing_ids == set(corpus)
+    assert stats.failed == 0
@@ -0,0 +1,140 @@
+from src.fetch_journal import FetchJournal
+from src.fetch_stats import FetchStats, FetchStatus
+
+URL = "http://www.ncbi.nlm.nih.gov/pubmed/{}"
+
+
+def test_register_keeps_existing_entries(tmp_path):
+    """Test that registering IDs adds them as pending without resetting others."""
+    with FetchJournal(tmp_path / "journal.sqlite") as journal:
+        journal.record_status("1", URL.format(1), FetchStatus.FETCHED)
+        journal.register({"1": URL.format(1), "2": URL.format(2)})
+
+        assert journal.ids_with_status(FetchStatus.FETCHED) == {"1"}
+        assert journal.ids_with_status(FetchStatus.PENDING) == {"2"}
+
+
+def test_attempts_and_last_error(tmp_path):
+    """Test that attempts are counted and the last error class is kept."""
+    with FetchJournal(tmp_path / "journal.sqlite") as journal:
+        journal.register({"1": URL.format(1)})
+        journal.record_attempt("1", TimeoutError("Timed out"))
+        journal.record_attempt("1", ValueError("Bad record"))
+        journal.record_status("1", URL.format(1), FetchStatus.FAILED)
+
+        entry = journal.get("1")
+        assert entry["status"] == "failed"
+        assert entry["attempts"] == 2
+        assert entry["last_error"] == "ValueError"
+        assert entry["url"] == URL.format(1)
+        assert entry["updated_at"] >= entry["created_at"]
+
+
+def test_updates_are_buffered(tmp_path):
+    """Test that updates are written in batches of flush_every."""
+    path = tmp_path / "journal.sqlite"
+    journal = FetchJournal(path, flush_every=3, flush_interval=3600)
+    reader = FetchJournal(path)
+
+    journal.record_status("1", URL.format(1), FetchStatus.FETCHED)
+    journal.record_status("2", URL.format(2), FetchStatus.FETCHED)
+    assert reader.status_counts() == {}
+
+    journal.record_status("3", URL.format(3), FetchStatus.FAILED)
+    assert reader.status_counts() == {"fetched": 2, "failed": 1}
+
+    journal.close()
+    reader.close()
+
+
+def test_flush_interval(tmp_path):
+    """Test that buffered updates are written once flush_interval has passed."""
+    now = [0.0]
+    path = tmp_path / "journal.sqlite"
+    journal = FetchJournal(
+        path, flush_every=100, flush_interval=5, clock=lambda: now[0]
+    )
+    reader = FetchJournal(path)
+
+    journal.record_status("1", URL.format(1), FetchStatus.FETCHED)
+    assert reader.status_counts() == {}
+
+    now[0] = 6
+    journal.record_status("2", URL.format(2), FetchStatus.FETCHED)
+    assert reader.status_counts() == {"fetched": 2}
+
+    journal.close()
+    reader.close()
+
+
+def test_state_survives_reopen(tmp_path):
+    """Test that the journal is persistent across instances."""
+    path = tmp_path / "journal.sqlite"
+    with FetchJournal(path) as journal:
+        journal.import_fetched(["1", "2"])
+        journal.record_status("3", URL.format(3), FetchStatus.FAILED)
+        stats = FetchStats()
+        stats.record("3", FetchStatus.FAILED)
+        journal.record_run(3, stats)
+
+    with FetchJournal(path) as journal:
+        assert not journal.is_empty()
+        assert journal.ids_with_status(FetchStatus.FETCHED) == {"1", "2"}
+        assert journal.urls_with_status(FetchStatus.FAILED) == [URL.format(3)]
+        last_run = journal.last_run()
+        assert last_run["total_urls"] == 3
+        assert last_run["failed"] == 1
+
+
+def test_releases(tmp_path):
+    """Test recording releases and finding the latest one."""
+    now = [1.0]
+    with FetchJournal(tmp_path / "journal.sqlite", clock=lambda: now[0]) as journal:
+        assert journal.latest_release() is None
+        journal.record_release("BioASQ-12b", ["1", "2"])
+        now[0] = 2.0
+        journal.record_release("BioASQ-13b", ["2", "3"])
+
+        assert journal.latest_release() == "BioASQ-13b"
+        assert journal.latest_release(exclude="BioASQ-13b") == "BioASQ-12b"
+        assert journal.release_ids("BioASQ-12b") == {"1", "2"}
+
+        # Recording a release again replaces its IDs
+        journal.record_release("BioASQ-12b", ["1"])
+        assert journal.release_ids("BioASQ-12b") == {"1"}
+        assert journal.release_ids("BioASQ-14b") == set()
+
+
+
+def test_fetched_times(tmp_path):
+    """Test that only fetched abstracts that were requested have a fetch time."""
+    now = [1.0]
+    with FetchJournal(tmp_path / "journal.sqlite", clock=lambda: now[0]) as journal:
+        journal.import_fetched(["1"])
+        journal.record_attempt("2")
+        journal.record_attempt("3")
+        now[0] = 2.0
+        journal.record_fetched(["2"])
+
+        assert journal.fetched_times() == {"2": 2.0}
+
+
+def test_flush_is_not_blocked_by_another_reader(tmp_path):
+    """Test that a shard can flush while another shard is reading the journal."""
+    path = tmp_path / "journal.sqlite"
+    writer = FetchJournal(path, timeout=0.1)
+    reader = FetchJournal(path)
+    writer.import_fetched(["1"])
+    assert writer._connection.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # Hold a read transaction open, as a shard does while selecting its IDs
+    reader._connection.execute("BEGIN")
+    reader._connection.execute("SELECT * FROM fetches").fetchall()
+
+    writer.record_status("2", URL.format(2), FetchStatus.FETCHED)
+    writer.flush()
+    reader._connection.commit()
+    assert reader.ids_with_status(FetchStatus.FETCHED) == {"1", "2"}
+
+    writer.close()
+    reader.close()
@@ -0,0 +1,27 @@
+from src.fetch_stats import FetchStats, FetchStatus
+
+
+def test_record_counts_statuses():
+    """Test that recorded outcomes are counted per status."""
+    stats = FetchStats()
+    stats.record("1", FetchStatus.FETCHED)
+    stats.record("2", FetchStatus.ALREADY_DOWNLOADED)
+    stats.record("3", FetchStatus.FAILED)
+
+    assert stats.total == 3
+    assert stats.fetched == 1
+    assert stats.already_downloaded == 1
+    assert stats.failed == 1
+    assert stats.successful == 2
+
+
+def test_record_replaces_earlier_outcome():
+    """Test that recording an ID twice keeps only the latest outcome."""
+    stats = FetchStats()
+    stats.record("1", FetchStatus.FAILED)
+    stats.record("1", FetchStatus.FETCHED)
+
+    assert stats.total == 1
+    assert stats.failed == 0
+    assert stats.fetched == 1
+    assert stats.statuses["1"] == FetchStatus.FETCHED
@@ -0,0 +1,94 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.abstract_store import SegmentStore, ZstdFileStore
+from src.migrate_abstracts import migrate_abstracts
+
+
+def test_migrate_abstracts(tmp_path):
+    """Test copying a JSON abstracts directory into a segment store."""
+    abstracts_dir = tmp_path / "abstracts"
+    abstracts_dir.mkdir()
+    for pubmed_id in ["1", "2", "3"]:
+        with open(abstracts_dir / f"{pubmed_id}.json", "w") as f:
+            json.dump({"id": pubmed_id, "title": f"Title {pubmed_id}"}, f, indent=2)
+    (abstracts_dir / "broken.json").write_text("not json")
+    store_dir = tmp_path / "segments"
+
+    assert migrate_abstracts(str(abstracts_dir), str(store_dir)) == 3
+
+    store = SegmentStore(store_dir)
+    assert store.ids() == {"1", "2", "3"}
+    assert store.get("3") == {"id": "3", "title": "Title 3"}
+    store.close()
+
+    # Running again only copies what is missing
+    assert migrate_abstracts(str(abstracts_dir), str(store_dir)) == 0
+
+
+def test_migrate_abstracts_remove_source(tmp_path):
+    """Test that migrated files are removed when requested."""
+    abstracts_dir = tmp_path / "abstracts"
+    abstracts_dir.mkdir()
+    with open(abstracts_dir / "1.json", "w") as f:
+        json.dump({"id": "1"}, f)
+
+    migrate_abstracts(
+        str(abstracts_dir), str(tmp_path / "segments"), remove_source=True
+    )
+
+    assert not (abstracts_dir / "1.json").exists()
+
+
+def test_migrate_abstracts_syncs_before_removing_source(tmp_path):
+    """Test that source files are only removed once the store synced them."""
+    abstracts_dir = tmp_path / "abstracts"
+    abstracts_dir.mkdir()
+    for pubmed_id in ["1", "2", "3"]:
+        with open(abstracts_dir / f"{pubmed_id}.json", "w") as f:
+            json.dump({"id": pubmed_id}, f)
+    synced = []
+
+    def sync(store, pubmed_ids):
+        # Nothing has been removed before the sync
+        assert all((abstracts_dir / f"{pid}.json").exists() for pid in pubmed_ids)
+        synced.extend(pubmed_ids)
+
+    with (
+        patch("src.migrate_abstracts.REMOVE_BATCH_SIZE", 2),
+        patch.object(SegmentStore, "sync", autospec=True, side_effect=sync),
+    ):
+        migrate_abstracts(
+            str(abstracts_dir), str(tmp_path / "segments"), remove_source=True
+        )
+
+    assert sorted(synced) == ["1", "2", "3"]
+    assert not list(abstracts_dir.glob("*.json"))
+
+
+def test_migrate_abstracts_to_zstd(tmp_path):
+    """Test that migrating to a zstd store trains the dictionary first."""
+    pytest.importorskip("zstandard")
+    abstracts_dir = tmp_path / "abstracts"
+    abstracts_dir.mkdir()
+    for i in range(1, 301):
+        abstract = {
+            "id": str(i),
+            "title": f"Outcomes of trial {i} in adult patients",
+            "journal": f"Journal {i % 9}",
+            "authors": [f"Author {i % 11}", f"Author {i % 23}"],
+        }
+        with open(abstracts_dir / f"{i}.json", "w") as f:
+            json.dump(abstract, f, indent=2)
+    store_dir = tmp_path / "zstd"
+
+    migrated = migrate_abstracts(
+        str(abstracts_dir), str(store_dir), storage_format="zstd"
+    )
+
+    assert migrated == 300
+    store = ZstdFileStore(store_dir)
+    assert store.dictionary is not None
+    assert store.get("7")["title"] == "Outcomes of trial 7 in adult patients"
@@ -3,9 +3,10 @@
 import json
 from pathlib import Path
 from typing import Any, Dict, List
-from unittest.mock import mock_open, patch
+from unittest.mock import patch
 
 import pytest
+from bioasq_common.pmid_set import PMIDSet
 
 from src.pubmed_url_collector import PubMedURLCollector
 
@@ -45,18 +46,18 @@ class TestPubMedURLCollector:
         assert collector.goldset_dir == Path("/test/path/BioASQ-12b/goldset")
         assert collector.unique_urls == set()
 
-    def test_extract_urls_from_file(self, mock_bioasq_data):
+        collector = PubMedURLCollector(data_dir="/test/path", release="BioASQ-13b")
+        assert collector.training_dir == Path("/test/path/BioASQ-13b/training")
+
+    def test_extract_urls_from_file(self, tmp_path, mock_bioasq_data):
         """Test _extract_urls_from_file method."""
         collector = PubMedURLCollector()
 
-        # Mock file opening and JSON loading
-        mock_file = mock_open(read_data=json.dumps(mock_bioasq_data))
+        # A real file, so the streaming parser reads it
+        file_path = tmp_path / "training.json"
+        file_path.write_text(json.dumps(mock_bioasq_data), encoding="utf-8")
 
-        with (
-            patch("builtins.open", mock_file),
-            patch("json.load", return_value=mock_bioasq_data),
-        ):
-            urls = collector._extract_urls_from_file(Path("mock_file.json"))
+        urls = collector._extract_urls_from_file(file_path)
 
         assert urls == {
             "http://www.ncbi.nlm.nih.gov/pubmed/12345678",
@@ -78,7 +79,7 @@ class TestPubMedURLCollector:
 
     def test_collect_urls(self):
         """Test collect_urls method."""
-        collector = PubMedURLCollector()
+        collector = PubMedURLCollector(processes=1)
 
         # Mock the _extract_urls_from_file method
         training_urls = {
@@ -117,6 +118,53 @@ class TestPubMedURLCollector:
         }
         assert len(result) == 3  # Check deduplication
 
+    def test_collect_urls_in_parallel(self, tmp_path, mock_bioasq_data):
+        """Test that files read by worker processes give the same URLs."""
+        training_dir = tmp_path / "BioASQ-12b" / "training"
+        goldset_dir = tmp_path / "BioASQ-12b" / "goldset"
+        training_dir.mkdir(parents=True)
+        goldset_dir.mkdir(parents=True)
+        (training_dir / "training12b.json").write_text(json.dumps(mock_bioasq_data))
+        for i in range(3):
+            goldset = {
+                "questions": [
+                    {
+                        "body": "?",
+                        "documents": [f"http://www.ncbi.nlm.nih.gov/pubmed/{i}"],
+                        "snippets": [{"text": "ignored"}],
+                    },
+                    {"body": "No documents"},
+                ]
+            }
+            (goldset_dir / f"goldset{i}.json").write_text(json.dumps(goldset))
+        (goldset_dir / "broken.json").write_text('{"questions": [')
+
+        parallel = PubMedURLCollector(
+            data_dir=str(tmp_path), processes=2, parallel_min_bytes=0
+        )
+        sequential = PubMedURLCollector(data_dir=str(tmp_path), processes=1)
+
+        urls = parallel.collect_urls()
+        assert urls == sequential.collect_urls()
+        assert len(urls) == 7
+
+    def test_small_files_are_read_without_worker_processes(
+        self, tmp_path, mock_bioasq_data
+    ):
+        """Test that no process pool is spawned for files too small to need one."""
+        training_dir = tmp_path / "BioASQ-12b" / "training"
+        training_dir.mkdir(parents=True)
+        for name in ("training12b.json", "training12b_new.json"):
+            (training_dir / name).write_text(json.dumps(mock_bioasq_data))
+
+        collector = PubMedURLCollector(data_dir=str(tmp_path), processes=4)
+        sequential = PubMedURLCollector(data_dir=str(tmp_path), processes=1)
+        with patch("src.pubmed_url_collector.ProcessPoolExecutor") as pool:
+            urls = collector.collect_urls()
+
+        pool.assert_not_called()
+        assert urls == sequential.collect_urls()
+
     def test_save_urls_to_file(self, tmp_path):
         """Test save_urls_to_file method."""
         collector = PubMedURLCollector()
@@ -150,3 +198,8 @@ class TestPubMedURLCollector:
 
         for i, url in enumerate(expected_urls):
             assert lines[i].strip() == url
+
+        # The IDs are saved as a PMID set next to the URLs
+        pmids = PMIDSet.load(tmp_path / "test_ids.pmids")
+        assert list(pmids) == [11223344, 12345678, 87654321]
+        assert pmids == collector.pmids()
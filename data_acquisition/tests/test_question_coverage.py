@@ -0,0 +1,116 @@
+"""Tests for per-question coverage tracking and the default fetch priority."""
+
+import json
+
+import pytest
+
+from src.question_coverage import QuestionCoverage
+
+URL = "http://www.ncbi.nlm.nih.gov/pubmed/{}"
+
+
+class ManualClock:
+    """Clock that only moves when advanced."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def question(question_id, *pubmed_ids):
+    """Return a question citing the given PubMed IDs."""
+    return {"id": question_id, "documents": [URL.format(i) for i in pubmed_ids]}
+
+
+@pytest.fixture
+def coverage(tmp_path):
+    """Return a tracker with two training questions and one goldset question."""
+    coverage = QuestionCoverage(
+        report_path=tmp_path / "coverage.json",
+        report_interval=10,
+        clock=ManualClock(),
+    )
+    coverage.add_questions([question("q1", 1, 2, 3), question("q2", 3, 4)])
+    coverage.add_questions([question("q3", 5), {"id": "q4"}], goldset=True)
+    return coverage
+
+
+def test_priority_puts_goldset_documents_first(coverage):
+    """Test that goldset documents outrank the most cited training documents."""
+    ordered = sorted(["1", "2", "3", "4", "5", "6"], key=coverage.priority)
+
+    assert ordered[::-1][:2] == ["5", "3"]
+    assert coverage.citations("3") == 2
+    assert coverage.is_goldset("5") and not coverage.is_goldset("3")
+    assert coverage.priority("6") == 0
+
+
+def test_questions_in_several_files_are_merged(coverage):
+    """Test that a goldset question also in training is counted once."""
+    coverage.add_questions([question("q1", 1, 6)], goldset=True)
+
+    summary = coverage.summary()
+    assert summary["all"]["questions"] == 3
+    assert summary["goldset"]["questions"] == 2
+    assert summary["documents"] == 6
+    assert coverage.is_goldset("2")
+    assert coverage.citations("1") == 1
+
+
+def test_mark_available_updates_shares(coverage):
+    """Test that available documents count once towards each citing question."""
+    coverage.mark_available(["3", "3", "5", "99"])
+
+    assert coverage.coverage("q1") == pytest.approx(1 / 3)
+    assert coverage.coverage("q2") == 0.5
+    summary = coverage.summary()
+    assert summary["goldset"] == {
+        "questions": 1,
+        "answerable": 1,
+        "partially_answerable": 0,
+        "mean_coverage": 1.0,
+    }
+    assert summary["all"]["answerable"] == 1
+    assert summary["all"]["partially_answerable"] == 2
+    assert summary["available_documents"] == 2
+
+    # Questions added later see documents that are already available
+    coverage.add_questions([question("q5", 3)])
+    assert coverage.coverage("q5") == 1.0
+
+
+def test_record_reports_once_per_interval(coverage, tmp_path):
+    """Test that fetch callbacks write the report only after the interval."""
+    report_path = tmp_path / "coverage.json"
+
+    coverage.record([URL.format(1)], [{"id": "1"}])
+    assert not report_path.exists()
+
+    coverage._clock.now = 10
+    coverage.record([URL.format(2), URL.format(3)], [{"id": "2"}, {"id": "3"}])
+    report = json.loads(report_path.read_text())
+    assert report["all"]["answerable"] == 1
+    assert report["questions"]["q1"] == {
+        "goldset": False,
+        "documents": 3,
+        "available": 3,
+    }
+
+
+def test_from_files_skips_unreadable_files(tmp_path):
+    """Test building from training and goldset files through the cache."""
+    training = tmp_path / "training.json"
+    training.write_text(json.dumps({"questions": [question("q1", 1, 2)]}))
+    goldset = tmp_path / "goldset.json"
+    goldset.write_text(json.dumps({"questions": [question("q2", 2)]}))
+    broken = tmp_path / "broken.json"
+    broken.write_text("{")
+
+    coverage = QuestionCoverage.from_files(
+        [training, broken], [goldset], cache_dir=tmp_path / "cache"
+    )
+
+    assert coverage.question_ids == ["q1", "q2"]
+    assert coverage.is_goldset("2") and not coverage.is_goldset("1")
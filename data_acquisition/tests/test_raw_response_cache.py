@@ -0,0 +1,71 @@
+"""Tests for the raw EFetch response cache."""
+
+from src.clients.medline_utils import parse_medline_text
+from src.clients.pubmed_xml import parse_pubmed_xml
+from src.raw_response_cache import (
+    RawResponseCache,
+    format_raw_record,
+    split_medline_records,
+    split_pubmed_articles,
+)
+
+MEDLINE_TEXT = """
+PMID- 12345
+TI  - Test Article Title
+AB  - This is a test abstract that continues
+      on a second line.
+AU  - Smith J
+MH  - Bioinformatics
+
+PMID- 67890
+TI  - Second Test Article
+DP  - 2023
+
+"""
+
+
+def test_split_medline_records():
+    """Test that each record keeps all its lines, including continuations."""
+    records = dict(split_medline_records(MEDLINE_TEXT))
+
+    assert list(records) == ["12345", "67890"]
+    assert records["67890"] == "PMID- 67890\nTI  - Second Test Article\nDP  - 2023\n"
+    assert parse_medline_text(records["12345"]) == parse_medline_text(MEDLINE_TEXT)[:1]
+    assert list(split_medline_records("\n\n")) == []
+
+
+def test_split_pubmed_articles(pubmed_xml_payload):
+    """Test that articles are keyed by their own PMID."""
+    articles = dict(split_pubmed_articles(pubmed_xml_payload))
+
+    assert list(articles) == ["15858239", "12345678"]
+    assert articles["15858239"].startswith(b"<PubmedArticle>")
+    assert articles["15858239"].endswith(b"</PubmedArticle>")
+
+
+def test_record_and_format_round_trip(tmp_path, pubmed_xml_payload):
+    """Test that cached records format exactly like the full responses."""
+    cache = RawResponseCache(tmp_path / "raw")
+    assert cache.record_medline(MEDLINE_TEXT) == ["12345", "67890"]
+    assert cache.record_xml(pubmed_xml_payload) == ["15858239", "12345678"]
+    cache.close()
+
+    cache = RawResponseCache(tmp_path / "raw")
+    assert cache.ordered_ids() == ["12345", "67890", "15858239", "12345678"]
+    record = cache.get("67890")
+    assert record["format"] == "medline"
+    assert format_raw_record(record) == parse_medline_text(MEDLINE_TEXT)[1]
+    article = parse_pubmed_xml(pubmed_xml_payload)[1]
+    assert format_raw_record(cache.get("12345678")) == article
+    cache.close()
+
+
+def test_fetched_again_replaces_record(tmp_path):
+    """Test that the latest response for a PMID wins."""
+    cache = RawResponseCache(tmp_path / "raw")
+    cache.record_medline("PMID- 1\nTI  - Old title\n")
+    cache.record_medline("PMID- 1\nTI  - New title\n")
+
+    assert len(cache) == 1
+    assert format_raw_record(cache.get("1"))["title"] == "New title"
+    cache.close()
@@ -0,0 +1,135 @@
+"""Tests for the refresh_abstracts.py script."""
+
+import json
+import time
+
+import pytest
+
+from src.abstract_store import JsonFileStore
+from src.clients.httpx_pubmed_client import HttpxPubMedClient
+from src.eutils_simulator import EUtilsSimulator, synthetic_corpus
+from src.fetch_journal import FetchJournal
+from src.refresh_abstracts import refresh_abstracts
+
+
+@pytest.mark.asyncio
+async def test_refresh_refetches_only_changed_records(tmp_path):
+    """Test that only records whose summary changed are fetched again."""
+    corpus = synthetic_corpus(30, first_id=3000)
+    store = JsonFileStore(tmp_path / "abstracts")
+    for pubmed_id, abstract in corpus.items():
+        store.put(pubmed_id, {**abstract, "title": "Old title"})
+    store.close()
+
+    with EUtilsSimulator(corpus, seed=0) as simulator:
+        client = HttpxPubMedClient(
+            email="test@example.com", base_url=simulator.base_url, timeout=5.0
+        )
+
+        async def refresh(**kwargs):
+            return await refresh_abstracts(
+                email="test@example.com",
+                data_dir=str(tmp_path),
+                summary_batch_size=20,
+                ids_per_request=10,
+                rate_limit=100,
+                pubmed_client=client,
+                **kwargs,
+            )
+
+        # The first refresh records the baseline
+        baseline = await refresh()
+        assert baseline["baseline"] == 30
+        assert baseline["changed"] == 0
+        assert simulator.stats["requests:esummary.fcgi"] == 2
+        assert simulator.stats["requests:efetch.fcgi"] == 0
+
+        # A retraction and a MEDLINE indexing update two records
+        corpus["3001"]["pub_types"] = ["Journal Article", "Retracted Publication"]
+        corpus["3002"]["history"] = {"medline": "2025/01/01 00:00"}
+        del corpus["3003"]
+
+        dry_run = await refresh(dry_run=True)
+        assert dry_run["changed_ids"] == ["3001", "3002"]
+        assert dry_run["refreshed"] == 0
+
+        result = await refresh()
+        await client.close()
+
+    assert result["changed_ids"] == ["3001", "3002"]
+    assert result["refreshed"] == 2
+    assert result["missing_ids"] == ["3003"]
+    assert result["unchanged"] == 27
+    assert simulator.stats["requests:efetch.fcgi"] == 1
+
+    store = JsonFileStore(tmp_path / "abstracts")
+    assert store.get("3001")["title"] == corpus["3001"]["title"]
+    assert store.get("3004")["title"] == "Old title"
+    store.close()
+    report = json.loads((tmp_path / "refresh_report.json").read_text())
+    assert report["refreshed"] == 2
+
+    # Refreshed records are unchanged on the next check
+    with EUtilsSimulator(corpus, seed=0) as simulator:
+        client = HttpxPubMedClient(
+            email="test@example.com", base_url=simulator.base_url, timeout=5.0
+        )
+        again = await refresh()
+        await client.close()
+    assert again["changed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_first_refresh_refetches_records_modified_since_fetch(tmp_path):
+    """Test that the first refresh compares history dates with the fetch time."""
+    corpus = synthetic_corpus(10, first_id=5000)
+    store = JsonFileStore(tmp_path / "abstracts")
+    for pubmed_id, abstract in corpus.items():
+        store.put(pubmed_id, {**abstract, "title": "Old title"})
+    store.close()
+    fetched_at = time.mktime((2024, 6, 1, 12, 0, 0, 0, 0, 0))
+    with FetchJournal(
+        tmp_path / "fetch_journal.sqlite", clock=lambda: fetched_at
+    ) as journal:
+        for pubmed_id in corpus:
+            journal.record_attempt(pubmed_id)
+        journal.record_fetched(corpus)
+
+    # Indexed for MEDLINE after the fetch, and corrected long before it
+    corpus["5001"]["history"] = {"medline": "2025/01/01 00:00"}
+    corpus["5002"]["history"] = {"medline": "2020/01/01 00:00"}
+
+    with EUtilsSimulator(corpus, seed=0) as simulator:
+        client = HttpxPubMedClient(
+            email="test@example.com", base_url=simulator.base_url, timeout=5.0
+        )
+        result = await refresh_abstracts(
+            email="test@example.com",
+            data_dir=str(tmp_path),
+            rate_limit=100,
+            pubmed_client=client,
+        )
+        await client.close()
+
+    assert result["changed_ids"] == ["5001"]
+    assert result["refreshed"] == 1
+    assert result["baseline"] == 9
+    store = JsonFileStore(tmp_path / "abstracts")
+    assert store.get("5001")["title"] == corpus["5001"]["title"]
+    assert store.get("5002")["title"] == "Old title"
+    store.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_requires_esummary_support(tmp_path, mock_pubmed_client):
+    """Test that a client without ESummary support is rejected up front."""
+    mock_pubmed_client.supports_esummary = False
+
+    with pytest.raises(ValueError):
+        await refresh_abstracts(
+            email="test@example.com",
+            data_dir=str(tmp_path),
+            pubmed_client=mock_pubmed_client,
+        )
+
+    mock_pubmed_client.get_summaries.assert_not_called()
@@ -0,0 +1,72 @@
+"""Tests for comparing BioASQ releases."""
+
+import json
+
+from src.fetch_journal import FetchJournal
+from src.release_delta import compute_release_delta, release_report_path
+
+
+def test_delta_against_saved_abstracts(tmp_path):
+    """Test that the saved abstracts stand in for a release never recorded."""
+    with FetchJournal(tmp_path / "journal.sqlite") as journal:
+        delta = compute_release_delta(
+            journal, "BioASQ-12b", {"1", "2", "3"}, existing_ids={"1", "4"}
+        )
+
+    assert delta.previous_release is None
+    assert delta.added == {"2", "3"}
+    assert delta.removed == {"4"}
+    assert delta.unchanged == {"1"}
+    assert delta.to_fetch == {"2", "3"}
+
+
+def test_delta_against_previous_release(tmp_path):
+    """Test that a new release is compared with the last recorded one."""
+    with FetchJournal(tmp_path / "journal.sqlite") as journal:
+        journal.record_release("BioASQ-12b", {"1", "2", "3"})
+        delta = compute_release_delta(
+            journal, "BioASQ-13b", {"2", "3", "4", "5"}, existing_ids={"1", "2", "5"}
+        )
+        # Recording the new release again still compares it with 12b
+        journal.record_release("BioASQ-13b", {"2", "3", "4", "5"})
+        again = compute_release_delta(
+            journal, "BioASQ-13b", {"2", "3", "4", "5"}, existing_ids={"1", "2", "5"}
+        )
+
+    assert delta.previous_release == "BioASQ-12b"
+    assert delta.added == {"4", "5"}
+    assert delta.removed == {"1"}
+    assert delta.unchanged == {"2", "3"}
+    assert delta.to_fetch == {"4"}
+    assert delta.missing == {"3"}
+    assert again.counts() == delta.counts()
+
+
+def test_delta_urls(tmp_path):
+    """Test that delta mode requests new and saved IDs but not missing ones."""
+    ids_to_urls = {pid: f"http://www.ncbi.nlm.nih.gov/pubmed/{pid}" for pid in "2345"}
+    with FetchJournal(tmp_path / "journal.sqlite") as journal:
+        journal.record_release("BioASQ-12b", {"1", "2", "3"})
+        delta = compute_release_delta(
+            journal, "BioASQ-13b", ids_to_urls, existing_ids={"1", "2", "5"}
+        )
+
+    assert delta.delta_urls(ids_to_urls, {"1", "2", "5"}) == {
+        ids_to_urls["2"],
+        ids_to_urls["4"],
+        ids_to_urls["5"],
+    }
+
+
+def test_write_report(tmp_path):
+    """Test the JSON report of a delta."""
+    with FetchJournal(tmp_path / "journal.sqlite") as journal:
+        delta = compute_release_delta(journal, "BioASQ-13b", {"2", "1"}, set())
+    path = release_report_path(tmp_path, "BioASQ-13b")
+    delta.write_report(path)
+
+    report = json.loads(path.read_text())
+    assert path.name == "release_delta-BioASQ-13b.json"
+    assert report["added"] == 2
+    assert report["added_ids"] == ["1", "2"]
+    assert report["removed_ids"] == []
@@ -0,0 +1,66 @@
+"""Tests for rebuilding abstracts from the raw response cache."""
+
+import pytest
+
+from src.abstract_store import SegmentStore, open_abstract_store
+from src.clients.medline_utils import parse_medline_text
+from src.clients.pubmed_xml import parse_pubmed_xml
+from src.fetch_journal import FetchJournal
+from src.fetch_stats import FetchStatus
+from src.raw_response_cache import RAW_CACHE_DIR, RawResponseCache
+from src.replay_raw_cache import replay_raw_cache
+
+MEDLINE_TEXT = """PMID- 1
+TI  - First title
+MH  - Humans
+
+PMID- 2
+TI  - Second title
+"""
+
+
+@pytest.fixture
+def data_dir(tmp_path, pubmed_xml_payload):
+    """Return a data directory whose raw cache holds Medline and XML records."""
+    cache = RawResponseCache(tmp_path / RAW_CACHE_DIR)
+    cache.record_medline(MEDLINE_TEXT)
+    cache.record_xml(pubmed_xml_payload)
+    # A record that no longer parses as an article
+    cache.put("3", {"format": "xml", "payload": b"<PubmedArticle/>"})
+    cache.close()
+    return tmp_path
+
+
+def test_replay_rebuilds_abstracts(data_dir, pubmed_xml_payload):
+    """Test that abstracts are rebuilt and marked fetched without a client."""
+    summary = replay_raw_cache(str(data_dir), processes=1, chunk_size=2)
+
+    assert summary["records"] == 5
+    assert summary["rebuilt"] == 4
+    assert summary["failed_ids"] == ["3"]
+    store = open_abstract_store(data_dir / "abstracts", "json")
+    assert store.get("2") == parse_medline_text(MEDLINE_TEXT)[1]
+    assert store.get("15858239") == parse_pubmed_xml(pubmed_xml_payload)[0]
+
+    journal = FetchJournal(data_dir / "fetch_journal.sqlite")
+    assert journal.ids_with_status(FetchStatus.FETCHED) == {
+        "1",
+        "2",
+        "15858239",
+        "12345678",
+    }
+    journal.close()
+
+
+def test_replay_in_worker_processes(data_dir):
+    """Test that spawned workers rebuild the same abstracts into segments."""
+    in_process = replay_raw_cache(str(data_dir), processes=1)
+    summary = replay_raw_cache(
+        str(data_dir), storage_format="segments", processes=2, chunk_size=1
+    )
+
+    assert summary["rebuilt"] == in_process["rebuilt"]
+    json_store = open_abstract_store(data_dir / "abstracts", "json")
+    segments = SegmentStore(data_dir / "abstract_segments")
+    assert dict(segments.iter_records()) == dict(json_store.iter_records())
+    segments.close()
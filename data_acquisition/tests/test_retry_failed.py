@@ -1,18 +1,30 @@
 """Tests for the retry_failed.py script."""
 
 import json
-import os
-from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from src.abstract_store import open_abstract_store
+from src.data_fetcher import STORE_DIRECTORIES
+from src.fetch_journal import FetchJournal
+from src.fetch_stats import FetchStats, FetchStatus
 from src.retry_failed import retry_failed_urls
 
 
+def make_stats(fetched: int = 0, failed: int = 0) -> FetchStats:
+    """Create fetch statistics with the given number of outcomes."""
+    stats = FetchStats()
+    for i in range(fetched):
+        stats.record(f"fetched-{i}", FetchStatus.FETCHED)
+    for i in range(failed):
+        stats.record(f"failed-{i}", FetchStatus.FAILED)
+    return stats
+
+
 @pytest.fixture
-def mock_failed_urls_file(tmp_path):
-    """Create a mock failed_urls.json file."""
+def mock_failed_journal(tmp_path):
+    """Create a fetch journal with three failed URLs and one fetched URL."""
     data_dir = tmp_path / "data"
     data_dir.mkdir()
 
@@ -22,26 +34,34 @@ def mock_failed_urls_file(tmp_path):
         "http://www.ncbi.nlm.nih.gov/pubmed/11223344",
     ]
 
-    failed_urls_file = data_dir / "failed_urls.json"
-    with open(failed_urls_file, "w") as f:
-        json.dump(failed_urls, f)
+    journal_file = data_dir / "fetch_journal.sqlite"
+    with FetchJournal(journal_file) as journal:
+        for url in failed_urls:
+            journal.record_status(url.split("/")[-1], url, FetchStatus.FAILED)
+        journal.record_status(
+            "15858239",
+            "http://www.ncbi.nlm.nih.gov/pubmed/15858239",
+            FetchStatus.FETCHED,
+        )
 
     return {
         "data_dir": data_dir,
-        "failed_urls_file": failed_urls_file,
+        "journal_file": journal_file,
         "failed_urls": failed_urls,
     }
 
 
+def make_mock_data_fetcher(stats: FetchStats, failed_urls=()) -> MagicMock:
+    """Create a mock DataFetcher whose streaming fetch returns stats."""
+    mock_data_fetcher = MagicMock()
+    mock_data_fetcher.stream_all_abstracts = AsyncMock(return_value=stats)
+    mock_data_fetcher.failed_urls = set(failed_urls)
+    return mock_data_fetcher
+
+
 @pytest.mark.asyncio
-async def test_retry_failed_urls_success(
-    mock_pubmed_client, mock_pubmed_abstract, mock_failed_urls_file
-):
+async def test_retry_failed_urls_success(mock_pubmed_client, mock_failed_journal):
     """Test successful retry of failed URLs."""
-    # Setup
-    mock_pubmed_client.get_abstract_by_id.return_value = mock_pubmed_abstract
-
-    # Set up so all URLs are successfully fetched
     with (
         patch(
             "src.retry_failed.BioPythonPubMedClient",
@@ -49,49 +69,36 @@ async def test_retry_failed_urls_success(
         ),
         patch("src.retry_failed.DataFetcher") as mock_data_fetcher_class,
     ):
-        # Configure mock DataFetcher
-        mock_data_fetcher = MagicMock()
-        mock_data_fetcher.fetch_all_abstracts = AsyncMock()
-        mock_data_fetcher.fetch_all_abstracts.return_value = [
-            mock_pubmed_abstract
-        ] * len(mock_failed_urls_file["failed_urls"])
-        mock_data_fetcher.failed_urls = set()  # No failures
-        mock_data_fetcher.abstracts_dir = (
-            mock_failed_urls_file["data_dir"] / "abstracts"
+        mock_data_fetcher = make_mock_data_fetcher(
+            make_stats(fetched=len(mock_failed_journal["failed_urls"]))
         )
-
         mock_data_fetcher_class.return_value = mock_data_fetcher
 
         # Run the function under test
         result = await retry_failed_urls(
-            email="test@example.com", data_dir=str(mock_failed_urls_file["data_dir"])
+            email="test@example.com", data_dir=str(mock_failed_journal["data_dir"])
         )
 
         # Assertions
-        assert result == len(mock_failed_urls_file["failed_urls"])
+        assert result == len(mock_failed_journal["failed_urls"])
 
-        # Check if DataFetcher was initialized correctly
+        # The fetcher shares the journal that the failed URLs came from
         mock_data_fetcher_class.assert_called_once()
+        journal = mock_data_fetcher_class.call_args.kwargs["journal"]
+        assert journal.path == mock_failed_journal["journal_file"]
 
-        # Verify fetch_all_abstracts was called with the correct URLs
-        mock_data_fetcher.fetch_all_abstracts.assert_called_once()
-        called_urls = mock_data_fetcher.fetch_all_abstracts.call_args[0][0]
+        # Only the failed URLs are retried
+        mock_data_fetcher.stream_all_abstracts.assert_called_once()
+        called_urls = mock_data_fetcher.stream_all_abstracts.call_args[0][0]
         assert isinstance(called_urls, set)
-        assert called_urls == set(mock_failed_urls_file["failed_urls"])
-
-        # Verify failed_urls.json file is removed when all fetches succeed
-        assert not mock_failed_urls_file["failed_urls_file"].exists()
+        assert called_urls == set(mock_failed_journal["failed_urls"])
 
 
 @pytest.mark.asyncio
 async def test_retry_failed_urls_partial_success(
-    mock_pubmed_client, mock_pubmed_abstract, mock_failed_urls_file
+    mock_pubmed_client, mock_failed_journal
 ):
     """Test partial success when retrying failed URLs."""
-    # Setup
-    mock_pubmed_client.get_abstract_by_id.return_value = mock_pubmed_abstract
-
-    # Set up for partial success (only 2 of 3 URLs succeed)
     with (
         patch(
             "src.retry_failed.BioPythonPubMedClient",
@@ -99,81 +106,196 @@ async def test_retry_failed_urls_partial_success(
         ),
         patch("src.retry_failed.DataFetcher") as mock_data_fetcher_class,
     ):
-        # Configure mock DataFetcher
-        mock_data_fetcher = MagicMock()
-        mock_data_fetcher.fetch_all_abstracts = AsyncMock()
-        mock_data_fetcher.fetch_all_abstracts.return_value = [
-            mock_pubmed_abstract
-        ] * 2  # Only 2 succeed
-
-        # One URL still fails
-        remaining_failed_url = mock_failed_urls_file["failed_urls"][0]
-        mock_data_fetcher.failed_urls = {remaining_failed_url}
-        mock_data_fetcher.abstracts_dir = (
-            mock_failed_urls_file["data_dir"] / "abstracts"
+        # Only 2 of 3 URLs succeed
+        mock_data_fetcher_class.return_value = make_mock_data_fetcher(
+            make_stats(fetched=2, failed=1),
+            failed_urls=mock_failed_journal["failed_urls"][:1],
         )
 
-        mock_data_fetcher_class.return_value = mock_data_fetcher
+        result = await retry_failed_urls(
+            email="test@example.com", data_dir=str(mock_failed_journal["data_dir"])
+        )
 
-        # Run the function under test
+        assert result == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_failed_urls_updates_journal(
+    mock_pubmed_client, mock_pubmed_abstract, mock_failed_journal
+):
+    """Test that retried URLs are journaled as requests complete."""
+
+    async def get_abstract(pubmed_id):
+        if pubmed_id == "12345678":
+            raise TimeoutError("Timed out")
+        return {**mock_pubmed_abstract, "id": pubmed_id}
+
+    mock_pubmed_client.get_abstract_by_id.side_effect = get_abstract
+
+    with (
+        patch(
+            "src.retry_failed.BioPythonPubMedClient",
+            return_value=mock_pubmed_client,
+        ),
+        patch("asyncio.sleep", new=AsyncMock()),
+    ):
         result = await retry_failed_urls(
-            email="test@example.com", data_dir=str(mock_failed_urls_file["data_dir"])
+            email="test@example.com",
+            data_dir=str(mock_failed_journal["data_dir"]),
+            rate_limit=100,
+            max_retries=2,
         )
 
-        # Assertions
-        assert result == 2  # 2 out of 3 succeeded
+    assert result == 2
+    with FetchJournal(mock_failed_journal["journal_file"]) as journal:
+        assert journal.status_counts() == {"fetched": 3, "failed": 1}
+        entry = journal.get("12345678")
+        assert entry["status"] == "failed"
+        assert entry["attempts"] == 2
+        assert entry["last_error"] == "TimeoutError"
+        assert journal.get("87654321")["attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_retry_failed_urls_with_given_client(
+    mock_pubmed_client, mock_pubmed_abstract, mock_failed_journal
+):
+    """Test that a client passed in is used instead of a new Biopython client."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: {
+        **mock_pubmed_abstract,
+        "id": pubmed_id,
+    }
 
-        # Check if failed_urls.json was updated with the remaining failed URL
-        assert mock_failed_urls_file["failed_urls_file"].exists()
-        with open(mock_failed_urls_file["failed_urls_file"], "r") as f:
-            updated_failed_urls = json.load(f)
+    with patch("src.retry_failed.BioPythonPubMedClient") as mock_client_cls:
+        result = await retry_failed_urls(
+            email="test@example.com",
+            data_dir=str(mock_failed_journal["data_dir"]),
+            rate_limit=100,
+            pubmed_client=mock_pubmed_client,
+        )
 
-        assert len(updated_failed_urls) == 1
-        assert updated_failed_urls[0] == remaining_failed_url
+    assert result == 3
+    mock_client_cls.assert_not_called()
+    assert mock_pubmed_client.get_abstract_by_id.call_count == 3
 
 
 @pytest.mark.asyncio
-async def test_retry_failed_urls_no_file(mock_pubmed_client):
-    """Test handling of missing failed_urls.json file."""
-    # Setup a temp directory with no failed_urls.json
-    tmp_dir = Path(os.path.join(os.path.dirname(__file__), "temp_test_dir"))
-    tmp_dir.mkdir(exist_ok=True)
-
-    try:
-        with patch(
+async def test_retry_failed_urls_imports_legacy_file(mock_pubmed_client, tmp_path):
+    """Test that a failed_urls.json file from older runs is moved into the journal."""
+    failed_urls = ["http://www.ncbi.nlm.nih.gov/pubmed/12345678"]
+    legacy_file = tmp_path / "failed_urls.json"
+    with open(legacy_file, "w") as f:
+        json.dump(failed_urls, f)
+
+    with (
+        patch(
             "src.retry_failed.BioPythonPubMedClient",
             return_value=mock_pubmed_client,
-        ):
-            # Run the function under test
-            result = await retry_failed_urls(
-                email="test@example.com", data_dir=str(tmp_dir)
-            )
+        ),
+        patch("src.retry_failed.DataFetcher") as mock_data_fetcher_class,
+    ):
+        mock_data_fetcher = make_mock_data_fetcher(make_stats(fetched=1))
+        mock_data_fetcher_class.return_value = mock_data_fetcher
+
+        result = await retry_failed_urls(
+            email="test@example.com", data_dir=str(tmp_path)
+        )
+
+    assert result == 1
+    assert not legacy_file.exists()
+    called_urls = mock_data_fetcher.stream_all_abstracts.call_args[0][0]
+    assert called_urls == set(failed_urls)
+
 
-            # Assertions
-            assert result == 0  # No URLs processed
-    finally:
-        # Cleanup
-        if tmp_dir.exists():
-            import shutil
+@pytest.mark.asyncio
+async def test_retry_failed_urls_no_journal(mock_pubmed_client, tmp_path):
+    """Test handling of a missing fetch journal."""
+    with patch(
+        "src.retry_failed.BioPythonPubMedClient",
+        return_value=mock_pubmed_client,
+    ):
+        result = await retry_failed_urls(
+            email="test@example.com", data_dir=str(tmp_path)
+        )
 
-            shutil.rmtree(tmp_dir)
+    assert result == 0  # No URLs processed
+    assert not (tmp_path / "fetch_journal.sqlite").exists()
 
 
 @pytest.mark.asyncio
-async def test_retry_failed_urls_empty_file(mock_pubmed_client, mock_failed_urls_file):
-    """Test handling of empty failed_urls.json file."""
-    # Setup - empty the failed_urls.json file
-    with open(mock_failed_urls_file["failed_urls_file"], "w") as f:
-        json.dump([], f)
+async def test_retry_failed_urls_nothing_failed(mock_pubmed_client, tmp_path):
+    """Test handling of a journal without failed URLs."""
+    with FetchJournal(tmp_path / "fetch_journal.sqlite") as journal:
+        journal.record_status(
+            "15858239",
+            "http://www.ncbi.nlm.nih.gov/pubmed/15858239",
+            FetchStatus.FETCHED,
+        )
 
     with patch(
         "src.retry_failed.BioPythonPubMedClient",
         return_value=mock_pubmed_client,
     ):
-        # Run the function under test
         result = await retry_failed_urls(
-            email="test@example.com", data_dir=str(mock_failed_urls_file["data_dir"])
+            email="test@example.com", data_dir=str(tmp_path)
         )
 
-        # Assertions
-        assert result == 0  # No URLs processed
+    assert result == 0  # No URLs processed
+
+
+@pytest.mark.asyncio
+async def test_retry_failed_urls_storage_format(
+    mock_pubmed_client, mock_pubmed_abstract, mock_failed_journal
+):
+    """Test that abstracts are saved in the given storage format and flushed."""
+    mock_pubmed_client.get_abstract_by_id.side_effect = lambda pubmed_id: {
+        **mock_pubmed_abstract,
+        "id": pubmed_id,
+    }
+
+    with patch(
+        "src.retry_failed.BioPythonPubMedClient",
+        return_value=mock_pubmed_client,
+    ):
+        result = await retry_failed_urls(
+            email="test@example.com",
+            data_dir=str(mock_failed_journal["data_dir"]),
+            rate_limit=100,
+            storage_format="segments",
+        )
+
+    assert result == 3
+    store = open_abstract_store(
+        mock_failed_journal["data_dir"] / STORE_DIRECTORIES["segments"], "segments"
+    )
+    assert set(dict(store.iter_records())) == {"12345678", "87654321", "11223344"}
+    store.close()
+    assert not (mock_failed_journal["data_dir"] / "abstracts").exists()
+    # The client created for the retry is closed with the fetcher
+    mock_pubmed_client.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_retry_failed_urls_closes_on_error(
+    mock_pubmed_client, mock_failed_journal
+):
+    """Test that the fetcher and the client are closed when the retry fails."""
+    with (
+        patch(
+            "src.retry_failed.BioPythonPubMedClient",
+            return_value=mock_pubmed_client,
+        ),
+        patch("src.retry_failed.DataFetcher") as mock_data_fetcher_class,
+    ):
+        mock_data_fetcher = make_mock_data_fetcher(make_stats())
+        mock_data_fetcher.stream_all_abstracts.side_effect = OSError("Disk full")
+        mock_data_fetcher_class.return_value = mock_data_fetcher
+
+        with pytest.raises(OSError):
+            await retry_failed_urls(
+                email="test@example.com",
+                data_dir=str(mock_failed_journal["data_dir"]),
+            )
+
+    mock_data_fetcher.close.assert_called_once()
+    mock_pubmed_client.close.assert_awaited_once()
@@ -0,0 +1,101 @@
+import json
+from collections import Counter
+
+import pytest
+
+from src.abstract_store import SegmentStore
+from src.eutils_simulator import EUtilsSimulator, synthetic_corpus
+from src.fetch_journal import FetchJournal
+from src.fetch_stats import FetchStatus
+from src.sharded_fetch import (
+    NCBICredentials,
+    load_credentials,
+    run_sharded_fetch,
+    shard_for,
+)
+
+
+def test_shard_for_is_stable_and_balanced():
+    """Test that IDs always map to the same shard and spread over all shards."""
+    ids = [str(i) for i in range(10000000, 10001000)]
+    shards = Counter(shard_for(pubmed_id, 3) for pubmed_id in ids)
+
+    assert [shard_for(pubmed_id, 3) for pubmed_id in ids[:10]] == [
+        shard_for(pubmed_id, 3) for pubmed_id in ids[:10]
+    ]
+    assert set(shards) == {0, 1, 2}
+    assert min(shards.values()) > 250
+
+
+def test_credentials_defaults():
+    """Test the default rate limits and that the key is masked in logs."""
+    keyed = NCBICredentials("me@example.org", api_key="abcdef123456")
+    keyless = NCBICredentials("me@example.org")
+
+    assert keyed.requests_per_second == 10
+    assert keyless.requests_per_second == 3
+    assert NCBICredentials("me@example.org", rate_limit=5).requests_per_second == 5
+    assert "abcdef" not in keyed.describe()
+    assert keyed.describe().endswith("(key ...3456)")
+
+
+def test_load_credentials(tmp_path):
+    """Test loading credentials from a JSON list."""
+    path = tmp_path / "credentials.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"email": "a@example.org", "api_key": "key1", "tool": "tool-a"},
+                {"email": "b@example.org", "rate_limit": 2},
+            ]
+        )
+    )
+    credentials = load_credentials(path)
+
+    assert credentials[0].tool == "tool-a"
+    assert credentials[1].requests_per_second == 2
+
+    path.write_text("[]")
+    with pytest.raises(ValueError):
+        load_credentials(path)
+
+
+def test_run_sharded_fetch(tmp_path):
+    """Test a fetch split over two worker processes against the simulator."""
+    corpus = synthetic_corpus(40, first_id=2000)
+    urls = {f"http://www.ncbi.nlm.nih.gov/pubmed/{pubmed_id}" for pubmed_id in corpus}
+    credentials = [
+        NCBICredentials("a@example.org", api_key="key-a", rate_limit=100),
+        NCBICredentials("b@example.org", api_key="key-b", rate_limit=100),
+    ]
+
+    with EUtilsSimulator(corpus, seed=0) as simulator:
+        summary = run_sharded_fetch(
+            urls,
+            credentials,
+            data_dir=str(tmp_path),
+            storage_format="segments",
+            client="httpx",
+            client_options={"ids_per_request": 5, "eutils_url": simulator.base_url},
+            fetcher_options={"ids_per_request": 5, "burst_size": 100},
+            log_level="WARNING",
+        )
+        resumed = run_sharded_fetch(
+            urls, credentials, data_dir=str(tmp_path), storage_format="segments"
+        )
+
+    assert summary["successful_fetches"] == len(corpus)
+    assert summary["failed_fetches"] == 0
+    assert sorted(shard["shard"] for shard in summary["shards"]) == [0, 1]
+    assert sum(shard["urls"] for shard in summary["shards"]) == len(corpus)
+    assert (tmp_path / "abstract_segments" / "index-shard0.idx").exists()
+    assert (tmp_path / "abstract_segments" / "index-shard1.idx").exists()
+    store = SegmentStore(tmp_path / "abstract_segments")
+    assert store.ids() == set(corpus)
+    store.close()
+    with FetchJournal(tmp_path / "fetch_journal.sqlite") as journal:
+        assert journal.ids_with_status(FetchStatus.FETCHED) == set(corpus)
+
+    # Nothing is left for the workers of a resumed fetch
+    assert resumed["already_downloaded"] == len(corpus)
+    assert resumed["shards"] == []
@@ -0,0 +1,160 @@
+"""Tests for the AIMD rate and concurrency controller."""
+
+import asyncio
+
+import pytest
+
+from src.utils.adaptive_controller import AIMDController
+
+
+@pytest.fixture
+def make_controller(make_token_bucket, manual_clock):
+    """Return a factory for controllers driven by the manual clock."""
+
+    def factory(rate: float = 10, **kwargs) -> AIMDController:
+        bucket = make_token_bucket(rate=rate)
+        defaults = {
+            "min_rate": 1,
+            "max_rate": 20,
+            "window_size": 10,
+            "clock": manual_clock.time,
+            "sleep": manual_clock.sleep,
+        }
+        return AIMDController(bucket, **{**defaults, **kwargs})
+
+    return factory
+
+
+def test_initial_limits_follow_rate_limiter(make_controller):
+    """Test that the starting rate and concurrency come from the limiter."""
+    controller = make_controller(rate=10)
+
+    assert controller.rate == 10
+    assert controller.concurrency == 10
+
+
+def test_additive_increase_after_healthy_window(make_controller):
+    """Test that a window of fast successes raises rate and concurrency."""
+    controller = make_controller(rate=10, rate_increase=0.5)
+
+    for _ in range(10):
+        controller.record_success(0.2)
+
+    assert controller.rate == pytest.approx(10.5)
+    assert controller.rate_limiter.rate == pytest.approx(10.5)
+    assert controller.concurrency == 11
+
+
+def test_slow_window_holds_rate(make_controller):
+    """Test that high latency prevents an increase."""
+    controller = make_controller(rate=10, latency_threshold=1.0)
+
+    for _ in range(10):
+        controller.record_success(3.0)
+
+    assert controller.rate == 10
+
+
+def test_errors_hold_rate(make_controller):
+    """Test that a high error rate prevents an increase."""
+    controller = make_controller(rate=10, error_rate_threshold=0.05)
+
+    for _ in range(8):
+        controller.record_success(0.1)
+    controller.record_error()
+    controller.record_error()
+
+    assert controller.rate == 10
+
+
+def test_multiplicative_decrease_on_throttle(make_controller):
+    """Test that a 429 halves rate and concurrency."""
+    controller = make_controller(rate=10)
+
+    controller.record_throttle()
+
+    assert controller.rate == 5
+    assert controller.rate_limiter.rate == 5
+    assert controller.concurrency == 5
+
+
+def test_decrease_respects_cooldown(make_controller, manual_clock):
+    """Test that errors from requests already in flight only count once."""
+    controller = make_controller(rate=16, decrease_cooldown=1.0)
+
+    for _ in range(5):
+        controller.record_throttle()
+    assert controller.rate == 8
+
+    manual_clock.now += 2
+    controller.record_timeout()
+    assert controller.rate == 4
+
+
+def test_rate_stays_within_bounds(make_controller, manual_clock):
+    """Test that the rate never leaves [min_rate, max_rate]."""
+    controller = make_controller(rate=10, min_rate=2, max_rate=11, rate_increase=5)
+
+    for _ in range(10):
+        controller.record_success(0.1)
+    assert controller.rate == 11
+
+    for _ in range(5):
+        manual_clock.now += 2
+        controller.record_throttle()
+    assert controller.rate == 2
+    assert controller.concurrency == 1
+
+
+def test_converges_near_tolerated_rate(make_controller, manual_clock):
+    """Test that the rate oscillates around the highest tolerated rate."""
+    controller = make_controller(rate=3, max_rate=50, rate_increase=1)
+    tolerated_rate = 12
+    rates = []
+
+    for _ in range(200):
+        manual_clock.now += 1
+        if controller.rate > tolerated_rate:
+            controller.record_throttle()
+        else:
+            for _ in range(10):
+                controller.record_success(0.1)
+        rates.append(controller.rate)
+
+    settled = rates[50:]
+    assert max(settled) <= tolerated_rate + 1
+    assert min(settled) >= tolerated_rate / 2
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_requests(make_controller, manual_clock):
+    """Test that a Retry-After delay pauses requests until it has passed."""
+    controller = make_controller(rate=10)
+
+    controller.record_throttle(retry_after=30)
+    waited = await controller.wait_for_backoff()
+
+    assert waited == 30
+    assert manual_clock.now == 30
+    assert await controller.wait_for_backoff() == 0
+
+
+@pytest.mark.asyncio
+async def test_slot_limits_concurrency(make_controller):
+    """Test that slot() admits at most `concurrency` holders at once."""
+    controller = make_controller(rate=2)
+    in_flight = 0
+    peak = 0
+
+    async def request():
+        nonlocal in_flight, peak
+        async with controller.slot():
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            in_flight -= 1
+
+    await asyncio.gather(*[request() for _ in range(10)])
+
+    assert peak == 2
@@ -0,0 +1,95 @@
+"""Tests for the metrics registry, endpoint and snapshots."""
+
+import json
+
+import httpx
+import pytest
+
+from src.utils.metrics import MetricsRegistry, MetricsServer, MetricsSnapshotWriter
+
+
+def test_render_prometheus():
+    """Test the text exposition of counters, gauges and histograms."""
+    registry = MetricsRegistry()
+    requests = registry.counter("fetcher_requests", "Requests by outcome")
+    requests.inc(outcome="success")
+    requests.inc(2, outcome="rate_limited")
+    registry.gauge("queue_depth", "Queued items").set_function(lambda: 7)
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3.0)
+
+    text = registry.render_prometheus()
+
+    assert "# TYPE fetcher_requests counter" in text
+    assert 'fetcher_requests_total{outcome="rate_limited"} 2' in text
+    assert 'fetcher_requests_total{outcome="success"} 1' in text
+    assert "queue_depth 7" in text
+    assert 'latency_seconds_bucket{le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{le="1"} 2' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in text
+    assert "latency_seconds_sum 3.55" in text
+    assert "latency_seconds_count 3" in text
+
+
+def test_registry_returns_existing_metric():
+    """Test that metrics are shared by name and cannot change type."""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "Requests")
+
+    assert registry.counter("requests", "Requests") is counter
+    with pytest.raises(ValueError):
+        registry.gauge("requests", "Requests")
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_gauge_inc_dec_and_snapshot():
+    """Test gauge updates and the JSON snapshot of all metric types."""
+    registry = MetricsRegistry()
+    in_flight = registry.gauge("in_flight", "In flight")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+    registry.counter("requests", "Requests").inc(outcome="error")
+    registry.histogram("backoff_seconds", "Backoff").observe(2.0)
+
+    metrics = registry.snapshot()["metrics"]
+
+    assert metrics["in_flight"] == 1
+    assert metrics["requests"] == {'{outcome="error"}': 1}
+    assert metrics["backoff_seconds"]["count"] == 1
+    assert metrics["backoff_seconds"]["mean"] == 2.0
+
+
+def test_metrics_server():
+    """Test that the endpoint serves the registry at /metrics only."""
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests").inc()
+    server = MetricsServer(registry)
+    server.start()
+    try:
+        response = httpx.get(server.url)
+        missing = httpx.get(server.url.replace("/metrics", "/other"))
+    finally:
+        server.stop()
+
+    assert response.status_code == 200
+    assert "requests_total 1" in response.text
+    assert missing.status_code == 404
+
+
+def test_snapshot_writer_writes_final_snapshot(tmp_path):
+    """Test that stopping the snapshot writer leaves an up-to-date snapshot."""
+    registry = MetricsRegistry()
+    counter = registry.counter("requests", "Requests")
+    path = tmp_path / "fetch_metrics.json"
+    writer = MetricsSnapshotWriter(registry, path, interval=60)
+    writer.start()
+    counter.inc(3)
+    writer.stop()
+
+    assert json.loads(path.read_text())["metrics"]["requests"] == 3
+    with pytest.raises(ValueError):
+        MetricsSnapshotWriter(registry, path, interval=0)
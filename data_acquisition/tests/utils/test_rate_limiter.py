@@ -0,0 +1,108 @@
+"""Tests for the asynchronous token bucket rate limiter."""
+
+import asyncio
+
+import pytest
+
+from src.utils.rate_limiter import AsyncTokenBucket
+
+
+@pytest.mark.asyncio
+async def test_first_acquire_does_not_wait(make_token_bucket, manual_clock):
+    """Test that a full bucket lets the first request through immediately."""
+    bucket = make_token_bucket(rate=10)
+
+    wait_time = await bucket.acquire()
+
+    assert wait_time == 0
+    assert manual_clock.now == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_acquires_are_spaced(make_token_bucket, manual_clock):
+    """Test that concurrent callers are spaced at the configured rate."""
+    bucket = make_token_bucket(rate=10)
+
+    await asyncio.gather(*[bucket.acquire() for _ in range(100)])
+
+    # The first token is free, the remaining 99 arrive every 0.1 seconds
+    assert manual_clock.now == pytest.approx(9.9)
+    assert bucket.acquired == 100
+
+
+@pytest.mark.asyncio
+async def test_burst_allows_back_to_back_requests(make_token_bucket, manual_clock):
+    """Test that up to burst requests pass without waiting."""
+    bucket = make_token_bucket(rate=10, burst=5)
+
+    waits = await asyncio.gather(*[bucket.acquire() for _ in range(20)])
+
+    assert sum(1 for wait in waits if wait == 0) == 5
+    assert manual_clock.now == pytest.approx(1.5)
+
+
+@pytest.mark.asyncio
+async def test_achieved_rate_with_long_lived_workers(make_token_bucket, manual_clock):
+    """Test the achieved rate when many workers acquire repeatedly."""
+    bucket = make_token_bucket(rate=10, burst=1)
+    request_times = []
+
+    async def worker():
+        for _ in range(20):
+            await bucket.acquire()
+            request_times.append(manual_clock.now)
+
+    await asyncio.gather(*[worker() for _ in range(25)])
+
+    assert len(request_times) == 500
+    achieved_rate = (len(request_times) - 1) / (max(request_times) - min(request_times))
+    assert achieved_rate == pytest.approx(10, rel=0.01)
+
+
+@pytest.mark.asyncio
+async def test_tokens_refill_while_idle(make_token_bucket, manual_clock):
+    """Test that idle time refills tokens up to the burst size."""
+    bucket = make_token_bucket(rate=2, burst=3)
+    await asyncio.gather(*[bucket.acquire() for _ in range(3)])
+
+    manual_clock.now += 100
+
+    waits = await asyncio.gather(*[bucket.acquire() for _ in range(4)])
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_set_rate(make_token_bucket, manual_clock):
+    """Test that changing the rate changes the spacing of later requests."""
+    bucket = make_token_bucket(rate=10)
+    await bucket.acquire()
+
+    bucket.set_rate(2)
+    wait_time = await bucket.acquire()
+
+    assert wait_time == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_acquire_returns_token(make_token_bucket, manual_clock):
+    """Test that a cancelled waiter gives its reserved token back."""
+    bucket = make_token_bucket(rate=1)
+    await bucket.acquire()
+
+    task = asyncio.create_task(bucket.acquire())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    # Only the original debt remains, so the next caller waits one interval
+    assert await bucket.acquire() == pytest.approx(1.0)
+
+
+def test_invalid_arguments():
+    """Test that invalid rates and burst sizes are rejected."""
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        AsyncTokenBucket(rate=10, burst=0)
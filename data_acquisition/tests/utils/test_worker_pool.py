@@ -0,0 +1,122 @@
+"""Tests for the queue-fed worker pool."""
+
+import asyncio
+
+import pytest
+
+from src.utils.worker_pool import run_worker_pool
+
+
+@pytest.mark.asyncio
+async def test_processes_every_item_once():
+    """Test that each item is processed once and reported to on_complete."""
+    completed = []
+
+    async def double(item: int) -> int:
+        await asyncio.sleep(0)
+        return item * 2
+
+    await run_worker_pool(
+        range(20),
+        double,
+        num_workers=3,
+        on_complete=lambda item, result: completed.append((item, result)),
+    )
+
+    assert sorted(completed) == [(i, i * 2) for i in range(20)]
+
+
+@pytest.mark.asyncio
+async def test_limits_concurrency_to_num_workers():
+    """Test that no more than num_workers items are processed at once."""
+    in_flight = 0
+    peak = 0
+
+    async def work(item: int) -> None:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+
+    await run_worker_pool(range(50), work, num_workers=4)
+
+    assert peak == 4
+
+
+@pytest.mark.asyncio
+async def test_slow_item_does_not_block_others():
+    """Test that other workers keep going while one item is stuck."""
+    release = asyncio.Event()
+    completed = []
+
+    async def work(item: int) -> int:
+        if item == 0:
+            await release.wait()
+        return item
+
+    def on_complete(item: int, result: int) -> None:
+        completed.append(item)
+        if len(completed) == 9:
+            release.set()
+
+    await asyncio.wait_for(
+        run_worker_pool(range(10), work, num_workers=2, on_complete=on_complete),
+        timeout=1,
+    )
+
+    # Everything else finished before the stuck item was released
+    assert completed[-1] == 0
+
+
+@pytest.mark.asyncio
+async def test_items_are_consumed_lazily():
+    """Test that the producer runs at most max_pending items ahead."""
+    produced = 0
+    max_ahead = 0
+    processed = 0
+
+    def items():
+        nonlocal produced
+        for i in range(30):
+            produced += 1
+            yield i
+
+    async def work(item: int) -> None:
+        nonlocal processed, max_ahead
+        max_ahead = max(max_ahead, produced - processed)
+        await asyncio.sleep(0)
+        processed += 1
+
+    await run_worker_pool(items(), work, num_workers=2, max_pending=3)
+
+    # In-flight items plus the queue plus the one the producer is holding
+    assert max_ahead <= 2 + 3 + 1
+
+
+@pytest.mark.asyncio
+async def test_worker_error_cancels_pool():
+    """Test that an exception stops the pool and is re-raised."""
+    started = []
+
+    async def work(item: int) -> None:
+        started.append(item)
+        if item == 3:
+            raise RuntimeError("boom")
+        await asyncio.sleep(0)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await run_worker_pool(range(100), work, num_workers=2)
+
+    assert len(started) < 100
+
+
+@pytest.mark.asyncio
+async def test_invalid_num_workers():
+    """Test that at least one worker is required."""
+
+    async def work(item: int) -> None:
+        pass
+
+    with pytest.raises(ValueError):
+        await run_worker_pool([1], work, num_workers=0)
@@ -2,6 +2,8 @@ import argparse
 import logging
 import os
 
+from bioasq_common.pmid_set import PMIDSet
+
 from src.corpus_processor import create_corpus
 from src.dataset_utils import (
     validate_dataset,
@@ -50,7 +52,17 @@ def main():
         help="Output directory for the processed dataset",
     )
 
+    parser.add_argument(
+        "--question_cache_dir",
+        default="data/question_cache",
+        help="Directory of the parsed question cache shared with data_acquisition "
+        "(use 'none' to parse the question files on every run)",
+    )
+
     args = parser.parse_args()
+    question_cache_dir = (
+        None if args.question_cache_dir.lower() == "none" else args.question_cache_dir
+    )
 
     # Ensure output directory exists
     os.makedirs(args.output_dir, exist_ok=True)
@@ -61,7 +73,8 @@ def main():
     # Process and create corpus
     corpus_path = os.path.join(args.output_dir, "data/corpus.jsonl")
     logger.info(f"Creating corpus from {args.abstracts_dir}")
-    corpus_count = create_corpus(args.abstracts_dir, corpus_path)
+    corpus_pmids = PMIDSet()
+    corpus_count = create_corpus(args.abstracts_dir, corpus_path, corpus_pmids)
 
     # Process and create question datasets
     dev_path = os.path.join(args.output_dir, "data/dev.jsonl")
@@ -69,10 +82,24 @@ def main():
     logger.info(
         f"Creating question datasets from {args.training_file} and {args.goldset_dir}"
     )
+    relevant_pmids = PMIDSet()
     dev_count, eval_count = create_question_datasets(
-        args.training_file, args.goldset_dir, dev_path, eval_path
+        args.training_file,
+        args.goldset_dir,
+        dev_path,
+        eval_path,
+        relevant_pmids,
+        question_cache_dir,
     )
 
+    # Relevant passages without an abstract cannot be retrieved
+    missing_pmids = relevant_pmids - corpus_pmids
+    if missing_pmids:
+        logger.warning(
+            f"{len(missing_pmids)} of {len(relevant_pmids)} relevant PubMed IDs "
+            "have no abstract in the corpus"
+        )
+
     # Validate dataset
     logger.info("Validating dataset")
     if validate_dataset(args.output_dir):
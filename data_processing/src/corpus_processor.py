@@ -1,8 +1,18 @@
+import itertools
 import json
 import logging
 import os
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
+
+from bioasq_common.compressed_abstracts import (
+    ZSTD_SUFFIX,
+    compressed_abstract_id,
+    is_compressed_abstract,
+    load_compressed_abstract,
+)
+from bioasq_common.pmid_set import PMIDSet
+from bioasq_common.segment_store import SegmentStoreReader, is_segment_store
 
 logger = logging.getLogger(__name__)
 
@@ -12,69 +22,117 @@ def process_abstract(file_path: Path) -> Optional[Dict[str, Any]]:
     Process a single PubMed abstract file and transform it into the desired format for the corpus.
 
     Args:
-        file_path: Path to the JSON file containing the abstract
+        file_path: Path to the JSON file (or zstd-compressed .json.zst file)
+            containing the abstract
 
     Returns:
         Dictionary with processed abstract data or None if processing fails
     """
     try:
+        if is_compressed_abstract(file_path):
+            return build_corpus_entry(
+                compressed_abstract_id(file_path), load_compressed_abstract(file_path)
+            )
+
         with open(file_path, "r", encoding="utf-8") as f:
             abstract_data = json.load(f)
 
         # Extract PubMed ID from filename
-        pubmed_id = file_path.stem
-
-        # Create URL
-        pubmed_url = f"http://www.ncbi.nlm.nih.gov/pubmed/{pubmed_id}"
-
-        # Create corpus entry
-        corpus_entry = {
-            "id": pubmed_id,
-            "title": abstract_data.get("title", ""),
-            "text": abstract_data.get("abstract", ""),
-            "url": pubmed_url,
-            "publication_date": abstract_data.get("publication_date", ""),
-            "journal": abstract_data.get("journal", ""),
-            "authors": abstract_data.get("authors", []),
-            "doi": abstract_data.get("doi"),
-            "keywords": abstract_data.get("keywords", []),
-            "mesh_terms": abstract_data.get("mesh_terms", []),
-        }
-
-        return corpus_entry
+        return build_corpus_entry(file_path.stem, abstract_data)
     except Exception as e:
         logger.error(f"Error processing abstract {file_path}: {e}")
         return None
 
 
-def create_corpus(abstracts_dir: str, output_path: str) -> int:
+def build_corpus_entry(pubmed_id: str, abstract_data: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Process all abstracts in the given directory and create the corpus JSONL file.
+    Transform the data of a single abstract into the corpus format.
 
     Args:
-        abstracts_dir: Directory containing abstract JSON files
-        output_path: Path to write the corpus JSONL file
+        pubmed_id: The PubMed ID of the abstract
+        abstract_data: Abstract data as saved by the data acquisition module
 
     Returns:
-        Number of abstracts processed
+        Dictionary with processed abstract data
     """
-    abstracts_dir_path = Path(abstracts_dir)
-    corpus_entries = []
-    count = 0
+    # Create URL
+    pubmed_url = f"http://www.ncbi.nlm.nih.gov/pubmed/{pubmed_id}"
+
+    # Create corpus entry
+    return {
+        "id": pubmed_id,
+        "title": abstract_data.get("title", ""),
+        "text": abstract_data.get("abstract", ""),
+        "url": pubmed_url,
+        "publication_date": abstract_data.get("publication_date", ""),
+        "journal": abstract_data.get("journal", ""),
+        "authors": abstract_data.get("authors", []),
+        "doi": abstract_data.get("doi"),
+        "keywords": abstract_data.get("keywords", []),
+        "mesh_terms": abstract_data.get("mesh_terms", []),
+    }
+
+
+def iter_corpus_entries(abstracts_dir: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the corpus entries of all abstracts in a directory.
 
-    # Process each JSON file in the abstracts directory
-    for abstract_file in abstracts_dir_path.glob("*.json"):
+    The directory can either hold one (optionally zstd-compressed) JSON file per
+    abstract or a packed segment store written by the data acquisition module,
+    which is read sequentially.
+
+    Args:
+        abstracts_dir: Directory containing the abstracts
+
+    Yields:
+        Corpus entries
+    """
+    if is_segment_store(abstracts_dir):
+        with SegmentStoreReader(abstracts_dir) as reader:
+            for pubmed_id, abstract_data in reader.iter_records():
+                yield build_corpus_entry(pubmed_id, abstract_data)
+        return
+
+    # Process each JSON file (plain or compressed) in the abstracts directory
+    abstract_files = itertools.chain(
+        abstracts_dir.glob("*.json"), abstracts_dir.glob(f"*{ZSTD_SUFFIX}")
+    )
+    for abstract_file in abstract_files:
         # Skip any empty or invalid files
         if abstract_file.stat().st_size == 0:
             continue
 
         corpus_entry = process_abstract(abstract_file)
         if corpus_entry:
-            corpus_entries.append(corpus_entry)
-            count += 1
+            yield corpus_entry
+
+
+def create_corpus(
+    abstracts_dir: str, output_path: str, pmids: Optional[PMIDSet] = None
+) -> int:
+    """
+    Process all abstracts in the given directory and create the corpus JSONL file.
+
+    Args:
+        abstracts_dir: Directory containing abstract JSON files or a segment store
+        output_path: Path to write the corpus JSONL file
+        pmids: Set that the PubMed IDs of the corpus are added to
+
+    Returns:
+        Number of abstracts processed
+    """
+    abstracts_dir_path = Path(abstracts_dir)
+    corpus_entries = []
+    count = 0
+
+    for corpus_entry in iter_corpus_entries(abstracts_dir_path):
+        corpus_entries.append(corpus_entry)
+        count += 1
+        if pmids is not None:
+            pmids.add(corpus_entry["id"])
 
         # Log progress every 1000 abstracts
-        if count % 1000 == 0 and count > 0:
+        if count % 1000 == 0:
             logger.info(f"Processed {count} abstracts...")
 
     # Write corpus to JSONL file
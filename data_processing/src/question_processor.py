@@ -5,8 +5,13 @@ import re
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from bioasq_common.pmid_set import PMIDSet
+from bioasq_common.question_cache import load_questions
+
 logger = logging.getLogger(__name__)
 
+PUBMED_ID_PATTERN = re.compile(r"pubmed/(\d+)")
+
 
 def extract_pubmed_id(url: str) -> Optional[str]:
     """
@@ -18,7 +23,7 @@ def extract_pubmed_id(url: str) -> Optional[str]:
     Returns:
         PubMed ID or None if extraction fails
     """
-    match = re.search(r"pubmed/(\d+)", url)
+    match = PUBMED_ID_PATTERN.search(url)
     if match:
         return match.group(1)
     return None
@@ -75,12 +80,16 @@ def process_question(question: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
 
-def process_question_file(file_path: str) -> List[Dict[str, Any]]:
+def process_question_file(
+    file_path: str, cache_dir: Optional[str] = None
+) -> List[Dict[str, Any]]:
     """
     Process a BioASQ question file and extract all questions.
 
     Args:
         file_path: Path to the question file
+        cache_dir: Directory of the question cache shared with data_acquisition,
+            or None to parse the file
 
     Returns:
         List of processed questions
@@ -88,10 +97,7 @@ def process_question_file(file_path: str) -> List[Dict[str, Any]]:
     processed_questions = []
 
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        for question in data.get("questions", []):
+        for question in load_questions(file_path, cache_dir):
             processed_question = process_question(question)
             if processed_question:
                 processed_questions.append(processed_question)
@@ -102,7 +108,12 @@ def process_question_file(file_path: str) -> List[Dict[str, Any]]:
 
 
 def create_question_datasets(
-    training_file: str, goldset_dir: str, dev_output_path: str, eval_output_path: str
+    training_file: str,
+    goldset_dir: str,
+    dev_output_path: str,
+    eval_output_path: str,
+    pmids: Optional[PMIDSet] = None,
+    cache_dir: Optional[str] = None,
 ) -> tuple:
     """
     Process BioASQ questions and create dev and test datasets.
@@ -112,19 +123,28 @@ def create_question_datasets(
         goldset_dir: Directory containing goldset files
         dev_output_path: Path to write the dev JSONL file
         eval_output_path: Path to write the eval JSONL file
+        pmids: Set that the relevant PubMed IDs of all questions are added to
+        cache_dir: Directory of the question cache, or None to parse the files
 
     Returns:
         Tuple with the number of dev and test questions processed
     """
     # Use training file for dev dataset
-    dev_questions = process_question_file(training_file)
+    dev_questions = process_question_file(training_file, cache_dir)
 
     # Use goldset files for test dataset
     eval_questions = []
     goldset_dir_path = Path(goldset_dir)
 
     for goldset_file in goldset_dir_path.glob("*.json"):
-        eval_questions.extend(process_question_file(str(goldset_file)))
+        eval_questions.extend(process_question_file(str(goldset_file), cache_dir))
+
+    if pmids is not None:
+        pmids.update(
+            pubmed_id
+            for question in dev_questions + eval_questions
+            for pubmed_id in question["relevant_passage_ids"]
+        )
 
     # Write dev questions to JSONL file
     os.makedirs(os.path.dirname(dev_output_path), exist_ok=True)
@@ -3,6 +3,11 @@ import os
 import tempfile
 
 import pytest
+from bioasq_common.compressed_abstracts import (
+    ZSTD_DICTIONARY_NAME,
+    encode_compressed_record,
+)
+from bioasq_common.segment_store import INDEX_ENTRY, encode_segment_record
 
 
 @pytest.fixture
@@ -56,6 +61,61 @@ def sample_abstracts_dir(tmp_path, sample_abstract_data):
     return abstract_dir
 
 
+@pytest.fixture
+def sample_segment_store_dir(tmp_path, sample_abstract_data):
+    """Fixture creating a temporary segment store with multiple abstracts."""
+    store_dir = tmp_path / "abstract_segments"
+    store_dir.mkdir()
+
+    # Write the records and index entries the way data_acquisition's SegmentStore does
+    pmids = ["12345678", "23456789", "34567890"]
+    segment = b""
+    index = b""
+    for i, pmid in enumerate(pmids):
+        abstract = sample_abstract_data.copy()
+        abstract["id"] = pmid
+        abstract["title"] = f"Test Abstract {i + 1}"
+
+        record = encode_segment_record(abstract)
+        index += INDEX_ENTRY.pack(int(pmid), 1, len(segment), len(record))
+        segment += record
+
+    (store_dir / "segment-main-000001.seg").write_bytes(segment)
+    # A trailing entry cut short by a crash must be ignored
+    (store_dir / "index-main.idx").write_bytes(index + b"\x01\x02")
+
+    return store_dir
+
+
+@pytest.fixture
+def sample_compressed_abstracts_dir(tmp_path, sample_abstract_data):
+    """Fixture creating a temporary directory of zstd-compressed abstracts."""
+    zstandard = pytest.importorskip("zstandard")
+    abstract_dir = tmp_path / "abstracts_zstd"
+    abstract_dir.mkdir()
+
+    # Train a dictionary the way data_acquisition's ZstdFileStore does
+    records = {}
+    for i in range(300):
+        pmid = str(10000000 + i)
+        abstract = sample_abstract_data.copy()
+        abstract["id"] = pmid
+        abstract["title"] = f"Test Abstract {i + 1} on topic {i % 7}"
+        abstract["publication_date"] = f"20{i % 25:02d} Jan {i % 28 + 1:02d}"
+        records[pmid] = encode_compressed_record(abstract)
+    dictionary = zstandard.train_dictionary(16384, list(records.values()))
+    (abstract_dir / ZSTD_DICTIONARY_NAME).write_bytes(dictionary.as_bytes())
+
+    # The first record is compressed without the dictionary
+    plain = zstandard.ZstdCompressor()
+    with_dictionary = zstandard.ZstdCompressor(dict_data=dictionary)
+    for i, (pmid, record) in enumerate(records.items()):
+        compressor = plain if i == 0 else with_dictionary
+        (abstract_dir / f"{pmid}.json.zst").write_bytes(compressor.compress(record))
+
+    return abstract_dir
+
+
 @pytest.fixture
 def sample_question_data():
     """Fixture providing sample question data for testing."""
@@ -86,3 +86,46 @@ def test_create_corpus_with_empty_dir(tmp_path, temp_output_dir):
     with open(output_path, "r", encoding="utf-8") as f:
         lines = f.readlines()
         assert len(lines) == 0
+
+
+def test_create_corpus_from_segment_store(sample_segment_store_dir, temp_output_dir):
+    """Test that a corpus is created correctly from a segment store."""
+    output_path = os.path.join(temp_output_dir, "data/segment_corpus.jsonl")
+
+    # Create the corpus
+    count = create_corpus(str(sample_segment_store_dir), output_path)
+
+    # Check that all abstracts were read in storage order
+    assert count == 3
+    with open(output_path, "r", encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["id"] for entry in entries] == ["12345678", "23456789", "34567890"]
+    assert entries[1]["title"] == "Test Abstract 2"
+    assert entries[1]["url"] == "http://www.ncbi.nlm.nih.gov/pubmed/23456789"
+
+
+def test_process_compressed_abstract(sample_compressed_abstracts_dir):
+    """Test that zstd-compressed abstracts are read with and without a dictionary."""
+    plain = process_abstract(sample_compressed_abstracts_dir / "10000000.json.zst")
+    with_dictionary = process_abstract(
+        sample_compressed_abstracts_dir / "10000042.json.zst"
+    )
+
+    assert plain is not None
+    assert plain["id"] == "10000000"
+    assert plain["title"] == "Test Abstract 1 on topic 0"
+    assert with_dictionary is not None
+    assert with_dictionary["id"] == "10000042"
+    assert with_dictionary["title"] == "Test Abstract 43 on topic 0"
+    assert with_dictionary["url"] == "http://www.ncbi.nlm.nih.gov/pubmed/10000042"
+
+
+def test_create_corpus_from_compressed_abstracts(
+    sample_compressed_abstracts_dir, temp_output_dir
+):
+    """Test that a corpus is created from a directory of compressed abstracts."""
+    output_path = os.path.join(temp_output_dir, "data/compressed_corpus.jsonl")
+
+    count = create_corpus(str(sample_compressed_abstracts_dir), output_path)
+
+    assert count == 300
@@ -1,6 +1,10 @@
 import json
 import os
 
+from bioasq_common.pmid_set import PMIDSet
+from bioasq_common.question_cache import ENTRY_SUFFIX
+
+from src.corpus_processor import create_corpus
 from src.question_processor import (
     create_question_datasets,
     extract_pubmed_id,
@@ -65,6 +69,19 @@ def test_process_question_file(sample_questions_file):
     assert "test_question_id_2" in question_ids
 
 
+def test_process_question_file_with_cache(sample_questions_file, tmp_path):
+    """Test that cached questions are processed like freshly parsed ones."""
+    cache_dir = tmp_path / "question_cache"
+
+    parsed = process_question_file(str(sample_questions_file))
+    first = process_question_file(str(sample_questions_file), str(cache_dir))
+    second = process_question_file(str(sample_questions_file), str(cache_dir))
+
+    assert first == parsed
+    assert second == parsed
+    assert len(list(cache_dir.glob(f"*{ENTRY_SUFFIX}"))) == 1
+
+
 def test_process_question_file_with_invalid_file(tmp_path):
     """Test that processing an invalid question file returns an empty list."""
     # Create an invalid file
@@ -124,3 +141,27 @@ def test_create_question_datasets(
             assert "answer" in question
             assert "relevant_passage_ids" in question
             assert question["question_id"].startswith("goldset_question_")
+
+
+def test_create_question_datasets_collects_pmids(
+    sample_questions_file, sample_goldset_dir, sample_abstracts_dir, temp_output_dir
+):
+    """Test that the relevant PubMed IDs are collected for the coverage check."""
+    relevant = PMIDSet()
+    create_question_datasets(
+        str(sample_questions_file),
+        str(sample_goldset_dir),
+        os.path.join(temp_output_dir, "data/dev.jsonl"),
+        os.path.join(temp_output_dir, "data/test.jsonl"),
+        relevant,
+    )
+    corpus = PMIDSet()
+    create_corpus(
+        str(sample_abstracts_dir),
+        os.path.join(temp_output_dir, "data/corpus.jsonl"),
+        corpus,
+    )
+
+    assert list(relevant) == [12345678, 23456789]
+    assert list(corpus) == [12345678, 23456789, 34567890]
+    assert not relevant - corpus